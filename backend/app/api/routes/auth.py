@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from typing import Any, Optional
@@ -7,18 +9,19 @@ from datetime import timedelta, datetime
 from jose import JWTError, jwt
 import logging
 
-from ...database import get_db
+from ...database import get_db, get_async_db
 from ...models.user import User
 from ...schemas.token import Token
 from ...schemas.user import UserCreate, UserResponse
 from ...utils.security import (
     create_access_token, 
-    verify_password, 
-    get_password_hash,
+    verify_and_update_password, 
+    get_password_hash_async,
     SECRET_KEY,
     ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from ...utils.principal_cache import load_principal
 
 # Configurar logging
 logger = logging.getLogger("app.auth")
@@ -28,7 +31,7 @@ router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 @router.post("/refresh", response_model=Token)
-async def refresh_access_token(request: Request, db: Session = Depends(get_db)):
+async def refresh_access_token(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Recibe un refresh token y retorna un nuevo access token si es válido.
     """
@@ -41,7 +44,7 @@ async def refresh_access_token(request: Request, db: Session = Depends(get_db)):
         user_id = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Refresh token inválido")
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.scalar(select(User).where(User.id == user_id))
         if not user or not user.is_active:
             raise HTTPException(status_code=401, detail="Usuario no válido o inactivo")
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -69,7 +72,10 @@ def login_access_token(
         (User.email == username) | (User.username == username)
     ).first()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = verify_and_update_password(form_data.password, user.hashed_password)
+    if not valid:
         logger.warning(f"Failed login attempt for: {username}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -77,6 +83,12 @@ def login_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # El hash se generó con otros parámetros (p. ej. BCRYPT_ROUNDS): se actualiza
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+        logger.info(f"Password hash upgraded for user ID: {user.id}")
+    
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(user.id, expires_delta=access_token_expires)
     
@@ -99,7 +111,7 @@ def login_access_token(
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register_user(
     request: Request,
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     user_in: UserCreate = None
 ) -> Any:
     """
@@ -109,14 +121,6 @@ async def register_user(
     client_host = request.client.host
     logger.info(f"Registration attempt from IP: {client_host}")
     
-    # Capturar el cuerpo de la solicitud para debugging
-    try:
-        body = await request.json()
-        logger.info(f"Registration request data: {body}")
-    except Exception:
-        # Si no podemos leer el cuerpo como JSON, continuamos de todas formas
-        logger.warning("Could not read request body as JSON")
-    
     # Si user_in es None, algo salió mal con la validación de Pydantic
     if user_in is None:
         logger.error("Invalid user data format in registration request")
@@ -128,12 +132,9 @@ async def register_user(
     # Normalizar email
     email = user_in.email.lower().strip()
 
-    # Log de los datos recibidos (sin la contraseña)
-    safe_log_data = {k: v for k, v in user_in.dict().items() if k != 'password'}
-    logger.info(f"Processing registration for: {safe_log_data}")
 
     # Verificar si el email ya existe
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
     if user:
         logger.warning(f"Registration failed: Email already exists: {email}")
         raise HTTPException(
@@ -150,12 +151,12 @@ async def register_user(
 
         # Verificar si ya existe y añadir número si es necesario
         count = 1
-        while db.query(User).filter(User.username == username).first():
+        while await db.scalar(select(User.id).where(User.username == username)):
             username = f"{base_username}{count}"
             count += 1
     else:
         # Verificar si el username ya existe
-        if db.query(User).filter(User.username == username).first():
+        if await db.scalar(select(User.id).where(User.username == username)):
             logger.warning(f"Registration failed: Username already exists: {username}")
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -175,7 +176,7 @@ async def register_user(
         username=username,
         email=email,
         full_name=user_in.full_name,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await get_password_hash_async(user_in.password),
         is_admin=False,
         is_active=True,  # Usuario activo por defecto
         created_at=datetime.utcnow(),
@@ -185,18 +186,18 @@ async def register_user(
     # Guardar en la base de datos con manejo de errores
     db.add(db_user)
     try:
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         logger.info(f"User registered successfully: {username} (ID: {db_user.id})")
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"IntegrityError during registration: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="No se pudo crear el usuario. El nombre de usuario o correo ya existe.",
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Unexpected error during user registration: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -224,7 +225,7 @@ router = APIRouter()
 # ...existing code...
 
 @router.post("/refresh", response_model=Token)
-async def refresh_access_token(request: Request, db: Session = Depends(get_db)):
+async def refresh_access_token(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Recibe un refresh token y retorna un nuevo access token si es válido.
     """
@@ -237,7 +238,7 @@ async def refresh_access_token(request: Request, db: Session = Depends(get_db)):
         user_id = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Refresh token inválido")
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.scalar(select(User).where(User.id == user_id))
         if not user or not user.is_active:
             raise HTTPException(status_code=401, detail="Usuario no válido o inactivo")
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -248,6 +249,8 @@ async def refresh_access_token(request: Request, db: Session = Depends(get_db)):
 #app/api/routes/auth.py
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from typing import Any, Optional
@@ -255,18 +258,19 @@ from datetime import timedelta, datetime
 from jose import JWTError, jwt
 import logging
 
-from ...database import get_db
+from ...database import get_db, get_async_db
 from ...models.user import User
 from ...schemas.token import Token
 from ...schemas.user import UserCreate, UserResponse
 from ...utils.security import (
     create_access_token, 
-    verify_password, 
-    get_password_hash,
+    verify_and_update_password, 
+    get_password_hash_async,
     SECRET_KEY,
     ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from ...utils.principal_cache import load_principal
 
 # Configurar logging
 logger = logging.getLogger("app.auth")
@@ -292,7 +296,7 @@ def get_current_user(
         logger.warning(f"JWT validation error: {str(e)}")
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = load_principal(db, user_id, token)
     if user is None:
         logger.warning(f"User with ID {user_id} not found in database")
         raise credentials_exception
@@ -324,7 +328,10 @@ def login_access_token(
         (User.email == username) | (User.username == username)
     ).first()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = verify_and_update_password(form_data.password, user.hashed_password)
+    if not valid:
         logger.warning(f"Failed login attempt for: {username}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -332,6 +339,12 @@ def login_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # El hash se generó con otros parámetros (p. ej. BCRYPT_ROUNDS): se actualiza
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+        logger.info(f"Password hash upgraded for user ID: {user.id}")
+    
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(user.id, expires_delta=access_token_expires)
     
@@ -354,7 +367,7 @@ def login_access_token(
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register_user(
     request: Request,
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     user_in: UserCreate = None
 ) -> Any:
     """
@@ -364,14 +377,6 @@ async def register_user(
     client_host = request.client.host
     logger.info(f"Registration attempt from IP: {client_host}")
     
-    # Capturar el cuerpo de la solicitud para debugging
-    try:
-        body = await request.json()
-        logger.info(f"Registration request data: {body}")
-    except Exception:
-        # Si no podemos leer el cuerpo como JSON, continuamos de todas formas
-        logger.warning("Could not read request body as JSON")
-    
     # Si user_in es None, algo salió mal con la validación de Pydantic
     if user_in is None:
         logger.error("Invalid user data format in registration request")
@@ -383,12 +388,9 @@ async def register_user(
     # Normalizar email
     email = user_in.email.lower().strip()
     
-    # Log de los datos recibidos (sin la contraseña)
-    safe_log_data = {k: v for k, v in user_in.dict().items() if k != 'password'}
-    logger.info(f"Processing registration for: {safe_log_data}")
     
     # Verificar si el email ya existe
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
     if user:
         logger.warning(f"Registration failed: Email already exists: {email}")
         raise HTTPException(
@@ -405,12 +407,12 @@ async def register_user(
         
         # Verificar si ya existe y añadir número si es necesario
         count = 1
-        while db.query(User).filter(User.username == username).first():
+        while await db.scalar(select(User.id).where(User.username == username)):
             username = f"{base_username}{count}"
             count += 1
     else:
         # Verificar si el username ya existe
-        if db.query(User).filter(User.username == username).first():
+        if await db.scalar(select(User.id).where(User.username == username)):
             logger.warning(f"Registration failed: Username already exists: {username}")
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -430,7 +432,7 @@ async def register_user(
         username=username,
         email=email,
         full_name=user_in.full_name,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await get_password_hash_async(user_in.password),
         is_admin=False,
         is_active=True,  # Usuario activo por defecto
         created_at=datetime.utcnow(),
@@ -440,18 +442,18 @@ async def register_user(
     # Guardar en la base de datos con manejo de errores
     db.add(db_user)
     try:
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         logger.info(f"User registered successfully: {username} (ID: {db_user.id})")
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"IntegrityError during registration: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="No se pudo crear el usuario. El nombre de usuario o correo ya existe.",
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Unexpected error during user registration: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,88 +1,111 @@
 # app/api/routes/backups.py
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-import subprocess
-import os
-import datetime
-from typing import Any  # Añadida importación de Any
+from typing import Any, List, Literal, Optional
 from ...database import get_db
 from ...api.routes.auth import get_current_active_user
-from ...config import settings
+from ...models.backup_job import BackupJob
+from ...schemas.backup import BackupJobStatus
+from ...services.backups import BackupInProgress, expire_stale_backup, prune_backups, submit_backup, verify_backup
+from ...utils.responses import json_response
 
 router = APIRouter()
 
-def create_database_backup(filename: str):
+def get_current_admin_user(current_user: Any = Depends(get_current_active_user)) -> Any:
+    """Los respaldos solo los gestionan administradores."""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=403,
+            detail="Only administrators can manage backups"
+        )
+    return current_user
+
+def _backup_content(job: BackupJob) -> dict:
+    content = {
+        field: getattr(job, field)
+        for field in BackupJobStatus.model_fields
+        if hasattr(job, field)
+    }
+    content["status_url"] = f"/api/backups/{job.id}"
+    return content
+
+def _backup_response(job: BackupJob, status_code: int = 200) -> Response:
+    return json_response(BackupJobStatus, _backup_content(job), status_code=status_code)
+
+def _get_backup(db: Session, backup_id: str) -> BackupJob:
+    job = db.get(BackupJob, backup_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Backup not found")
+    return job
+
+@router.post("/database-backup", response_model=BackupJobStatus, status_code=202)
+def create_backup(
+    current_user: Any = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+) -> Any:
     """
-    Crea un respaldo de la base de datos usando pg_dump.
-    Esta función asume que tienes PostgreSQL instalado.
+    Inicia un respaldo de la base de datos (solo administradores). El respaldo
+    se genera en segundo plano; su estado, tamaño y duración se consultan en
+    `status_url`.
     """
     try:
-        # Extraer datos de conexión desde DATABASE_URL
-        db_url = str(settings.DATABASE_URL)
-        db_parts = db_url.replace("postgresql://", "").split("/")
-        auth_parts = db_parts[0].split("@")
-        
-        user_pass = auth_parts[0].split(":")
-        username = user_pass[0]
-        password = user_pass[1] if len(user_pass) > 1 else ""
-        
-        host_port = auth_parts[1].split(":")
-        host = host_port[0]
-        port = host_port[1] if len(host_port) > 1 else "5432"
-        
-        db_name = db_parts[1]
-        
-        # Crear directorio de backups si no existe
-        backup_dir = "backups"
-        os.makedirs(backup_dir, exist_ok=True)
-        
-        # Ejecutar pg_dump
-        output_file = os.path.join(backup_dir, filename)
-        env = os.environ.copy()
-        env["PGPASSWORD"] = password
-        
-        subprocess.run([
-            "pg_dump",
-            "-h", host,
-            "-p", port,
-            "-U", username,
-            "-F", "c",  # Custom format (compressed)
-            "-b",       # Include large objects
-            "-v",       # Verbose
-            "-f", output_file,
-            db_name
-        ], env=env, check=True)
-        
-        return True
-    except Exception as e:
-        print(f"Error creating backup: {str(e)}")
-        return False
+        job = submit_backup(db, current_user.id)
+    except BackupInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return _backup_response(job, status_code=202)
 
-@router.post("/database-backup")
-async def create_backup(
-    background_tasks: BackgroundTasks,
-    current_user: Any = Depends(get_current_active_user),
+@router.get("/", response_model=List[BackupJobStatus])
+def list_backups(
+    status: Optional[Literal["queued", "running", "completed", "failed", "pruned"]] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: Any = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
-):
+) -> Any:
     """
-    Inicia un respaldo de la base de datos (solo administradores).
+    Respaldos registrados, del más reciente al más antiguo.
     """
-    # Verificar que el usuario es admin
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=403,
-            detail="Only administrators can create backups"
-        )
-    
-    # Generar nombre de archivo con marca de tiempo
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"backup_{timestamp}.dump"
-    
-    # Ejecutar el backup en segundo plano
-    background_tasks.add_task(create_database_backup, filename)
-    
-    return {
-        "message": "Backup process started",
-        "filename": filename,
-        "status": "processing"
-    }
\ No newline at end of file
+    query = db.query(BackupJob)
+    if status:
+        query = query.filter(BackupJob.status == status)
+    jobs = query.order_by(BackupJob.created_at.desc(), BackupJob.id.desc()).offset(skip).limit(limit).all()
+    return json_response(List[BackupJobStatus], [_backup_content(expire_stale_backup(db, job)) for job in jobs])
+
+@router.post("/prune", response_model=List[BackupJobStatus])
+def prune(
+    current_user: Any = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    Aplica la política de retención ahora y devuelve los respaldos borrados.
+    """
+    return json_response(List[BackupJobStatus], [_backup_content(job) for job in prune_backups(db)])
+
+@router.get("/{backup_id}", response_model=BackupJobStatus)
+def get_backup(
+    backup_id: str,
+    current_user: Any = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    Estado de un respaldo: tamaño, duración, checksum y última verificación.
+    """
+    return _backup_response(expire_stale_backup(db, _get_backup(db, backup_id)))
+
+@router.post("/{backup_id}/verify", response_model=BackupJobStatus)
+def verify(
+    backup_id: str,
+    current_user: Any = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    Vuelve a verificar un respaldo completo (checksum y lectura del archivo).
+    Si no pasa la verificación queda como `failed` con el motivo en `error`.
+    """
+    try:
+        job = verify_backup(db, _get_backup(db, backup_id))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _backup_response(job)
@@ -56,7 +56,7 @@ def update_category(
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     
-    update_data = category_in.dict(exclude_unset=True)
+    update_data = category_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(category, field, value)
     
@@ -1,28 +1,37 @@
 from typing import List, Any, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from ...database import get_db
-from ...models.customer import Customer
-from ...schemas.customer import CustomerCreate, CustomerUpdate, Customer as CustomerSchema
+from ...database import get_db, get_read_db
+from ...models.customer import Customer, CustomerStats
+from ...schemas.customer import CustomerCreate, CustomerUpdate, Customer as CustomerSchema, CustomerStats as CustomerStatsSchema
+from ...services.customer_stats import RFM_SEGMENTS, get_customer_stats
 from ...api.routes.auth import get_current_active_user
+from ...utils.responses import json_response
 
 router = APIRouter()
 
 @router.get("/", response_model=List[CustomerSchema])
 def read_customers(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None,
     is_active: Optional[bool] = None,
+    segment: Optional[str] = Query(None, enum=list(RFM_SEGMENTS)),
     current_user: Any = Depends(get_current_active_user),
 ) -> Any:
     """
-    Retrieve customers.
+    Retrieve customers. With `segment`, only the customers of that RFM
+    segment, highest lifetime spend first.
     """
     query = db.query(Customer)
     
+    if segment:
+        query = query.join(CustomerStats, CustomerStats.customer_id == Customer.id).filter(
+            CustomerStats.segment == segment
+        ).order_by(CustomerStats.total_spent.desc())
+    
     if is_active is not None:
         query = query.filter(Customer.is_active == is_active)
     
@@ -35,7 +44,7 @@ def read_customers(
         )
     
     customers = query.offset(skip).limit(limit).all()
-    return customers
+    return json_response(List[CustomerSchema], customers)
 
 @router.post("/", response_model=CustomerSchema)
 def create_customer(
@@ -56,7 +65,7 @@ def create_customer(
                 detail="A customer with this email already exists.",
             )
     
-    customer = Customer(**customer_in.dict())
+    customer = Customer(**customer_in.model_dump())
     db.add(customer)
     db.commit()
     db.refresh(customer)
@@ -86,7 +95,7 @@ def update_customer(
                 detail="A customer with this email already exists.",
             )
     
-    update_data = customer_in.dict(exclude_unset=True)
+    update_data = customer_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(customer, field, value)
     
@@ -110,6 +119,21 @@ def read_customer(
         raise HTTPException(status_code=404, detail="Customer not found")
     return customer
 
+@router.get("/{id}/stats", response_model=CustomerStatsSchema)
+def read_customer_stats(
+    *,
+    db: Session = Depends(get_read_db),
+    id: int,
+    current_user: Any = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get a customer's purchase summary and RFM segment.
+    """
+    stats = get_customer_stats(db, id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return stats
+
 @router.delete("/{id}", response_model=CustomerSchema)
 def delete_customer(
     *,
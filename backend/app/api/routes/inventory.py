@@ -1,16 +1,25 @@
-from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import List, Any, Optional
+import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.orm import Session, joinedload
 
-from ...database import get_db
+from ...database import get_db, get_read_db
 from ...models.inventory import InventoryMovement
 from ...models.product import Product
 from ...schemas.inventory import (
     InventoryMovementCreate,
     InventoryMovement as InventoryMovementSchema,
-    InventoryMovementWithProduct
+    InventoryMovementWithProduct,
+    MovementTypeEnum,
+    StockCountCreate,
+    StockCountResult,
+    StockAsOf
 )
 from ...api.routes.auth import get_current_active_user, get_current_user
+from ...services.costing import apply_movements
+from ...services.stock_snapshots import create_stock_snapshot, get_stock_as_of
+from ...utils.responses import json_response
 
 router = APIRouter()
 
@@ -31,7 +40,7 @@ def create_inventory_movement(
     
     # Crear el movimiento de inventario
     movement = InventoryMovement(
-        **movement_in.dict(),
+        **movement_in.model_dump(),
         created_by=current_user.id
     )
     db.add(movement)
@@ -40,13 +49,107 @@ def create_inventory_movement(
     product.stock_quantity += movement_in.quantity
     db.add(product)
     
+    # Reflejar el movimiento en las capas de costo
+    db.flush()
+    apply_movements(db, [movement])
+    
     db.commit()
     db.refresh(movement)
     return movement
 
+@router.post("/counts", response_model=StockCountResult)
+def create_stock_count(
+    *,
+    db: Session = Depends(get_db),
+    count_in: StockCountCreate,
+    current_user: Any = Depends(get_current_active_user),
+) -> Any:
+    """
+    Apply a physical stock count (cycle count) in a single transaction.
+
+    Current stock for every counted SKU is read in one query, the differences
+    are written as `adjustment` movements with one bulk insert and product
+    stock is updated with one set-based UPDATE.
+    """
+    counted = {}
+    for item in count_in.items:
+        if item.sku in counted:
+            raise HTTPException(status_code=400, detail=f"Duplicate SKU in count: {item.sku}")
+        counted[item.sku] = item.counted_quantity
+
+    # Leer el stock actual de todos los SKUs contados en una sola consulta
+    rows = db.execute(
+        select(Product.id, Product.sku, Product.stock_quantity, Product.cost_price)
+        .where(Product.sku.in_(counted.keys()))
+        .with_for_update()
+    ).all()
+
+    missing = set(counted) - {row.sku for row in rows}
+    if missing:
+        db.rollback()
+        raise HTTPException(
+            status_code=404,
+            detail=f"Products not found for SKUs: {', '.join(sorted(missing))}"
+        )
+
+    variances = []
+    for row in rows:
+        previous = row.stock_quantity or 0
+        delta = counted[row.sku] - previous
+        if delta == 0:
+            continue
+        variances.append({
+            "product_id": row.id,
+            "sku": row.sku,
+            "previous_quantity": previous,
+            "counted_quantity": counted[row.sku],
+            "variance": delta,
+            "variance_value": round(delta * (row.cost_price or 0.0), 2),
+        })
+
+    try:
+        if variances:
+            movements = db.scalars(
+                insert(InventoryMovement).returning(InventoryMovement),
+                [
+                    {
+                        "product_id": v["product_id"],
+                        "movement_type": MovementTypeEnum.ADJUSTMENT.value,
+                        "quantity": v["variance"],
+                        "notes": count_in.notes or "Stock count",
+                        "created_by": current_user.id,
+                    }
+                    for v in variances
+                ]
+            ).all()
+            deltas = {v["product_id"]: v["variance"] for v in variances}
+            db.execute(
+                update(Product)
+                .where(Product.id.in_(deltas.keys()))
+                .values(stock_quantity=Product.stock_quantity + case(deltas, value=Product.id, else_=0))
+                .execution_options(synchronize_session=False)
+            )
+            apply_movements(db, movements)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    variances.sort(key=lambda v: abs(v["variance_value"]), reverse=True)
+    return {
+        "total_items": len(counted),
+        "adjusted_items": len(variances),
+        "unchanged_items": len(counted) - len(variances),
+        "units_gained": sum(v["variance"] for v in variances if v["variance"] > 0),
+        "units_lost": -sum(v["variance"] for v in variances if v["variance"] < 0),
+        "net_variance": sum(v["variance"] for v in variances),
+        "net_variance_value": round(sum(v["variance_value"] for v in variances), 2),
+        "variances": variances,
+    }
+
 @router.get("/", response_model=List[InventoryMovementWithProduct])
 def read_inventory_movements(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     product_id: int = None,
@@ -56,7 +159,7 @@ def read_inventory_movements(
     """
     Retrieve inventory movements.
     """
-    query = db.query(InventoryMovement)
+    query = db.query(InventoryMovement).options(joinedload(InventoryMovement.product))
     
     if product_id:
         query = query.filter(InventoryMovement.product_id == product_id)
@@ -65,7 +168,41 @@ def read_inventory_movements(
         query = query.filter(InventoryMovement.movement_type == movement_type)
     
     movements = query.order_by(InventoryMovement.created_at.desc()).offset(skip).limit(limit).all()
-    return movements
+    return json_response(List[InventoryMovementWithProduct], movements)
+
+@router.get("/as-of", response_model=StockAsOf)
+def read_stock_as_of(
+    db: Session = Depends(get_read_db),
+    date: datetime.date = Query(..., description="Fecha de cierre a consultar (YYYY-MM-DD)"),
+    product_id: Optional[int] = None,
+    current_user: Any = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get closing stock per product on a past date.
+
+    Starts from the nearest daily snapshot and applies only the movements
+    between that snapshot and the requested date.
+    """
+    if date > datetime.date.today():
+        raise HTTPException(status_code=400, detail="Date cannot be in the future")
+    return get_stock_as_of(db, date, product_id)
+
+@router.post("/snapshots")
+def create_snapshot(
+    db: Session = Depends(get_db),
+    date: Optional[datetime.date] = None,
+    current_user: Any = Depends(get_current_active_user),
+) -> Any:
+    """
+    Create (or replace) the closing stock snapshot for a day (admins only).
+    Defaults to yesterday; the scheduler runs it every night.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Only administrators can create stock snapshots")
+    if date is None:
+        date = datetime.date.today() - datetime.timedelta(days=1)
+    products = create_stock_snapshot(db, date)
+    return {"snapshot_date": date, "products": products}
 
 @router.get("/{id}", response_model=InventoryMovementWithProduct)
 def read_inventory_movement(
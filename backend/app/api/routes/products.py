@@ -1,17 +1,18 @@
 from typing import List, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
-from ...database import get_db
+from ...database import get_db, get_read_db
 from ...models.product import Product
 from ...schemas.product import ProductCreate, ProductUpdate, Product as ProductSchema, ProductWithCategory
 from ...api.routes.auth import get_current_active_user
+from ...utils.responses import json_response
 
 router = APIRouter()
 
 @router.get("/", response_model=List[ProductWithCategory])
 def read_products(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     category_id: Optional[int] = None,
@@ -22,7 +23,7 @@ def read_products(
     """
     Retrieve products.
     """
-    query = db.query(Product)
+    query = db.query(Product).options(joinedload(Product.category))
     
     if category_id:
         query = query.filter(Product.category_id == category_id)
@@ -39,7 +40,7 @@ def read_products(
         )
     
     products = query.offset(skip).limit(limit).all()
-    return products
+    return json_response(List[ProductWithCategory], products)
 
 @router.post("/", response_model=ProductSchema)
 def create_product(
@@ -67,7 +68,7 @@ def create_product(
                 detail="A product with this barcode already exists.",
             )
     
-    product = Product(**product_in.dict())
+    product = Product(**product_in.model_dump())
     db.add(product)
     db.commit()
     db.refresh(product)
@@ -106,7 +107,7 @@ def update_product(
                 detail="A product with this barcode already exists.",
             )
     
-    update_data = product_in.dict(exclude_unset=True)
+    update_data = product_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(product, field, value)
     
@@ -154,7 +155,7 @@ def delete_product(
 
 @router.get("/low-stock/", response_model=List[ProductWithCategory])
 def read_low_stock_products(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: Any = Depends(get_current_active_user),
 ) -> Any:
     """
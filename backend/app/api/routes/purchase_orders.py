@@ -1,11 +1,12 @@
 ##backend/app/api/routes/purchase_orders.py
-from typing import List, Optional
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 
-from app.database import get_db
-from app.utils.security import get_current_user
+from app.database import get_async_db
+from app.utils.security import get_current_user_async
 from app.models.user import User
 from app.models.purchase_order import (
     PurchaseOrder, 
@@ -15,8 +16,13 @@ from app.models.purchase_order import (
 )
 from app.models.supplier import Supplier
 from app.models.product import Product
+from app.models.inventory import InventoryMovement
+from app.services.costing import apply_movements
+from app.utils.responses import json_response
+from app.utils.date_ranges import date_range_filter
 from app.schemas.purchase_order import (
     PurchaseOrder as PurchaseOrderSchema,
+    PurchaseOrderPage,
     PurchaseOrderCreate,
     PurchaseOrderUpdate,
     Receipt,
@@ -25,32 +31,130 @@ from app.schemas.purchase_order import (
 
 router = APIRouter()
 
+def _order_response(order: PurchaseOrder, supplier_name: Optional[str], items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "id": order.id,
+        "order_number": order.order_number,
+        "supplier_id": order.supplier_id,
+        "supplier_name": supplier_name,
+        "order_date": order.order_date,
+        "expected_delivery_date": order.expected_delivery_date,
+        "status": order.status,
+        "total_amount": order.total_amount,
+        "payment_terms": order.payment_terms,
+        "shipping_method": order.shipping_method,
+        "notes": order.notes,
+        "created_at": order.created_at,
+        "updated_at": order.updated_at,
+        "items": items
+    }
+
+async def _order_items(db: AsyncSession, order_ids: Iterable[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Items de varias órdenes en una sola consulta, agrupados por orden.
+    """
+    items: Dict[int, List[Dict[str, Any]]] = {order_id: [] for order_id in order_ids}
+    if not items:
+        return items
+    rows = await db.execute(
+        select(
+            purchase_order_items.c.purchase_order_id,
+            purchase_order_items.c.id,
+            purchase_order_items.c.product_id,
+            Product.name.label("product_name"),
+            purchase_order_items.c.quantity,
+            purchase_order_items.c.unit_price,
+            purchase_order_items.c.subtotal,
+            purchase_order_items.c.notes
+        ).join(
+            Product, purchase_order_items.c.product_id == Product.id
+        ).where(
+            purchase_order_items.c.purchase_order_id.in_(list(items))
+        ).order_by(purchase_order_items.c.id)
+    )
+    for item in rows:
+        items[item.purchase_order_id].append({
+            "id": item.id,
+            "product_id": item.product_id,
+            "product_name": item.product_name,
+            "quantity": item.quantity,
+            "unit_price": item.unit_price,
+            "subtotal": item.subtotal,
+            "notes": item.notes
+        })
+    return items
 
+async def _receipt_items(db: AsyncSession, receipt_ids: Iterable[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Items de varias recepciones en una sola consulta, agrupados por recepción.
+    """
+    items: Dict[int, List[Dict[str, Any]]] = {receipt_id: [] for receipt_id in receipt_ids}
+    if not items:
+        return items
+    rows = await db.execute(
+        select(
+            PurchaseOrderReceiptItem.receipt_id,
+            PurchaseOrderReceiptItem.id,
+            PurchaseOrderReceiptItem.product_id,
+            Product.name.label("product_name"),
+            PurchaseOrderReceiptItem.quantity_received,
+            PurchaseOrderReceiptItem.quantity_rejected,
+            PurchaseOrderReceiptItem.rejection_reason
+        ).join(
+            Product, PurchaseOrderReceiptItem.product_id == Product.id
+        ).where(
+            PurchaseOrderReceiptItem.receipt_id.in_(list(items))
+        ).order_by(PurchaseOrderReceiptItem.id)
+    )
+    for item in rows:
+        items[item.receipt_id].append({
+            "id": item.id,
+            "product_id": item.product_id,
+            "product_name": item.product_name,
+            "quantity_received": item.quantity_received,
+            "quantity_rejected": item.quantity_rejected,
+            "rejection_reason": item.rejection_reason
+        })
+    return items
+
+def _receipt_response(receipt: PurchaseOrderReceipt, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "id": receipt.id,
+        "purchase_order_id": receipt.purchase_order_id,
+        "receipt_date": receipt.receipt_date,
+        "received_by": receipt.received_by,
+        "status": receipt.status,
+        "notes": receipt.notes,
+        "items": items
+    }
+
+async def _supplier_name(db: AsyncSession, supplier_id: int) -> Optional[str]:
+    return await db.scalar(select(Supplier.name).where(Supplier.id == supplier_id))
 
 # Generar número de orden único
-def generate_order_number(db: Session):
-    # Obtener el año actual
-    current_year = func.extract('year', func.current_date())
+async def generate_order_number(db: AsyncSession):
+    # Obtener el año actual (según la base de datos)
+    current_year = int(await db.scalar(select(func.extract('year', func.current_date()))))
     
     # Contar cuántas órdenes hay este año
-    count = db.query(func.count(PurchaseOrder.id))\
-        .filter(func.extract('year', PurchaseOrder.order_date) == current_year)\
-        .scalar()
+    count = await db.scalar(
+        select(func.count(PurchaseOrder.id))
+        .where(func.extract('year', PurchaseOrder.order_date) == current_year)
+    )
     
     # Formatear como "PO-YYYY-XXXX"
-    year = func.extract('year', func.current_date()).scalar_subquery()
-    return f"PO-{year}-{(count + 1):04d}"
+    return f"PO-{current_year}-{(count + 1):04d}"
 
-@router.get("/", response_model=dict)
+@router.get("/", response_model=PurchaseOrderPage)
 async def get_purchase_orders(
     page: int = Query(1, ge=1, description="Número de página"),
     limit: int = Query(10, ge=1, le=100, description="Elementos por página"),
     supplier_id: Optional[int] = Query(None, description="Filtrar por proveedor"),
     status: Optional[str] = Query(None, description="Filtrar por estado"),
-    from_date: Optional[str] = Query(None, description="Fecha inicial (YYYY-MM-DD)"),
-    to_date: Optional[str] = Query(None, description="Fecha final (YYYY-MM-DD)"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    from_date: Optional[date] = Query(None, description="Fecha inicial (YYYY-MM-DD)"),
+    to_date: Optional[date] = Query(None, description="Fecha final, incluida completa (YYYY-MM-DD)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Obtener lista de órdenes de compra con paginación y filtros opcionales.
@@ -59,106 +163,70 @@ async def get_purchase_orders(
     skip = (page - 1) * limit
     
     # Construir la consulta base
-    query = db.query(PurchaseOrder).join(Supplier)
+    query = select(PurchaseOrder, Supplier.name.label("supplier_name")).join(Supplier)
     
     # Aplicar filtros si se proporcionaron
     if supplier_id:
-        query = query.filter(PurchaseOrder.supplier_id == supplier_id)
+        query = query.where(PurchaseOrder.supplier_id == supplier_id)
     if status:
-        query = query.filter(PurchaseOrder.status == status)
-    if from_date:
-        query = query.filter(PurchaseOrder.order_date >= from_date)
-    if to_date:
-        query = query.filter(PurchaseOrder.order_date <= to_date)
-    
-    # Ordenar por fecha de orden (más reciente primero)
-    query = query.order_by(PurchaseOrder.order_date.desc())
+        query = query.where(PurchaseOrder.status == status)
+    if from_date or to_date:
+        query = query.where(date_range_filter(PurchaseOrder.order_date, from_date, to_date))
     
     # Obtener el total de registros para la paginación
-    total = query.count()
-    
-    # Aplicar paginación
-    purchase_orders = query.offset(skip).limit(limit).all()
-    
-    # Enriquecer datos
-    result_orders = []
-    for order in purchase_orders:
-        order_data = {
-            "id": order.id,
-            "order_number": order.order_number,
-            "supplier_id": order.supplier_id,
-            "supplier_name": order.supplier.name if order.supplier else None,
-            "order_date": order.order_date,
-            "expected_delivery_date": order.expected_delivery_date,
-            "status": order.status,
-            "total_amount": order.total_amount,
-            "payment_terms": order.payment_terms,
-            "shipping_method": order.shipping_method,
-            "notes": order.notes,
-            "created_at": order.created_at,
-            "updated_at": order.updated_at,
-            "items": []
-        }
-        
-        # Obtener items de la orden
-        items_query = db.query(
-            purchase_order_items.c.id,
-            purchase_order_items.c.product_id,
-            Product.name.label("product_name"),
-            purchase_order_items.c.quantity,
-            purchase_order_items.c.unit_price,
-            purchase_order_items.c.subtotal,
-            purchase_order_items.c.notes
-        ).join(
-            Product, purchase_order_items.c.product_id == Product.id
-        ).filter(
-            purchase_order_items.c.purchase_order_id == order.id
-        )
-        
-        items = items_query.all()
-        for item in items:
-            order_data["items"].append({
-                "id": item.id,
-                "product_id": item.product_id,
-                "product_name": item.product_name,
-                "quantity": item.quantity,
-                "unit_price": item.unit_price,
-                "subtotal": item.subtotal,
-                "notes": item.notes
-            })
-        
-        result_orders.append(order_data)
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    
+    # Ordenar por fecha de orden (más reciente primero) y paginar
+    query = query.order_by(PurchaseOrder.order_date.desc()).offset(skip).limit(limit)
+    purchase_orders = (await db.execute(query)).all()
+    
+    # Enriquecer datos (items de todas las órdenes de la página en una consulta)
+    items = await _order_items(db, [order.id for order, _ in purchase_orders])
+    result_orders = [
+        _order_response(order, supplier_name, items[order.id])
+        for order, supplier_name in purchase_orders
+    ]
     
     # Calcular total de páginas
     pages = (total + limit - 1) // limit if total > 0 else 1
     
-    return {
+    return json_response(PurchaseOrderPage, {
         "items": result_orders,
         "total": total,
         "page": page,
         "limit": limit,
         "pages": pages
-    }
+    })
 
 @router.post("/", response_model=PurchaseOrderSchema, status_code=status.HTTP_201_CREATED)
 async def create_purchase_order(
     order: PurchaseOrderCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Crear una nueva orden de compra.
     """
     # Verificar que el proveedor existe
-    supplier = db.query(Supplier).filter(Supplier.id == order.supplier_id).first()
+    supplier = await db.get(Supplier, order.supplier_id)
     if not supplier:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Proveedor no encontrado"
         )
     
+    # Verificar que los productos existen
+    product_ids = {item.product_id for item in order.items}
+    found = set((await db.scalars(select(Product.id).where(Product.id.in_(product_ids)))).all())
+    for item in order.items:
+        if item.product_id not in found:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Producto con ID {item.product_id} no encontrado"
+            )
+    
     # Generar número de orden único
-    order_number = generate_order_number(db)
+    order_number = await generate_order_number(db)
     
     # Calcular total de la orden
     total_amount = 0
@@ -179,95 +247,43 @@ async def create_purchase_order(
     )
     
     db.add(db_order)
-    db.flush()  # Para obtener el ID asignado
+    await db.flush()  # Para obtener el ID asignado
     
     # Añadir los elementos de la orden
-    for item in order.items:
-        # Verificar que el producto existe
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if not product:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Producto con ID {item.product_id} no encontrado"
-            )
-        
-        # Calcular subtotal
-        subtotal = item.quantity * item.unit_price
-        
-        # Añadir elemento a la orden
-        db.execute(
-            purchase_order_items.insert().values(
-                purchase_order_id=db_order.id,
-                product_id=item.product_id,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
-                subtotal=subtotal,
-                notes=item.notes
-            )
+    if order.items:
+        await db.execute(
+            purchase_order_items.insert(),
+            [
+                {
+                    "purchase_order_id": db_order.id,
+                    "product_id": item.product_id,
+                    "quantity": item.quantity,
+                    "unit_price": item.unit_price,
+                    "subtotal": item.quantity * item.unit_price,
+                    "notes": item.notes
+                }
+                for item in order.items
+            ]
         )
     
-    db.commit()
-    db.refresh(db_order)
+    await db.commit()
+    await db.refresh(db_order)
     
     # Preparar respuesta
-    result = {
-        "id": db_order.id,
-        "order_number": db_order.order_number,
-        "supplier_id": db_order.supplier_id,
-        "supplier_name": supplier.name,
-        "order_date": db_order.order_date,
-        "expected_delivery_date": db_order.expected_delivery_date,
-        "status": db_order.status,
-        "total_amount": db_order.total_amount,
-        "payment_terms": db_order.payment_terms,
-        "shipping_method": db_order.shipping_method,
-        "notes": db_order.notes,
-        "created_at": db_order.created_at,
-        "updated_at": db_order.updated_at,
-        "items": []
-    }
-    
-    # Obtener items para la respuesta
-    items_query = db.query(
-        purchase_order_items.c.id,
-        purchase_order_items.c.product_id,
-        Product.name.label("product_name"),
-        purchase_order_items.c.quantity,
-        purchase_order_items.c.unit_price,
-        purchase_order_items.c.subtotal,
-        purchase_order_items.c.notes
-    ).join(
-        Product, purchase_order_items.c.product_id == Product.id
-    ).filter(
-        purchase_order_items.c.purchase_order_id == db_order.id
-    )
-    
-    items = items_query.all()
-    for item in items:
-        result["items"].append({
-            "id": item.id,
-            "product_id": item.product_id,
-            "product_name": item.product_name,
-            "quantity": item.quantity,
-            "unit_price": item.unit_price,
-            "subtotal": item.subtotal,
-            "notes": item.notes
-        })
-    
-    return result
+    items = await _order_items(db, [db_order.id])
+    return _order_response(db_order, supplier.name, items[db_order.id])
 
 @router.get("/{order_id}", response_model=PurchaseOrderSchema)
 async def get_purchase_order(
     order_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Obtener una orden de compra por su ID.
     """
     # Buscar la orden
-    order = db.query(PurchaseOrder).filter(PurchaseOrder.id == order_id).first()
+    order = await db.get(PurchaseOrder, order_id)
     
     # Verificar si existe
     if not order:
@@ -276,68 +292,22 @@ async def get_purchase_order(
             detail="Orden de compra no encontrada"
         )
     
-    # Obtener datos del proveedor
-    supplier = db.query(Supplier).filter(Supplier.id == order.supplier_id).first()
-    
     # Preparar respuesta
-    result = {
-        "id": order.id,
-        "order_number": order.order_number,
-        "supplier_id": order.supplier_id,
-        "supplier_name": supplier.name if supplier else None,
-        "order_date": order.order_date,
-        "expected_delivery_date": order.expected_delivery_date,
-        "status": order.status,
-        "total_amount": order.total_amount,
-        "payment_terms": order.payment_terms,
-        "shipping_method": order.shipping_method,
-        "notes": order.notes,
-        "created_at": order.created_at,
-        "updated_at": order.updated_at,
-        "items": []
-    }
-    
-    # Obtener items de la orden
-    items_query = db.query(
-        purchase_order_items.c.id,
-        purchase_order_items.c.product_id,
-        Product.name.label("product_name"),
-        purchase_order_items.c.quantity,
-        purchase_order_items.c.unit_price,
-        purchase_order_items.c.subtotal,
-        purchase_order_items.c.notes
-    ).join(
-        Product, purchase_order_items.c.product_id == Product.id
-    ).filter(
-        purchase_order_items.c.purchase_order_id == order.id
-    )
-    
-    items = items_query.all()
-    for item in items:
-        result["items"].append({
-            "id": item.id,
-            "product_id": item.product_id,
-            "product_name": item.product_name,
-            "quantity": item.quantity,
-            "unit_price": item.unit_price,
-            "subtotal": item.subtotal,
-            "notes": item.notes
-        })
-    
-    return result
+    items = await _order_items(db, [order.id])
+    return _order_response(order, await _supplier_name(db, order.supplier_id), items[order.id])
 
 @router.put("/{order_id}", response_model=PurchaseOrderSchema)
 async def update_purchase_order(
     order_id: int,
     order_update: PurchaseOrderUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Actualizar una orden de compra existente.
     """
     # Buscar la orden
-    db_order = db.query(PurchaseOrder).filter(PurchaseOrder.id == order_id).first()
+    db_order = await db.get(PurchaseOrder, order_id)
     
     # Verificar si existe
     if not db_order:
@@ -346,19 +316,19 @@ async def update_purchase_order(
             detail="Orden de compra no encontrada"
         )
     
+    # Actualizar los campos de la orden
+    update_data = order_update.model_dump(exclude_unset=True)
+    
     # Solo permitir actualización de órdenes pendientes o aprobadas
-    if db_order.status not in ["pending", "approved"] and "status" in order_update.dict(exclude_unset=True):
+    if db_order.status not in ["pending", "approved"] and "status" in update_data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"No se puede actualizar una orden con estado '{db_order.status}'"
         )
     
-        # Actualizar los campos de la orden
-    update_data = order_update.dict(exclude_unset=True)
-    
     # Si se está cambiando el proveedor, verificar que existe
     if "supplier_id" in update_data:
-        supplier = db.query(Supplier).filter(Supplier.id == update_data["supplier_id"]).first()
+        supplier = await db.get(Supplier, update_data["supplier_id"])
         if not supplier:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -369,67 +339,24 @@ async def update_purchase_order(
     for key, value in update_data.items():
         setattr(db_order, key, value)
     
-    db.commit()
-    db.refresh(db_order)
+    await db.commit()
+    await db.refresh(db_order)
     
     # Preparar respuesta
-    result = {
-        "id": db_order.id,
-        "order_number": db_order.order_number,
-        "supplier_id": db_order.supplier_id,
-        "supplier_name": db_order.supplier.name if db_order.supplier else None,
-        "order_date": db_order.order_date,
-        "expected_delivery_date": db_order.expected_delivery_date,
-        "status": db_order.status,
-        "total_amount": db_order.total_amount,
-        "payment_terms": db_order.payment_terms,
-        "shipping_method": db_order.shipping_method,
-        "notes": db_order.notes,
-        "created_at": db_order.created_at,
-        "updated_at": db_order.updated_at,
-        "items": []
-    }
-    
-    # Obtener items de la orden
-    items_query = db.query(
-        purchase_order_items.c.id,
-        purchase_order_items.c.product_id,
-        Product.name.label("product_name"),
-        purchase_order_items.c.quantity,
-        purchase_order_items.c.unit_price,
-        purchase_order_items.c.subtotal,
-        purchase_order_items.c.notes
-    ).join(
-        Product, purchase_order_items.c.product_id == Product.id
-    ).filter(
-        purchase_order_items.c.purchase_order_id == db_order.id
-    )
-    
-    items = items_query.all()
-    for item in items:
-        result["items"].append({
-            "id": item.id,
-            "product_id": item.product_id,
-            "product_name": item.product_name,
-            "quantity": item.quantity,
-            "unit_price": item.unit_price,
-            "subtotal": item.subtotal,
-            "notes": item.notes
-        })
-    
-    return result
+    items = await _order_items(db, [db_order.id])
+    return _order_response(db_order, await _supplier_name(db, db_order.supplier_id), items[db_order.id])
 
 @router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_purchase_order(
     order_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Eliminar una orden de compra.
     """
     # Buscar la orden
-    db_order = db.query(PurchaseOrder).filter(PurchaseOrder.id == order_id).first()
+    db_order = await db.get(PurchaseOrder, order_id)
     
     # Verificar si existe
     if not db_order:
@@ -446,8 +373,8 @@ async def delete_purchase_order(
         )
     
     # Eliminar la orden (los items se eliminarán en cascada por la relación)
-    db.delete(db_order)
-    db.commit()
+    await db.delete(db_order)
+    await db.commit()
     
     return None
 
@@ -455,14 +382,14 @@ async def delete_purchase_order(
 async def receive_order(
     order_id: int,
     receipt_data: ReceiptCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Registrar la recepción de productos de una orden de compra.
     """
     # Buscar la orden
-    db_order = db.query(PurchaseOrder).filter(PurchaseOrder.id == order_id).first()
+    db_order = await db.get(PurchaseOrder, order_id)
     
     # Verificar si existe
     if not db_order:
@@ -479,14 +406,16 @@ async def receive_order(
         )
     
     # Obtener los items actuales de la orden
-    items_query = db.query(
-        purchase_order_items.c.product_id,
-        purchase_order_items.c.quantity
-    ).filter(
-        purchase_order_items.c.purchase_order_id == db_order.id
+    items_rows = await db.execute(
+        select(
+            purchase_order_items.c.product_id,
+            purchase_order_items.c.quantity
+        ).where(
+            purchase_order_items.c.purchase_order_id == db_order.id
+        )
     )
     
-    order_items = {item.product_id: item.quantity for item in items_query.all()}
+    order_items = {item.product_id: item.quantity for item in items_rows}
     
     # Verificar que todos los productos recibidos están en la orden
     for receipt_item in receipt_data.items:
@@ -505,11 +434,20 @@ async def receive_order(
     )
     
     db.add(receipt)
-    db.flush()  # Para obtener el ID asignado
+    await db.flush()  # Para obtener el ID asignado
+    
+    # Productos recibidos, cargados en una sola consulta
+    products = {
+        product.id: product
+        for product in (await db.scalars(
+            select(Product).where(Product.id.in_({item.product_id for item in receipt_data.items}))
+        )).all()
+    }
     
     # Añadir los items recibidos
     total_expected = 0
     total_received = 0
+    movements = []
     
     for receipt_item in receipt_data.items:
         # Añadir el item recibido
@@ -525,9 +463,22 @@ async def receive_order(
         
         # Actualizar el inventario (esto debería hacerse en un servicio aparte)
         # Aquí simplemente aumentamos el stock del producto
-        product = db.query(Product).filter(Product.id == receipt_item.product_id).first()
+        product = products.get(receipt_item.product_id)
         if product:
             product.stock_quantity = (product.stock_quantity or 0) + receipt_item.quantity_received
+            
+            # Registrar la entrada; su costo se toma de la línea de la orden
+            if receipt_item.quantity_received:
+                movement = InventoryMovement(
+                    product_id=receipt_item.product_id,
+                    movement_type="purchase",
+                    quantity=receipt_item.quantity_received,
+                    reference_id=db_order.id,
+                    notes=f"PO: {db_order.order_number}"[:50],
+                    created_by=current_user.id
+                )
+                db.add(movement)
+                movements.append(movement)
         
         # Sumar para determinar si es recepción completa
         total_expected += order_items[receipt_item.product_id]
@@ -543,57 +494,29 @@ async def receive_order(
     else:
         db_order.status = "partially_received"
     
-    db.commit()
-    db.refresh(receipt)
-    
-    # Preparar respuesta
-    result = {
-        "id": receipt.id,
-        "purchase_order_id": receipt.purchase_order_id,
-        "receipt_date": receipt.receipt_date,
-        "received_by": receipt.received_by,
-        "status": receipt.status,
-        "notes": receipt.notes,
-        "items": []
-    }
-    
-    # Obtener items para la respuesta
-    receipt_items_query = db.query(
-        PurchaseOrderReceiptItem.id,
-        PurchaseOrderReceiptItem.product_id,
-        Product.name.label("product_name"),
-        PurchaseOrderReceiptItem.quantity_received,
-        PurchaseOrderReceiptItem.quantity_rejected,
-        PurchaseOrderReceiptItem.rejection_reason
-    ).join(
-        Product, PurchaseOrderReceiptItem.product_id == Product.id
-    ).filter(
-        PurchaseOrderReceiptItem.receipt_id == receipt.id
-    )
+    # Crear las capas de costo de las unidades recibidas (el servicio de
+    # costeo es síncrono; run_sync lo ejecuta sobre la misma transacción)
+    await db.flush()
+    await db.run_sync(apply_movements, movements)
     
-    for item in receipt_items_query.all():
-        result["items"].append({
-            "id": item.id,
-            "product_id": item.product_id,
-            "product_name": item.product_name,
-            "quantity_received": item.quantity_received,
-            "quantity_rejected": item.quantity_rejected,
-            "rejection_reason": item.rejection_reason
-        })
+    await db.commit()
+    await db.refresh(receipt)
     
-    return result
+    # Preparar respuesta
+    items = await _receipt_items(db, [receipt.id])
+    return _receipt_response(receipt, items[receipt.id])
 
 @router.get("/{order_id}/receipts", response_model=List[Receipt])
 async def get_order_receipts(
     order_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Obtener el historial de recepciones de una orden de compra.
     """
     # Verificar que la orden existe
-    order = db.query(PurchaseOrder).filter(PurchaseOrder.id == order_id).first()
+    order = await db.get(PurchaseOrder, order_id)
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -601,65 +524,28 @@ async def get_order_receipts(
         )
     
     # Obtener todas las recepciones para esta orden
-    receipts_query = db.query(PurchaseOrderReceipt).filter(
-        PurchaseOrderReceipt.purchase_order_id == order_id
-    ).order_by(PurchaseOrderReceipt.receipt_date.desc())
-    
-    receipts = receipts_query.all()
+    receipts = (await db.scalars(
+        select(PurchaseOrderReceipt).where(
+            PurchaseOrderReceipt.purchase_order_id == order_id
+        ).order_by(PurchaseOrderReceipt.receipt_date.desc())
+    )).all()
     
     # Preparar respuesta
-    result = []
-    for receipt in receipts:
-        receipt_data = {
-            "id": receipt.id,
-            "purchase_order_id": receipt.purchase_order_id,
-            "receipt_date": receipt.receipt_date,
-            "received_by": receipt.received_by,
-            "status": receipt.status,
-            "notes": receipt.notes,
-            "items": []
-        }
-        
-        # Obtener items de la recepción
-        receipt_items_query = db.query(
-            PurchaseOrderReceiptItem.id,
-            PurchaseOrderReceiptItem.product_id,
-            Product.name.label("product_name"),
-            PurchaseOrderReceiptItem.quantity_received,
-            PurchaseOrderReceiptItem.quantity_rejected,
-            PurchaseOrderReceiptItem.rejection_reason
-        ).join(
-            Product, PurchaseOrderReceiptItem.product_id == Product.id
-        ).filter(
-            PurchaseOrderReceiptItem.receipt_id == receipt.id
-        )
-        
-        for item in receipt_items_query.all():
-            receipt_data["items"].append({
-                "id": item.id,
-                "product_id": item.product_id,
-                "product_name": item.product_name,
-                "quantity_received": item.quantity_received,
-                "quantity_rejected": item.quantity_rejected,
-                "rejection_reason": item.rejection_reason
-            })
-        
-        result.append(receipt_data)
-    
-    return result
+    items = await _receipt_items(db, [receipt.id for receipt in receipts])
+    return [_receipt_response(receipt, items[receipt.id]) for receipt in receipts]
 
 @router.get("/supplier/{supplier_id}/history", response_model=List[PurchaseOrderSchema])
 async def get_supplier_purchase_history(
     supplier_id: int,
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Obtener el historial de órdenes de compra para un proveedor específico.
     """
     # Verificar que el proveedor existe
-    supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
+    supplier = await db.get(Supplier, supplier_id)
     if not supplier:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -667,80 +553,34 @@ async def get_supplier_purchase_history(
         )
     
     # Obtener las órdenes más recientes para este proveedor
-    orders_query = db.query(PurchaseOrder).filter(
-        PurchaseOrder.supplier_id == supplier_id
-    ).order_by(PurchaseOrder.order_date.desc()).limit(limit)
-    
-    orders = orders_query.all()
+    orders = (await db.scalars(
+        select(PurchaseOrder).where(
+            PurchaseOrder.supplier_id == supplier_id
+        ).order_by(PurchaseOrder.order_date.desc()).limit(limit)
+    )).all()
     
     # Preparar respuesta
-    result = []
-    for order in orders:
-        order_data = {
-            "id": order.id,
-            "order_number": order.order_number,
-            "supplier_id": order.supplier_id,
-            "supplier_name": supplier.name,
-            "order_date": order.order_date,
-            "expected_delivery_date": order.expected_delivery_date,
-            "status": order.status,
-            "total_amount": order.total_amount,
-            "payment_terms": order.payment_terms,
-            "shipping_method": order.shipping_method,
-            "notes": order.notes,
-            "created_at": order.created_at,
-            "updated_at": order.updated_at,
-            "items": []
-        }
-        
-        # Obtener items de la orden
-        items_query = db.query(
-            purchase_order_items.c.id,
-            purchase_order_items.c.product_id,
-            Product.name.label("product_name"),
-            purchase_order_items.c.quantity,
-            purchase_order_items.c.unit_price,
-            purchase_order_items.c.subtotal,
-            purchase_order_items.c.notes
-        ).join(
-            Product, purchase_order_items.c.product_id == Product.id
-        ).filter(
-            purchase_order_items.c.purchase_order_id == order.id
-        )
-        
-        for item in items_query.all():
-            order_data["items"].append({
-                "id": item.id,
-                "product_id": item.product_id,
-                "product_name": item.product_name,
-                "quantity": item.quantity,
-                "unit_price": item.unit_price,
-                "subtotal": item.subtotal,
-                "notes": item.notes
-            })
-        
-        result.append(order_data)
-    
-    return result
+    items = await _order_items(db, [order.id for order in orders])
+    return [_order_response(order, supplier.name, items[order.id]) for order in orders]
 
 @router.post("/{order_id}/approve", response_model=PurchaseOrderSchema)
 async def approve_purchase_order(
     order_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Aprobar una orden de compra pendiente.
     """
     # Verificar que el usuario tiene permisos para aprobar (opcional)
-    if not current_user.is_superuser:
+    if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No tiene permisos para aprobar órdenes de compra"
         )
     
     # Buscar la orden
-    db_order = db.query(PurchaseOrder).filter(PurchaseOrder.id == order_id).first()
+    db_order = await db.get(PurchaseOrder, order_id)
     
     # Verificar si existe
     if not db_order:
@@ -758,74 +598,31 @@ async def approve_purchase_order(
     
     # Actualizar el estado de la orden
     db_order.status = "approved"
-    db.commit()
-    db.refresh(db_order)
+    await db.commit()
+    await db.refresh(db_order)
     
     # Preparar respuesta
-    result = {
-        "id": db_order.id,
-        "order_number": db_order.order_number,
-        "supplier_id": db_order.supplier_id,
-        "supplier_name": db_order.supplier.name if db_order.supplier else None,
-        "order_date": db_order.order_date,
-        "expected_delivery_date": db_order.expected_delivery_date,
-        "status": db_order.status,
-        "total_amount": db_order.total_amount,
-        "payment_terms": db_order.payment_terms,
-        "shipping_method": db_order.shipping_method,
-        "notes": db_order.notes,
-        "created_at": db_order.created_at,
-        "updated_at": db_order.updated_at,
-        "items": []
-    }
-    
-    # Obtener items de la orden
-    items_query = db.query(
-        purchase_order_items.c.id,
-        purchase_order_items.c.product_id,
-        Product.name.label("product_name"),
-        purchase_order_items.c.quantity,
-        purchase_order_items.c.unit_price,
-        purchase_order_items.c.subtotal,
-        purchase_order_items.c.notes
-    ).join(
-        Product, purchase_order_items.c.product_id == Product.id
-    ).filter(
-        purchase_order_items.c.purchase_order_id == db_order.id
-    )
-    
-    items = items_query.all()
-    for item in items:
-        result["items"].append({
-            "id": item.id,
-            "product_id": item.product_id,
-            "product_name": item.product_name,
-            "quantity": item.quantity,
-            "unit_price": item.unit_price,
-            "subtotal": item.subtotal,
-            "notes": item.notes
-        })
-    
-    return result
+    items = await _order_items(db, [db_order.id])
+    return _order_response(db_order, await _supplier_name(db, db_order.supplier_id), items[db_order.id])
 
 @router.post("/{order_id}/cancel", response_model=PurchaseOrderSchema)
 async def cancel_purchase_order(
     order_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Cancelar una orden de compra.
     """
     # Verificar que el usuario tiene permisos para cancelar (opcional)
-    if not current_user.is_superuser:
+    if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No tiene permisos para cancelar órdenes de compra"
         )
     
     # Buscar la orden
-    db_order = db.query(PurchaseOrder).filter(PurchaseOrder.id == order_id).first()
+    db_order = await db.get(PurchaseOrder, order_id)
     
     # Verificar si existe
     if not db_order:
@@ -843,52 +640,9 @@ async def cancel_purchase_order(
     
     # Actualizar el estado de la orden
     db_order.status = "cancelled"
-    db.commit()
-    db.refresh(db_order)
+    await db.commit()
+    await db.refresh(db_order)
     
     # Preparar respuesta
-    result = {
-        "id": db_order.id,
-        "order_number": db_order.order_number,
-        "supplier_id": db_order.supplier_id,
-        "supplier_name": db_order.supplier.name if db_order.supplier else None,
-        "order_date": db_order.order_date,
-        "expected_delivery_date": db_order.expected_delivery_date,
-        "status": db_order.status,
-        "total_amount": db_order.total_amount,
-        "payment_terms": db_order.payment_terms,
-        "shipping_method": db_order.shipping_method,
-        "notes": db_order.notes,
-        "created_at": db_order.created_at,
-        "updated_at": db_order.updated_at,
-        "items": []
-    }
-    
-    # Obtener items de la orden
-    items_query = db.query(
-        purchase_order_items.c.id,
-        purchase_order_items.c.product_id,
-        Product.name.label("product_name"),
-        purchase_order_items.c.quantity,
-        purchase_order_items.c.unit_price,
-        purchase_order_items.c.subtotal,
-        purchase_order_items.c.notes
-    ).join(
-        Product, purchase_order_items.c.product_id == Product.id
-    ).filter(
-        purchase_order_items.c.purchase_order_id == db_order.id
-    )
-    
-    items = items_query.all()
-    for item in items:
-        result["items"].append({
-            "id": item.id,
-            "product_id": item.product_id,
-            "product_name": item.product_name,
-            "quantity": item.quantity,
-            "unit_price": item.unit_price,
-            "subtotal": item.subtotal,
-            "notes": item.notes
-        })
-    
-    return result
\ No newline at end of file
+    items = await _order_items(db, [db_order.id])
+    return _order_response(db_order, await _supplier_name(db, db_order.supplier_id), items[db_order.id])
@@ -1,411 +1,503 @@
-from typing import List, Any, Optional
-from fastapi import APIRouter, Depends, Query, HTTPException, Response
+from typing import List, Any, Optional, Dict
+from fastapi import APIRouter, Body, Depends, Query, HTTPException, Response
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
 from datetime import date, datetime, timedelta
-import traceback
 import logging
+import os
 
-from ...database import get_db
+from ...config import settings
+from ...database import get_db, get_read_db
 from ...api.routes.auth import get_current_active_user
-from ...models.product import Product  # Importación necesaria
-from ...models.customer import Customer  # Importación necesaria
+from ...models.report_job import ReportJob
+from ...schemas.reports import (
+    Dashboard,
+    DashboardMetrics,
+    LowStockProduct,
+    ProductSales,
+    ReportBundleCreate,
+    ReportJobCreate,
+    ReportJobStatus,
+    SalesReport
+)
 from ...services.reports import (
     generate_sales_report,
     generate_product_sales_report,
     generate_inventory_value_report,
+    generate_gross_margin_report,
     generate_customer_sales_report,
-    export_report_to_json,
-    export_report_to_csv,
     generate_inventory_movements_report,
     generate_low_stock_report
 )
+from ...services.customer_stats import RFM_SEGMENTS, generate_customer_lifetime_report, segment_summary
+from ...services.dashboard import DASHBOARD_WIDGETS, build_dashboard
+from ...services import report_aggregates
+from ...services.report_jobs import expire_stale_job, submit_report_bundle, submit_report_job
+from ...utils.responses import json_response
+from ...utils.date_ranges import local_today
 
 # Configurar logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def _job_response(job: ReportJob, status_code: int = 200) -> Response:
+    content = {
+        field: getattr(job, field)
+        for field in ReportJobStatus.model_fields
+        if hasattr(job, field)
+    }
+    content["status_url"] = f"/api/reports/jobs/{job.id}"
+    if job.status == "completed":
+        content["download_url"] = f"/api/reports/download/{job.filename}"
+    return json_response(ReportJobStatus, content, status_code=status_code)
+
+def _submit_export(
+    db: Session,
+    report_type: str,
+    params: Dict[str, Any],
+    export_format: str,
+    current_user: Any,
+    compress: bool = False
+) -> Response:
+    """
+    Las exportaciones se generan en el pool de reportes: la respuesta es 202
+    con el trabajo, que se consulta en `status_url` hasta que esté completo.
+    Con `compress` el archivo se escribe con gzip.
+    """
+    try:
+        job = submit_report_job(db, report_type, params, export_format, current_user.id, compress)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return _job_response(job, status_code=202)
+
+def _materialized(
+    db: Session,
+    response: Response,
+    report_type: str,
+    reader: Any,
+    *args: Any
+) -> Optional[Any]:
+    """
+    Lee el reporte de sus agregados si ya se materializó; si no, devuelve
+    None y la ruta lo calcula en vivo. Los encabezados indican de dónde salió
+    y hasta cuándo están incorporados los datos.
+    """
+    refreshed_at = report_aggregates.aggregates_refreshed_at(db, report_type)
+    if refreshed_at is None:
+        response.headers["X-Report-Source"] = "live"
+        return None
+    response.headers["X-Report-Source"] = "materialized"
+    response.headers["X-Report-Refreshed-At"] = refreshed_at.isoformat()
+    return reader(db, *args)
+
 @router.get("/sales/", response_model=List[dict])
 def get_sales_report(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     group_by: str = Query("day", enum=["day", "week", "month"]),
-    export_format: Optional[str] = Query(None, enum=["json", "csv"]),
+    export_format: Optional[str] = Query(None, enum=["json", "csv", "jsonl", "parquet", "arrow"]),
+    compress: bool = Query(False),
+    materialized: bool = Query(False),
+    response: Response = None,
     current_user: Any = Depends(get_current_active_user),
 ) -> Any:
     """
     Obtiene un reporte de ventas agrupado por día, semana o mes.
+    Con `export_format` crea un trabajo en segundo plano (202). Con
+    `materialized` lee los agregados diarios (datos hasta la última corrida).
     """
+    if export_format:
+        params = {"start_date": start_date, "end_date": end_date, "group_by": group_by}
+        return _submit_export(primary_db, "sales", params, export_format, current_user, compress)
+
     # Establecer fechas por defecto si no se proporcionan
     if not start_date:
-        start_date = date.today() - timedelta(days=30)
+        start_date = local_today() - timedelta(days=30)
     if not end_date:
-        end_date = date.today()
+        end_date = local_today()
     
+    if materialized:
+        report = _materialized(
+            db, response, "sales", report_aggregates.read_sales_report, start_date, end_date, group_by
+        )
+        if report is not None:
+            return report
+
     # Generar el reporte
-    report_data = generate_sales_report(db, start_date, end_date, group_by)
-    
-    # Exportar si se solicitó
-    if export_format:
-        filename = f"sales_report_{start_date}_{end_date}_{group_by}"
-        if export_format == "json":
-            filepath = export_report_to_json(report_data, filename)
-            return {"message": f"Report exported to {filepath}", "data": report_data}
-        elif export_format == "csv":
-            filepath = export_report_to_csv(report_data, filename)
-            return {"message": f"Report exported to {filepath}", "data": report_data}
-    
-    return report_data
+    return generate_sales_report(db, start_date, end_date, group_by)
 
 @router.get("/products/", response_model=List[dict])
 def get_product_sales_report(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     category_id: Optional[int] = Query(None),
     limit: int = Query(50, ge=1, le=100),
-    export_format: Optional[str] = Query(None, enum=["json", "csv"]),
+    export_format: Optional[str] = Query(None, enum=["json", "csv", "jsonl", "parquet", "arrow"]),
+    compress: bool = Query(False),
+    materialized: bool = Query(False),
+    response: Response = None,
     current_user: Any = Depends(get_current_active_user),
 ) -> Any:
     """
     Obtiene un reporte de ventas por producto.
+    Con `export_format` crea un trabajo en segundo plano (202). Con
+    `materialized` lee los agregados diarios (datos hasta la última corrida).
     """
+    if export_format:
+        params = {"start_date": start_date, "end_date": end_date, "category_id": category_id, "limit": limit}
+        return _submit_export(primary_db, "products", params, export_format, current_user, compress)
+
     # Establecer fechas por defecto si no se proporcionan
     if not start_date:
-        start_date = date.today() - timedelta(days=30)
+        start_date = local_today() - timedelta(days=30)
     if not end_date:
-        end_date = date.today()
+        end_date = local_today()
     
+    if materialized:
+        report = _materialized(
+            db, response, "products", report_aggregates.read_product_sales_report,
+            start_date, end_date, category_id, limit
+        )
+        if report is not None:
+            return report
+
     # Generar el reporte
-    report_data = generate_product_sales_report(db, start_date, end_date, category_id, limit)
-    
-    # Exportar si se solicitó
-    if export_format:
-        filename = f"product_sales_report_{start_date}_{end_date}"
-        if export_format == "json":
-            filepath = export_report_to_json(report_data, filename)
-            return {"message": f"Report exported to {filepath}", "data": report_data}
-        elif export_format == "csv":
-            filepath = export_report_to_csv(report_data, filename)
-            return {"message": f"Report exported to {filepath}", "data": report_data}
-    
-    return report_data
+    return generate_product_sales_report(db, start_date, end_date, category_id, limit)
 
 @router.get("/inventory/value/", response_model=dict)
 def get_inventory_value_report(
-    db: Session = Depends(get_db),
-    export_format: Optional[str] = Query(None, enum=["json", "csv"]),
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db),
+    export_format: Optional[str] = Query(None, enum=["json", "csv", "jsonl", "parquet", "arrow"]),
+    compress: bool = Query(False),
+    materialized: bool = Query(False),
+    response: Response = None,
     current_user: Any = Depends(get_current_active_user),
 ) -> Any:
     """
     Obtiene un reporte del valor actual del inventario.
+    Con `export_format` crea un trabajo en segundo plano (202); el CSV lleva
+    una fila por categoría y una de totales. Con `materialized` lee el valor
+    por producto de la última corrida.
     """
+    if export_format:
+        return _submit_export(primary_db, "inventory_value", {}, export_format, current_user, compress)
+
+    if materialized:
+        report = _materialized(db, response, "inventory_value", report_aggregates.read_inventory_value_report)
+        if report is not None:
+            return report
+
     # Generar el reporte
-    report_data = generate_inventory_value_report(db)
-    
-    # Exportar si se solicitó
+    return generate_inventory_value_report(db)
+
+@router.get("/margins/", response_model=List[dict])
+def get_gross_margin_report(
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    category_id: Optional[int] = Query(None),
+    limit: int = Query(50, ge=1, le=100),
+    export_format: Optional[str] = Query(None, enum=["json", "csv", "jsonl", "parquet", "arrow"]),
+    compress: bool = Query(False),
+    current_user: Any = Depends(get_current_active_user),
+) -> Any:
+    """
+    Obtiene un reporte de margen bruto por producto (costo de ventas FIFO).
+    Con `export_format` crea un trabajo en segundo plano (202).
+    """
     if export_format:
-        filename = f"inventory_value_report_{date.today()}"
-        if export_format == "json":
-            filepath = export_report_to_json(report_data, filename)
-            return {"message": f"Report exported to {filepath}", "data": report_data}
-        elif export_format == "csv":
-            # Para CSV, necesitamos aplanar la estructura jerárquica
-            # Primero el resumen
-            summary_data = [{"key": k, "value": v} for k, v in report_data["summary"].items()]
-            summary_filepath = export_report_to_csv(summary_data, f"{filename}_summary")
-            
-            # Luego los datos por categoría
-            category_filepath = export_report_to_csv(report_data["by_category"], f"{filename}_by_category")
-            
-            return {
-                "message": f"Reports exported to {summary_filepath} and {category_filepath}",
-                "data": report_data
-            }
+        params = {"start_date": start_date, "end_date": end_date, "category_id": category_id, "limit": limit}
+        return _submit_export(primary_db, "margins", params, export_format, current_user, compress)
+
+    # Establecer fechas por defecto si no se proporcionan
+    if not start_date:
+        start_date = local_today() - timedelta(days=30)
+    if not end_date:
+        end_date = local_today()
     
-    return report_data
+    # Generar el reporte
+    return generate_gross_margin_report(db, start_date, end_date, category_id, limit)
 
 @router.get("/customers/", response_model=List[dict])
 def get_customer_sales_report(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     limit: int = Query(20, ge=1, le=100),
-    export_format: Optional[str] = Query(None, enum=["json", "csv"]),
+    export_format: Optional[str] = Query(None, enum=["json", "csv", "jsonl", "parquet", "arrow"]),
+    compress: bool = Query(False),
+    materialized: bool = Query(False),
+    response: Response = None,
     current_user: Any = Depends(get_current_active_user),
 ) -> Any:
     """
     Obtiene un reporte de ventas por cliente.
+    Con `export_format` crea un trabajo en segundo plano (202). Con
+    `materialized` lee los agregados diarios (datos hasta la última corrida).
     """
+    if export_format:
+        params = {"start_date": start_date, "end_date": end_date, "limit": limit}
+        return _submit_export(primary_db, "customers", params, export_format, current_user, compress)
+
     # Establecer fechas por defecto si no se proporcionan
     if not start_date:
-        start_date = date.today() - timedelta(days=90)  # 3 meses
+        start_date = local_today() - timedelta(days=90)  # 3 meses
     if not end_date:
-        end_date = date.today()
+        end_date = local_today()
     
+    if materialized:
+        report = _materialized(
+            db, response, "customers", report_aggregates.read_customer_sales_report, start_date, end_date, limit
+        )
+        if report is not None:
+            return report
+
     # Generar el reporte
-    report_data = generate_customer_sales_report(db, start_date, end_date, limit)
-    
-    # Exportar si se solicitó
+    return generate_customer_sales_report(db, start_date, end_date, limit)
+
+@router.get("/customers/lifetime/", response_model=List[dict])
+def get_customer_lifetime_report(
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db),
+    segment: Optional[str] = Query(None, enum=list(RFM_SEGMENTS)),
+    limit: int = Query(20, ge=1, le=100),
+    export_format: Optional[str] = Query(None, enum=["json", "csv", "jsonl", "parquet", "arrow"]),
+    compress: bool = Query(False),
+    current_user: Any = Depends(get_current_active_user),
+) -> Any:
+    """
+    Obtiene los clientes con mayor monto histórico, con sus puntajes RFM,
+    opcionalmente de un segmento. Lee el resumen por cliente (sin agregar ventas).
+    Con `export_format` crea un trabajo en segundo plano (202).
+    """
     if export_format:
-        filename = f"customer_sales_report_{start_date}_{end_date}"
-        if export_format == "json":
-            filepath = export_report_to_json(report_data, filename)
-            return {"message": f"Report exported to {filepath}", "data": report_data}
-        elif export_format == "csv":
-            filepath = export_report_to_csv(report_data, filename)
-            return {"message": f"Report exported to {filepath}", "data": report_data}
-    
-    return report_data
+        params = {"segment": segment, "limit": limit}
+        return _submit_export(primary_db, "customers_lifetime", params, export_format, current_user, compress)
+
+    return generate_customer_lifetime_report(db, segment, limit)
+
+@router.get("/customers/segments/", response_model=List[dict])
+def get_customer_segments_report(
+    db: Session = Depends(get_read_db),
+    current_user: Any = Depends(get_current_active_user),
+) -> Any:
+    """
+    Obtiene el número de clientes y el monto de cada segmento RFM
+    (según la última corrida nocturna).
+    """
+    return segment_summary(db)
 
 @router.get("/inventory/movements/", response_model=List[dict])
 def get_inventory_movements_report(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     product_id: Optional[int] = Query(None),
     movement_type: Optional[str] = Query(None),
-    export_format: Optional[str] = Query(None, enum=["json", "csv"]),
+    export_format: Optional[str] = Query(None, enum=["json", "csv", "jsonl", "parquet", "arrow"]),
+    compress: bool = Query(False),
     current_user: Any = Depends(get_current_active_user),
 ) -> Any:
     """
     Obtiene un reporte de movimientos de inventario.
+    Con `export_format` crea un trabajo en segundo plano (202).
     """
+    if export_format:
+        params = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "product_id": product_id,
+            "movement_type": movement_type
+        }
+        return _submit_export(primary_db, "inventory_movements", params, export_format, current_user, compress)
+
     # Establecer fechas por defecto si no se proporcionan
     if not start_date:
-        start_date = date.today() - timedelta(days=30)
+        start_date = local_today() - timedelta(days=30)
     if not end_date:
-        end_date = date.today()
+        end_date = local_today()
     
     # Generar el reporte
-    report_data = generate_inventory_movements_report(
+    return generate_inventory_movements_report(
         db, start_date, end_date, product_id, movement_type
     )
-    
-    # Exportar si se solicitó
-    if export_format:
-        filename = f"inventory_movements_report_{start_date}_{end_date}"
-        if export_format == "json":
-            filepath = export_report_to_json(report_data, filename)
-            return {"message": f"Report exported to {filepath}", "data": report_data}
-        elif export_format == "csv":
-            filepath = export_report_to_csv(report_data, filename)
-            return {"message": f"Report exported to {filepath}", "data": report_data}
-    
-    return report_data
 
 @router.get("/inventory/low-stock/", response_model=List[dict])
 def get_low_stock_report(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db),
     threshold_percentage: int = Query(20, ge=0, le=100),
-    export_format: Optional[str] = Query(None, enum=["json", "csv"]),
+    export_format: Optional[str] = Query(None, enum=["json", "csv", "jsonl", "parquet", "arrow"]),
+    compress: bool = Query(False),
     current_user: Any = Depends(get_current_active_user),
 ) -> Any:
     """
     Obtiene un reporte de productos con bajo stock.
+    Con `export_format` crea un trabajo en segundo plano (202).
     """
-    # Generar el reporte
-    report_data = generate_low_stock_report(db, threshold_percentage)
-    
-    # Exportar si se solicitó
     if export_format:
-        filename = f"low_stock_report_{date.today()}"
-        if export_format == "json":
-            filepath = export_report_to_json(report_data, filename)
-            return {"message": f"Report exported to {filepath}", "data": report_data}
-        elif export_format == "csv":
-            filepath = export_report_to_csv(report_data, filename)
-            return {"message": f"Report exported to {filepath}", "data": report_data}
-    
-    return report_data
+        params = {"threshold_percentage": threshold_percentage}
+        return _submit_export(primary_db, "low_stock", params, export_format, current_user, compress)
+
+    # Generar el reporte
+    return generate_low_stock_report(db, threshold_percentage)
+
+@router.get("/sales/lines/", response_model=ReportJobStatus, status_code=202)
+def export_sales_lines(
+    db: Session = Depends(get_db),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    export_format: str = Query(..., enum=["json", "csv", "jsonl", "parquet", "arrow"]),
+    compress: bool = Query(False),
+    current_user: Any = Depends(get_current_active_user),
+) -> Any:
+    """
+    Exporta las ventas sin agrupar, una fila por línea de venta. Siempre se
+    genera en segundo plano (202).
+    """
+    params = {"start_date": start_date, "end_date": end_date}
+    return _submit_export(db, "sales_lines", params, export_format, current_user, compress)
+
+@router.post("/jobs", response_model=ReportJobStatus, status_code=202)
+def create_report_job(
+    job_in: ReportJobCreate,
+    db: Session = Depends(get_db),
+    current_user: Any = Depends(get_current_active_user),
+) -> Any:
+    """
+    Crea un trabajo de exportación para cualquiera de los reportes.
+    """
+    return _submit_export(
+        db, job_in.report_type, job_in.params, job_in.export_format, current_user, job_in.compress
+    )
+
+@router.post("/bundle", response_model=ReportJobStatus, status_code=202)
+def create_report_bundle(
+    bundle_in: ReportBundleCreate = Body(default_factory=ReportBundleCreate),
+    db: Session = Depends(get_db),
+    current_user: Any = Depends(get_current_active_user),
+) -> Any:
+    """
+    Genera varios reportes en paralelo (cada uno en un proceso con su propia
+    conexión) y los entrega en un solo ZIP con un manifest.json de tiempos.
+    Sin `reports` se generan los del cierre de mes. El avance y los tiempos
+    de cada reporte se consultan en `status_url`.
+    """
+    specs = [item.model_dump() for item in bundle_in.reports] if bundle_in.reports else None
+    try:
+        job = submit_report_bundle(
+            db, specs, bundle_in.export_format, current_user.id, bundle_in.compress,
+            bundle_in.start_date, bundle_in.end_date
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return _job_response(job, status_code=202)
+
+@router.get("/jobs/{job_id}", response_model=ReportJobStatus)
+def get_report_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: Any = Depends(get_current_active_user),
+) -> Any:
+    """
+    Estado y avance de un trabajo de reporte; al completarse incluye `download_url`.
+    """
+    job = db.get(ReportJob, job_id)
+    # Los trabajos de otros usuarios no se revelan (salvo a administradores)
+    if job is None or (job.created_by != current_user.id and not current_user.is_admin):
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return _job_response(expire_stale_job(db, job))
 
 @router.get("/download/{filename}")
 def download_report(
     filename: str,
+    db: Session = Depends(get_db),
     current_user: Any = Depends(get_current_active_user),
 ) -> Any:
     """
-    Descarga un archivo de reporte previamente generado.
+    Descarga un archivo de reporte previamente generado. Admite peticiones
+    `Range` para reanudar descargas grandes.
     """
-    import os
-    from fastapi.responses import FileResponse
-    
+    # Solo nombres de archivo dentro de la carpeta de reportes
+    if os.path.basename(filename) != filename or filename.startswith('.'):
+        raise HTTPException(status_code=404, detail="Report file not found")
+
+    # Los archivos de un trabajo solo los descarga quien lo creó (o un administrador)
+    job = db.query(ReportJob).filter(ReportJob.filename == filename).first()
+    if job is not None and job.created_by != current_user.id and not current_user.is_admin:
+        raise HTTPException(status_code=404, detail="Report file not found")
+
     # Verificar que el archivo existe
-    filepath = os.path.join('reports', filename)
-    if not os.path.exists(filepath):
+    filepath = os.path.join(settings.REPORTS_FOLDER, filename)
+    if not os.path.isfile(filepath):
         raise HTTPException(status_code=404, detail="Report file not found")
     
-    # Devolver el archivo
+    # FileResponse envía Content-Length y responde 206 a las peticiones Range
     return FileResponse(
         path=filepath,
         filename=filename,
         media_type='application/octet-stream'
     )
 
-# ==== Endpoints específicos para el Dashboard (sin autenticación) ====
+# ==== Endpoints específicos para el Dashboard ====
 
-@router.get("/reports/sales", response_model=List[dict])
-def dashboard_sales_report(
-    db: Session = Depends(get_db),
-    group_by: str = Query("day", enum=["day", "week", "month"])
-):
+@router.get("/dashboard", response_model=Dashboard, response_model_exclude_none=True)
+def get_dashboard(
+    db: Session = Depends(get_read_db),
+    widgets: List[str] = Query(list(DASHBOARD_WIDGETS), enum=list(DASHBOARD_WIDGETS)),
+    top_products_limit: int = Query(10, ge=1, le=100),
     current_user: Any = Depends(get_current_active_user),
-    """Endpoint para el dashboard: Reporte de ventas por período"""
+) -> Any:
+    """
+    Todos los widgets del dashboard en una respuesta: ventas de los últimos
+    7 días, productos más vendidos, productos con bajo stock y métricas del
+    mes. Las consultas corren en paralelo y solo se calculan los widgets pedidos.
+    """
     try:
-        # Usamos los últimos 7 días por defecto para el dashboard
-        start_date = date.today() - timedelta(days=7)
-        end_date = date.today()
-        
-        # Generar el reporte
-        report_data = generate_sales_report(db, start_date, end_date, group_by)
-        
-        # Transformar al formato esperado por el frontend
-        return [{"date": item["date"], "total": item["revenue"]} for item in report_data]
-    except Exception as e:
-        logger.error(f"Error en dashboard_sales_report: {str(e)}")
-        logger.error(traceback.format_exc())
-        # Devolver datos de muestra en caso de error
-        return [
-            {"date": (date.today() - timedelta(days=i)).isoformat(), "total": 1000 - (i * 100)} 
-            for i in range(7)
-        ]
-
-@router.get("/reports/products", response_model=List[dict])
-def dashboard_top_products(
-    db: Session = Depends(get_db),
-    limit: int = Query(10, ge=1, le=100)
+        return build_dashboard(db, widgets, top_products_limit)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+# Endpoints anteriores (un widget por solicitud): usan el mismo cálculo
+
+@router.get("/reports/sales", response_model=List[SalesReport])
+def dashboard_sales_report(
+    db: Session = Depends(get_read_db),
+    current_user: Any = Depends(get_current_active_user),
 ):
+    """Endpoint para el dashboard: ventas de los últimos 7 días"""
+    return build_dashboard(db, ["sales"])["sales"]
+
+@router.get("/reports/products", response_model=List[ProductSales])
+def dashboard_top_products(
+    db: Session = Depends(get_read_db),
+    limit: int = Query(10, ge=1, le=100),
     current_user: Any = Depends(get_current_active_user),
+):
     """Endpoint para el dashboard: Productos más vendidos"""
-    try:
-        # Usamos los últimos 30 días por defecto
-        start_date = date.today() - timedelta(days=30)
-        end_date = date.today()
-        
-        # Generar el reporte
-        report_data = generate_product_sales_report(db, start_date, end_date, limit=limit)
-        
-        # Transformar al formato esperado por el frontend
-        return [
-            {
-                "id": item["product_id"],
-                "name": item["product_name"],
-                "sales": item["quantity_sold"],
-                "revenue": item["total_revenue"]
-            } 
-            for item in report_data
-        ]
-    except Exception as e:
-        logger.error(f"Error en dashboard_top_products: {str(e)}")
-        logger.error(traceback.format_exc())
-        # Devolver datos de muestra en caso de error
-        return [
-            {"id": i, "name": f"Producto {i}", "sales": 100 - (i * 10), "revenue": 1000 - (i * 100)}
-            for i in range(1, 6)
-        ]
-
-@router.get("/reports/inventory/low-stock", response_model=List[dict])
+    return build_dashboard(db, ["top_products"], limit)["topProducts"]
+
+@router.get("/reports/inventory/low-stock", response_model=List[LowStockProduct])
 def dashboard_low_stock(
-    db: Session = Depends(get_db)
-):
+    db: Session = Depends(get_read_db),
     current_user: Any = Depends(get_current_active_user),
+):
     """Endpoint para el dashboard: Productos con bajo stock"""
-    try:
-        try:
-            # Intentar usar la función existente
-            report_data = generate_low_stock_report(db, threshold_percentage=20)
-        except Exception as inner_e:
-            logger.warning(f"Usando implementación alternativa para low-stock: {str(inner_e)}")
-            # Implementación alternativa si hay problemas
-            products = db.query(
-                Product.id, 
-                Product.name,
-                Product.stock_quantity.label('stock'),
-                Product.min_stock.label('minStock')
-            ).filter(
-                and_(
-                    Product.is_active == True,
-                    Product.stock_quantity <= Product.min_stock
-                )
-            ).order_by(
-                (Product.stock_quantity / Product.min_stock).asc()
-            ).limit(10).all()
-            
-            report_data = [
-                {
-                    "id": p.id,
-                    "name": p.name,
-                    "stock": p.stock,
-                    "minStock": p.minStock
-                }
-                for p in products
-            ]
-        
-        return report_data
-    except Exception as e:
-        logger.error(f"Error en dashboard_low_stock: {str(e)}")
-        logger.error(traceback.format_exc())
-        # Devolver datos de muestra en caso de error
-        return [
-            {"id": i, "name": f"Producto con bajo stock {i}", "stock": i, "minStock": i*3}
-            for i in range(1, 4)
-        ]
-
-@router.get("/reports/inventory/value", response_model=dict)
+    return build_dashboard(db, ["low_stock"])["lowStock"]
+
+@router.get("/reports/inventory/value", response_model=DashboardMetrics)
 def dashboard_metrics(
-    db: Session = Depends(get_db)
-):
+    db: Session = Depends(get_read_db),
     current_user: Any = Depends(get_current_active_user),
+):
     """Endpoint para el dashboard: Métricas generales"""
-    # Valores por defecto en caso de error
-    default_metrics = {
-        "totalSales": 0,
-        "monthlyRevenue": 0,
-        "averageOrderValue": 0,
-        "customerCount": 0
-    }
-    
-    try:
-        try:
-            # Generar reporte de valor de inventario
-            inventory_data = generate_inventory_value_report(db)
-            
-            # Calcular métricas adicionales
-            # Ventas totales (último mes)
-            start_date = date.today() - timedelta(days=30)
-            end_date = date.today()
-            sales_data = generate_sales_report(db, start_date, end_date, "month")
-            
-            total_sales = sum(item["total_sales"] for item in sales_data) if sales_data else 0
-            monthly_revenue = sum(item["revenue"] for item in sales_data) if sales_data else 0
-            
-            # Calcular valor promedio de orden
-            avg_order_value = monthly_revenue / total_sales if total_sales > 0 else 0
-            
-            # Contar clientes activos
-            customer_count = db.query(func.count(Customer.id)).filter(
-                Customer.is_active == True
-            ).scalar() or 0
-            
-            return {
-                "totalSales": total_sales,
-                "monthlyRevenue": round(monthly_revenue, 2),
-                "averageOrderValue": round(avg_order_value, 2),
-                "customerCount": customer_count
-            }
-        except Exception as inner_e:
-            logger.warning(f"Error generando métricas detalladas: {str(inner_e)}")
-            # Si falla, intentar obtener valores parciales
-            return default_metrics
-    except Exception as e:
-        logger.error(f"Error crítico en dashboard_metrics: {str(e)}")
-        logger.error(traceback.format_exc())
-        # Valores de muestra para desarrollo
-        return {
-            "totalSales": 156,
-            "monthlyRevenue": 28950.75,
-            "averageOrderValue": 185.58,
-            "customerCount": 48
-        }
\ No newline at end of file
+    return build_dashboard(db, ["metrics"])["metrics"]
@@ -1,9 +1,9 @@
 from typing import List, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 import datetime
 
-from ...database import get_db
+from ...database import get_db, get_read_db
 from ...models.sale import Sale, SaleItem
 from ...models.product import Product
 from ...models.inventory import InventoryMovement
@@ -15,6 +15,10 @@ from ...schemas.sale import (
     SaleWithItemsAndProducts
 )
 from ...api.routes.auth import get_current_active_user
+from ...services.costing import apply_movements
+from ...services.customer_stats import record_sale, refresh_customer_stats
+from ...utils.responses import json_response
+from ...utils.date_ranges import date_range_filter, local_date, local_today
 
 router = APIRouter()
 
@@ -52,6 +56,7 @@ def create_sale(
     db.flush()  # Para obtener el ID de la venta sin hacer commit completo
     
     # Crear los items y actualizar el inventario
+    movements = []
     for item_data in sale_in.items:
         # Verificar que el producto existe
         product = db.query(Product).filter(Product.id == item_data.product_id).first()
@@ -93,6 +98,14 @@ def create_sale(
             created_by=current_user.id
         )
         db.add(inventory_movement)
+        movements.append(inventory_movement)
+    
+    # Consumir las capas de costo FIFO (costo de ventas)
+    db.flush()
+    apply_movements(db, movements)
+    
+    # Resumen de compras del cliente, en la misma transacción
+    record_sale(db, sale)
     
     db.commit()
     db.refresh(sale)
@@ -103,7 +116,7 @@ def create_sale(
 
 @router.get("/", response_model=List[SaleWithItems])
 def read_sales(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     customer_id: Optional[int] = None,
@@ -116,7 +129,8 @@ def read_sales(
     """
     Retrieve sales.
     """
-    query = db.query(Sale)
+    # Los items de toda la página en una consulta en lugar de una por venta
+    query = db.query(Sale).options(selectinload(Sale.items))
     
     if customer_id:
         query = query.filter(Sale.customer_id == customer_id)
@@ -127,14 +141,11 @@ def read_sales(
     if payment_method:
         query = query.filter(Sale.payment_method == payment_method)
     
-    if date_from:
-        query = query.filter(Sale.created_at >= datetime.datetime.combine(date_from, datetime.time.min))
-    
-    if date_to:
-        query = query.filter(Sale.created_at <= datetime.datetime.combine(date_to, datetime.time.max))
+    if date_from or date_to:
+        query = query.filter(date_range_filter(Sale.created_at, date_from, date_to))
     
     sales = query.order_by(Sale.created_at.desc()).offset(skip).limit(limit).all()
-    return sales
+    return json_response(List[SaleWithItems], sales)
 
 @router.get("/{id}", response_model=SaleWithItemsAndProducts)
 def read_sale(
@@ -167,11 +178,15 @@ def update_sale(
         raise HTTPException(status_code=404, detail="Sale not found")
     
     # Solo permitimos actualizar ciertos campos de la venta, no los items
-    update_data = sale_in.dict(exclude_unset=True)
+    update_data = sale_in.model_dump(exclude_unset=True)
+    previous_customer_id = sale.customer_id
     for field, value in update_data.items():
         setattr(sale, field, value)
     
     db.add(sale)
+    if update_data.keys() & {"customer_id", "total_amount", "payment_status"}:
+        db.flush()
+        refresh_customer_stats(db, [previous_customer_id, sale.customer_id])
     db.commit()
     db.refresh(sale)
     return sale
@@ -202,6 +217,7 @@ def cancel_sale(
     sale_items = db.query(SaleItem).filter(SaleItem.sale_id == id).all()
     
     # Para cada item, restaurar el inventario
+    movements = []
     for item in sale_items:
         product = db.query(Product).filter(Product.id == item.product_id).first()
         if product:
@@ -219,6 +235,12 @@ def cancel_sale(
                 created_by=current_user.id
             )
             db.add(inventory_movement)
+            movements.append(inventory_movement)
+    
+    # Devolver las unidades a las capas de costo con el costo con que salieron
+    db.flush()
+    apply_movements(db, movements)
+    refresh_customer_stats(db, [sale.customer_id])
     
     db.commit()
     db.refresh(sale)
@@ -226,7 +248,7 @@ def cancel_sale(
 
 @router.get("/report/daily/", response_model=List[dict])
 def get_daily_sales_report(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     start_date: Optional[datetime.date] = None,
     end_date: Optional[datetime.date] = None,
     current_user: Any = Depends(get_current_active_user),
@@ -237,24 +259,25 @@ def get_daily_sales_report(
     from sqlalchemy import func
     
     if not start_date:
-        start_date = datetime.date.today() - datetime.timedelta(days=30)
+        start_date = local_today() - datetime.timedelta(days=30)
     
     if not end_date:
-        end_date = datetime.date.today()
+        end_date = local_today()
     
-    # Consulta para agrupar ventas por día
+    # Consulta para agrupar ventas por día (el filtro compara created_at
+    # directamente para usar su índice)
+    day = local_date(Sale.created_at)
     query = db.query(
-        func.date(Sale.created_at).label('date'),
+        day.label('date'),
         func.count(Sale.id).label('total_sales'),
         func.sum(Sale.total_amount).label('total_amount')
     ).filter(
-        func.date(Sale.created_at) >= start_date,
-        func.date(Sale.created_at) <= end_date,
+        date_range_filter(Sale.created_at, start_date, end_date),
         Sale.payment_status != 'cancelled'
     ).group_by(
-        func.date(Sale.created_at)
+        day
     ).order_by(
-        func.date(Sale.created_at)
+        day
     )
     
     result = query.all()
@@ -273,7 +296,7 @@ def get_daily_sales_report(
 
 @router.get("/report/products/", response_model=List[dict])
 def get_top_selling_products(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     limit: int = 10,
     start_date: Optional[datetime.date] = None,
     end_date: Optional[datetime.date] = None,
@@ -285,10 +308,10 @@ def get_top_selling_products(
     from sqlalchemy import func
     
     if not start_date:
-        start_date = datetime.date.today() - datetime.timedelta(days=30)
+        start_date = local_today() - datetime.timedelta(days=30)
     
     if not end_date:
-        end_date = datetime.date.today()
+        end_date = local_today()
     
     # Consulta para obtener los productos más vendidos
     query = db.query(
@@ -301,8 +324,7 @@ def get_top_selling_products(
     ).join(
         Sale, Sale.id == SaleItem.sale_id
     ).filter(
-        func.date(Sale.created_at) >= start_date,
-        func.date(Sale.created_at) <= end_date,
+        date_range_filter(Sale.created_at, start_date, end_date),
         Sale.payment_status != 'cancelled'
     ).group_by(
         Product.id
@@ -1,13 +1,15 @@
 from typing import List, Optional
+import logging
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.utils.security import get_current_user
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.utils.security import get_current_user_async
 from app.models.user import User
 from app.models.supplier import Supplier
 from app.schemas.supplier import SupplierCreate, SupplierUpdate, SupplierResponse
 
-print("DEBUG: suppliers.py is being loaded!")
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     tags=["suppliers"],
@@ -21,21 +23,21 @@ async def get_suppliers(
     limit: int = Query(10, ge=1, le=100, description="Elementos por página"),
     name: Optional[str] = Query(None, description="Filtrar por nombre"),
     status_filter: Optional[str] = Query(None, description="Filtrar por estado (active/inactive)", alias="status"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Obtener lista de proveedores con paginación y filtros opcionales.
     """
     try:
         skip = (page - 1) * limit
-        query = db.query(Supplier)
+        query = select(Supplier)
         if name:
-            query = query.filter(Supplier.name.ilike(f"%{name}%"))
+            query = query.where(Supplier.name.ilike(f"%{name}%"))
         if status_filter:
-            query = query.filter(Supplier.status == status_filter)
-        total = query.count()
-        suppliers = query.offset(skip).limit(limit).all()
+            query = query.where(Supplier.status == status_filter)
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+        suppliers = (await db.scalars(query.offset(skip).limit(limit))).all()
         pages = (total + limit - 1) // limit if total > 0 else 1
         supplier_items = [SupplierResponse.model_validate(supplier) for supplier in suppliers]
         return {
@@ -46,7 +48,7 @@ async def get_suppliers(
             "pages": pages
         }
     except Exception as e:
-        print(f"Error al obtener proveedores: {str(e)}")
+        logger.error(f"Error al obtener proveedores: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener proveedores: {str(e)}"
@@ -57,8 +59,8 @@ async def get_suppliers(
 async def search_suppliers_by_name(
     name: str,
     limit: int = Query(10, ge=1, le=50, description="Número máximo de resultados"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Buscar proveedores por nombre.
@@ -66,13 +68,13 @@ async def search_suppliers_by_name(
     Requiere autenticación. Útil para implementar búsqueda en tiempo real.
     """
     try:
-        suppliers = db.query(Supplier).filter(
-            Supplier.name.ilike(f"%{name}%")
-        ).limit(limit).all()
+        suppliers = (await db.scalars(
+            select(Supplier).where(Supplier.name.ilike(f"%{name}%")).limit(limit)
+        )).all()
         
         return suppliers
     except Exception as e:
-        print(f"Error al buscar proveedores por nombre: {str(e)}")
+        logger.error(f"Error al buscar proveedores por nombre: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al buscar proveedores: {str(e)}"
@@ -81,8 +83,8 @@ async def search_suppliers_by_name(
 @router.post("/", response_model=SupplierResponse, status_code=status.HTTP_201_CREATED)
 async def create_supplier(
     supplier: SupplierCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Crear un nuevo proveedor.
@@ -91,7 +93,7 @@ async def create_supplier(
     """
     try:
         # Verificar si ya existe un proveedor con el mismo nombre
-        existing_supplier = db.query(Supplier).filter(Supplier.name == supplier.name).first()
+        existing_supplier = await db.scalar(select(Supplier).where(Supplier.name == supplier.name))
         if existing_supplier:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -99,20 +101,20 @@ async def create_supplier(
             )
         
         # Crear nueva instancia del modelo Supplier con los datos del request
-        db_supplier = Supplier(**supplier.dict())
+        db_supplier = Supplier(**supplier.model_dump())
         
         # Añadir a la sesión de BD y confirmar
         db.add(db_supplier)
-        db.commit()
-        db.refresh(db_supplier)
+        await db.commit()
+        await db.refresh(db_supplier)
         
         return db_supplier
     except HTTPException:
         # Re-lanzar excepciones HTTP ya formateadas
         raise
     except Exception as e:
-        db.rollback()  # Revertir transacción en caso de error
-        print(f"Error al crear proveedor: {str(e)}")
+        await db.rollback()  # Revertir transacción en caso de error
+        logger.error(f"Error al crear proveedor: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al crear proveedor: {str(e)}"
@@ -121,8 +123,8 @@ async def create_supplier(
 @router.get("/{supplier_id}", response_model=SupplierResponse)
 async def get_supplier(
     supplier_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Obtener un proveedor por su ID.
@@ -131,7 +133,7 @@ async def get_supplier(
     """
     try:
         # Buscar el proveedor en la BD
-        db_supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
+        db_supplier = await db.get(Supplier, supplier_id)
         
         # Verificar si existe
         if db_supplier is None:
@@ -144,7 +146,7 @@ async def get_supplier(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error al obtener proveedor {supplier_id}: {str(e)}")
+        logger.error(f"Error al obtener proveedor {supplier_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener proveedor: {str(e)}"
@@ -154,8 +156,8 @@ async def get_supplier(
 async def update_supplier(
     supplier_id: int,
     supplier: SupplierUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Actualizar un proveedor existente.
@@ -164,7 +166,7 @@ async def update_supplier(
     """
     try:
         # Buscar el proveedor en la BD
-        db_supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
+        db_supplier = await db.get(Supplier, supplier_id)
         
         # Verificar si existe
         if db_supplier is None:
@@ -175,10 +177,10 @@ async def update_supplier(
         
         # Verificar si ya existe otro proveedor con el mismo nombre (si se está cambiando el nombre)
         if supplier.name and supplier.name != db_supplier.name:
-            existing_supplier = db.query(Supplier).filter(
+            existing_supplier = await db.scalar(select(Supplier).where(
                 Supplier.name == supplier.name,
                 Supplier.id != supplier_id
-            ).first()
+            ))
             if existing_supplier:
                 raise HTTPException(
                     status_code=status.HTTP_409_CONFLICT,
@@ -186,20 +188,20 @@ async def update_supplier(
                 )
         
         # Actualizar solo los campos que vienen en la solicitud
-        supplier_data = supplier.dict(exclude_unset=True)
+        supplier_data = supplier.model_dump(exclude_unset=True)
         for key, value in supplier_data.items():
             setattr(db_supplier, key, value)
         
         # Confirmar cambios
-        db.commit()
-        db.refresh(db_supplier)
+        await db.commit()
+        await db.refresh(db_supplier)
         
         return db_supplier
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()  # Revertir transacción en caso de error
-        print(f"Error al actualizar proveedor {supplier_id}: {str(e)}")
+        await db.rollback()  # Revertir transacción en caso de error
+        logger.error(f"Error al actualizar proveedor {supplier_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al actualizar proveedor: {str(e)}"
@@ -208,8 +210,8 @@ async def update_supplier(
 @router.delete("/{supplier_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_supplier(
     supplier_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async),
     response: Response = None
 ):
     """
@@ -219,7 +221,7 @@ async def delete_supplier(
     """
     try:
         # Buscar el proveedor en la BD
-        db_supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
+        db_supplier = await db.get(Supplier, supplier_id)
         
         # Verificar si existe
         if db_supplier is None:
@@ -236,16 +238,16 @@ async def delete_supplier(
         #     )
         
         # Eliminar y confirmar
-        db.delete(db_supplier)
-        db.commit()
+        await db.delete(db_supplier)
+        await db.commit()
         
         response.status_code = status.HTTP_204_NO_CONTENT
         return None
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()  # Revertir transacción en caso de error
-        print(f"Error al eliminar proveedor {supplier_id}: {str(e)}")
+        await db.rollback()  # Revertir transacción en caso de error
+        logger.error(f"Error al eliminar proveedor {supplier_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al eliminar proveedor: {str(e)}"
@@ -255,8 +257,8 @@ async def delete_supplier(
 async def update_supplier_status(
     supplier_id: int,
     status_value: str = Query(..., alias="status", description="Nuevo estado (active/inactive)"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     Actualizar solo el estado de un proveedor.
@@ -272,7 +274,7 @@ async def update_supplier_status(
             )
         
         # Buscar el proveedor en la BD
-        db_supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
+        db_supplier = await db.get(Supplier, supplier_id)
         
         # Verificar si existe
         if db_supplier is None:
@@ -283,15 +285,15 @@ async def update_supplier_status(
         
         # Actualizar estado
         db_supplier.status = status_value
-        db.commit()
-        db.refresh(db_supplier)
+        await db.commit()
+        await db.refresh(db_supplier)
         
         return db_supplier
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()  # Revertir transacción en caso de error
-        print(f"Error al actualizar estado de proveedor {supplier_id}: {str(e)}")
+        await db.rollback()  # Revertir transacción en caso de error
+        logger.error(f"Error al actualizar estado de proveedor {supplier_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al actualizar estado: {str(e)}"
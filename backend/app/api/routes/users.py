@@ -1,14 +1,16 @@
 from typing import List, Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Ajusta las rutas relativas según tu estructura
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User as UserModel
 # Eliminada referencia a UserRegister que ya no existe
 from app.schemas.user import UserCreate, UserResponse, UserUpdate
-from app.utils.security import get_password_hash, get_current_user, get_current_active_superuser
+from app.utils.security import get_password_hash_async, get_current_user_async, get_current_active_superuser_async
+from app.utils.principal_cache import principal_cache
 
 router = APIRouter()
 
@@ -19,7 +21,7 @@ router = APIRouter()
     summary="Obtener el perfil del usuario actual"
 )
 async def get_current_user_profile(
-    current_user: UserModel = Depends(get_current_user)
+    current_user: UserModel = Depends(get_current_user_async)
 ):
     """
     Obtiene el perfil del usuario autenticado actualmente.
@@ -34,8 +36,8 @@ async def get_current_user_profile(
 )
 async def update_current_user_profile(
     user_in: UserUpdate,
-    current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserModel = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Actualiza el perfil del usuario autenticado actualmente.
@@ -51,7 +53,7 @@ async def update_current_user_profile(
     
     # Si se permite cambiar contraseña:
     if user_in.password:
-        setattr(current_user, "hashed_password", get_password_hash(user_in.password))
+        setattr(current_user, "hashed_password", await get_password_hash_async(user_in.password))
     
     # Actualiza otros campos
     update_data = user_in.model_dump(exclude={"password"}, exclude_unset=True)
@@ -59,8 +61,9 @@ async def update_current_user_profile(
         setattr(current_user, attr, value)
     
     db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    principal_cache.invalidate(current_user.id)
+    await db.refresh(current_user)
     return current_user
 
 @router.post(
@@ -71,8 +74,8 @@ async def update_current_user_profile(
 async def update_profile_image(
     # Puedes usar Form para manejar formularios multipart
     # image: UploadFile = File(...),
-    current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserModel = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Actualiza la imagen de perfil del usuario autenticado.
@@ -91,14 +94,14 @@ async def update_profile_image(
 )
 async def create_user(
     user_in: UserCreate,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_active_superuser)  # Solo administradores
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_active_superuser_async)  # Solo administradores
 ):
     """
     Crea un nuevo usuario (solo administradores).
     """
     # Evitamos duplicados por email
-    exists = db.query(UserModel).filter(UserModel.email == user_in.email).first()
+    exists = await db.scalar(select(UserModel).where(UserModel.email == user_in.email))
     if exists:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -107,7 +110,7 @@ async def create_user(
     
     # Evitamos duplicados por username
     if user_in.username:
-        exists = db.query(UserModel).filter(UserModel.username == user_in.username).first()
+        exists = await db.scalar(select(UserModel).where(UserModel.username == user_in.username))
         if exists:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -115,7 +118,7 @@ async def create_user(
             )
     
     # Hasheamos la contraseña
-    hashed_pw = get_password_hash(user_in.password)
+    hashed_pw = await get_password_hash_async(user_in.password)
     
     # Creamos la instancia
     user_data = user_in.model_dump(exclude={"password"})
@@ -124,8 +127,8 @@ async def create_user(
         hashed_password=hashed_pw
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.get(
@@ -136,15 +139,27 @@ async def create_user(
 async def read_users(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_active_superuser)  # Solo administradores
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_active_superuser_async)  # Solo administradores
 ):
     """
     Lista todos los usuarios (solo administradores).
     """
-    users = db.query(UserModel).offset(skip).limit(limit).all()
+    users = (await db.scalars(select(UserModel).offset(skip).limit(limit))).all()
     return users
 
+@router.get(
+    "/principal-cache/stats",
+    summary="Métricas de la caché de usuario autenticado (admin)"
+)
+async def read_principal_cache_stats(
+    current_user: UserModel = Depends(get_current_active_superuser_async)  # Solo administradores
+):
+    """
+    Devuelve tamaño, aciertos, fallos y tasa de aciertos de la caché de usuario.
+    """
+    return principal_cache.stats()
+
 @router.get(
     "/{user_id}",
     response_model=UserResponse,
@@ -152,13 +167,13 @@ async def read_users(
 )
 async def read_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_active_superuser)  # Solo administradores
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_active_superuser_async)  # Solo administradores
 ):
     """
     Obtiene los detalles de un usuario por su ID (solo administradores).
     """
-    db_user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    db_user = await db.get(UserModel, user_id)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -174,13 +189,13 @@ async def read_user(
 async def update_user(
     user_id: int,
     user_in: UserUpdate,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_active_superuser)  # Solo administradores
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_active_superuser_async)  # Solo administradores
 ):
     """
     Actualiza un usuario existente (solo administradores).
     """
-    db_user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    db_user = await db.get(UserModel, user_id)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -189,7 +204,7 @@ async def update_user(
     
     # Comprobar si estamos cambiando un email a uno que ya existe
     if user_in.email and user_in.email != db_user.email:
-        exists = db.query(UserModel).filter(UserModel.email == user_in.email).first()
+        exists = await db.scalar(select(UserModel).where(UserModel.email == user_in.email))
         if exists:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -198,7 +213,7 @@ async def update_user(
     
     # Comprobar si estamos cambiando un username a uno que ya existe
     if user_in.username and user_in.username != db_user.username:
-        exists = db.query(UserModel).filter(UserModel.username == user_in.username).first()
+        exists = await db.scalar(select(UserModel).where(UserModel.username == user_in.username))
         if exists:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -207,7 +222,7 @@ async def update_user(
     
     # Si se permite cambiar contraseña:
     if user_in.password:
-        setattr(db_user, "hashed_password", get_password_hash(user_in.password))
+        setattr(db_user, "hashed_password", await get_password_hash_async(user_in.password))
     
     # Actualiza otros campos
     update_data = user_in.model_dump(exclude={"password"}, exclude_unset=True)
@@ -215,8 +230,9 @@ async def update_user(
         setattr(db_user, attr, value)
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    principal_cache.invalidate(user_id)
+    await db.refresh(db_user)
     return db_user
 
 @router.delete(
@@ -226,8 +242,8 @@ async def update_user(
 )
 async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_active_superuser)  # Solo administradores
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_active_superuser_async)  # Solo administradores
 ):
     """
     Elimina un usuario (solo administradores).
@@ -239,15 +255,16 @@ async def delete_user(
             detail="No puede eliminar su propia cuenta"
         )
     
-    db_user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    db_user = await db.get(UserModel, user_id)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Usuario no encontrado"
         )
     
-    db.delete(db_user)
-    db.commit()
+    await db.delete(db_user)
+    await db.commit()
+    principal_cache.invalidate(user_id)
     return None
 
 @router.patch(
@@ -258,8 +275,8 @@ async def delete_user(
 async def set_user_status(
     user_id: int,
     is_active: bool,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_active_superuser)  # Solo administradores
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_active_superuser_async)  # Solo administradores
 ):
     """
     Activa o desactiva un usuario (solo administradores).
@@ -271,7 +288,7 @@ async def set_user_status(
             detail="No puede desactivar su propia cuenta"
         )
     
-    db_user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    db_user = await db.get(UserModel, user_id)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -280,6 +297,7 @@ async def set_user_status(
     
     db_user.is_active = is_active
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    principal_cache.invalidate(user_id)
+    await db.refresh(db_user)
     return db_user
\ No newline at end of file
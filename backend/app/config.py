@@ -1,21 +1,42 @@
 import os
 from typing import Optional, Dict, Any
-from pydantic_settings import BaseSettings # <--- Importación correcta
-from pydantic import AnyUrl, validator # Otras importaciones de pydantic
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import AnyUrl
 from dotenv import load_dotenv
 
 load_dotenv()
 
 class Settings(BaseSettings):
+        model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", case_sensitive=True)
+
         ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
         
         # Base de datos
         DATABASE_URL: AnyUrl
+        # Pool de conexiones del engine
+        DB_POOL_SIZE: int = 10
+        DB_MAX_OVERFLOW: int = 20
+        DB_POOL_TIMEOUT: int = 30          # segundos esperando una conexión libre
+        DB_POOL_RECYCLE: int = 1800        # segundos antes de reabrir una conexión
+        DB_POOL_PRE_PING: bool = True      # descarta conexiones caídas (p. ej. tras un failover)
+        DB_STATEMENT_TIMEOUT_MS: int = 30000  # 0 = sin límite
+        # Réplica de lectura para reportes y listados (vacío = todo al primario)
+        DATABASE_REPLICA_URL: Optional[str] = None
+        DB_REPLICA_MAX_LAG_SECONDS: float = 5.0     # más atraso que esto => primario
+        DB_REPLICA_CHECK_INTERVAL_SECONDS: float = 5.0
         
         # Seguridad
         SECRET_KEY: str
         ALGORITHM: str = "HS256"
         ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+        # Factor de trabajo de bcrypt (2^rondas); los hashes con otro valor se
+        # regeneran al iniciar sesión
+        BCRYPT_ROUNDS: int = 12
+        # Máximo de hashes bcrypt calculados en paralelo
+        PASSWORD_HASH_WORKERS: int = 4
+        # Caché del usuario autenticado (0 desactiva la caché)
+        PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+        PRINCIPAL_CACHE_MAX_SIZE: int = 10000
         
         # Servidor
         API_PORT: int = 8000
@@ -29,15 +50,60 @@ class Settings(BaseSettings):
         
         # Carpetas
         REPORTS_FOLDER: str = "reports"
+        
+        # Reportes en segundo plano: procesos del pool (0 = un hilo en el
+        # mismo proceso, para pruebas o desarrollo con SQLite)
+        REPORT_JOB_WORKERS: int = 2
+        # Procesos para las partes de un paquete (POST /reports/bundle): con
+        # uno por reporte el paquete tarda lo que su reporte más lento
+        REPORT_BUNDLE_WORKERS: int = 6
+        # Un trabajo sin avances durante este tiempo se considera perdido
+        REPORT_JOB_STALE_SECONDS: int = 3600
+        # Dashboards calculados a la vez (cada uno usa un hilo y una conexión
+        # por widget); los demás esperan su turno antes de lanzar consultas
+        DASHBOARD_CONCURRENT_BUILDS: int = 5
+        # Zona horaria del negocio: define dónde empieza y termina cada día en
+        # los filtros por fecha y en los agrupamientos por día de los reportes
+        REPORT_TIMEZONE: str = "UTC"
+        # Cada cuánto se incorporan las ventas nuevas a los agregados de reportes
+        REPORT_AGGREGATES_INTERVAL_MINUTES: int = 15
         UPLOADS_FOLDER: str = "uploads"
         
+        # Respaldos de la base de datos
+        BACKUPS_FOLDER: str = "backups"
+        # Procesos de pg_dump en formato directorio (una tabla por proceso)
+        BACKUP_PARALLEL_JOBS: int = 4
+        # Argumento de pg_dump --compress: nivel gzip ("6"); PostgreSQL 16+
+        # acepta también "zstd:3" o "lz4"
+        BACKUP_COMPRESSION: str = "6"
+        # Retención: se conservan siempre los últimos BACKUP_RETENTION_COUNT
+        # respaldos completos; de los demás, los de más de BACKUP_RETENTION_DAYS días se borran
+        BACKUP_RETENTION_COUNT: int = 7
+        BACKUP_RETENTION_DAYS: int = 30
+        # Un respaldo sin terminar después de este tiempo se considera perdido
+        BACKUP_TIMEOUT_SECONDS: int = 6 * 3600
+        
+        # Rate limiting: políticas "N/second|minute|hour|day"
+        RATE_LIMIT_ENABLED: bool = True
+        RATE_LIMIT_DEFAULT: str = "100/minute"        # Anónimos, por IP
+        RATE_LIMIT_AUTHENTICATED: str = "300/minute"  # Por usuario
+        RATE_LIMIT_ROUTES: Dict[str, str] = {
+            "/api/auth/login": "10/minute",
+            "/api/auth/register": "5/minute",
+        }
+        RATE_LIMIT_EXEMPT_PATHS: list = ["/health", "/metrics", "/api/docs", "/api/redoc", "/openapi.json"]
+        # memory:// (por proceso) o sqlite:///ruta.db (compartido entre workers)
+        RATE_LIMIT_STORAGE_URL: str = "memory://"
+        RATE_LIMIT_MAX_KEYS: int = 100000
+        
+        # Métricas (/metrics)
+        METRICS_ENABLED: bool = True
+        
         # Logging
         LOG_LEVEL: str = "INFO"
-        
-        class Config:
-            env_file = ".env"
-            env_file_encoding = "utf-8"
-            case_sensitive = True
+        LOG_FORMAT: str = "json"      # json | text
+        # Fracción de solicitudes cuyos logs INFO se registran (WARNING+ siempre)
+        LOG_SAMPLE_RATE: float = 1.0
 
     # Crear instancia de configuración
 settings = Settings()
\ No newline at end of file
@@ -10,6 +10,7 @@ from .models.customer import Customer
 from .models.sale import Sale, SaleItem
 from .models.inventory import InventoryMovement
 from .utils.security import get_password_hash
+from .services.customer_stats import rebuild_customer_stats, score_customers
 
 def seed_database(db: Session, num_products=50, num_customers=20, num_sales=100) -> None:
     """
@@ -208,6 +209,10 @@ def seed_database(db: Session, num_products=50, num_customers=20, num_sales=100)
     db.commit()
     print(f"Ventas creadas: {created_sales}")
     
+    # Las ventas se insertaron sin pasar por el API: reconstruir los resúmenes de clientes
+    rebuild_customer_stats(db)
+    score_customers(db)
+    
     # 5. Crear algunos movimientos de inventario adicionales (compras, ajustes)
     inventory_movements = 0
     
@@ -1,22 +1,260 @@
 #app/database.py
-from sqlalchemy import create_engine
+from fastapi import Depends
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.util import await_only
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+import inspect
+import logging
+import threading
+import time
 
-load_dotenv()
+from app.config import settings
+from app.metrics import db_pool_wait_seconds, db_pool_timeouts_total, db_read_routing_total, register_collector
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+logger = logging.getLogger(__name__)
 
-    # --- Añadir estas líneas temporalmente ---
-print(f"DEBUG: DATABASE_URL cargada: {DATABASE_URL}")
-if DATABASE_URL is None:
-        print("DEBUG: ERROR - DATABASE_URL es None. La carga de .env pudo fallar o la variable no está definida.")
-    # ---------------------------------------
-engine = create_engine(DATABASE_URL) # Aquí es donde falla si es None
+DATABASE_URL = str(settings.DATABASE_URL)
+
+# Driver async para cada motor soportado por el engine asíncrono
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+class _TimedPoolMixin:
+    """
+    Mide cuánto espera cada checkout por una conexión libre. Esperas altas
+    indican que el pool (tamaño + overflow) es chico para la carga.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            db_pool_timeouts_total.inc()
+            raise
+        finally:
+            db_pool_wait_seconds.observe(time.perf_counter() - start)
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    """QueuePool del engine síncrono con medición de esperas."""
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    """Pool del engine asíncrono con medición de esperas."""
+
+def async_database_url(url: str) -> str:
+    """
+    Convierte una URL síncrona (sqlite://, postgresql://, postgresql+psycopg2://)
+    en la equivalente con driver async (aiosqlite, asyncpg).
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No hay driver async configurado para '{backend}'")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+def _engine_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Opciones de create_engine según la configuración y el motor de base de datos.
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    connect_args: Dict[str, Any] = {}
+    timeout_ms = settings.DB_STATEMENT_TIMEOUT_MS
+
+    # SQLite en memoria usa un pool propio (una conexión por hilo) sin overflow
+    in_memory = backend == "sqlite" and parsed.database in (None, "", ":memory:")
+    if not in_memory:
+        options.update(
+            poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+
+    if backend == "postgresql":
+        if timeout_ms and is_async:
+            # asyncpg no acepta `options`: los parámetros van en server_settings
+            connect_args["server_settings"] = {"statement_timeout": str(timeout_ms)}
+        elif timeout_ms:
+            connect_args["options"] = f"-c statement_timeout={timeout_ms}"
+    elif backend == "mysql":
+        if timeout_ms:
+            connect_args["init_command"] = f"SET SESSION MAX_EXECUTION_TIME={timeout_ms}"
+
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+def _install_sqlite_statement_timeout(engine: Engine, timeout_ms: int) -> None:
+    """
+    Interrumpe las sentencias SQLite que superan `timeout_ms`: el progress
+    handler se ejecuta cada N instrucciones de la VM y aborta si pasó el plazo.
+    """
+    timeout = timeout_ms / 1000
+
+    # `info` es el mismo diccionario en el evento connect y en Connection.info
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        info = connection_record.info
+        info["statement_deadline"] = None
+
+        def check():
+            limit = info["statement_deadline"]
+            return 1 if limit is not None and time.monotonic() > limit else 0
+
+        # Con aiosqlite la conexión del driver es async; el evento corre dentro
+        # del greenlet de SQLAlchemy, así que se puede esperar con await_only
+        result = connection_record.driver_connection.set_progress_handler(check, 10_000)
+        if inspect.isawaitable(result):
+            await_only(result)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info["statement_deadline"] = time.monotonic() + timeout
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        conn.info["statement_deadline"] = None
+
+    # Un error o el ping del pool no deben heredar el plazo de otra sentencia
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        if context.connection is not None:
+            context.connection.info["statement_deadline"] = None
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        connection_record.info["statement_deadline"] = None
+
+def create_db_engine(url: str) -> Engine:
+    """Crea un engine con el pool y los timeouts configurados en Settings."""
+    engine = create_engine(url, **_engine_options(url))
+    if engine.dialect.name == "sqlite" and settings.DB_STATEMENT_TIMEOUT_MS:
+        _install_sqlite_statement_timeout(engine, settings.DB_STATEMENT_TIMEOUT_MS)
+    logger.info(f"Database engine: {make_url(url).render_as_string(hide_password=True)}")
+    return engine
+
+def create_async_db_engine(url: str) -> AsyncEngine:
+    """
+    Crea el engine asíncrono (aiosqlite / asyncpg) equivalente a `url`, con el
+    mismo pool y timeouts que el síncrono.
+    """
+    async_url = async_database_url(url)
+    engine = create_async_engine(async_url, **_engine_options(async_url, is_async=True))
+    if engine.dialect.name == "sqlite" and settings.DB_STATEMENT_TIMEOUT_MS:
+        _install_sqlite_statement_timeout(engine.sync_engine, settings.DB_STATEMENT_TIMEOUT_MS)
+    logger.info(f"Async database engine: {make_url(async_url).render_as_string(hide_password=True)}")
+    return engine
+
+def replication_lag_seconds(connection: Connection) -> Optional[float]:
+    """
+    Atraso de la réplica en segundos, o None si no se puede determinar.
+    En PostgreSQL es 0 si no hay WAL pendiente de aplicar; en motores sin
+    replicación (SQLite) se asume 0.
+    """
+    if connection.dialect.name == "postgresql":
+        return connection.execute(text(
+            "SELECT CASE"
+            " WHEN NOT pg_is_in_recovery() THEN 0"
+            " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+            " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+            " END"
+        )).scalar()
+    return 0.0
+
+class ReplicaRouter:
+    """
+    Decide si las sesiones de solo lectura van a la réplica o al primario.
+
+    El atraso de la réplica se consulta como máximo una vez por
+    `check_interval` segundos (un solo hilo a la vez; los demás usan el último
+    resultado). Si la réplica no responde o supera `max_lag_seconds`, las
+    lecturas vuelven al primario hasta la siguiente comprobación.
+    """
+
+    def __init__(
+        self,
+        engine: Optional[Engine],
+        max_lag_seconds: float,
+        check_interval: float,
+        lag_probe: Callable[[Connection], Optional[float]] = replication_lag_seconds
+    ):
+        self.engine = engine
+        self.session_factory = (
+            sessionmaker(autocommit=False, autoflush=False, bind=engine) if engine is not None else None
+        )
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.lag_probe = lag_probe
+        self.lag_seconds: Optional[float] = None
+        self._healthy = False
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def use_replica(self) -> bool:
+        if self.engine is None:
+            return False
+        if time.monotonic() - self._checked_at >= self.check_interval and self._lock.acquire(blocking=False):
+            try:
+                self._healthy = self._check()
+                self._checked_at = time.monotonic()
+            finally:
+                self._lock.release()
+        return self._healthy
+
+    @property
+    def healthy(self) -> bool:
+        return self._healthy
+
+    def mark_unhealthy(self) -> None:
+        """Envía las lecturas al primario hasta la próxima comprobación."""
+        self._healthy = False
+        self._checked_at = time.monotonic()
+
+    def _check(self) -> bool:
+        try:
+            with self.engine.connect() as conn:
+                lag = self.lag_probe(conn)
+        except Exception as e:
+            logger.warning(f"Réplica no disponible, lecturas al primario: {e}")
+            self.lag_seconds = None
+            return False
+        self.lag_seconds = lag
+        if lag is None or lag > self.max_lag_seconds:
+            logger.warning(f"Réplica atrasada ({lag}s > {self.max_lag_seconds}s), lecturas al primario")
+            return False
+        return True
+
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_router = ReplicaRouter(
+    create_db_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None,
+    max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.DB_REPLICA_CHECK_INTERVAL_SECONDS
+)
+
+def _collect_replica():
+    if replica_router.engine is not None:
+        yield "db_replica_healthy", "gauge", "1 si las lecturas van a la réplica", [({}, int(replica_router.healthy))]
+        if replica_router.lag_seconds is not None:
+            yield "db_replica_lag_seconds", "gauge", "Último atraso medido de la réplica", [({}, replica_router.lag_seconds)]
+
+register_collector(_collect_replica)
+
+# Engine asíncrono para los endpoints `async def`: las consultas no bloquean el
+# event loop y un worker atiende muchas solicitudes lentas a la vez.
+# expire_on_commit=False porque en async no hay carga perezosa de atributos.
+async_engine = create_async_db_engine(DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency
@@ -25,4 +263,32 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db(primary: Session = Depends(get_db)) -> Iterator[Session]:
+    """
+    Sesión para endpoints de solo lectura (reportes, listados pesados): usar
+    `Depends(get_read_db)` en lugar de `Depends(get_db)` marca la ruta como de
+    solo lectura. Va a la réplica si está configurada y al día; si no, usa la
+    sesión del primario (que no abre conexión hasta su primera consulta).
+    """
+    if not replica_router.use_replica():
+        db_read_routing_total.inc("primary")
+        yield primary
+        return
+
+    db_read_routing_total.inc("replica")
+    db = replica_router.session_factory()
+    try:
+        yield db
+    except DBAPIError as e:
+        # Réplica caída a mitad de la solicitud: las siguientes van al primario
+        if e.connection_invalidated:
+            replica_router.mark_unhealthy()
+        raise
+    finally:
+        db.close()
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -6,47 +6,100 @@ from .database import SessionLocal, engine, Base
 from .models.user import User
 from .utils.security import get_password_hash
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
 # Importar todos los modelos para que SQLAlchemy los reconozca
 from .models.user import User
 from .models.category import Category
 from .models.product import Product
-from .models.customer import Customer
+from .models.customer import Customer, CustomerStats
 from .models.sale import Sale, SaleItem
-from .models.inventory import InventoryMovement
+from .models.inventory import InventoryMovement, StockSnapshot
 from .models.supplier import Supplier  # Asegúrate de importar el modelo de Supplier
 # Importar también purchase_order si lo has creado
 from .models.purchase_order import PurchaseOrder, purchase_order_items, PurchaseOrderReceipt, PurchaseOrderReceiptItem
+from .models.cost_layer import InventoryCostLayer, CostLayerConsumption
+from .models.report_job import ReportJob
+from .models.report_aggregate import ReportWatermark, SalesDaily, ProductSalesDaily, CustomerSalesDaily, InventoryValueByProduct
 
 load_dotenv()
 
-# Configuración de logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+# Tablas que crea la migración 0001, es decir, las que creaba create_all antes
+# de Alembic. Las posteriores las crean sus migraciones (con sus datos iniciales)
+LEGACY_TABLES = frozenset({
+    "categories", "customers", "suppliers", "users", "products", "purchase_orders",
+    "sales", "inventory_movements", "purchase_order_items", "purchase_order_receipts",
+    "sale_items", "stock_snapshots", "inventory_cost_layers",
+    "purchase_order_receipt_items", "cost_layer_consumptions",
+})
+
+def alembic_config(connection=None):
+    """Configuración de Alembic del proyecto; `connection` se reutiliza en env.py."""
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
 def create_tables() -> None:
     """
-    Crea todas las tablas definidas en los modelos que no existen en la base de datos.
+    Verifica el esquema una sola vez al arrancar (importar los modelos no toca la base).
+
+    - Base vacía: crea todas las tablas y la marca con la última migración.
+    - Base con migraciones: registra un error si hay migraciones pendientes (los
+      modelos necesitan head); aplicarlas es un paso explícito del despliegue
+      (`alembic upgrade head`).
+    - Base creada con create_all antes de Alembic: crea solo las tablas de 0001
+      que falten y pide marcarla con `alembic stamp 0001` y actualizarla; el
+      resto del esquema lo crean las migraciones.
     """
-    logger.info("Verificando y creando tablas necesarias...")
-    
-    # Obtener tablas existentes
-    inspector = inspect(engine)
-    existing_tables = inspector.get_table_names()
-    
-    # Crear todas las tablas que no existen
-    tables_created = 0
-    for table in Base.metadata.sorted_tables:
-        if table.name not in existing_tables:
-            logger.info(f"Creando tabla: {table.name}")
-            table.create(engine)
-            tables_created += 1
+    from alembic import command
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    logger.info("Verificando esquema de la base de datos...")
     
-    if tables_created > 0:
-        logger.info(f"Se crearon {tables_created} tablas nuevas")
-    else:
-        logger.info("Todas las tablas ya existen")
+    with engine.begin() as connection:
+        # Obtener tablas existentes
+        existing_tables = set(inspect(connection).get_table_names())
+        missing = [table for table in Base.metadata.sorted_tables if table.name not in existing_tables]
+        config = alembic_config(connection)
+        head = ScriptDirectory.from_config(config).get_current_head()
+
+        if len(missing) == len(Base.metadata.sorted_tables):
+            logger.info("Base de datos vacía: creando esquema completo")
+            Base.metadata.create_all(bind=connection, checkfirst=False)
+            command.stamp(config, "head")
+            logger.info(f"Esquema creado en la revisión {head}")
+            return
+
+        if "alembic_version" in existing_tables:
+            current = MigrationContext.configure(connection).get_current_revision()
+            if current != head:
+                logger.error(
+                    f"Esquema desactualizado ({current} -> {head}): las consultas sobre tablas o "
+                    f"columnas nuevas fallarán hasta ejecutar 'alembic upgrade head'"
+                )
+            else:
+                logger.info(f"Esquema en la revisión {head}")
+            return
+
+        # Crear las tablas de 0001 que no existen, en orden de dependencias
+        missing = [table for table in missing if table.name in LEGACY_TABLES]
+        if missing:
+            logger.info(f"Creando tablas: {', '.join(table.name for table in missing)}")
+            Base.metadata.create_all(bind=connection, tables=missing, checkfirst=False)
+        logger.error(
+            "La base de datos no tiene versión de Alembic: ejecute "
+            "'alembic stamp 0001 && alembic upgrade head' para crear las tablas, columnas e índices pendientes"
+        )
 
 def init_db() -> None:
     """
@@ -0,0 +1,113 @@
+#app/logging_config.py
+import atexit
+import contextvars
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.config import settings
+
+# Id de la solicitud en curso y si sus logs informativos se registran (muestreo)
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+request_sampled_var: contextvars.ContextVar[bool] = contextvars.ContextVar("request_sampled", default=True)
+
+# Atributos estándar de LogRecord; el resto se considera un campo estructurado (extra=...)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[QueueHandler] = None
+
+def start_request(request_id: str) -> None:
+    """Asocia los logs del contexto actual a una solicitud y decide si se muestrea."""
+    request_id_var.set(request_id)
+    request_sampled_var.set(
+        settings.LOG_SAMPLE_RATE >= 1 or random.random() < settings.LOG_SAMPLE_RATE
+    )
+
+class RequestContextFilter(logging.Filter):
+    """
+    Añade el id de solicitud al registro y descarta los logs por debajo de
+    WARNING de las solicitudes no muestreadas. Corre en el hilo que genera el
+    log, donde el contexto de la solicitud está disponible.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return record.levelno >= logging.WARNING or request_sampled_var.get()
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro, con los campos pasados en `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler que no formatea en el hilo de la solicitud: solo fija el
+    mensaje (los argumentos podrían cambiar después) y deja el JSON, la traza y
+    la escritura a stdout al hilo del QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+def configure_logging() -> None:
+    """
+    Configura el logging de la aplicación una sola vez: el logger raíz escribe
+    en una cola y un QueueListener en segundo plano formatea y escribe a stdout.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+        ))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _handler = _DeferredQueueHandler(log_queue)
+    _handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.setLevel(settings.LOG_LEVEL)
+    root.addHandler(_handler)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging() -> None:
+    """Vacía la cola de logs pendientes y detiene el listener."""
+    global _listener, _handler
+    if _listener is not None:
+        logging.getLogger().removeHandler(_handler)
+        _listener.stop()
+        _listener = None
+        _handler = None
@@ -1,50 +1,25 @@
-#app/main.py
 import os
 import logging
 import datetime
-from fastapi import HTTPException, FastAPI, Request, Response, Depends
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, HTTPException, FastAPI, Request, Response, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from app.api.api import api_router
 from app.initialization import init_db
-from app.middleware.logging import logging_middleware
-from app.middleware.rate_limiter import rate_limiting_middleware
+from app.middleware.logging import LoggingMiddleware
+from app.middleware.rate_limiter import RateLimitMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.metrics import REGISTRY, instrument_engine
+from app.database import engine, async_engine, replica_router
 from app.config import settings
-from app.scheduled_tasks import start_scheduler
-from app.api.routes import users
-from app.api.routes.suppliers import router as suppliers_router
+from app.logging_config import configure_logging
+from app.services import backups
+from app.services.report_jobs import shutdown_executor
 from app.api.routes.purchase_orders import router as purchase_orders_router
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
 logger = logging.getLogger("app")
 
-# Actualiza la definición de app en main.py
-app = FastAPI(
-    title="POS & Inventory API",
-    description="API para un sistema de punto de venta e inventario",
-    version="1.0.0",
-    openapi_tags=[
-        {"name": "authentication", "description": "Operaciones de autenticación"},
-        {"name": "products", "description": "Gestión de productos"},
-        {"name": "categories", "description": "Gestión de categorías"},
-        {"name": "sales", "description": "Operaciones de ventas"},
-        {"name": "inventory", "description": "Gestión de inventario"},
-        {"name": "customers", "description": "Gestión de clientes"},
-        {"name": "reports", "description": "Generación de reportes"},
-        {"name": "administration", "description": "Funciones administrativas"},
-        {"name": "suppliers", "description": "Gestión de proveedores"},
-        {"name": "purchase-orders", "description": "Gestión de órdenes de compra"},
-        {"name": "health", "description": "Verificación de estado del sistema"},
-    ],
-    docs_url="/api/docs",
-    redoc_url="/api/redoc",
-)
-
 # Configurar CORS - Expandido para desarrollo
 origins = [
     "http://localhost:3000",     # React default
@@ -61,55 +36,21 @@ if settings.ENVIRONMENT == "production":
         "https://app.yourdomain.com",
     ])
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-    expose_headers=["X-Total-Count", "Content-Disposition"],
-)
-
-# Añadir middleware personalizado
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        logger.info(f"Incoming request: {request.method} {request.url.path}")
-        return await logging_middleware(request, call_next)
-
-class RateLimitingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        return await rate_limiting_middleware(request, call_next)
-
-app.add_middleware(LoggingMiddleware)
-app.add_middleware(RateLimitingMiddleware)
-
-# Manejador global de excepciones
-@app.exception_handler(Exception)
-async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Error no controlado: {str(exc)}", exc_info=True)
-    return JSONResponse(
-        status_code=500,
-        content={"detail": "Error interno del servidor", "path": request.url.path},
-    )
-
-# Incluir todos los routers bajo el prefijo /api
-app.include_router(api_router, prefix="/api")
-app.include_router(purchase_orders_router, prefix="/api/purchase-orders")
-
-# ÚNICO evento de startup
-@app.on_event("startup")
-async def startup_event():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
     """
-    Inicializa componentes al iniciar la aplicación.
+    Inicializa componentes al iniciar la aplicación y libera las conexiones
+    al detenerla. Nada de esto ocurre al importar el módulo.
     """
     logger.info("Iniciando aplicación...")
     try:
-        logger.info("Inicializando base de datos...")
+        logger.info("Verificando esquema de base de datos...")
         init_db()
         logger.info("Base de datos inicializada correctamente")
         
         # Iniciar tareas programadas en entornos de producción
         if settings.ENVIRONMENT == "production":
+            from app.scheduled_tasks import start_scheduler
             logger.info("Iniciando tareas programadas...")
             start_scheduler()
             logger.info("Tareas programadas iniciadas correctamente")
@@ -119,14 +60,23 @@ async def startup_event():
     
     logger.info(f"Aplicación iniciada en modo: {settings.ENVIRONMENT}")
     logger.info(f"CORS configurado para orígenes: {origins}")
+    yield
+    # Trabajos de reportes: los que no terminaron se marcarán como perdidos
+    shutdown_executor()
+    backups.shutdown_executor()
+    # Las conexiones async deben cerrarse dentro del event loop que las creó
+    await async_engine.dispose()
+
+# Rutas propias de la aplicación (fuera de /api)
+system_router = APIRouter()
 
-@app.get("/")
+@system_router.get("/")
 async def root():
     logger.info("Acceso a la ruta raíz")
     return {"message": "POS & Inventory API"}
 
 # NUEVO: Endpoint de health check para verificación de conexión
-@app.get("/health", tags=["health"])
+@system_router.get("/health", tags=["health"])
 async def health_check():
     """
     Endpoint para verificar que la API está funcionando correctamente.
@@ -140,8 +90,18 @@ async def health_check():
         "api_version": "1.0.0"
     }
 
+@system_router.get("/metrics", tags=["health"], include_in_schema=False)
+async def metrics():
+    """
+    Métricas en formato de texto de Prometheus: solicitudes por ruta, latencias,
+    solicitudes en curso, tiempos de SQL, estado del pool y cachés.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # NUEVO: Endpoint para verificar el estado de CORS
-@app.options("/cors-test", tags=["health"])
+@system_router.options("/cors-test", tags=["health"])
 async def cors_preflight_check():
     """
     Endpoint para verificar que CORS está configurado correctamente.
@@ -149,7 +109,7 @@ async def cors_preflight_check():
     logger.info("Verificación de preflight CORS")
     return {}
 
-@app.get("/cors-test", tags=["health"])
+@system_router.get("/cors-test", tags=["health"])
 async def cors_check():
     """
     Endpoint para verificar que CORS está configurado correctamente.
@@ -157,7 +117,7 @@ async def cors_check():
     logger.info("Verificación de CORS")
     return {"cors_test": "success"}
 
-@app.post("/api/seed-database", tags=["administration"])
+@system_router.post("/api/seed-database", tags=["administration"])
 async def seed_db(request: Request):
     """
     Puebla la base de datos con datos de ejemplo.
@@ -200,6 +160,77 @@ async def seed_db(request: Request):
     finally:
         db.close()
 
+def create_app() -> FastAPI:
+    """
+    Construye la aplicación: logging, middleware, routers y el ciclo de vida
+    (esquema y scheduler se verifican al arrancar, no al importar).
+    Con uvicorn: `uvicorn app.main:create_app --factory`.
+    """
+    # Configurar logging (una sola vez para toda la aplicación)
+    configure_logging()
+    
+    app = FastAPI(
+        title="POS & Inventory API",
+        description="API para un sistema de punto de venta e inventario",
+        version="1.0.0",
+        openapi_tags=[
+            {"name": "authentication", "description": "Operaciones de autenticación"},
+            {"name": "products", "description": "Gestión de productos"},
+            {"name": "categories", "description": "Gestión de categorías"},
+            {"name": "sales", "description": "Operaciones de ventas"},
+            {"name": "inventory", "description": "Gestión de inventario"},
+            {"name": "customers", "description": "Gestión de clientes"},
+            {"name": "reports", "description": "Generación de reportes"},
+            {"name": "administration", "description": "Funciones administrativas"},
+            {"name": "suppliers", "description": "Gestión de proveedores"},
+            {"name": "purchase-orders", "description": "Gestión de órdenes de compra"},
+            {"name": "health", "description": "Verificación de estado del sistema"},
+        ],
+        docs_url="/api/docs",
+        redoc_url="/api/redoc",
+        lifespan=lifespan,
+        # orjson en lugar de json.dumps para todas las respuestas con response_model
+        default_response_class=ORJSONResponse,
+    )
+    
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Total-Count", "Content-Disposition"],
+    )
+
+    # Añadir middleware personalizado (ASGI puro). El último añadido es el más
+    # externo: el logging envuelve al rate limiting para registrar también los 429
+    app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(LoggingMiddleware)
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+        # Tiempos por sentencia y estado del pool de la base de datos
+        instrument_engine(engine)
+        instrument_engine(async_engine.sync_engine, name="async")
+        if replica_router.engine is not None:
+            instrument_engine(replica_router.engine, name="replica")
+
+    # Manejador global de excepciones
+    @app.exception_handler(Exception)
+    async def global_exception_handler(request: Request, exc: Exception):
+        logger.error(f"Error no controlado: {str(exc)}", exc_info=True)
+        return JSONResponse(
+            status_code=500,
+            content={"detail": "Error interno del servidor", "path": request.url.path},
+        )
+
+    # Incluir todos los routers bajo el prefijo /api
+    app.include_router(api_router, prefix="/api")
+    app.include_router(purchase_orders_router, prefix="/api/purchase-orders")
+    app.include_router(system_router)
+    return app
+
+app = create_app()
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
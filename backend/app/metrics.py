@@ -0,0 +1,258 @@
+#app/metrics.py
+"""
+Métricas en formato de texto de Prometheus, sin dependencias externas.
+
+Los contadores, gauges e histogramas son seguros entre hilos (los endpoints
+síncronos y los eventos de SQLAlchemy corren en el threadpool). Los valores que
+ya existen en otro objeto (pool de conexiones, cachés) se leen al exportar
+mediante colectores registrados con `register_collector`.
+"""
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+# (nombre, tipo, ayuda, [(etiquetas, valor)])
+Sample = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence[str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}")
+        return tuple(str(label) for label in labels)
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}"
+            for key, value in items
+        ]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por etiquetas: conteos por bucket (no acumulados, el último es +Inf), suma y total
+        self._values: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, *labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[2] if entry else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        lines = []
+        for key, (counts, total, count) in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                bucket_labels = dict(labels, le=_format_value(float(bound)))
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(
+                    f"{name}{_format_labels(labels)} {_format_value(value)}"
+                    for labels, value in samples
+                )
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+def register_collector(collector: Callable[[], Iterable[Sample]]) -> None:
+    REGISTRY.register_collector(collector)
+
+_caches: Dict[str, Callable[[], Dict]] = {}
+
+def register_cache(name: str, stats: Callable[[], Dict]) -> None:
+    """
+    Publica las estadísticas de una caché. `stats` debe devolver un diccionario
+    con hits, misses, hit_rate y size.
+    """
+    _caches[name] = stats
+
+def _collect_caches() -> Iterable[Sample]:
+    stats = {name: collect() for name, collect in list(_caches.items())}
+    for key, metric, kind, documentation in (
+        ("hits", "cache_hits_total", "counter", "Aciertos de caché"),
+        ("misses", "cache_misses_total", "counter", "Fallos de caché"),
+        ("hit_rate", "cache_hit_ratio", "gauge", "Proporción de aciertos de caché"),
+        ("size", "cache_entries", "gauge", "Entradas en caché"),
+    ):
+        yield metric, kind, documentation, [({"cache": name}, values[key]) for name, values in stats.items()]
+
+register_collector(_collect_caches)
+
+# Solicitudes HTTP (etiqueta `route` = plantilla de la ruta, no la URL concreta)
+http_requests_total = REGISTRY.register(Counter(
+    "http_requests_total", "Solicitudes HTTP atendidas", ("method", "route", "status")
+))
+http_request_duration_seconds = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Duración de las solicitudes HTTP", ("method", "route")
+))
+http_requests_in_progress = REGISTRY.register(Gauge(
+    "http_requests_in_progress", "Solicitudes HTTP en curso", ("method",)
+))
+
+# Base de datos
+db_statement_duration_seconds = REGISTRY.register(Histogram(
+    "db_statement_duration_seconds", "Duración de las sentencias SQL", ("operation",), buckets=DB_BUCKETS
+))
+db_statement_errors_total = REGISTRY.register(Counter(
+    "db_statement_errors_total", "Sentencias SQL que terminaron con error", ("operation",)
+))
+db_pool_wait_seconds = REGISTRY.register(Histogram(
+    "db_pool_wait_seconds", "Espera para obtener una conexión del pool", buckets=DB_BUCKETS
+))
+db_pool_timeouts_total = REGISTRY.register(Counter(
+    "db_pool_timeouts_total", "Checkouts que agotaron pool_timeout sin obtener conexión"
+))
+
+db_read_routing_total = REGISTRY.register(Counter(
+    "db_read_routing_total", "Sesiones de solo lectura por destino", ("target",)
+))
+
+# Engine instrumentado -> valor de la etiqueta `engine`
+_instrumented_engines: "weakref.WeakKeyDictionary[Engine, str]" = weakref.WeakKeyDictionary()
+
+def _collect_pools() -> Iterable[Sample]:
+    """Estado del pool de cada engine instrumentado: una familia por métrica."""
+    pools = [(name, engine.pool) for engine, name in list(_instrumented_engines.items())]
+    for attr, metric, documentation in (
+        ("size", "db_pool_size", "Tamaño configurado del pool de conexiones"),
+        ("checkedout", "db_pool_checked_out", "Conexiones del pool en uso"),
+        ("checkedin", "db_pool_checked_in", "Conexiones libres en el pool"),
+        ("overflow", "db_pool_overflow", "Conexiones abiertas por encima del tamaño del pool"),
+    ):
+        samples = [
+            ({"engine": name, "pool": type(pool).__name__}, getattr(pool, attr)())
+            for name, pool in pools
+            if callable(getattr(pool, attr, None))
+        ]
+        if samples:
+            yield metric, "gauge", documentation, samples
+
+register_collector(_collect_pools)
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") else "OTHER"
+
+def instrument_engine(engine: Engine, name: str = "primary") -> None:
+    """
+    Mide cada sentencia SQL con los eventos before/after_cursor_execute y
+    publica el estado del pool de conexiones del engine (etiqueta `engine`).
+    """
+    if engine in _instrumented_engines:
+        return
+    _instrumented_engines[engine] = name
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start_time"].pop()
+        db_statement_duration_seconds.observe(time.perf_counter() - start, _operation(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("query_start_time") if context.connection is not None else None
+        if starts:
+            starts.pop()
+        db_statement_errors_total.inc(_operation(context.statement or ""))
@@ -1,39 +1,55 @@
-from fastapi import Request
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import time
 import logging
 import uuid
 
-# Configurar logger
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-)
+from app.logging_config import start_request
+
 logger = logging.getLogger("api")
 
-async def logging_middleware(request: Request, call_next):
-    """Middleware para registrar solicitudes y respuestas."""
-    request_id = str(uuid.uuid4())
-    
-    # Registrar detalles de la solicitud
-    logger.info(f"Request {request_id} start: {request.method} {request.url.path}")
-    
-    # Medir tiempo de respuesta
-    start_time = time.time()
-    
-    # Procesar la solicitud
-    response = await call_next(request)
-    
-    # Calcular tiempo de procesamiento
-    process_time = time.time() - start_time
-    
-    # Registrar detalles de la respuesta
-    logger.info(
-        f"Request {request_id} completed: status_code={response.status_code}, "
-        f"process_time={process_time:.4f}s"
-    )
-    
-    # Añadir headers con información de la solicitud
-    response.headers["X-Process-Time"] = str(process_time)
-    response.headers["X-Request-ID"] = request_id
-    
-    return response
\ No newline at end of file
+class LoggingMiddleware:
+    """
+    Middleware ASGI para registrar solicitudes y respuestas.
+
+    Escribe una sola línea por solicitud al terminar la respuesta (con método,
+    ruta, estado y duración como campos estructurados) y añade los
+    headers X-Request-ID y X-Process-Time. Al ser ASGI puro no crea tareas ni
+    streams intermedios como BaseHTTPMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = str(uuid.uuid4())
+        start_request(request_id)
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", f"{time.perf_counter() - start_time:.6f}")
+                headers.append("X-Request-ID", request_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            process_time = time.perf_counter() - start_time
+            logger.info(
+                f"{scope['method']} {scope['path']} {status_code}",
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": round(process_time * 1000, 2),
+                }
+            )
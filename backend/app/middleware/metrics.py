@@ -0,0 +1,44 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import time
+
+from app.metrics import (
+    http_requests_total, http_request_duration_seconds, http_requests_in_progress
+)
+
+# Etiqueta para las rutas que no coinciden con ningún endpoint (evita una serie por URL)
+UNMATCHED_ROUTE = "<unmatched>"
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que cuenta solicitudes por ruta y estado, mide su duración
+    y mantiene el número de solicitudes en curso. La ruta se etiqueta con su
+    plantilla (p. ej. /api/products/{product_id}) una vez resuelta por el router.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        start_time = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_progress.dec(method)
+            route = scope.get("route")
+            route_path = getattr(route, "path", UNMATCHED_ROUTE)
+            http_request_duration_seconds.observe(time.perf_counter() - start_time, method, route_path)
+            http_requests_total.inc(method, route_path, str(status_code))
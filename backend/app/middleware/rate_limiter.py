@@ -1,66 +1,310 @@
-from fastapi import Request, HTTPException, status
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+from jose import JWTError, jwt
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import itertools
+import logging
+import math
+import sqlite3
+import threading
 import time
-from typing import Dict, List, Tuple
-import asyncio
-import os
+import zlib
 
-ENABLE_RATE_LIMITING = False  # Desactivado para desarrollo
+from app.config import settings
 
-async def rate_limiting_middleware(request: Request, call_next):
-    """Middleware para implementar rate limiting."""
-    # Saltar completamente el rate limiting en entorno de desarrollo
-    if not ENABLE_RATE_LIMITING:
-        return await call_next(request)
+logger = logging.getLogger("api.rate_limit")
+
+# Número de locks entre los que se reparten las claves
+LOCK_STRIPES = 64
+# Cada cuántas operaciones se barren las claves inactivas
+SWEEP_EVERY = 1024
+# Segundos que el backend SQLite espera el lock de escritura antes de dejar pasar la solicitud
+SQLITE_BUSY_TIMEOUT = 0.5
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """Límite de `limit` solicitudes por `period` segundos, con ráfagas de hasta `burst`."""
+    limit: int
+    period: float
+    burst: Optional[int] = None
+
+    @property
+    def emission_interval(self) -> float:
+        return self.period / self.limit
+
+    @property
+    def capacity(self) -> int:
+        return self.burst or self.limit
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimitPolicy":
+        """Convierte textos como "100/minute" o "10/second" en una política."""
+        limit, _, unit = value.partition("/")
+        unit = unit.strip().rstrip("s")
+        if unit not in _PERIODS:
+            raise ValueError(f"Periodo de rate limit inválido: {value}")
+        return cls(limit=int(limit), period=_PERIODS[unit])
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float
+
+def gcra(tat: Optional[float], now: float, policy: RateLimitPolicy) -> Tuple[RateLimitResult, float]:
+    """
+    Generic Cell Rate Algorithm: el estado de cada clave es un único número,
+    el instante teórico de llegada (TAT). Devuelve el resultado y el nuevo TAT.
+    """
+    interval = policy.emission_interval
+    tolerance = policy.capacity * interval
+    new_tat = max(tat or now, now) + interval
+    allow_at = new_tat - tolerance
+    if now < allow_at:
+        return RateLimitResult(False, policy.capacity, 0, allow_at - now), tat
+    remaining = int((now - allow_at) / interval)
+    return RateLimitResult(True, policy.capacity, remaining, 0.0), new_tat
+
+class RateLimitBackend(ABC):
+    """
+    Almacén del estado del limitador. Una clave cuyo TAT ya pasó equivale a una
+    clave nueva, así que los backends pueden descartarla sin perder información.
+    """
+
+    # True si hit() hace E/S: el middleware lo llama desde el pool de hilos
+    blocking: bool = False
+
+    @abstractmethod
+    def hit(self, key: str, policy: RateLimitPolicy, now: float) -> RateLimitResult:
+        """Registra una solicitud de forma atómica y devuelve si se permite."""
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Elimina todo el estado."""
+
+class MemoryBackend(RateLimitBackend):
+    """
+    Backend en memoria del proceso. Las claves se reparten en varios
+    diccionarios, cada uno con su lock, para que los hilos no compitan por un
+    lock global. Las claves inactivas se barren periódicamente y cada segmento
+    tiene un tamaño máximo (se descartan las menos recientes).
+    """
+
+    def __init__(self, max_keys: int = 100_000, stripes: int = LOCK_STRIPES):
+        self.stripes = stripes
+        self.max_keys_per_stripe = max(1, max_keys // stripes)
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._buckets: List[Dict[str, float]] = [{} for _ in range(stripes)]
+        self._ops = [0] * stripes
+
+    def hit(self, key: str, policy: RateLimitPolicy, now: float) -> RateLimitResult:
+        index = zlib.crc32(key.encode()) % self.stripes
+        with self._locks[index]:
+            bucket = self._buckets[index]
+            # pop + insert mantiene el orden de uso para descartar las más antiguas
+            result, tat = gcra(bucket.pop(key, None), now, policy)
+            if tat is not None:
+                bucket[key] = tat
+
+            self._ops[index] += 1
+            if self._ops[index] % SWEEP_EVERY == 0:
+                self._sweep(bucket, now)
+            while len(bucket) > self.max_keys_per_stripe:
+                bucket.pop(next(iter(bucket)))
+        return result
+
+    @staticmethod
+    def _sweep(bucket: Dict[str, float], now: float) -> None:
+        for key in [key for key, tat in bucket.items() if tat <= now]:
+            del bucket[key]
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._buckets)
+
+    def reset(self) -> None:
+        for lock, bucket in zip(self._locks, self._buckets):
+            with lock:
+                bucket.clear()
+
+class SQLiteBackend(RateLimitBackend):
+    """
+    Backend compartido entre procesos de la misma máquina mediante un archivo
+    SQLite (sustituto local de un almacén como Redis). Cada actualización se
+    hace en una transacción BEGIN IMMEDIATE, por lo que es atómica entre workers.
+    Si el lock no se obtiene en `timeout` segundos la solicitud se permite: un
+    almacén saturado no debe frenar la API.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, timeout: float = SQLITE_BUSY_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._ops = itertools.count(1)
+        conn = self._connection()
+        # Al arrancar, los workers crean la tabla a la vez: ahí sí se espera el lock
+        conn.execute("PRAGMA busy_timeout = 5000")
+        conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)}")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, policy: RateLimitPolicy, now: float) -> RateLimitResult:
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            logger.warning("Rate limit store is locked, allowing request")
+            return RateLimitResult(True, policy.capacity, policy.capacity, 0.0)
+        try:
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            result, tat = gcra(row[0] if row else None, now, policy)
+            if result.allowed:
+                conn.execute("INSERT OR REPLACE INTO rate_limits (key, tat) VALUES (?, ?)", (key, tat))
+            if next(self._ops) % SWEEP_EVERY == 0:
+                conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def reset(self) -> None:
+        self._connection().execute("DELETE FROM rate_limits")
+
+def create_backend(url: str) -> RateLimitBackend:
+    """Crea el backend a partir de RATE_LIMIT_STORAGE_URL (memory:// o sqlite:///ruta)."""
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    if url.startswith("memory://"):
+        return MemoryBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+    raise ValueError(f"Backend de rate limit no soportado: {url}")
 
 class RateLimiter:
-    def __init__(self, calls: int = 100, period: int = 60):  # Cambiado de 10 a 100
-        self.calls = calls  # número máximo de llamadas permitidas en el período
-        self.period = period  # período en segundos
-        self.tokens: Dict[str, List[float]] = {}  # diccionario para almacenar tokens
-        self.lock = asyncio.Lock()  # lock para acceso concurrente
-    
-    async def _clean_old_tokens(self, ip: str):
-        """Limpia tokens antiguos para una IP."""
-        if ip in self.tokens:
-            now = time.time()
-            self.tokens[ip] = [t for t in self.tokens[ip] if now - t < self.period]
-    
-    async def is_rate_limited(self, request: Request) -> bool:
-        """Verifica si una solicitud debe ser limitada por rate limiting."""
-        ip = request.client.host
-        
-        async with self.lock:
-            await self._clean_old_tokens(ip)
-            
-            # Si no hay tokens para esta IP, inicializarlos
-            if ip not in self.tokens:
-                self.tokens[ip] = []
-            
-            # Verificar si se ha excedido el límite
-            if len(self.tokens[ip]) >= self.calls:
-                return True
-            
-            # Agregar el token
-            self.tokens[ip].append(time.time())
-            return False
+    """
+    Aplica las políticas de rate limiting: una por ruta (por prefijo) si existe,
+    si no la general para usuarios autenticados (por id) o anónimos (por IP).
+    """
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        default_policy: RateLimitPolicy,
+        user_policy: RateLimitPolicy,
+        route_policies: Dict[str, RateLimitPolicy],
+        exempt_paths: Tuple[str, ...] = ()
+    ):
+        self.backend = backend
+        self.default_policy = default_policy
+        self.user_policy = user_policy
+        # El prefijo más largo tiene prioridad
+        self.route_policies = sorted(route_policies.items(), key=lambda item: len(item[0]), reverse=True)
+        self.exempt_paths = exempt_paths
+
+    @staticmethod
+    def _user_id(request: Request) -> Optional[str]:
+        authorization = request.headers.get("authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return None
+        return payload.get("sub")
+
+    def check(self, request: Request) -> Optional[RateLimitResult]:
+        """Devuelve el resultado de la política aplicada, o None si la ruta está exenta."""
+        path = request.url.path
+        if path.startswith(self.exempt_paths):
+            return None
+
+        user_id = self._user_id(request)
+        if user_id is not None:
+            identity, policy = f"user:{user_id}", self.user_policy
+        else:
+            host = request.client.host if request.client else "unknown"
+            identity, policy = f"ip:{host}", self.default_policy
+
+        scope = "*"
+        for prefix, route_policy in self.route_policies:
+            if path.startswith(prefix):
+                scope, policy = prefix, route_policy
+                break
+
+        return self.backend.hit(f"{scope}|{identity}", policy, time.time())
+
+    def reset(self) -> None:
+        self.backend.reset()
 
 # Instancia global del limitador de velocidad
-rate_limiter = RateLimiter()  # Ahora usa los nuevos valores por defecto: 100 llamadas en 60 segundos
-
-async def rate_limiting_middleware(request: Request, call_next):
-    """Middleware para implementar rate limiting."""
-    # Saltar completamente el rate limiting en entorno de desarrollo
-    if not ENABLE_RATE_LIMITING:
-        return await call_next(request)
-    # Excluir rutas específicas del rate limiting, como la documentación
-    if request.url.path.startswith(("/docs", "/redoc", "/openapi.json")):
-        return await call_next(request)
-    # Verificar rate limiting
-    is_limited = await rate_limiter.is_rate_limited(request)
-    if is_limited:
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Too many requests. Please try again later."
-        )
-    # Procesar la solicitud normalmente
-    return await call_next(request)
\ No newline at end of file
+rate_limiter = RateLimiter(
+    backend=create_backend(settings.RATE_LIMIT_STORAGE_URL),
+    default_policy=RateLimitPolicy.parse(settings.RATE_LIMIT_DEFAULT),
+    user_policy=RateLimitPolicy.parse(settings.RATE_LIMIT_AUTHENTICATED),
+    route_policies={path: RateLimitPolicy.parse(value) for path, value in settings.RATE_LIMIT_ROUTES.items()},
+    exempt_paths=tuple(settings.RATE_LIMIT_EXEMPT_PATHS)
+)
+
+class RateLimitMiddleware:
+    """
+    Middleware ASGI de rate limiting. Las solicitudes rechazadas reciben un 429
+    sin llegar a la aplicación; las permitidas llevan los headers X-RateLimit-*.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        if self.limiter.backend.blocking:
+            # Un backend con E/S no debe detener el event loop mientras espera
+            result = await run_in_threadpool(self.limiter.check, Request(scope))
+        else:
+            result = self.limiter.check(Request(scope))
+        if result is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not result.allowed:
+            logger.warning(f"Rate limit exceeded: {scope['method']} {scope['path']}")
+            response = JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={"detail": "Too many requests. Please try again later."},
+                headers={
+                    "Retry-After": str(math.ceil(result.retry_after)),
+                    "X-RateLimit-Limit": str(result.limit),
+                    "X-RateLimit-Remaining": "0",
+                }
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-RateLimit-Limit", str(result.limit))
+                headers.append("X-RateLimit-Remaining", str(result.remaining))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
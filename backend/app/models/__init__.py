@@ -1,12 +1,12 @@
 from .user import User
 from .category import Category
 from .product import Product
-from .inventory import InventoryMovement, MovementType
-from .customer import Customer
+from .inventory import InventoryMovement, MovementType, StockSnapshot
+from .customer import Customer, CustomerStats
 from .sale import Sale, SaleItem, PaymentMethod
 from .supplier import Supplier
 from .purchase_order import PurchaseOrder, PurchaseOrderReceipt, PurchaseOrderReceiptItem
-
-# Para crear todas las tablas
-from ..database import Base, engine
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+from .cost_layer import InventoryCostLayer, CostLayerConsumption
+from .report_job import ReportJob
+from .report_aggregate import ReportWatermark, SalesDaily, ProductSalesDaily, CustomerSalesDaily, InventoryValueByProduct
+from .backup_job import BackupJob
@@ -0,0 +1,29 @@
+from sqlalchemy import BigInteger, Column, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy.sql import func
+from ..database import Base
+
+class BackupJob(Base):
+    """
+    Respaldo de la base de datos. El API crea la fila (queued) y el hilo de
+    respaldos la actualiza con el resultado, el tamaño, la duración y la
+    verificación del archivo.
+    """
+    __tablename__ = "backup_jobs"
+
+    id = Column(String(32), primary_key=True)
+    engine = Column(String(20), nullable=False)                    # postgresql, sqlite
+    # queued, running, completed, failed; pruned cuando la retención borró el archivo
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    # Directorio (pg_dump) o archivo (SQLite) dentro de BACKUPS_FOLDER
+    filename = Column(String(255), nullable=True)
+    size_bytes = Column(BigInteger, nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    # SHA-256 del archivo (o de la lista de archivos del directorio con sus hashes)
+    checksum = Column(String(64), nullable=True)
+    verified_at = Column(DateTime(timezone=True), nullable=True)
+    error = Column(Text, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
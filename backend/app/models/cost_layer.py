@@ -0,0 +1,51 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from ..database import Base
+
+class InventoryCostLayer(Base):
+    """
+    Capa de costo FIFO: una entrada de inventario con su costo unitario y la
+    cantidad que aún no ha sido consumida por ventas o ajustes.
+    """
+    __tablename__ = "inventory_cost_layers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    movement_id = Column(Integer, ForeignKey("inventory_movements.id"), nullable=True, index=True)
+    unit_cost = Column(Float, nullable=False)
+    original_quantity = Column(Integer, nullable=False)
+    remaining_quantity = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relaciones
+    product = relationship("Product")
+    consumptions = relationship("CostLayerConsumption", back_populates="layer")
+
+    __table_args__ = (
+        # Solo las capas abiertas se leen en la valoración y en el consumo FIFO
+        Index(
+            "ix_inventory_cost_layers_open",
+            "product_id", "id",
+            postgresql_where=remaining_quantity > 0,
+            sqlite_where=remaining_quantity > 0,
+        ),
+    )
+
+class CostLayerConsumption(Base):
+    """
+    Consumo de una capa de costo por un movimiento de salida (costo de ventas).
+    `layer_id` es nulo cuando no había capas abiertas y se usó el costo del producto.
+    """
+    __tablename__ = "cost_layer_consumptions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    movement_id = Column(Integer, ForeignKey("inventory_movements.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
+    layer_id = Column(Integer, ForeignKey("inventory_cost_layers.id"), nullable=True)
+    quantity = Column(Integer, nullable=False)
+    unit_cost = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relaciones
+    layer = relationship("InventoryCostLayer", back_populates="consumptions")
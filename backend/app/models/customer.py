@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -17,4 +17,33 @@ class Customer(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relaciones
-    sales = relationship("Sale", back_populates="customer")
\ No newline at end of file
+    sales = relationship("Sale", back_populates="customer")
+
+class CustomerStats(Base):
+    """
+    Resumen de las compras (ventas no canceladas) de cada cliente. Se
+    actualiza en la misma transacción que registra, modifica o cancela la
+    venta; los puntajes RFM y el segmento se recalculan cada noche.
+    """
+    __tablename__ = "customer_stats"
+
+    customer_id = Column(Integer, ForeignKey("customers.id"), primary_key=True)
+    first_purchase_at = Column(DateTime(timezone=True), nullable=True)
+    last_purchase_at = Column(DateTime(timezone=True), nullable=True)
+    purchase_count = Column(Integer, nullable=False, default=0)
+    total_spent = Column(Float, nullable=False, default=0.0)
+    average_purchase = Column(Float, nullable=False, default=0.0)
+    # Quintiles 1-5 (5 = compra más reciente, más frecuente, mayor monto)
+    recency_score = Column(Integer, nullable=True)
+    frequency_score = Column(Integer, nullable=True)
+    monetary_score = Column(Integer, nullable=True)
+    segment = Column(String(length=30), nullable=True)
+    scored_at = Column(DateTime(timezone=True), nullable=True)
+
+    customer = relationship("Customer")
+
+    __table_args__ = (
+        # Mejores clientes y clientes de un segmento, ordenados por monto
+        Index("ix_customer_stats_total_spent", "total_spent"),
+        Index("ix_customer_stats_segment_total_spent", "segment", "total_spent"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -25,4 +25,28 @@ class InventoryMovement(Base):
 
     # Relaciones
     product = relationship("Product", back_populates="inventory_movements")
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+    __table_args__ = (
+        # Kardex, stock a una fecha y reportes filtran por producto y rango de fechas
+        Index("ix_inventory_movements_product_id_created_at", "product_id", "created_at"),
+        # Reporte de movimientos y snapshots: rango de fechas de todos los productos
+        Index("ix_inventory_movements_created_at", "created_at"),
+    )
+
+class StockSnapshot(Base):
+    """
+    Stock de cierre de un producto al final de un día. Permite responder
+    consultas históricas sumando solo los movimientos posteriores al snapshot.
+    """
+    __tablename__ = "stock_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    snapshot_date = Column(Date, nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    closing_quantity = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("snapshot_date", "product_id", name="uq_stock_snapshots_date_product"),
+    )
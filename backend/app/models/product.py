@@ -14,7 +14,7 @@ class Product(Base):
     price = Column(Float)
     cost_price = Column(Float)
     tax_rate = Column(Float, default=0.0)
-    category_id = Column(Integer, ForeignKey("categories.id"))
+    category_id = Column(Integer, ForeignKey("categories.id"), index=True)
     stock_quantity = Column(Integer, default=0)
     min_stock_level = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
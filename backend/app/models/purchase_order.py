@@ -10,7 +10,7 @@ purchase_order_items = Table(
     'purchase_order_items',
     Base.metadata,
     Column('id', Integer, primary_key=True, index=True),
-    Column('purchase_order_id', Integer, ForeignKey('purchase_orders.id', ondelete='CASCADE')),
+    Column('purchase_order_id', Integer, ForeignKey('purchase_orders.id', ondelete='CASCADE'), index=True),
     Column('product_id', Integer, ForeignKey('products.id')),
     Column('quantity', Integer, nullable=False),
     Column('unit_price', Float, nullable=False),
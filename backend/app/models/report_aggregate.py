@@ -0,0 +1,58 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey
+from ..database import Base
+
+class ReportWatermark(Base):
+    """
+    Hasta dónde se incorporaron ventas y movimientos a los agregados de un
+    tipo de reporte. Cada corrida procesa solo lo posterior a la marca, así
+    que una corrida perdida se recupera en la siguiente.
+    """
+    __tablename__ = "report_watermarks"
+
+    report_type = Column(String(50), primary_key=True)  # sales, products, customers, inventory_value
+    last_sale_id = Column(Integer, nullable=False, default=0)
+    last_movement_id = Column(Integer, nullable=False, default=0)
+    # Hora de la base de datos al inicio de la última corrida
+    refreshed_at = Column(DateTime(timezone=True), nullable=True)
+
+class SalesDaily(Base):
+    """Totales de ventas no canceladas por día."""
+    __tablename__ = "sales_daily"
+
+    day = Column(Date, primary_key=True)
+    sales_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    taxes = Column(Float, nullable=False, default=0.0)
+    discounts = Column(Float, nullable=False, default=0.0)
+
+class ProductSalesDaily(Base):
+    """Unidades e importe vendidos por producto y día."""
+    __tablename__ = "product_sales_daily"
+
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    quantity_sold = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    # Suma de precios y número de líneas: el precio promedio de un rango es su cociente
+    unit_price_sum = Column(Float, nullable=False, default=0.0)
+    line_count = Column(Integer, nullable=False, default=0)
+
+class CustomerSalesDaily(Base):
+    """Compras e importe por cliente y día."""
+    __tablename__ = "customer_sales_daily"
+
+    day = Column(Date, primary_key=True)
+    customer_id = Column(Integer, ForeignKey("customers.id"), primary_key=True)
+    purchases = Column(Integer, nullable=False, default=0)
+    total_spent = Column(Float, nullable=False, default=0.0)
+
+class InventoryValueByProduct(Base):
+    """Valor al costo (FIFO) y de venta del stock de cada producto."""
+    __tablename__ = "inventory_value_by_product"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    category_id = Column(Integer, nullable=True, index=True)
+    is_active = Column(Boolean, nullable=False, default=True)
+    stock_quantity = Column(Integer, nullable=False, default=0)
+    cost_value = Column(Float, nullable=False, default=0.0)
+    retail_value = Column(Float, nullable=False, default=0.0)
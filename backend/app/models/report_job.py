@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Text
+from sqlalchemy.sql import func
+from ..database import Base
+
+class ReportJob(Base):
+    """
+    Reporte generado en segundo plano. El API crea la fila (queued) y un
+    proceso del pool de reportes la actualiza con el avance y el archivo final.
+    """
+    __tablename__ = "report_jobs"
+
+    # Identificador aleatorio: también forma parte del nombre del archivo descargable
+    id = Column(String(32), primary_key=True)
+    report_type = Column(String(50), nullable=False)
+    params = Column(JSON, nullable=False, default=dict)
+    export_format = Column(String(10), nullable=False)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, completed, failed
+    progress = Column(Integer, nullable=False, default=0)          # 0-100
+    filename = Column(String(255), nullable=True)
+    file_size = Column(Integer, nullable=True)
+    row_count = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    # Paquetes: archivo, filas y segundos (o error) de cada reporte
+    results = Column(JSON, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Se actualiza con cada avance: un trabajo sin cambios por mucho tiempo quedó huérfano
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -16,14 +16,16 @@ class Sale(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     invoice_number = Column(String(length=50), unique=True, index=True)
-    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=True)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=True, index=True)
     total_amount = Column(Float, nullable=False)
     tax_amount = Column(Float, default=0.0)
     discount_amount = Column(Float, default=0.0)
     payment_method = Column(String(length=50), nullable=False)
     payment_status = Column(String(length=50), default="paid")
     notes = Column(String(length=250), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Lo lee la actualización de los agregados de reportes para recalcular el día
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
     created_by = Column(Integer, ForeignKey("users.id"))
 
     # Relaciones
@@ -35,8 +37,8 @@ class SaleItem(Base):
     __tablename__ = "sale_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    sale_id = Column(Integer, ForeignKey("sales.id"))
-    product_id = Column(Integer, ForeignKey("products.id"))
+    sale_id = Column(Integer, ForeignKey("sales.id"), index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), index=True)
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Float, nullable=False)
     discount = Column(Float, default=0.0)
@@ -1,41 +1,43 @@
 # app/scheduled_tasks.py
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from sqlalchemy.orm import Session
 import datetime
 import logging
 from .database import SessionLocal
 from .services.notifications import check_low_stock_levels
-from .services.reports import generate_sales_report, export_report_to_json
+from .services.report_aggregates import refresh_report_aggregates
+from .services.customer_stats import score_customers
+from .services.backups import BackupInProgress, submit_backup
+from .services.stock_snapshots import create_stock_snapshot
+from .utils.date_ranges import local_today
 from .config import settings
 
 logger = logging.getLogger(__name__)
 
-# Configurar scheduler
-jobstores = {
-    'default': SQLAlchemyJobStore(url=str(settings.DATABASE_URL))
-}
-scheduler = AsyncIOScheduler(jobstores=jobstores)
+# El scheduler (y su job store, que abre su propio engine) se crea al
+# iniciarlo, no al importar el módulo
+scheduler = None
 
-async def daily_sales_report():
-    """Generar reporte diario de ventas y guardarlo"""
-    logger.info("Generating daily sales report")
+def create_scheduler():
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+
+    jobstores = {
+        'default': SQLAlchemyJobStore(url=str(settings.DATABASE_URL))
+    }
+    return AsyncIOScheduler(jobstores=jobstores)
+
+def refresh_report_aggregates_job():
+    """
+    Incorporar las ventas y movimientos nuevos a los agregados de reportes.
+    Es síncrona: el scheduler la corre en su pool de hilos, fuera del event loop
+    """
+    logger.info("Refreshing report aggregates")
     
     db = SessionLocal()
     try:
-        today = datetime.date.today()
-        yesterday = today - datetime.timedelta(days=1)
-        
-        # Generar reporte
-        report_data = generate_sales_report(db, yesterday, today, "day")
-        
-        # Exportar a JSON
-        filename = f"auto_sales_report_{yesterday}_{today}"
-        filepath = export_report_to_json(report_data, filename)
-        
-        logger.info(f"Daily sales report saved to {filepath}")
+        refresh_report_aggregates(db)
     except Exception as e:
-        logger.error(f"Error generating daily report: {str(e)}")
+        logger.error(f"Error refreshing report aggregates: {str(e)}")
     finally:
         db.close()
 
@@ -53,10 +55,73 @@ async def check_inventory_levels():
     finally:
         db.close()
 
+def nightly_stock_snapshot():
+    """Guardar el stock de cierre del día anterior (en el pool de hilos)"""
+    logger.info("Creating nightly stock snapshot")
+    
+    db = SessionLocal()
+    try:
+        # El día se cierra en REPORT_TIMEZONE, igual que los reportes
+        yesterday = local_today() - datetime.timedelta(days=1)
+        create_stock_snapshot(db, yesterday)
+    except Exception as e:
+        logger.error(f"Error creating stock snapshot: {str(e)}")
+    finally:
+        db.close()
+
+def nightly_customer_scoring():
+    """Recalcular los puntajes RFM y segmentos de todos los clientes (en el pool de hilos)"""
+    logger.info("Scoring customers (RFM)")
+    
+    db = SessionLocal()
+    try:
+        score_customers(db)
+    except Exception as e:
+        logger.error(f"Error scoring customers: {str(e)}")
+    finally:
+        db.close()
+
+async def nightly_database_backup():
+    """Respaldar la base de datos y aplicar la política de retención"""
+    logger.info("Starting nightly database backup")
+    
+    db = SessionLocal()
+    try:
+        # pg_dump corre en el hilo de respaldos, no en el event loop
+        submit_backup(db)
+    except BackupInProgress:
+        logger.warning("Skipping nightly backup: another backup is still running")
+    except Exception as e:
+        logger.error(f"Error starting database backup: {str(e)}")
+    finally:
+        db.close()
+
 def start_scheduler():
     """Iniciar el scheduler con las tareas programadas"""
-    # Reportes diarios a las 00:05 am
-    scheduler.add_job(daily_sales_report, 'cron', hour=0, minute=5)
+    global scheduler
+    if scheduler is None:
+        scheduler = create_scheduler()
+    
+    # Agregados de reportes: cada corrida retoma desde su marca de agua, así
+    # que una corrida perdida (servidor apagado) se recupera en la siguiente
+    scheduler.add_job(
+        refresh_report_aggregates_job, 'interval',
+        minutes=settings.REPORT_AGGREGATES_INTERVAL_MINUTES,
+        id='refresh_report_aggregates', replace_existing=True, coalesce=True,
+        next_run_time=datetime.datetime.now()
+    )
+    
+    # Snapshot de stock de cierre a las 00:10 am de la zona de los reportes
+    scheduler.add_job(nightly_stock_snapshot, 'cron', hour=0, minute=10, timezone=settings.REPORT_TIMEZONE,
+                      id='nightly_stock_snapshot', replace_existing=True, coalesce=True)
+    
+    # Puntajes RFM de clientes a las 00:20 am
+    scheduler.add_job(nightly_customer_scoring, 'cron', hour=0, minute=20,
+                      id='nightly_customer_scoring', replace_existing=True, coalesce=True)
+    
+    # Respaldo de la base de datos a la 01:00 am (incluye la retención)
+    scheduler.add_job(nightly_database_backup, 'cron', hour=1, minute=0,
+                      id='nightly_database_backup', replace_existing=True, coalesce=True)
     
     # Verificar inventario cada 4 horas
     scheduler.add_job(check_inventory_levels, 'interval', hours=4)
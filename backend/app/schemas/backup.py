@@ -0,0 +1,21 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from datetime import datetime
+
+class BackupJobStatus(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    engine: str
+    status: str
+    # Directorio (pg_dump) o archivo (SQLite) dentro de BACKUPS_FOLDER
+    filename: Optional[str] = None
+    size_bytes: Optional[int] = None
+    duration_seconds: Optional[float] = None
+    checksum: Optional[str] = None
+    verified_at: Optional[datetime] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    status_url: str
@@ -1,25 +1,24 @@
-from pydantic import BaseModel, Field, constr
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, Annotated # Added Annotated
 from datetime import datetime
 
 class CategoryBase(BaseModel):
-    name: Annotated[str, constr(min_length=1, max_length=50)]
-    description: Annotated[Optional[str], constr(max_length=255)] = None
+    name: Annotated[str, Field(min_length=1, max_length=50)]
+    description: Annotated[Optional[str], Field(max_length=255)] = None
 
 class CategoryCreate(CategoryBase):
     pass
 
 class CategoryUpdate(BaseModel):
-    name: Annotated[Optional[str], constr(min_length=1, max_length=50)] = None
-    description: Annotated[Optional[str], constr(max_length=255)] = None
+    name: Annotated[Optional[str], Field(min_length=1, max_length=50)] = None
+    description: Annotated[Optional[str], Field(max_length=255)] = None
 
 class CategoryInDBBase(CategoryBase):
     id: Annotated[int, Field(gt=0)] # ID must be positive
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class Category(CategoryInDBBase):
     pass
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from typing import Optional, List
 from datetime import datetime
 
@@ -23,11 +23,27 @@ class CustomerUpdate(BaseModel):
 
 class CustomerInDBBase(CustomerBase):
     id: int
+    # El correo ya se validó al guardarlo; validarlo otra vez en cada respuesta
+    # con email-validator domina el costo de serializar la lista de clientes
+    email: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class Customer(CustomerInDBBase):
-    pass
\ No newline at end of file
+    pass
+
+class CustomerStats(BaseModel):
+    customer_id: int
+    name: str
+    email: Optional[str] = None
+    total_purchases: int
+    total_spent: float
+    average_purchase: float
+    first_purchase: Optional[str] = None
+    last_purchase: Optional[str] = None
+    recency_score: Optional[int] = None
+    frequency_score: Optional[int] = None
+    monetary_score: Optional[int] = None
+    segment: Optional[str] = None
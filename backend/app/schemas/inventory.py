@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, date
 from enum import Enum
 
 class MovementTypeEnum(str, Enum):
@@ -29,8 +29,7 @@ class InventoryMovementInDBBase(InventoryMovementBase):
     created_at: datetime
     created_by: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class InventoryMovement(InventoryMovementInDBBase):
     pass
@@ -38,4 +37,41 @@ class InventoryMovement(InventoryMovementInDBBase):
 class InventoryMovementWithProduct(InventoryMovement):
     product: "Product"
 
+class StockCountItem(BaseModel):
+    sku: str = Field(..., min_length=1, max_length=250)
+    counted_quantity: int = Field(..., ge=0)
+
+class StockCountCreate(BaseModel):
+    items: List[StockCountItem] = Field(..., min_length=1)
+    notes: Optional[str] = Field(None, max_length=50)
+
+class StockCountVariance(BaseModel):
+    product_id: int
+    sku: str
+    previous_quantity: int
+    counted_quantity: int
+    variance: int
+    variance_value: float
+
+class StockCountResult(BaseModel):
+    total_items: int
+    adjusted_items: int
+    unchanged_items: int
+    units_gained: int
+    units_lost: int
+    net_variance: int
+    net_variance_value: float
+    variances: List[StockCountVariance]
+
+class StockAsOfItem(BaseModel):
+    product_id: int
+    sku: Optional[str] = None
+    name: Optional[str] = None
+    quantity: int
+
+class StockAsOf(BaseModel):
+    date: date
+    snapshot_date: Optional[date] = None
+    items: List[StockAsOfItem]
+
 from .product import Product
\ No newline at end of file
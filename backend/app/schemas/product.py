@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, constr
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Annotated # Added Annotated
 from datetime import datetime
 
@@ -8,14 +8,13 @@ class Category(BaseModel):
     id: int
     name: str
     # Add other fields if they are accessed directly when ProductWithCategory is serialized
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ProductBase(BaseModel):
-    name: Annotated[str, constr(min_length=1, max_length=50)]
-    description: Annotated[Optional[str], constr(max_length=250)] = None
-    sku: Annotated[str, constr(min_length=1, max_length=250)]
-    barcode: Annotated[Optional[str], constr(max_length=50)] = None # Assuming barcode can be optional
+    name: Annotated[str, Field(min_length=1, max_length=50)]
+    description: Annotated[Optional[str], Field(max_length=250)] = None
+    sku: Annotated[str, Field(min_length=1, max_length=250)]
+    barcode: Annotated[Optional[str], Field(max_length=50)] = None # Assuming barcode can be optional
     price: Annotated[float, Field(gt=0)] # Price must be greater than 0
     cost_price: Annotated[float, Field(ge=0)] # Cost price can be 0 or more
     tax_rate: Annotated[float, Field(default=0.0, ge=0, le=1)] = 0.0 # Tax rate between 0 and 1 (0% to 100%)
@@ -28,10 +27,10 @@ class ProductCreate(ProductBase):
     pass
 
 class ProductUpdate(BaseModel):
-    name: Annotated[Optional[str], constr(min_length=1, max_length=50)] = None
-    description: Annotated[Optional[str], constr(max_length=250)] = None
-    sku: Annotated[Optional[str], constr(min_length=1, max_length=250)] = None
-    barcode: Annotated[Optional[str], constr(max_length=50)] = None
+    name: Annotated[Optional[str], Field(min_length=1, max_length=50)] = None
+    description: Annotated[Optional[str], Field(max_length=250)] = None
+    sku: Annotated[Optional[str], Field(min_length=1, max_length=250)] = None
+    barcode: Annotated[Optional[str], Field(max_length=50)] = None
     price: Annotated[Optional[float], Field(gt=0)] = None
     cost_price: Annotated[Optional[float], Field(ge=0)] = None
     tax_rate: Annotated[Optional[float], Field(ge=0, le=1)] = None
@@ -45,8 +44,7 @@ class ProductInDBBase(ProductBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class Product(ProductInDBBase):
     pass
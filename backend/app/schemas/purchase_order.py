@@ -56,6 +56,14 @@ class PurchaseOrder(PurchaseOrderBase):
     
     model_config = ConfigDict(from_attributes=True)
 
+class PurchaseOrderPage(BaseModel):
+    """Página de órdenes de compra"""
+    items: List[PurchaseOrder]
+    total: int
+    page: int
+    limit: int
+    pages: int
+
 class ReceiptItemBase(BaseModel):
     """Esquema base para item de recepción"""
     product_id: int = Field(..., description="ID del producto")
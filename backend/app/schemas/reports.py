@@ -1,6 +1,6 @@
 # app/schemas/reports.py
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, List, Literal, Optional
 from datetime import date, datetime
 
 class SalesReport(BaseModel):
@@ -23,4 +23,58 @@ class DashboardMetrics(BaseModel):
     totalSales: float
     monthlyRevenue: float
     averageOrderValue: float
-    customerCount: int
\ No newline at end of file
+    customerCount: int
+
+class Dashboard(BaseModel):
+    # Solo vienen los widgets pedidos en `widgets`
+    sales: Optional[List[SalesReport]] = None
+    topProducts: Optional[List[ProductSales]] = None
+    lowStock: Optional[List[LowStockProduct]] = None
+    metrics: Optional[DashboardMetrics] = None
+ReportType = Literal[
+    "sales", "products", "inventory_value", "margins", "customers",
+    "customers_lifetime", "inventory_movements", "low_stock", "sales_lines"
+]
+ExportFormat = Literal["json", "csv", "jsonl", "parquet", "arrow"]
+
+class ReportJobCreate(BaseModel):
+    report_type: ReportType
+    export_format: ExportFormat = "csv"
+    # gzip para json/csv/jsonl; Parquet y Arrow ya van comprimidos
+    compress: bool = False
+    # Los mismos parámetros que el endpoint del reporte (start_date, end_date, limit...)
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+class ReportJobStatus(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    report_type: str
+    export_format: str
+    params: Dict[str, Any]
+    status: str
+    progress: int
+    row_count: Optional[int] = None
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    # Solo en paquetes: archivo, filas y segundos (o error) de cada reporte
+    results: Optional[List[Dict[str, Any]]] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    status_url: str
+    # Solo cuando el trabajo terminó
+    download_url: Optional[str] = None
+
+class ReportBundleItem(BaseModel):
+    report_type: ReportType
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+class ReportBundleCreate(BaseModel):
+    # Sin reportes se generan los del cierre de mes
+    reports: Optional[List[ReportBundleItem]] = Field(default=None, min_length=1, max_length=20)
+    export_format: ExportFormat = "csv"
+    compress: bool = False
+    # Rango para los reportes que no traen el suyo en params
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
@@ -1,6 +1,6 @@
 from typing import Optional, List
 from datetime import datetime
-from pydantic import BaseModel, EmailStr, Field, validator, ConfigDict
+from pydantic import BaseModel, EmailStr, Field, field_validator, ConfigDict
 
 class SupplierBase(BaseModel):
     """Esquema base para datos de proveedores"""
@@ -13,14 +13,16 @@ class SupplierBase(BaseModel):
     country: Optional[str] = Field(None, max_length=50, description="País")
     status: str = Field("active", description="Estado del proveedor (active/inactive)")
     
-    @validator('status')
+    @field_validator('status')
+    @classmethod
     def validate_status(cls, v):
         """Validar que el estado sea 'active' o 'inactive'"""
         if v not in ["active", "inactive"]:
             raise ValueError("El estado debe ser 'active' o 'inactive'")
         return v
     
-    @validator('phone')
+    @field_validator('phone')
+    @classmethod
     def validate_phone(cls, v):
         """Validar formato de teléfono básico"""
         if v is not None and not v.strip():
@@ -45,14 +47,16 @@ class SupplierUpdate(BaseModel):
     country: Optional[str] = Field(None, max_length=50, description="País")
     status: Optional[str] = Field(None, description="Estado del proveedor (active/inactive)")
     
-    @validator('status')
+    @field_validator('status')
+    @classmethod
     def validate_status(cls, v):
         """Validar que el estado sea 'active' o 'inactive' o None"""
         if v is not None and v not in ["active", "inactive"]:
             raise ValueError("El estado debe ser 'active' o 'inactive'")
         return v
     
-    @validator('phone')
+    @field_validator('phone')
+    @classmethod
     def validate_phone(cls, v):
         """Validar formato de teléfono básico"""
         if v is not None and not v.strip():
@@ -1,8 +1,17 @@
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 import re
 
+_USERNAME_PATTERN = re.compile(r'^[a-zA-Z0-9_]+$')
+
+def _check_username(v: str) -> str:
+    if not _USERNAME_PATTERN.match(v):
+        raise ValueError('El nombre de usuario solo puede contener letras, números y guiones bajos')
+    if len(v) < 3:
+        raise ValueError('El nombre de usuario debe tener al menos 3 caracteres')
+    return v
+
 class UserBase(BaseModel):
     email: EmailStr = Field(..., description="Correo electrónico del usuario")
     full_name: Optional[str] = Field(None, description="Nombre completo del usuario")
@@ -17,20 +26,11 @@ class UserCreate(UserBase):
     password: str = Field(..., min_length=8, description="Contraseña del usuario (mínimo 8 caracteres)")
     username: str = Field(..., description="Nombre de usuario para inicio de sesión")
     
-    # Validadores
-    @validator('username')
+    # Validadores (la longitud de la contraseña ya la exige min_length)
+    @field_validator('username')
+    @classmethod
     def username_valid(cls, v):
-        if not re.match(r'^[a-zA-Z0-9_]+$', v):
-            raise ValueError('El nombre de usuario solo puede contener letras, números y guiones bajos')
-        if len(v) < 3:
-            raise ValueError('El nombre de usuario debe tener al menos 3 caracteres')
-        return v
-    
-    @validator('password')
-    def password_strength(cls, v):
-        if len(v) < 8:
-            raise ValueError('La contraseña debe tener al menos 8 caracteres')
-        return v
+        return _check_username(v)
 
 # Esquema para la creación de usuarios por administradores
 class UserAdminCreate(UserAdminBase):
@@ -47,14 +47,10 @@ class UserUpdate(BaseModel):
     password: Optional[str] = Field(None, min_length=8, description="Nueva contraseña")
     
     # Validador para username si se proporciona
-    @validator('username')
+    @field_validator('username')
+    @classmethod
     def username_valid(cls, v):
-        if v is not None:
-            if not re.match(r'^[a-zA-Z0-9_]+$', v):
-                raise ValueError('El nombre de usuario solo puede contener letras, números y guiones bajos')
-            if len(v) < 3:
-                raise ValueError('El nombre de usuario debe tener al menos 3 caracteres')
-        return v
+        return _check_username(v) if v is not None else v
 
 class UserInDBBase(UserAdminBase):
     """Esquema base para usuarios en la base de datos"""
@@ -63,8 +59,7 @@ class UserInDBBase(UserAdminBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True  # Actualizado de orm_mode a from_attributes
+    model_config = ConfigDict(from_attributes=True)
 
 # Esquema para respuestas de API (evita exponer información sensible)
 class UserResponse(BaseModel):
@@ -78,8 +73,7 @@ class UserResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Para compatibilidad con el código existente
 class User(UserInDBBase):
@@ -0,0 +1,397 @@
+# app/services/backups.py
+"""
+Respaldos de la base de datos.
+
+El API registra el respaldo en `backup_jobs` y lo envía a un hilo propio (uno
+a la vez); el hilo abre su sesión, genera el respaldo y guarda en la tabla el
+resultado, el tamaño, la duración y el checksum.
+
+- PostgreSQL: `pg_dump` en formato directorio con `--jobs`, así cada tabla se
+  vuelca en su propio proceso y se comprime mientras se escribe
+  (BACKUP_COMPRESSION). Los datos de conexión van por variables de entorno,
+  no en la línea de comandos.
+- SQLite (pruebas y desarrollo): API de respaldo en línea de sqlite3 (`.backup`)
+  y el archivo se comprime con gzip por bloques.
+
+Cada respaldo se escribe primero con el sufijo `.partial` y se renombra al
+terminar, de modo que un archivo sin ese sufijo siempre está completo. Antes
+de marcarlo como completo se verifica (`pg_restore --list` y CRC de los
+archivos gzip; `PRAGMA integrity_check` en SQLite). Después de cada respaldo
+se aplica la política de retención.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.engine import URL
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.backup_job import BackupJob
+
+logger = logging.getLogger(__name__)
+
+BACKUP_ENGINES = ("postgresql", "sqlite")
+
+ACTIVE_STATUSES = ("queued", "running")
+
+PARTIAL_SUFFIX = ".partial"
+
+_CHUNK_SIZE = 1024 * 1024
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+class BackupInProgress(Exception):
+    """Ya hay un respaldo en cola o en ejecución."""
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Un solo hilo: los respaldos se ejecutan de a uno. El paralelismo lo pone
+    pg_dump con sus propios procesos.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="database-backup")
+        return _executor
+
+def shutdown_executor() -> None:
+    """Detiene el hilo sin esperar: los respaldos en cola quedarán como perdidos."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+def backups_folder() -> str:
+    folder = os.path.abspath(settings.BACKUPS_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+def backup_engine(url: URL) -> str:
+    engine = url.get_backend_name()
+    if engine not in BACKUP_ENGINES:
+        raise ValueError(f"Backups are not supported for {engine} databases")
+    return engine
+
+def _gzip_level() -> int:
+    # BACKUP_COMPRESSION es el argumento de pg_dump; para SQLite solo sirve un nivel gzip
+    level = settings.BACKUP_COMPRESSION.rpartition(":")[2]
+    return int(level) if level.isdigit() else 6
+
+def pg_dump_command(url: URL, output_dir: str) -> Tuple[List[str], Dict[str, str]]:
+    """Comando de pg_dump (formato directorio, en paralelo) y su entorno con los datos de conexión."""
+    env = os.environ.copy()
+    connection = {
+        "PGHOST": url.host,
+        "PGPORT": str(url.port) if url.port else None,
+        "PGUSER": url.username,
+        "PGPASSWORD": url.password,
+        "PGDATABASE": url.database,
+        "PGSSLMODE": url.query.get("sslmode"),
+    }
+    env.update({name: value for name, value in connection.items() if value})
+    command = [
+        "pg_dump",
+        "--format=directory",
+        f"--jobs={max(settings.BACKUP_PARALLEL_JOBS, 1)}",
+        f"--compress={settings.BACKUP_COMPRESSION}",
+        "--no-password",
+        f"--file={output_dir}",
+    ]
+    return command, env
+
+def _run(command: List[str], env: Optional[Dict[str, str]] = None) -> None:
+    result = subprocess.run(
+        command, env=env, capture_output=True, text=True, timeout=settings.BACKUP_TIMEOUT_SECONDS
+    )
+    if result.returncode != 0:
+        # Las últimas líneas de stderr explican el error; el resto es ruido
+        detail = "\n".join(result.stderr.strip().splitlines()[-5:])
+        raise RuntimeError(f"{command[0]} exited with status {result.returncode}: {detail}")
+
+def dump_postgresql(url: URL, path: str) -> None:
+    command, env = pg_dump_command(url, path)
+    _run(command, env)
+
+def dump_sqlite(url: URL, path: str) -> None:
+    """
+    Copia consistente con la API de respaldo de sqlite3 (la misma que `.backup`)
+    a un archivo temporal, que luego se comprime con gzip por bloques.
+    """
+    if not url.database or url.database == ":memory:":
+        raise ValueError("In-memory SQLite databases cannot be backed up")
+    fd, copy_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".sqlite3" + PARTIAL_SUFFIX)
+    os.close(fd)
+    try:
+        source = sqlite3.connect(url.database)
+        target = sqlite3.connect(copy_path)
+        try:
+            # Un solo paso: la copia corresponde a un único instante de la base
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        with open(copy_path, "rb") as src, gzip.open(path, "wb", compresslevel=_gzip_level()) as dst:
+            shutil.copyfileobj(src, dst, _CHUNK_SIZE)
+    finally:
+        os.remove(copy_path)
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _walk_files(path: str) -> List[str]:
+    if not os.path.isdir(path):
+        return [path]
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs.sort()
+        files.extend(os.path.join(root, name) for name in sorted(names))
+    return files
+
+def backup_checksum(path: str) -> str:
+    """SHA-256 del archivo, o de la lista de archivos del directorio con el hash de cada uno."""
+    if not os.path.isdir(path):
+        return _file_sha256(path)
+    digest = hashlib.sha256()
+    for file_path in _walk_files(path):
+        digest.update(f"{os.path.relpath(file_path, path)}\0{_file_sha256(file_path)}\n".encode())
+    return digest.hexdigest()
+
+def backup_size(path: str) -> int:
+    return sum(os.path.getsize(file_path) for file_path in _walk_files(path))
+
+def _check_gzip(path: str) -> None:
+    # Leer hasta el final valida el CRC y la longitud de cada miembro gzip
+    with gzip.open(path, "rb") as f:
+        while f.read(_CHUNK_SIZE):
+            pass
+
+def verify_backup_file(engine: str, path: str) -> None:
+    """Comprueba que el respaldo se puede leer; lanza RuntimeError si no."""
+    if not os.path.exists(path):
+        raise RuntimeError(f"Backup file not found: {os.path.basename(path)}")
+    try:
+        if engine == "postgresql":
+            # Lee el índice (toc.dat); los datos comprimidos con gzip se validan por CRC
+            _run(["pg_restore", "--list", path])
+            for file_path in _walk_files(path):
+                if file_path.endswith(".gz"):
+                    _check_gzip(file_path)
+            return
+
+        fd, copy_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".sqlite3" + PARTIAL_SUFFIX)
+        os.close(fd)
+        try:
+            with gzip.open(path, "rb") as src, open(copy_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, _CHUNK_SIZE)
+            connection = sqlite3.connect(copy_path)
+            try:
+                result = [row[0] for row in connection.execute("PRAGMA integrity_check")]
+            finally:
+                connection.close()
+        finally:
+            os.remove(copy_path)
+        if result != ["ok"]:
+            raise RuntimeError(f"SQLite integrity check failed: {'; '.join(result[:5])}")
+    except (OSError, EOFError, sqlite3.DatabaseError, subprocess.SubprocessError) as e:
+        raise RuntimeError(f"Backup is unreadable: {e}") from e
+
+def _remove_path(path: str) -> None:
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+
+def _update(db: Session, job: BackupJob, **values) -> None:
+    for key, value in values.items():
+        setattr(job, key, value)
+    db.commit()
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite devuelve fechas sin zona horaria (CURRENT_TIMESTAMP es UTC)
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+def expire_stale_backup(db: Session, job: BackupJob) -> BackupJob:
+    """
+    Marca como fallido un respaldo activo con más de BACKUP_TIMEOUT_SECONDS
+    sin terminar (el proceso que lo ejecutaba se reinició o murió). pg_dump no
+    informa avances, así que se mide contra el tiempo máximo y no contra el
+    último cambio.
+    """
+    if job.status not in ACTIVE_STATUSES or job.updated_at is None:
+        return job
+    if datetime.now(timezone.utc) - _as_utc(job.updated_at) > timedelta(seconds=settings.BACKUP_TIMEOUT_SECONDS):
+        _update(db, job, status="failed", error="Backup was lost before finishing",
+                finished_at=datetime.now(timezone.utc))
+    return job
+
+def submit_backup(db: Session, user_id: Optional[int] = None) -> BackupJob:
+    """
+    Registra un respaldo (queued) y lo envía al hilo de respaldos. Lanza
+    BackupInProgress si ya hay uno activo y ValueError si el motor de base de
+    datos no se puede respaldar.
+    """
+    engine = backup_engine(db.get_bind().url)
+    active = db.query(BackupJob).filter(BackupJob.status.in_(ACTIVE_STATUSES)).all()
+    if any(expire_stale_backup(db, job).status in ACTIVE_STATUSES for job in active):
+        raise BackupInProgress("A backup is already queued or running")
+
+    job = BackupJob(id=uuid.uuid4().hex, engine=engine, status="queued", created_by=user_id)
+    db.add(job)
+    # El hilo debe encontrar la fila: se confirma antes de enviarlo
+    db.commit()
+    db.refresh(job)
+
+    get_executor().submit(run_backup_job, job.id)
+    return job
+
+def run_backup_job(job_id: str) -> None:
+    """
+    Genera, verifica y registra un respaldo con su propia sesión. Los errores
+    se guardan en el trabajo y el archivo incompleto se borra.
+    """
+    db = SessionLocal()
+    partial_path = None
+    try:
+        job = db.get(BackupJob, job_id)
+        if job is None or job.status != "queued":
+            return
+        started = time.perf_counter()
+        _update(db, job, status="running", started_at=datetime.now(timezone.utc))
+
+        url = db.get_bind().url
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        filename = f"backup_{timestamp}_{job.id[:8]}" + (".sqlite3.gz" if job.engine == "sqlite" else "")
+        path = os.path.join(backups_folder(), filename)
+        partial_path = path + PARTIAL_SUFFIX
+
+        if job.engine == "postgresql":
+            dump_postgresql(url, partial_path)
+        else:
+            dump_sqlite(url, partial_path)
+        verify_backup_file(job.engine, partial_path)
+        checksum = backup_checksum(partial_path)
+        size_bytes = backup_size(partial_path)
+        os.rename(partial_path, path)
+        partial_path = None
+
+        now = datetime.now(timezone.utc)
+        _update(
+            db, job, status="completed", filename=filename, size_bytes=size_bytes, checksum=checksum,
+            duration_seconds=round(time.perf_counter() - started, 3), verified_at=now, finished_at=now
+        )
+        logger.info(f"Backup {job_id} completed: {filename}, {size_bytes} bytes in {job.duration_seconds:.1f} s")
+    except Exception as e:
+        logger.exception(f"Backup {job_id} failed")
+        db.rollback()
+        job = db.get(BackupJob, job_id)
+        if job is not None and job.status in ACTIVE_STATUSES:
+            _update(db, job, status="failed", error=str(e), finished_at=datetime.now(timezone.utc))
+    finally:
+        if partial_path is not None:
+            _remove_path(partial_path)
+
+    try:
+        prune_backups(db)
+    except Exception:
+        db.rollback()
+        logger.exception("Pruning backups failed")
+    finally:
+        db.close()
+
+def verify_backup(db: Session, job: BackupJob) -> BackupJob:
+    """
+    Vuelve a verificar un respaldo completo: que el archivo siga existiendo,
+    que su checksum coincida con el registrado y que se pueda leer. Si falla,
+    el respaldo queda como fallido con el motivo.
+    """
+    if job.status != "completed":
+        raise ValueError(f"Only completed backups can be verified (status: {job.status})")
+    path = os.path.join(backups_folder(), job.filename)
+    try:
+        verify_backup_file(job.engine, path)
+        if backup_checksum(path) != job.checksum:
+            raise RuntimeError("Backup checksum does not match")
+    except RuntimeError as e:
+        logger.error(f"Backup {job.id} failed verification: {e}")
+        _update(db, job, status="failed", error=str(e))
+        return job
+    _update(db, job, verified_at=datetime.now(timezone.utc))
+    return job
+
+def prune_backups(db: Session, now: Optional[datetime] = None) -> List[BackupJob]:
+    """
+    Aplica la retención: conserva los BACKUP_RETENTION_COUNT respaldos completos
+    más recientes y borra los demás que tengan más de BACKUP_RETENTION_DAYS
+    días. Las filas quedan como `pruned` para conservar el historial. También
+    borra restos `.partial` de respaldos interrumpidos.
+
+    Returns:
+        Respaldos borrados
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=settings.BACKUP_RETENTION_DAYS)
+    folder = backups_folder()
+
+    completed = db.query(BackupJob).filter(BackupJob.status == "completed").order_by(
+        BackupJob.created_at.desc(), BackupJob.id.desc()
+    ).all()
+    pruned = []
+    for job in completed[max(settings.BACKUP_RETENTION_COUNT, 0):]:
+        if _as_utc(job.created_at) < cutoff:
+            _remove_path(os.path.join(folder, job.filename))
+            job.status = "pruned"
+            pruned.append(job)
+    db.commit()
+
+    # Un respaldo activo escribe su .partial: solo se borran los que superan el tiempo máximo
+    stale_before = time.time() - settings.BACKUP_TIMEOUT_SECONDS
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if name.endswith(PARTIAL_SUFFIX) and os.path.getmtime(path) < stale_before:
+            _remove_path(path)
+
+    if pruned:
+        logger.info(f"Pruned {len(pruned)} backups: {', '.join(job.filename for job in pruned)}")
+    return pruned
+
+if __name__ == "__main__":
+    import argparse
+    from ..logging_config import configure_logging
+
+    parser = argparse.ArgumentParser(description="Respaldo de la base de datos")
+    parser.add_argument("--prune-only", action="store_true", help="Solo aplicar la política de retención")
+    args = parser.parse_args()
+
+    configure_logging()
+    session = SessionLocal()
+    try:
+        if not args.prune_only:
+            backup = BackupJob(id=uuid.uuid4().hex, engine=backup_engine(session.get_bind().url), status="queued")
+            session.add(backup)
+            session.commit()
+            run_backup_job(backup.id)
+            session.refresh(backup)
+            if backup.status != "completed":
+                raise SystemExit(f"Backup failed: {backup.error}")
+        prune_backups(session)
+    finally:
+        session.close()
@@ -0,0 +1,302 @@
+# app/services/costing.py
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, insert, delete, exists
+from typing import Any, Dict, Iterable, List, Optional
+from collections import defaultdict, deque
+import logging
+
+from ..models.cost_layer import InventoryCostLayer, CostLayerConsumption
+from ..models.inventory import InventoryMovement
+from ..models.product import Product
+from ..models.purchase_order import purchase_order_items
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de lote para la reconstrucción (productos por transacción)
+REBUILD_BATCH_SIZE = 500
+
+def _resolve_inbound_costs(db: Session, movements: List[Any]) -> Dict[int, float]:
+    """
+    Obtiene el costo unitario de los movimientos de entrada que tienen un
+    documento de origen: compras (línea de la orden) y devoluciones de venta
+    (costo con el que salió la mercadería).
+    """
+    costs: Dict[int, float] = {}
+
+    purchases = [m for m in movements if m.movement_type == "purchase" and m.reference_id]
+    if purchases:
+        rows = db.query(
+            purchase_order_items.c.purchase_order_id,
+            purchase_order_items.c.product_id,
+            purchase_order_items.c.unit_price
+        ).filter(
+            purchase_order_items.c.purchase_order_id.in_({m.reference_id for m in purchases}),
+            purchase_order_items.c.product_id.in_({m.product_id for m in purchases})
+        ).all()
+        prices = {(r.purchase_order_id, r.product_id): r.unit_price for r in rows}
+        for m in purchases:
+            price = prices.get((m.reference_id, m.product_id))
+            if price is not None:
+                costs[m.id] = price
+
+    returns = [m for m in movements if m.movement_type == "return" and m.reference_id]
+    if returns:
+        rows = db.query(
+            InventoryMovement.reference_id,
+            CostLayerConsumption.product_id,
+            (func.sum(CostLayerConsumption.quantity * CostLayerConsumption.unit_cost)
+             / func.sum(CostLayerConsumption.quantity)).label('unit_cost')
+        ).join(
+            InventoryMovement, InventoryMovement.id == CostLayerConsumption.movement_id
+        ).filter(
+            InventoryMovement.movement_type == "sale",
+            InventoryMovement.reference_id.in_({m.reference_id for m in returns}),
+            CostLayerConsumption.product_id.in_({m.product_id for m in returns})
+        ).group_by(
+            InventoryMovement.reference_id,
+            CostLayerConsumption.product_id
+        ).all()
+        sale_costs = {(r.reference_id, r.product_id): r.unit_cost for r in rows}
+        for m in returns:
+            cost = sale_costs.get((m.reference_id, m.product_id))
+            if cost is not None:
+                costs[m.id] = float(cost)
+
+    return costs
+
+def apply_movements(db: Session, movements: Iterable[Any]) -> None:
+    """
+    Refleja movimientos de inventario en las capas de costo.
+
+    Las entradas crean una capa nueva; las salidas consumen las capas abiertas
+    en orden FIFO y registran el costo consumido. Las unidades en stock que no
+    tienen capa (stock inicial del producto o cargado al editarlo) son las más
+    antiguas: se consumen antes que cualquier capa, al costo del producto.
+    Solo se leen las capas abiertas de los productos involucrados, nunca el
+    historial de movimientos. No hace commit: debe llamarse dentro de la
+    transacción que creó los movimientos, después de actualizar el stock.
+
+    Args:
+        db: Sesión de base de datos
+        movements: Movimientos ya insertados (con `id`), en orden cronológico
+    """
+    movements = [m for m in movements if m.quantity]
+    if not movements:
+        return
+
+    product_ids = {m.product_id for m in movements}
+
+    # Capas abiertas de los productos afectados, bloqueadas hasta el commit
+    open_layers: Dict[int, deque] = defaultdict(deque)
+    layers = db.query(InventoryCostLayer).filter(
+        InventoryCostLayer.product_id.in_(product_ids),
+        InventoryCostLayer.remaining_quantity > 0
+    ).order_by(
+        InventoryCostLayer.product_id,
+        InventoryCostLayer.id
+    ).with_for_update().all()
+    for layer in layers:
+        open_layers[layer.product_id].append(layer)
+
+    products = db.query(
+        Product.id, Product.stock_quantity, Product.cost_price
+    ).filter(Product.id.in_(product_ids)).all()
+    fallback_costs = {p.id: p.cost_price for p in products}
+
+    # Unidades sin capa antes de estos movimientos: stock previo menos lo cubierto por capas
+    net_quantity: Dict[int, int] = defaultdict(int)
+    for movement in movements:
+        net_quantity[movement.product_id] += movement.quantity
+    uncovered = {
+        p.id: max(
+            (p.stock_quantity or 0) - net_quantity[p.id]
+            - sum(layer.remaining_quantity for layer in open_layers[p.id]),
+            0
+        )
+        for p in products
+    }
+    inbound_costs = _resolve_inbound_costs(db, movements)
+    # Costo de las ventas procesadas en esta misma llamada, para sus devoluciones
+    sold: Dict[tuple, List[float]] = defaultdict(lambda: [0, 0.0])
+    # Los consumos se insertan en bloque al final, cuando las capas nuevas ya tienen id
+    consumptions = []
+
+    for movement in movements:
+        if movement.quantity > 0:
+            unit_cost = inbound_costs.get(movement.id)
+            if movement.movement_type == "return":
+                quantity, value = sold.get((movement.reference_id, movement.product_id), (0, 0.0))
+                if quantity:
+                    unit_cost = value / quantity
+            if unit_cost is None:
+                unit_cost = fallback_costs.get(movement.product_id) or 0.0
+            layer = InventoryCostLayer(
+                product_id=movement.product_id,
+                movement_id=movement.id,
+                unit_cost=unit_cost,
+                original_quantity=movement.quantity,
+                remaining_quantity=movement.quantity
+            )
+            db.add(layer)
+            open_layers[movement.product_id].append(layer)
+            continue
+
+        pending = -movement.quantity
+        queue = open_layers[movement.product_id]
+        cost_total = 0.0
+        fallback = fallback_costs.get(movement.product_id) or 0.0
+
+        # Primero el stock sin capa, que es anterior a todas las capas
+        opening = min(pending, uncovered.get(movement.product_id, 0))
+        if opening > 0:
+            uncovered[movement.product_id] -= opening
+            pending -= opening
+            cost_total += opening * fallback
+            consumptions.append((movement.id, movement.product_id, None, opening, fallback))
+
+        while pending > 0 and queue:
+            layer = queue[0]
+            taken = min(pending, layer.remaining_quantity)
+            layer.remaining_quantity -= taken
+            pending -= taken
+            cost_total += taken * layer.unit_cost
+            consumptions.append((movement.id, movement.product_id, layer, taken, layer.unit_cost))
+            if layer.remaining_quantity == 0:
+                queue.popleft()
+
+        if pending > 0:
+            # Salida sin stock que la cubra (stock negativo): costo actual del producto
+            cost_total += pending * fallback
+            consumptions.append((movement.id, movement.product_id, None, pending, fallback))
+
+        if movement.movement_type == "sale" and movement.reference_id:
+            entry = sold[(movement.reference_id, movement.product_id)]
+            entry[0] += -movement.quantity
+            entry[1] += cost_total
+
+    db.flush()
+    if consumptions:
+        db.execute(insert(CostLayerConsumption), [
+            {
+                "movement_id": movement_id,
+                "product_id": product_id,
+                "layer_id": layer.id if layer is not None else None,
+                "quantity": quantity,
+                "unit_cost": unit_cost
+            }
+            for movement_id, product_id, layer, quantity, unit_cost in consumptions
+        ])
+
+def rebuild_cost_layers(
+    db: Session,
+    product_ids: Optional[List[int]] = None,
+    full: bool = False,
+    batch_size: int = REBUILD_BATCH_SIZE,
+    since_movement_id: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    Reconstruye las capas de costo a partir de los movimientos de inventario.
+
+    El stock que no proviene de ningún movimiento (stock inicial del producto)
+    queda sin capa y se consume antes que las capas, igual que en
+    apply_movements. En modo incremental solo procesa los movimientos que aún no están reflejados
+    en capas ni consumos (por ejemplo, historial previo a la introducción de las
+    capas). En modo completo borra las capas de los productos y repite todo su
+    historial. Se procesa por lotes de productos, con un commit por lote.
+
+    Args:
+        db: Sesión de base de datos
+        product_ids: Productos a reconstruir (todos si es None)
+        full: Borrar y reconstruir desde cero
+        batch_size: Productos por lote
+        since_movement_id: En modo incremental, ignorar movimientos con id menor o igual
+
+    Returns:
+        Diccionario con el número de productos y movimientos procesados
+    """
+    if product_ids is None:
+        product_ids = [row.id for row in db.query(Product.id).order_by(Product.id).all()]
+
+    stats = {"products": 0, "movements": 0}
+    for start in range(0, len(product_ids), batch_size):
+        batch = product_ids[start:start + batch_size]
+
+        if full:
+            db.execute(
+                delete(CostLayerConsumption).where(CostLayerConsumption.product_id.in_(batch)),
+                execution_options={"synchronize_session": "fetch"}
+            )
+            db.execute(
+                delete(InventoryCostLayer).where(InventoryCostLayer.product_id.in_(batch)),
+                execution_options={"synchronize_session": "fetch"}
+            )
+
+        query = select(
+            InventoryMovement.id,
+            InventoryMovement.product_id,
+            InventoryMovement.movement_type,
+            InventoryMovement.quantity,
+            InventoryMovement.reference_id
+        ).where(
+            InventoryMovement.product_id.in_(batch)
+        )
+        if not full:
+            if since_movement_id:
+                query = query.where(InventoryMovement.id > since_movement_id)
+            query = query.where(
+                ~exists().where(InventoryCostLayer.movement_id == InventoryMovement.id),
+                ~exists().where(CostLayerConsumption.movement_id == InventoryMovement.id)
+            )
+        movements = db.execute(query.order_by(InventoryMovement.id)).all()
+
+        apply_movements(db, movements)
+        db.commit()
+
+        stats["products"] += len(batch)
+        stats["movements"] += len(movements)
+        logger.info(f"Cost layers rebuilt for {stats['products']}/{len(product_ids)} products")
+
+    return stats
+
+def get_inventory_cost_summary(db: Session) -> Any:
+    """
+    Subconsulta con el valor FIFO de las capas abiertas por producto.
+    Lee únicamente capas con saldo, usando el índice parcial de capas abiertas.
+    """
+    return db.query(
+        InventoryCostLayer.product_id.label('product_id'),
+        func.sum(InventoryCostLayer.remaining_quantity).label('layer_quantity'),
+        func.sum(InventoryCostLayer.remaining_quantity * InventoryCostLayer.unit_cost).label('layer_value')
+    ).filter(
+        InventoryCostLayer.remaining_quantity > 0
+    ).group_by(
+        InventoryCostLayer.product_id
+    ).subquery()
+
+if __name__ == "__main__":
+    import argparse
+    from ..database import SessionLocal
+    from ..logging_config import configure_logging
+
+    parser = argparse.ArgumentParser(description="Reconstruye las capas de costo FIFO del inventario")
+    parser.add_argument("--full", action="store_true", help="Borrar y reconstruir desde cero")
+    parser.add_argument("--product-id", type=int, action="append", dest="product_ids",
+                        help="Limitar a un producto (se puede repetir)")
+    parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE)
+    parser.add_argument("--since-movement-id", type=int, default=None,
+                        help="Modo incremental: solo movimientos posteriores a este id")
+    args = parser.parse_args()
+
+    configure_logging()
+    session = SessionLocal()
+    try:
+        result = rebuild_cost_layers(
+            session,
+            args.product_ids,
+            full=args.full,
+            batch_size=args.batch_size,
+            since_movement_id=args.since_movement_id
+        )
+        logger.info(f"Rebuild finished: {result}")
+    finally:
+        session.close()
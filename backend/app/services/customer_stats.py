@@ -0,0 +1,241 @@
+# app/services/customer_stats.py
+"""
+Resumen de compras por cliente y segmentación RFM.
+
+customer_stats guarda primera y última compra, número de compras, total y
+promedio de cada cliente. Una venta nueva suma sus valores a la fila del
+cliente; una cancelación o un cambio de cliente, monto o estado recalcula la
+fila desde las ventas del cliente (índice ix_sales_customer_id). Ambas
+operaciones bloquean la fila, así que ventas simultáneas del mismo cliente
+se serializan en lugar de perder una actualización.
+
+Cada noche score_customers asigna quintiles de recencia, frecuencia y monto
+(1-5) a todos los clientes en una sola sentencia (NTILE sobre la tabla
+completa) y de ellos deriva el segmento.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+
+from sqlalchemy import and_, case, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.customer import Customer, CustomerStats
+from ..models.sale import Sale
+
+logger = logging.getLogger(__name__)
+
+RFM_SEGMENTS = ("champions", "loyal", "new", "at_risk", "hibernating", "potential")
+
+def _lock_stats(db: Session, customer_id: int) -> CustomerStats:
+    """Fila del cliente bloqueada hasta el commit; se crea si no existe."""
+    stats = db.query(CustomerStats).filter(
+        CustomerStats.customer_id == customer_id
+    ).with_for_update().first()
+    if stats is not None:
+        return stats
+    try:
+        with db.begin_nested():
+            stats = CustomerStats(customer_id=customer_id, purchase_count=0, total_spent=0.0, average_purchase=0.0)
+            db.add(stats)
+    except IntegrityError:
+        # Otra transacción la creó primero: esperar su commit y usar esa
+        stats = db.query(CustomerStats).filter(
+            CustomerStats.customer_id == customer_id
+        ).with_for_update().one()
+    return stats
+
+def record_sale(db: Session, sale: Sale) -> None:
+    """
+    Suma una venta nueva al resumen de su cliente. Se llama después del flush
+    de la venta y antes del commit, en la misma transacción.
+    """
+    if sale.customer_id is None or sale.payment_status == "cancelled":
+        return
+    stats = _lock_stats(db, sale.customer_id)
+    stats.purchase_count += 1
+    stats.total_spent += sale.total_amount or 0.0
+    stats.average_purchase = stats.total_spent / stats.purchase_count
+    if stats.first_purchase_at is None or sale.created_at < stats.first_purchase_at:
+        stats.first_purchase_at = sale.created_at
+    if stats.last_purchase_at is None or sale.created_at > stats.last_purchase_at:
+        stats.last_purchase_at = sale.created_at
+
+def refresh_customer_stats(db: Session, customer_ids: Iterable[Optional[int]]) -> None:
+    """
+    Recalcula el resumen de los clientes desde sus ventas no canceladas
+    (cancelaciones y cambios de una venta ya registrada).
+    """
+    # Orden fijo: dos transacciones que tocan los mismos clientes no se bloquean mutuamente
+    for customer_id in sorted({customer_id for customer_id in customer_ids if customer_id is not None}):
+        stats = _lock_stats(db, customer_id)
+        row = db.query(
+            func.count(Sale.id).label('purchase_count'),
+            func.coalesce(func.sum(Sale.total_amount), 0).label('total_spent'),
+            func.min(Sale.created_at).label('first_purchase_at'),
+            func.max(Sale.created_at).label('last_purchase_at')
+        ).filter(
+            Sale.customer_id == customer_id,
+            Sale.payment_status != 'cancelled'
+        ).one()
+        stats.purchase_count = row.purchase_count
+        stats.total_spent = float(row.total_spent)
+        stats.average_purchase = stats.total_spent / row.purchase_count if row.purchase_count else 0.0
+        stats.first_purchase_at = row.first_purchase_at
+        stats.last_purchase_at = row.last_purchase_at
+
+def rebuild_customer_stats(db: Session) -> int:
+    """
+    Reconstruye la tabla completa desde el historial de ventas (datos
+    cargados por fuera del API o correcciones manuales).
+
+    Returns:
+        Número de clientes con compras
+    """
+    db.execute(delete(CustomerStats))
+    result = db.execute(insert(CustomerStats).from_select(
+        ["customer_id", "first_purchase_at", "last_purchase_at", "purchase_count", "total_spent", "average_purchase"],
+        select(
+            Sale.customer_id,
+            func.min(Sale.created_at),
+            func.max(Sale.created_at),
+            func.count(Sale.id),
+            func.coalesce(func.sum(Sale.total_amount), 0),
+            func.coalesce(func.avg(Sale.total_amount), 0)
+        ).where(
+            Sale.customer_id.isnot(None),
+            Sale.payment_status != 'cancelled'
+        ).group_by(Sale.customer_id)
+    ))
+    db.commit()
+    return result.rowcount
+
+def _segment(recency: Any, frequency: Any, monetary: Any) -> Any:
+    """Segmento a partir de los quintiles (expresión SQL, se evalúa por fila)."""
+    return case(
+        (and_(recency >= 4, frequency >= 4, monetary >= 4), "champions"),
+        (and_(recency >= 3, frequency >= 4), "loyal"),
+        (and_(recency >= 4, frequency <= 2), "new"),
+        (and_(recency <= 2, frequency >= 3), "at_risk"),
+        (recency <= 2, "hibernating"),
+        else_="potential"
+    )
+
+def score_customers(db: Session) -> int:
+    """
+    Asigna puntajes RFM y segmento a todos los clientes con compras. Los
+    quintiles se calculan con NTILE(5) en la base de datos, en una sola
+    sentencia; los clientes sin compras vigentes quedan sin puntaje.
+
+    Returns:
+        Número de clientes puntuados
+    """
+    scored_at = db.scalar(select(func.now()))
+    has_purchases = CustomerStats.purchase_count > 0
+    # Desempate por id para que los quintiles sean estables entre corridas
+    scores = select(
+        CustomerStats.customer_id,
+        func.ntile(5).over(order_by=(CustomerStats.last_purchase_at, CustomerStats.customer_id)).label('recency'),
+        func.ntile(5).over(order_by=(CustomerStats.purchase_count, CustomerStats.customer_id)).label('frequency'),
+        func.ntile(5).over(order_by=(CustomerStats.total_spent, CustomerStats.customer_id)).label('monetary')
+    ).where(has_purchases).subquery()
+
+    result = db.execute(
+        update(CustomerStats).where(
+            CustomerStats.customer_id == scores.c.customer_id
+        ).values(
+            recency_score=scores.c.recency,
+            frequency_score=scores.c.frequency,
+            monetary_score=scores.c.monetary,
+            segment=_segment(scores.c.recency, scores.c.frequency, scores.c.monetary),
+            scored_at=scored_at
+        ).execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(CustomerStats).where(~has_purchases).values(
+            recency_score=None, frequency_score=None, monetary_score=None, segment=None, scored_at=scored_at
+        ).execution_options(synchronize_session=False)
+    )
+    db.commit()
+    logger.info(f"Scored {result.rowcount} customers")
+    return result.rowcount
+
+def _stats_row(customer: Customer, stats: CustomerStats) -> Dict[str, Any]:
+    return {
+        "customer_id": customer.id,
+        "name": customer.name,
+        "email": customer.email,
+        "total_purchases": stats.purchase_count,
+        "total_spent": stats.total_spent,
+        "average_purchase": stats.average_purchase,
+        "first_purchase": stats.first_purchase_at.strftime('%Y-%m-%d') if stats.first_purchase_at else None,
+        "last_purchase": stats.last_purchase_at.strftime('%Y-%m-%d') if stats.last_purchase_at else None,
+        "recency_score": stats.recency_score,
+        "frequency_score": stats.frequency_score,
+        "monetary_score": stats.monetary_score,
+        "segment": stats.segment
+    }
+
+def generate_customer_lifetime_report(
+    db: Session,
+    segment: Optional[str] = None,
+    limit: int = 20
+) -> List[Dict[str, Any]]:
+    """
+    Clientes ordenados por monto total histórico, opcionalmente de un
+    segmento. Lee customer_stats por índice en lugar de agregar ventas.
+    """
+    query = db.query(Customer, CustomerStats).join(
+        CustomerStats, CustomerStats.customer_id == Customer.id
+    ).filter(CustomerStats.purchase_count > 0)
+    if segment:
+        query = query.filter(CustomerStats.segment == segment)
+    rows = query.order_by(CustomerStats.total_spent.desc()).limit(limit).all()
+    return [_stats_row(customer, stats) for customer, stats in rows]
+
+def get_customer_stats(db: Session, customer_id: int) -> Optional[Dict[str, Any]]:
+    """Resumen de un cliente, o None si el cliente no existe."""
+    row = db.query(Customer, CustomerStats).outerjoin(
+        CustomerStats, CustomerStats.customer_id == Customer.id
+    ).filter(Customer.id == customer_id).first()
+    if row is None:
+        return None
+    customer, stats = row
+    return _stats_row(customer, stats or CustomerStats(purchase_count=0, total_spent=0.0, average_purchase=0.0))
+
+def segment_summary(db: Session) -> List[Dict[str, Any]]:
+    """Clientes, monto total y monto promedio de cada segmento."""
+    rows = db.query(
+        CustomerStats.segment,
+        func.count(CustomerStats.customer_id).label('customers'),
+        func.sum(CustomerStats.total_spent).label('total_spent'),
+        func.avg(CustomerStats.total_spent).label('average_spent')
+    ).filter(CustomerStats.segment.isnot(None)).group_by(CustomerStats.segment).all()
+    by_segment = {row.segment: row for row in rows}
+    return [
+        {
+            "segment": segment,
+            "customers": by_segment[segment].customers if segment in by_segment else 0,
+            "total_spent": float(by_segment[segment].total_spent or 0.0) if segment in by_segment else 0.0,
+            "average_spent": float(by_segment[segment].average_spent or 0.0) if segment in by_segment else 0.0
+        }
+        for segment in RFM_SEGMENTS
+    ]
+
+if __name__ == "__main__":
+    import argparse
+    from ..database import SessionLocal
+    from ..logging_config import configure_logging
+
+    parser = argparse.ArgumentParser(description="Resumen de compras por cliente y puntajes RFM")
+    parser.add_argument("--rebuild", action="store_true", help="Reconstruir los resúmenes desde las ventas antes de puntuar")
+    args = parser.parse_args()
+
+    configure_logging()
+    session = SessionLocal()
+    try:
+        if args.rebuild:
+            rebuild_customer_stats(session)
+        score_customers(session)
+    finally:
+        session.close()
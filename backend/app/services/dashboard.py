@@ -0,0 +1,160 @@
+# app/services/dashboard.py
+"""
+Datos del dashboard en una sola pasada.
+
+Cada agregado corre en su propio hilo con su propia sesión (una conexión del
+pool por consulta), así que el tiempo total es el de la consulta más lenta y
+no la suma. Como mucho se calculan DASHBOARD_CONCURRENT_BUILDS dashboards a
+la vez y el pool tiene un hilo por widget de cada uno, así que las consultas
+de una solicitud no esperan detrás de las de otra. Las ventas por día de los últimos 30 días se calculan una vez y
+alimentan tanto la gráfica (últimos 7 días) como las métricas del mes; los
+widgets que no se piden no se calculan.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import date, timedelta
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.customer import Customer
+from ..models.sale import Sale
+from ..utils.date_ranges import date_range_filter, local_date, local_today
+from .reports import generate_low_stock_report, generate_product_sales_report
+
+DASHBOARD_WIDGETS = ("sales", "top_products", "low_stock", "metrics")
+
+# Días de la gráfica de ventas y del periodo de las métricas y productos
+SALES_CHART_DAYS = 7
+METRICS_DAYS = 30
+
+LOW_STOCK_THRESHOLD_PERCENTAGE = 20
+LOW_STOCK_LIMIT = 10
+
+# Hilos compartidos por todas las solicitudes: uno por widget de cada
+# dashboard admitido, sin superar las conexiones que puede dar el pool
+_builds = threading.BoundedSemaphore(settings.DASHBOARD_CONCURRENT_BUILDS)
+_executor = ThreadPoolExecutor(
+    max_workers=max(
+        len(DASHBOARD_WIDGETS),
+        min(
+            len(DASHBOARD_WIDGETS) * settings.DASHBOARD_CONCURRENT_BUILDS,
+            settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+        )
+    ),
+    thread_name_prefix="dashboard"
+)
+
+def daily_sales(db: Session, start_date: date, end_date: date) -> Dict[str, Dict[str, float]]:
+    """Ventas (no canceladas) y monto por día en [start_date, end_date]."""
+    day = local_date(Sale.created_at)
+    rows = db.query(
+        day.label('day'),
+        func.count(Sale.id).label('sales'),
+        func.sum(Sale.total_amount).label('revenue')
+    ).filter(
+        date_range_filter(Sale.created_at, start_date, end_date),
+        Sale.payment_status != 'cancelled'
+    ).group_by(day).all()
+    # SQLite devuelve el día como texto y PostgreSQL como date
+    return {
+        str(row.day): {"sales": row.sales, "revenue": float(row.revenue or 0.0)}
+        for row in rows
+    }
+
+def active_customer_count(db: Session) -> int:
+    return db.query(func.count(Customer.id)).filter(Customer.is_active == True).scalar() or 0
+
+def _sales_chart(daily: Dict[str, Dict[str, float]], today: date) -> List[Dict[str, Any]]:
+    """Últimos SALES_CHART_DAYS días, con 0 en los días sin ventas."""
+    days = [today - timedelta(days=offset) for offset in range(SALES_CHART_DAYS - 1, -1, -1)]
+    return [
+        {"date": day.isoformat(), "total": round(daily.get(day.isoformat(), {}).get("revenue", 0.0), 2)}
+        for day in days
+    ]
+
+def _metrics(daily: Dict[str, Dict[str, float]], customer_count: int) -> Dict[str, Any]:
+    total_sales = sum(day["sales"] for day in daily.values())
+    revenue = sum(day["revenue"] for day in daily.values())
+    return {
+        "totalSales": total_sales,
+        "monthlyRevenue": round(revenue, 2),
+        "averageOrderValue": round(revenue / total_sales, 2) if total_sales else 0.0,
+        "customerCount": customer_count
+    }
+
+def build_dashboard(
+    db: Session,
+    widgets: Optional[Iterable[str]] = None,
+    top_products_limit: int = 10,
+    today: Optional[date] = None
+) -> Dict[str, Any]:
+    """
+    Calcula los widgets pedidos (todos por defecto). Las consultas usan el
+    mismo engine que `db` (primario o réplica), cada una con su sesión.
+
+    Los errores de cualquier consulta se propagan: el dashboard nunca muestra
+    datos inventados.
+    """
+    widgets = set(widgets or DASHBOARD_WIDGETS)
+    unknown = widgets - set(DASHBOARD_WIDGETS)
+    if unknown:
+        raise ValueError(f"Unknown dashboard widgets: {', '.join(sorted(unknown))}")
+    today = today or local_today()
+    month_start = today - timedelta(days=METRICS_DAYS - 1)
+    chart_start = today - timedelta(days=SALES_CHART_DAYS - 1)
+    bind = db.get_bind()
+
+    def run(query: Callable[..., Any], *args, **kwargs) -> Future:
+        def task():
+            with Session(bind=bind) as session:
+                return query(session, *args, **kwargs)
+        return _executor.submit(task)
+
+    futures = {}
+    with _builds:
+        if widgets & {"sales", "metrics"}:
+            # Una sola consulta por día para la gráfica y las métricas
+            futures["daily"] = run(daily_sales, month_start if "metrics" in widgets else chart_start, today)
+        if "metrics" in widgets:
+            futures["customers"] = run(active_customer_count)
+        if "top_products" in widgets:
+            futures["top_products"] = run(
+                generate_product_sales_report, month_start, today, limit=top_products_limit
+            )
+        if "low_stock" in widgets:
+            futures["low_stock"] = run(generate_low_stock_report, LOW_STOCK_THRESHOLD_PERCENTAGE)
+
+        # Esperar todas, aunque alguna falle: ningún hilo sigue usando una
+        # conexión después de responder
+        wait(futures.values())
+    results = {name: future.result() for name, future in futures.items()}
+
+    dashboard: Dict[str, Any] = {}
+    if "sales" in widgets:
+        dashboard["sales"] = _sales_chart(results["daily"], today)
+    if "top_products" in widgets:
+        dashboard["topProducts"] = [
+            {
+                "id": item["product_id"],
+                "name": item["product_name"],
+                "sales": item["quantity_sold"],
+                "revenue": item["total_revenue"]
+            }
+            for item in results["top_products"]
+        ]
+    if "low_stock" in widgets:
+        dashboard["lowStock"] = [
+            {
+                "id": item["product_id"],
+                "name": item["product_name"],
+                "stock": item["current_stock"],
+                "minStock": item["min_stock_level"]
+            }
+            for item in results["low_stock"][:LOW_STOCK_LIMIT]
+        ]
+    if "metrics" in widgets:
+        dashboard["metrics"] = _metrics(results["daily"], results["customers"])
+    return dashboard
@@ -0,0 +1,417 @@
+# app/services/report_aggregates.py
+"""
+Agregados materializados de los reportes de ventas, productos, clientes y
+valor de inventario.
+
+Cada tipo de reporte tiene una marca de agua (último id de venta y de
+movimiento incorporados, y hora de la última corrida). Una corrida recalcula
+solo los días tocados desde la marca: los de las ventas nuevas, los de ventas
+canceladas después (se detectan por su movimiento de devolución), los de
+ventas editadas (importes, estado o cliente, por su updated_at) y el día de la última venta ya
+incorporada, por si se confirmó tarde una venta con id menor. Si una corrida
+no ocurre, la siguiente procesa todo lo pendiente; sin marca, se procesa el
+historial completo.
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import and_, delete, desc, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from ..models.category import Category
+from ..models.customer import Customer
+from ..models.inventory import InventoryMovement
+from ..models.product import Product
+from ..models.report_aggregate import (
+    CustomerSalesDaily,
+    InventoryValueByProduct,
+    ProductSalesDaily,
+    ReportWatermark,
+    SalesDaily,
+)
+from ..models.sale import Sale, SaleItem
+from ..utils.date_ranges import date_range_filter, local_date
+from .costing import get_inventory_cost_summary
+from .reports import product_cost_value
+
+logger = logging.getLogger(__name__)
+
+MATERIALIZED_REPORTS = ("sales", "products", "customers", "inventory_value")
+
+DAILY_TABLES = {
+    "sales": SalesDaily,
+    "products": ProductSalesDaily,
+    "customers": CustomerSalesDaily,
+}
+
+def _as_date(value: Any) -> date:
+    # func.date devuelve texto en SQLite y date en PostgreSQL
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+def _lock_watermark(db: Session, report_type: str) -> ReportWatermark:
+    """
+    Marca de agua del reporte, bloqueada hasta el commit (en PostgreSQL dos
+    corridas simultáneas del mismo reporte se serializan).
+    """
+    watermark = db.query(ReportWatermark).filter(
+        ReportWatermark.report_type == report_type
+    ).with_for_update().first()
+    if watermark is None:
+        watermark = ReportWatermark(report_type=report_type, last_sale_id=0, last_movement_id=0)
+        db.add(watermark)
+        db.flush()
+    return watermark
+
+def _days_to_refresh(
+    db: Session,
+    watermark: ReportWatermark,
+    max_sale_id: int,
+    max_movement_id: int
+) -> Optional[Tuple[date, date]]:
+    """Rango de días con ventas nuevas, canceladas o editadas desde la marca de agua."""
+    cancelled = select(InventoryMovement.reference_id).where(
+        InventoryMovement.movement_type == "return",
+        InventoryMovement.id > watermark.last_movement_id,
+        InventoryMovement.id <= max_movement_id
+    )
+    touched = [
+        and_(Sale.id > watermark.last_sale_id, Sale.id <= max_sale_id),
+        Sale.id == watermark.last_sale_id,
+        Sale.id.in_(cancelled)
+    ]
+    if watermark.refreshed_at is not None:
+        touched.append(Sale.updated_at >= watermark.refreshed_at)
+    day = local_date(Sale.created_at)
+    first_day, last_day = db.query(func.min(day), func.max(day)).filter(or_(*touched)).one()
+    if first_day is None:
+        return None
+    return _as_date(first_day), _as_date(last_day)
+
+def _daily_select(report_type: str, first_day: date, last_day: date):
+    """Agregado por día de las ventas no canceladas de los días [first_day, last_day]."""
+    day = local_date(Sale.created_at)
+    in_range = and_(
+        date_range_filter(Sale.created_at, first_day, last_day),
+        Sale.payment_status != 'cancelled'
+    )
+    if report_type == "sales":
+        columns = ["day", "sales_count", "revenue", "taxes", "discounts"]
+        query = select(
+            day,
+            func.count(Sale.id),
+            func.coalesce(func.sum(Sale.total_amount), 0),
+            func.coalesce(func.sum(Sale.tax_amount), 0),
+            func.coalesce(func.sum(Sale.discount_amount), 0)
+        ).where(in_range).group_by(day)
+    elif report_type == "products":
+        columns = ["day", "product_id", "quantity_sold", "revenue", "unit_price_sum", "line_count"]
+        query = select(
+            day,
+            SaleItem.product_id,
+            func.sum(SaleItem.quantity),
+            func.coalesce(func.sum(SaleItem.total), 0),
+            func.coalesce(func.sum(SaleItem.unit_price), 0),
+            func.count(SaleItem.id)
+        ).join(SaleItem, SaleItem.sale_id == Sale.id).where(in_range).group_by(day, SaleItem.product_id)
+    else:
+        columns = ["day", "customer_id", "purchases", "total_spent"]
+        query = select(
+            day,
+            Sale.customer_id,
+            func.count(Sale.id),
+            func.coalesce(func.sum(Sale.total_amount), 0)
+        ).where(in_range, Sale.customer_id.isnot(None)).group_by(day, Sale.customer_id)
+    return columns, query
+
+def refresh_daily_aggregate(db: Session, report_type: str) -> int:
+    """
+    Incorpora las ventas nuevas al agregado diario de `report_type`
+    (sales, products o customers) y avanza su marca de agua.
+
+    Returns:
+        Número de días recalculados
+    """
+    table = DAILY_TABLES[report_type]
+    watermark = _lock_watermark(db, report_type)
+    refreshed_at = db.scalar(select(func.now()))
+    # Las marcas se fijan al inicio: lo que llegue durante la corrida queda para la siguiente
+    max_sale_id = db.scalar(select(func.max(Sale.id))) or 0
+    max_movement_id = db.scalar(select(func.max(InventoryMovement.id))) or 0
+
+    days = _days_to_refresh(db, watermark, max_sale_id, max_movement_id)
+    refreshed_days = 0
+    if days is not None:
+        first_day, last_day = days
+        columns, query = _daily_select(report_type, first_day, last_day)
+        db.execute(delete(table).where(table.day >= first_day, table.day <= last_day))
+        db.execute(insert(table).from_select(columns, query))
+        refreshed_days = (last_day - first_day).days + 1
+
+    watermark.last_sale_id = max_sale_id
+    watermark.last_movement_id = max_movement_id
+    watermark.refreshed_at = refreshed_at
+    db.commit()
+    return refreshed_days
+
+def refresh_inventory_value(db: Session) -> int:
+    """
+    Recalcula el valor de inventario de los productos modificados o con
+    movimientos desde la última corrida (todos en la primera).
+
+    Returns:
+        Número de productos recalculados
+    """
+    watermark = _lock_watermark(db, "inventory_value")
+    refreshed_at = db.scalar(select(func.now()))
+    max_movement_id = db.scalar(select(func.max(InventoryMovement.id))) or 0
+
+    layers = get_inventory_cost_summary(db)
+    query = select(
+        Product.id,
+        Product.category_id,
+        func.coalesce(Product.is_active, True),
+        func.coalesce(Product.stock_quantity, 0),
+        func.coalesce(product_cost_value(layers), 0),
+        func.coalesce(Product.stock_quantity * Product.price, 0)
+    ).outerjoin(layers, layers.c.product_id == Product.id)
+
+    stale = delete(InventoryValueByProduct)
+    if watermark.refreshed_at is not None:
+        # Precio, costo, stock o categoría cambian con updated_at; las capas, con un movimiento
+        changed = select(Product.id).where(or_(
+            func.coalesce(Product.updated_at, Product.created_at) >= watermark.refreshed_at,
+            Product.id.in_(select(InventoryMovement.product_id).where(
+                InventoryMovement.id > watermark.last_movement_id,
+                InventoryMovement.id <= max_movement_id
+            ))
+        ))
+        stale = stale.where(InventoryValueByProduct.product_id.in_(changed))
+        query = query.where(Product.id.in_(changed))
+
+    db.execute(stale)
+    result = db.execute(insert(InventoryValueByProduct).from_select(
+        ["product_id", "category_id", "is_active", "stock_quantity", "cost_value", "retail_value"],
+        query
+    ))
+
+    watermark.last_movement_id = max_movement_id
+    watermark.refreshed_at = refreshed_at
+    db.commit()
+    return result.rowcount
+
+def refresh_report_aggregates(db: Session, report_types: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """
+    Actualiza los agregados de los reportes indicados (todos por defecto).
+    Cada reporte se confirma por separado: si uno falla, los demás avanzan.
+
+    Returns:
+        Días (o productos, para inventory_value) recalculados por reporte
+    """
+    results: Dict[str, int] = {}
+    failed: List[str] = []
+    for report_type in report_types or MATERIALIZED_REPORTS:
+        try:
+            if report_type == "inventory_value":
+                results[report_type] = refresh_inventory_value(db)
+            else:
+                results[report_type] = refresh_daily_aggregate(db, report_type)
+        except Exception:
+            db.rollback()
+            logger.exception(f"Error refreshing {report_type} aggregates")
+            failed.append(report_type)
+    logger.info(f"Report aggregates refreshed: {results}")
+    if failed:
+        raise RuntimeError(f"Report aggregates failed: {', '.join(failed)}")
+    return results
+
+def reset_report_aggregates(db: Session, report_types: Optional[Iterable[str]] = None) -> None:
+    """Borra agregados y marcas de agua: la próxima corrida reconstruye todo."""
+    report_types = list(report_types or MATERIALIZED_REPORTS)
+    for report_type in report_types:
+        table = DAILY_TABLES.get(report_type, InventoryValueByProduct)
+        db.execute(delete(table))
+    db.execute(delete(ReportWatermark).where(ReportWatermark.report_type.in_(report_types)))
+    db.commit()
+
+def aggregates_refreshed_at(db: Session, report_type: str) -> Optional[datetime]:
+    """Hora de la última corrida del reporte, o None si nunca se materializó."""
+    return db.query(ReportWatermark.refreshed_at).filter(
+        ReportWatermark.report_type == report_type
+    ).scalar()
+
+# Lectores: mismo formato que los generadores de services/reports.py
+
+def read_sales_report(db: Session, start_date: date, end_date: date, group_by: str = "day") -> List[Dict[str, Any]]:
+    """Ventas por día, semana (desde el lunes) o mes, desde sales_daily."""
+    rows = db.query(SalesDaily).filter(
+        SalesDaily.day >= start_date,
+        SalesDaily.day <= end_date
+    ).order_by(SalesDaily.day).all()
+
+    buckets: Dict[date, Dict[str, float]] = {}
+    for row in rows:
+        if group_by == "week":
+            key = row.day - timedelta(days=row.day.weekday())
+        elif group_by == "month":
+            key = row.day.replace(day=1)
+        else:
+            key = row.day
+        bucket = buckets.setdefault(key, {"total_sales": 0, "revenue": 0.0, "taxes": 0.0, "discounts": 0.0})
+        bucket["total_sales"] += row.sales_count
+        bucket["revenue"] += row.revenue
+        bucket["taxes"] += row.taxes
+        bucket["discounts"] += row.discounts
+
+    return [
+        {
+            "date": key.strftime('%Y-%m-%d'),
+            "total_sales": bucket["total_sales"],
+            "revenue": bucket["revenue"],
+            "taxes": bucket["taxes"],
+            "discounts": bucket["discounts"],
+            "net_revenue": bucket["revenue"] - bucket["taxes"] if bucket["revenue"] and bucket["taxes"] else 0.0
+        }
+        for key, bucket in buckets.items()
+    ]
+
+def read_product_sales_report(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    category_id: Optional[int] = None,
+    limit: int = 50
+) -> List[Dict[str, Any]]:
+    """Ventas por producto desde product_sales_daily."""
+    quantity_sold = func.sum(ProductSalesDaily.quantity_sold)
+    query = db.query(
+        Product.id,
+        Product.name,
+        Product.sku,
+        Category.name.label('category_name'),
+        quantity_sold.label('quantity_sold'),
+        func.sum(ProductSalesDaily.revenue).label('total_revenue'),
+        (func.sum(ProductSalesDaily.unit_price_sum) / func.sum(ProductSalesDaily.line_count)).label('avg_price')
+    ).join(
+        Product, Product.id == ProductSalesDaily.product_id
+    ).join(
+        Category, Category.id == Product.category_id
+    ).filter(
+        ProductSalesDaily.day >= start_date,
+        ProductSalesDaily.day <= end_date
+    )
+    if category_id:
+        query = query.filter(Product.category_id == category_id)
+
+    rows = query.group_by(Product.id, Category.name).order_by(desc(quantity_sold)).limit(limit).all()
+    return [
+        {
+            "product_id": row.id,
+            "product_name": row.name,
+            "sku": row.sku,
+            "category": row.category_name,
+            "quantity_sold": row.quantity_sold,
+            "total_revenue": float(row.total_revenue) if row.total_revenue else 0.0,
+            "average_price": float(row.avg_price) if row.avg_price else 0.0
+        }
+        for row in rows
+    ]
+
+def read_customer_sales_report(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    limit: int = 20
+) -> List[Dict[str, Any]]:
+    """Ventas por cliente desde customer_sales_daily."""
+    total_spent = func.sum(CustomerSalesDaily.total_spent)
+    purchases = func.sum(CustomerSalesDaily.purchases)
+    rows = db.query(
+        Customer.id,
+        Customer.name,
+        Customer.email,
+        purchases.label('total_purchases'),
+        total_spent.label('total_spent'),
+        func.min(CustomerSalesDaily.day).label('first_purchase'),
+        func.max(CustomerSalesDaily.day).label('last_purchase')
+    ).join(
+        Customer, Customer.id == CustomerSalesDaily.customer_id
+    ).filter(
+        CustomerSalesDaily.day >= start_date,
+        CustomerSalesDaily.day <= end_date
+    ).group_by(Customer.id).order_by(desc(total_spent)).limit(limit).all()
+
+    return [
+        {
+            "customer_id": row.id,
+            "name": row.name,
+            "email": row.email,
+            "total_purchases": row.total_purchases,
+            "total_spent": float(row.total_spent) if row.total_spent else 0.0,
+            "average_purchase": float(row.total_spent) / row.total_purchases if row.total_purchases else 0.0,
+            "first_purchase": _as_date(row.first_purchase).strftime('%Y-%m-%d') if row.first_purchase else None,
+            "last_purchase": _as_date(row.last_purchase).strftime('%Y-%m-%d') if row.last_purchase else None
+        }
+        for row in rows
+    ]
+
+def read_inventory_value_report(db: Session) -> Dict[str, Any]:
+    """Valor de inventario desde inventory_value_by_product."""
+    active = InventoryValueByProduct.is_active == True
+    totals = db.query(
+        func.sum(InventoryValueByProduct.cost_value).label('total_cost_value'),
+        func.sum(InventoryValueByProduct.retail_value).label('total_retail_value'),
+        func.count(InventoryValueByProduct.product_id).label('total_products')
+    ).filter(active).first()
+
+    cost_value = func.sum(InventoryValueByProduct.cost_value)
+    categories = db.query(
+        Category.id,
+        Category.name,
+        cost_value.label('cost_value'),
+        func.sum(InventoryValueByProduct.retail_value).label('retail_value'),
+        func.count(InventoryValueByProduct.product_id).label('product_count')
+    ).join(
+        InventoryValueByProduct, and_(InventoryValueByProduct.category_id == Category.id, active)
+    ).group_by(Category.id).order_by(desc(cost_value)).all()
+
+    return {
+        "summary": {
+            "total_cost_value": float(totals.total_cost_value) if totals.total_cost_value else 0.0,
+            "total_retail_value": float(totals.total_retail_value) if totals.total_retail_value else 0.0,
+            "potential_profit": float(totals.total_retail_value - totals.total_cost_value)
+                if (totals.total_retail_value and totals.total_cost_value) else 0.0,
+            "total_products": totals.total_products,
+            "costing_method": "fifo"
+        },
+        "by_category": [
+            {
+                "category_id": row.id,
+                "category_name": row.name,
+                "cost_value": float(row.cost_value) if row.cost_value else 0.0,
+                "retail_value": float(row.retail_value) if row.retail_value else 0.0,
+                "product_count": row.product_count
+            }
+            for row in categories
+        ]
+    }
+
+if __name__ == "__main__":
+    import argparse
+    from ..database import SessionLocal
+    from ..logging_config import configure_logging
+
+    parser = argparse.ArgumentParser(description="Actualiza los agregados materializados de los reportes")
+    parser.add_argument("--report", action="append", dest="report_types", choices=MATERIALIZED_REPORTS,
+                        help="Limitar a un reporte (se puede repetir)")
+    parser.add_argument("--full", action="store_true", help="Borrar y reconstruir desde cero")
+    args = parser.parse_args()
+
+    configure_logging()
+    session = SessionLocal()
+    try:
+        if args.full:
+            reset_report_aggregates(session, args.report_types)
+        refresh_report_aggregates(session, args.report_types)
+    finally:
+        session.close()
@@ -0,0 +1,480 @@
+# app/services/report_jobs.py
+"""
+Reportes exportados en segundo plano.
+
+El API registra el trabajo en `report_jobs` y lo envía a un pool de procesos;
+cada proceso abre su propia sesión, genera el reporte, escribe el archivo en
+REPORTS_FOLDER y va actualizando el estado en la tabla. Como el estado vive en
+la base de datos, cualquier worker de uvicorn puede responder por un trabajo
+que se ejecutó en otro.
+
+Un paquete (report_type "bundle") reparte varios reportes en su propio pool:
+cada proceso genera y escribe un reporte y devuelve solo su tiempo y número
+de filas; un hilo del API espera las partes, las une en un ZIP con un
+manifest.json de tiempos y actualiza el trabajo.
+
+Mientras un trabajo corre, un hilo renueva su updated_at cada cuarto de
+REPORT_JOB_STALE_SECONDS; solo un trabajo en curso que deja de renovarlo (su
+proceso murió) se da por perdido.
+"""
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import zipfile
+from contextlib import contextmanager
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.report_job import ReportJob
+from ..utils.date_ranges import local_today
+from . import customer_stats, reports
+
+logger = logging.getLogger(__name__)
+
+# Tipo de reporte -> (generador, argumentos que acepta, días por defecto del rango)
+REPORT_TYPES = {
+    "sales": (reports.generate_sales_report, ("start_date", "end_date", "group_by"), 30),
+    "products": (reports.generate_product_sales_report, ("start_date", "end_date", "category_id", "limit"), 30),
+    "inventory_value": (reports.generate_inventory_value_report, (), None),
+    "margins": (reports.generate_gross_margin_report, ("start_date", "end_date", "category_id", "limit"), 30),
+    "customers": (reports.generate_customer_sales_report, ("start_date", "end_date", "limit"), 90),
+    "customers_lifetime": (customer_stats.generate_customer_lifetime_report, ("segment", "limit"), None),
+    # Sin lista intermedia: las filas van del cursor al archivo
+    "inventory_movements": (
+        reports.iter_inventory_movements_report,
+        ("start_date", "end_date", "product_id", "movement_type"),
+        30
+    ),
+    "low_stock": (reports.generate_low_stock_report, ("threshold_percentage",), None),
+    # Ventas sin agrupar (una fila por línea), solo como exportación
+    "sales_lines": (reports.iter_sales_lines_report, ("start_date", "end_date"), 30),
+}
+
+EXPORT_FORMATS = ("json", "csv", "jsonl") + reports.COLUMNAR_FORMATS
+
+# Tipos de columna declarados para Parquet/Arrow (los demás reportes se infieren)
+ARROW_COLUMN_TYPES = {
+    "inventory_movements": reports.INVENTORY_MOVEMENTS_ARROW_TYPES,
+    "sales_lines": reports.SALES_LINES_ARROW_TYPES,
+}
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Reportes del cierre de mes: paquete por defecto de POST /reports/bundle
+MONTH_END_BUNDLE = ("sales", "products", "customers", "inventory_value", "inventory_movements", "low_stock")
+
+# Pools por nombre: "jobs" para exportaciones sueltas, "bundle" para las partes de un paquete
+_executors: Dict[str, Executor] = {}
+_executor_lock = threading.Lock()
+
+# Hilos del API que esperan las partes de cada paquete (no hacen trabajo pesado)
+_bundle_coordinator = ThreadPoolExecutor(max_workers=2, thread_name_prefix="report-bundle")
+
+def get_executor(pool: str = "jobs") -> Executor:
+    """
+    Pool compartido por el proceso del API. Los procesos se crean con spawn:
+    un fork heredaría las conexiones abiertas del engine y los hilos del servidor.
+    """
+    workers = settings.REPORT_BUNDLE_WORKERS if pool == "bundle" else settings.REPORT_JOB_WORKERS
+    with _executor_lock:
+        if pool not in _executors:
+            if workers > 0:
+                _executors[pool] = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                _executors[pool] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"report-{pool}")
+        return _executors[pool]
+
+def shutdown_executor(pool: Optional[str] = None) -> None:
+    """Detiene el pool (todos por defecto) sin esperar: los trabajos pendientes quedarán como perdidos."""
+    with _executor_lock:
+        for name in [pool] if pool else list(_executors):
+            executor = _executors.pop(name, None)
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+def _submit(pool: str, fn: Callable[..., Any], *args: Any) -> Future:
+    try:
+        return get_executor(pool).submit(fn, *args)
+    except BrokenProcessPool:
+        # Un proceso del pool murió (p. ej. por memoria): se recrea una vez
+        logger.warning(f"Report pool {pool} was broken, recreating it")
+        shutdown_executor(pool)
+        return get_executor(pool).submit(fn, *args)
+
+def normalize_params(report_type: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Deja solo los argumentos que acepta el reporte y completa el rango de fechas
+    con los mismos valores por defecto que los endpoints. Las fechas se guardan
+    en ISO para que el trabajo sea reproducible aunque se ejecute otro día.
+    """
+    if report_type not in REPORT_TYPES:
+        raise ValueError(f"Unknown report type: {report_type}")
+    _, arguments, default_days = REPORT_TYPES[report_type]
+    params = params or {}
+
+    normalized = {
+        name: params[name]
+        for name in arguments
+        if name not in ("start_date", "end_date") and params.get(name) is not None
+    }
+    if default_days is not None:
+        end_date = params.get("end_date") or local_today()
+        start_date = params.get("start_date") or local_today() - timedelta(days=default_days)
+        normalized["start_date"] = date.fromisoformat(str(start_date)).isoformat()
+        normalized["end_date"] = date.fromisoformat(str(end_date)).isoformat()
+    return normalized
+
+def _check_export_format(export_format: str, compress: bool = False) -> str:
+    """Valida el formato y le añade .gz si se comprime."""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    if export_format in reports.COLUMNAR_FORMATS:
+        if importlib.util.find_spec("pyarrow") is None:
+            raise ValueError(f"Exporting to {export_format} requires pyarrow")
+    elif compress:
+        export_format += ".gz"
+    return export_format
+
+def submit_report_job(
+    db: Session,
+    report_type: str,
+    params: Optional[Dict[str, Any]],
+    export_format: str,
+    user_id: Optional[int] = None,
+    compress: bool = False
+) -> ReportJob:
+    """
+    Registra el trabajo (queued) y lo envía al pool. Con `compress` el archivo
+    se escribe con gzip y el formato queda como `csv.gz`, `jsonl.gz`...;
+    Parquet y Arrow ya van comprimidos (zstd) y lo ignoran.
+    """
+    export_format = _check_export_format(export_format, compress)
+
+    job = ReportJob(
+        id=uuid.uuid4().hex,
+        report_type=report_type,
+        params=normalize_params(report_type, params),
+        export_format=export_format,
+        status="queued",
+        progress=0,
+        created_by=user_id
+    )
+    db.add(job)
+    # El proceso del pool debe encontrar la fila: se confirma antes de enviarlo
+    db.commit()
+    db.refresh(job)
+
+    _submit("jobs", run_report_job, job.id)
+    return job
+
+def _update(db: Session, job: ReportJob, **values) -> None:
+    for key, value in values.items():
+        setattr(job, key, value)
+    db.commit()
+
+def _write_export(data: Any, name: str, export_format: str, report_type: Optional[str] = None) -> Dict[str, Any]:
+    """Escribe el archivo de un reporte y devuelve nombre, tamaño y filas."""
+    export_format, _, compression = export_format.partition(".")
+    compress = compression == "gz"
+
+    row_count = None
+    if isinstance(data, dict):
+        # Valor de inventario: las filas son las categorías; salvo en JSON se
+        # añade una fila de totales
+        row_count = len(data["by_category"])
+        if export_format != "json":
+            summary = data["summary"]
+            data = data["by_category"] + [{
+                "category_id": None,
+                "category_name": "TOTAL",
+                "cost_value": summary["total_cost_value"],
+                "retail_value": summary["total_retail_value"],
+                "product_count": summary["total_products"],
+            }]
+
+    if export_format == "csv":
+        filepath, written = reports.write_report_csv(data, name, compress)
+    elif export_format in reports.COLUMNAR_FORMATS:
+        filepath, written = reports.write_report_columnar(
+            data, name, export_format, ARROW_COLUMN_TYPES.get(report_type)
+        )
+    elif export_format == "jsonl":
+        filepath, written = reports.write_report_jsonl(data, name, compress)
+    else:
+        filepath, written = reports.write_report_json(data, name, compress)
+    return {
+        "filename": os.path.basename(filepath),
+        "file_size": os.path.getsize(filepath),
+        "row_count": written if row_count is None else row_count,
+    }
+
+@contextmanager
+def _heartbeat(job_id: str) -> Iterator[None]:
+    """
+    Renueva updated_at del trabajo mientras dura el bloque, desde un hilo con
+    su propia sesión: la del trabajo puede estar leyendo con un cursor del
+    servidor durante toda la exportación.
+    """
+    stop = threading.Event()
+    interval = max(1.0, settings.REPORT_JOB_STALE_SECONDS / 4)
+
+    def beat() -> None:
+        while not stop.wait(interval):
+            db = SessionLocal()
+            try:
+                db.execute(
+                    update(ReportJob)
+                    .where(ReportJob.id == job_id, ReportJob.status == "running")
+                    .values(updated_at=func.now())
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.exception(f"Report job {job_id}: heartbeat failed")
+            finally:
+                db.close()
+
+    thread = threading.Thread(target=beat, name=f"report-heartbeat-{job_id[:8]}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+def _export(job: ReportJob, data: Any) -> Dict[str, Any]:
+    return _write_export(data, f"{job.report_type}_{job.id}", job.export_format, job.report_type)
+
+def _generator_kwargs(report_type: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    _, arguments, _ = REPORT_TYPES[report_type]
+    return {
+        name: date.fromisoformat(value) if name in ("start_date", "end_date") else value
+        for name, value in params.items()
+        if name in arguments
+    }
+
+def run_report_job(job_id: str) -> None:
+    """
+    Ejecuta un trabajo dentro del pool, con su propia sesión. Los errores se
+    guardan en el trabajo: el proceso que lo envió no espera el resultado.
+    """
+    db = SessionLocal()
+    try:
+        job = db.get(ReportJob, job_id)
+        if job is None or job.status != "queued":
+            return
+        _update(db, job, status="running", progress=10, started_at=datetime.now(timezone.utc))
+
+        generator = REPORT_TYPES[job.report_type][0]
+        with _heartbeat(job_id):
+            data = generator(db, **_generator_kwargs(job.report_type, job.params))
+            _update(db, job, progress=70)
+
+            # En los reportes por streaming la lectura ocurre aquí, al escribir
+            result = _export(job, data)
+        _update(db, job, status="completed", progress=100, finished_at=datetime.now(timezone.utc), **result)
+        logger.info(f"Report job {job_id} completed: {result['row_count']} rows, {result['file_size']} bytes")
+    except Exception as e:
+        logger.exception(f"Report job {job_id} failed")
+        db.rollback()
+        job = db.get(ReportJob, job_id)
+        if job is not None:
+            _update(db, job, status="failed", error=str(e), finished_at=datetime.now(timezone.utc))
+    finally:
+        db.close()
+
+def submit_report_bundle(
+    db: Session,
+    report_specs: Optional[List[Dict[str, Any]]] = None,
+    export_format: str = "csv",
+    user_id: Optional[int] = None,
+    compress: bool = False,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> ReportJob:
+    """
+    Registra un paquete de reportes (queued) y lo envía al coordinador. Cada
+    reporte es {"report_type", "params"}; start_date y end_date se aplican a
+    los que no traen su propio rango. Sin lista se generan los reportes del
+    cierre de mes (MONTH_END_BUNDLE).
+    """
+    export_format = _check_export_format(export_format, compress)
+    specs = report_specs or [{"report_type": report_type} for report_type in MONTH_END_BUNDLE]
+    shared = {"start_date": start_date, "end_date": end_date}
+    parts = []
+    for spec in specs:
+        params = {**{k: v for k, v in shared.items() if v is not None}, **(spec.get("params") or {})}
+        parts.append({"report_type": spec["report_type"], "params": normalize_params(spec["report_type"], params)})
+
+    job = ReportJob(
+        id=uuid.uuid4().hex,
+        report_type="bundle",
+        params={"export_format": export_format, "reports": parts},
+        export_format="zip",
+        status="queued",
+        progress=0,
+        created_by=user_id
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    _bundle_coordinator.submit(run_report_bundle, job.id)
+    return job
+
+def run_bundle_part(report_type: str, params: Dict[str, Any], export_format: str, name: str) -> Dict[str, Any]:
+    """
+    Genera y escribe una parte de un paquete dentro del pool, con su propia
+    sesión (y conexión). Al coordinador solo vuelven el archivo y los tiempos,
+    no las filas.
+    """
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        generator = REPORT_TYPES[report_type][0]
+        result = _write_export(
+            generator(db, **_generator_kwargs(report_type, params)), name, export_format, report_type
+        )
+    finally:
+        db.close()
+    return {**result, "seconds": round(time.perf_counter() - started, 3)}
+
+def _write_bundle_archive(job: ReportJob, parts: List[Dict[str, Any]], results: List[Dict[str, Any]],
+                          wall_seconds: float) -> str:
+    """
+    Une los archivos de las partes en bundle_<id>.zip con un manifest.json.
+    Los formatos ya comprimidos (gzip, Parquet, Arrow) se guardan sin
+    volver a comprimir.
+    """
+    filepath = os.path.join(settings.REPORTS_FOLDER, f"bundle_{job.id}.zip")
+    manifest = []
+    names = set()
+    with zipfile.ZipFile(filepath, "w") as archive:
+        for part, result in zip(parts, results):
+            extension = result["filename"].split(".", 1)[1]
+            arcname = f"{part['report_type']}.{extension}"
+            suffix = 1
+            while arcname in names:
+                suffix += 1
+                arcname = f"{part['report_type']}_{suffix}.{extension}"
+            names.add(arcname)
+
+            compressed = extension.endswith(".gz") or extension in reports.COLUMNAR_FORMATS
+            archive.write(
+                os.path.join(settings.REPORTS_FOLDER, result["filename"]),
+                arcname,
+                compress_type=zipfile.ZIP_STORED if compressed else zipfile.ZIP_DEFLATED
+            )
+            result["file"] = arcname
+            manifest.append({**part, **result})
+        archive.writestr("manifest.json", json.dumps({
+            "bundle_id": job.id,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "export_format": job.params["export_format"],
+            "wall_seconds": round(wall_seconds, 3),
+            "reports": [
+                {key: value for key, value in entry.items() if key != "filename"}
+                for entry in manifest
+            ],
+        }, indent=2))
+    return filepath
+
+def run_report_bundle(job_id: str) -> None:
+    """
+    Coordina un paquete desde un hilo del API: envía cada reporte al pool
+    "bundle", guarda el avance y los tiempos de cada parte a medida que
+    terminan y al final escribe el ZIP. Si alguna parte falla, el paquete
+    falla (con el error de cada parte en `results`).
+    """
+    db = SessionLocal()
+    part_files: List[str] = []
+    try:
+        job = db.get(ReportJob, job_id)
+        if job is None or job.status != "queued":
+            return
+        _update(db, job, status="running", progress=5, started_at=datetime.now(timezone.utc))
+        parts = job.params["reports"]
+        export_format = job.params["export_format"]
+
+        started = time.perf_counter()
+        futures = {
+            _submit(
+                "bundle", run_bundle_part, part["report_type"], part["params"], export_format,
+                f"bundle_{job.id}_{index}_{part['report_type']}"
+            ): index
+            for index, part in enumerate(parts)
+        }
+        results: List[Dict[str, Any]] = [{"report_type": part["report_type"]} for part in parts]
+        with _heartbeat(job_id):
+            for done, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                try:
+                    results[index].update(future.result())
+                    part_files.append(results[index]["filename"])
+                except Exception as e:
+                    logger.exception(f"Report bundle {job_id}: {parts[index]['report_type']} failed")
+                    results[index]["error"] = str(e)
+                _update(db, job, progress=5 + 85 * done // len(parts),
+                        results=[{k: v for k, v in result.items() if k != "filename"} for result in results])
+        wall_seconds = time.perf_counter() - started
+
+        failed = [result["report_type"] for result in results if "error" in result]
+        if failed:
+            raise RuntimeError(f"Reports failed: {', '.join(failed)}")
+
+        filepath = _write_bundle_archive(job, parts, results, wall_seconds)
+        _update(
+            db, job, status="completed", progress=100, finished_at=datetime.now(timezone.utc),
+            filename=os.path.basename(filepath), file_size=os.path.getsize(filepath),
+            row_count=sum(result["row_count"] for result in results),
+            results=[{k: v for k, v in result.items() if k != "filename"} for result in results]
+        )
+        logger.info(f"Report bundle {job_id} completed in {wall_seconds:.2f} s "
+                    f"(sum of reports {sum(result['seconds'] for result in results):.2f} s)")
+    except Exception as e:
+        logger.exception(f"Report bundle {job_id} failed")
+        db.rollback()
+        job = db.get(ReportJob, job_id)
+        if job is not None:
+            _update(db, job, status="failed", error=str(e), finished_at=datetime.now(timezone.utc))
+    finally:
+        # Las partes ya están dentro del ZIP (o el paquete falló)
+        for filename in part_files:
+            try:
+                os.remove(os.path.join(settings.REPORTS_FOLDER, filename))
+            except OSError:
+                pass
+        db.close()
+
+def expire_stale_job(db: Session, job: ReportJob) -> ReportJob:
+    """
+    Marca como fallido un trabajo en curso cuyo updated_at no se renueva desde
+    hace más de REPORT_JOB_STALE_SECONDS (el proceso que lo ejecutaba se
+    reinició o murió). Los trabajos en cola no se expiran: pueden estar
+    esperando detrás de otros en un pool ocupado.
+    """
+    if job.status != "running" or job.updated_at is None:
+        return job
+    updated_at = job.updated_at
+    if updated_at.tzinfo is None:
+        # SQLite devuelve fechas sin zona horaria (CURRENT_TIMESTAMP es UTC)
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    if datetime.now(timezone.utc) - updated_at > timedelta(seconds=settings.REPORT_JOB_STALE_SECONDS):
+        _update(db, job, status="failed", error="Report job was lost before finishing",
+                finished_at=datetime.now(timezone.utc))
+    return job
@@ -1,17 +1,23 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc, cast, Date
-from datetime import datetime, timedelta, date
-from typing import List, Dict, Any, Optional
-import pandas as pd
-import json
-import os
+from sqlalchemy import func, and_, desc, cast, Date, case
+from datetime import datetime, date
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
 import csv
+import gzip
+import os
+from itertools import islice
+
+import orjson
 
+from ..config import settings
 from ..models.sale import Sale, SaleItem
 from ..models.product import Product
 from ..models.category import Category
 from ..models.inventory import InventoryMovement
 from ..models.customer import Customer
+from ..models.cost_layer import CostLayerConsumption
+from ..utils.date_ranges import date_range_filter, local_date, local_time
+from .costing import get_inventory_cost_summary
 
 def generate_sales_report(
     db: Session,
@@ -25,7 +31,7 @@ def generate_sales_report(
     Args:
         db: Sesión de base de datos
         start_date: Fecha de inicio
-        end_date: Fecha de fin
+        end_date: Fecha de fin (incluida completa)
         group_by: Tipo de agrupación ('day', 'week', 'month')
     
     Returns:
@@ -33,11 +39,11 @@ def generate_sales_report(
     """
     # Definir el formato de agrupación según el parámetro
     if group_by == "week":
-        date_format = func.date_trunc('week', Sale.created_at)
+        date_format = func.date_trunc('week', local_time(Sale.created_at))
     elif group_by == "month":
-        date_format = func.date_trunc('month', Sale.created_at)
+        date_format = func.date_trunc('month', local_time(Sale.created_at))
     else:  # Día por defecto
-        date_format = func.date(Sale.created_at)
+        date_format = local_date(Sale.created_at)
     
     # Construir la consulta base
     query = db.query(
@@ -48,8 +54,7 @@ def generate_sales_report(
         func.sum(Sale.discount_amount).label('discounts')
     ).filter(
         and_(
-            Sale.created_at >= start_date,
-            Sale.created_at <= end_date,
+            date_range_filter(Sale.created_at, start_date, end_date),
             Sale.payment_status != 'cancelled'
         )
     ).group_by(
@@ -88,7 +93,7 @@ def generate_product_sales_report(
     Args:
         db: Sesión de base de datos
         start_date: Fecha de inicio
-        end_date: Fecha de fin
+        end_date: Fecha de fin (incluida completa)
         category_id: ID de categoría para filtrar (opcional)
         limit: Número máximo de productos a incluir
     
@@ -109,8 +114,7 @@ def generate_product_sales_report(
     ).join(
         Sale, and_(
             Sale.id == SaleItem.sale_id,
-            Sale.created_at >= start_date,
-            Sale.created_at <= end_date,
+            date_range_filter(Sale.created_at, start_date, end_date),
             Sale.payment_status != 'cancelled'
         )
     ).join(
@@ -147,23 +151,44 @@ def generate_product_sales_report(
     
     return report
 
+def product_cost_value(layers: Any) -> Any:
+    """
+    Valor al costo del stock de un producto: sus capas FIFO abiertas
+    (`layers`, de get_inventory_cost_summary) más las unidades sin capa al
+    costo actual. Requiere unir `layers` por product_id.
+    """
+    layer_quantity = func.coalesce(layers.c.layer_quantity, 0)
+    uncovered_quantity = case(
+        (Product.stock_quantity > layer_quantity, Product.stock_quantity - layer_quantity),
+        else_=0
+    )
+    return func.coalesce(layers.c.layer_value, 0) + uncovered_quantity * Product.cost_price
+
 def generate_inventory_value_report(
     db: Session
 ) -> Dict[str, Any]:
     """
     Genera un reporte del valor actual del inventario.
     
+    El valor al costo se calcula con las capas FIFO abiertas; las unidades en
+    stock que no tienen capa (historial previo) se valoran al costo actual.
+    
     Args:
         db: Sesión de base de datos
     
     Returns:
         Diccionario con información del valor del inventario
     """
+    layers = get_inventory_cost_summary(db)
+    cost_value = product_cost_value(layers)
+    
     # Consulta para obtener el valor total del inventario
     inventory_value_query = db.query(
-        func.sum(Product.stock_quantity * Product.cost_price).label('total_cost_value'),
+        func.sum(cost_value).label('total_cost_value'),
         func.sum(Product.stock_quantity * Product.price).label('total_retail_value'),
         func.count(Product.id).label('total_products')
+    ).outerjoin(
+        layers, layers.c.product_id == Product.id
     ).filter(
         Product.is_active == True
     )
@@ -174,7 +199,7 @@ def generate_inventory_value_report(
     category_value_query = db.query(
         Category.id,
         Category.name,
-        func.sum(Product.stock_quantity * Product.cost_price).label('cost_value'),
+        func.sum(cost_value).label('cost_value'),
         func.sum(Product.stock_quantity * Product.price).label('retail_value'),
         func.count(Product.id).label('product_count')
     ).join(
@@ -182,10 +207,12 @@ def generate_inventory_value_report(
             Product.category_id == Category.id,
             Product.is_active == True
         )
+    ).outerjoin(
+        layers, layers.c.product_id == Product.id
     ).group_by(
         Category.id
     ).order_by(
-        desc(func.sum(Product.stock_quantity * Product.cost_price))
+        desc(func.sum(cost_value))
     )
     
     category_values = category_value_query.all()
@@ -197,7 +224,8 @@ def generate_inventory_value_report(
             "total_retail_value": float(inventory_value.total_retail_value) if inventory_value.total_retail_value else 0.0,
             "potential_profit": float(inventory_value.total_retail_value - inventory_value.total_cost_value) 
                 if (inventory_value.total_retail_value and inventory_value.total_cost_value) else 0.0,
-            "total_products": inventory_value.total_products
+            "total_products": inventory_value.total_products,
+            "costing_method": "fifo"
         },
         "by_category": [
             {
@@ -213,6 +241,100 @@ def generate_inventory_value_report(
     
     return report
 
+def generate_gross_margin_report(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    category_id: Optional[int] = None,
+    limit: int = 50
+) -> List[Dict[str, Any]]:
+    """
+    Genera un reporte de margen bruto por producto.
+    
+    El costo de ventas proviene de los consumos de capas FIFO registrados al
+    vender, por lo que no es necesario recorrer el historial de movimientos.
+    
+    Args:
+        db: Sesión de base de datos
+        start_date: Fecha de inicio
+        end_date: Fecha de fin (incluida completa)
+        category_id: ID de categoría para filtrar (opcional)
+        limit: Número máximo de productos a incluir
+    
+    Returns:
+        Lista de productos con ingresos, costo de ventas y margen
+    """
+    sale_filter = and_(
+        date_range_filter(Sale.created_at, start_date, end_date),
+        Sale.payment_status != 'cancelled'
+    )
+    
+    revenue = db.query(
+        SaleItem.product_id.label('product_id'),
+        func.sum(SaleItem.quantity).label('quantity_sold'),
+        func.sum(SaleItem.total).label('revenue')
+    ).join(
+        Sale, and_(Sale.id == SaleItem.sale_id, sale_filter)
+    ).group_by(
+        SaleItem.product_id
+    ).subquery()
+    
+    cogs = db.query(
+        CostLayerConsumption.product_id.label('product_id'),
+        func.sum(CostLayerConsumption.quantity * CostLayerConsumption.unit_cost).label('cogs')
+    ).join(
+        InventoryMovement, and_(
+            InventoryMovement.id == CostLayerConsumption.movement_id,
+            InventoryMovement.movement_type == 'sale'
+        )
+    ).join(
+        Sale, and_(Sale.id == InventoryMovement.reference_id, sale_filter)
+    ).group_by(
+        CostLayerConsumption.product_id
+    ).subquery()
+    
+    gross_margin = revenue.c.revenue - func.coalesce(cogs.c.cogs, 0)
+    
+    query = db.query(
+        Product.id,
+        Product.name,
+        Product.sku,
+        Category.name.label('category_name'),
+        revenue.c.quantity_sold,
+        revenue.c.revenue,
+        func.coalesce(cogs.c.cogs, 0).label('cogs'),
+        gross_margin.label('gross_margin')
+    ).join(
+        revenue, revenue.c.product_id == Product.id
+    ).outerjoin(
+        cogs, cogs.c.product_id == Product.id
+    ).join(
+        Category, Category.id == Product.category_id
+    )
+    
+    if category_id:
+        query = query.filter(Product.category_id == category_id)
+    
+    result = query.order_by(desc(gross_margin)).limit(limit).all()
+    
+    report = []
+    for row in result:
+        revenue_value = float(row.revenue) if row.revenue else 0.0
+        margin_value = float(row.gross_margin) if row.gross_margin else 0.0
+        report.append({
+            "product_id": row.id,
+            "product_name": row.name,
+            "sku": row.sku,
+            "category": row.category_name,
+            "quantity_sold": row.quantity_sold,
+            "revenue": revenue_value,
+            "cogs": float(row.cogs) if row.cogs else 0.0,
+            "gross_margin": margin_value,
+            "margin_percentage": round(margin_value / revenue_value * 100, 2) if revenue_value else 0.0
+        })
+    
+    return report
+
 def generate_customer_sales_report(
     db: Session,
     start_date: date,
@@ -225,7 +347,7 @@ def generate_customer_sales_report(
     Args:
         db: Sesión de base de datos
         start_date: Fecha de inicio
-        end_date: Fecha de fin
+        end_date: Fecha de fin (incluida completa)
         limit: Número máximo de clientes a incluir
     
     Returns:
@@ -244,8 +366,7 @@ def generate_customer_sales_report(
     ).join(
         Sale, and_(
             Sale.customer_id == Customer.id,
-            Sale.created_at >= start_date,
-            Sale.created_at <= end_date,
+            date_range_filter(Sale.created_at, start_date, end_date),
             Sale.payment_status != 'cancelled'
         )
     ).group_by(
@@ -273,88 +394,295 @@ def generate_customer_sales_report(
     
     return report
 
-def export_report_to_json(report_data: Any, filename: str) -> str:
+def _open_export(filename: str, extension: str, compress: bool = False, binary: bool = False) -> Tuple[str, IO]:
+    """
+    Abre el archivo de un reporte dentro de REPORTS_FOLDER, comprimido con
+    gzip si se pide (la extensión queda como `.csv.gz`, `.jsonl.gz`...).
+    """
+    if not filename.endswith(extension):
+        filename += extension
+    if compress:
+        filename += '.gz'
+    
+    # Crear la carpeta de reportes si no existe
+    os.makedirs(settings.REPORTS_FOLDER, exist_ok=True)
+    filepath = os.path.join(settings.REPORTS_FOLDER, filename)
+    
+    mode = 'wb' if binary else 'wt'
+    text_options = {} if binary else {'encoding': 'utf-8', 'newline': ''}
+    if compress:
+        # Nivel 6: casi el mismo tamaño que 9 en la mitad de tiempo
+        return filepath, gzip.open(filepath, mode, compresslevel=6, **text_options)
+    return filepath, open(filepath, mode, **text_options)
+
+def write_report_csv(rows: Iterable[Dict[str, Any]], filename: str, compress: bool = False) -> Tuple[str, int]:
+    """
+    Escribe filas (lista o generador de diccionarios) en un CSV a medida que
+    llegan, sin acumularlas: la memoria no depende del número de filas.
+    Las columnas son las claves de la primera fila.
+    
+    Returns:
+        Ruta al archivo creado y número de filas escritas
+    """
+    filepath, handle = _open_export(filename, '.csv', compress)
+    count = 0
+    with handle:
+        # Mismo fin de línea que generaba pandas
+        writer = csv.writer(handle, lineterminator='\n')
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            # Sin datos: un archivo con una sola línea informativa
+            writer.writerow(['No data available'])
+            return filepath, 0
+        
+        columns = list(first)
+        writer.writerow(columns)
+        writer.writerow([first.get(column) for column in columns])
+        count = 1
+        for row in rows:
+            writer.writerow([row.get(column) for column in columns])
+            count += 1
+    return filepath, count
+
+def write_report_jsonl(rows: Iterable[Dict[str, Any]], filename: str, compress: bool = False) -> Tuple[str, int]:
+    """
+    Escribe filas en JSON Lines (un objeto compacto por línea) a medida que llegan.
+    
+    Returns:
+        Ruta al archivo creado y número de filas escritas
+    """
+    filepath, handle = _open_export(filename, '.jsonl', compress, binary=True)
+    count = 0
+    with handle:
+        for row in rows:
+            handle.write(orjson.dumps(row, default=str) + b'\n')
+            count += 1
+    return filepath, count
+
+def write_report_json(report_data: Any, filename: str, compress: bool = False) -> Tuple[str, int]:
+    """
+    Escribe un reporte en JSON compacto. Las listas y generadores se escriben
+    como un arreglo fila por fila; un diccionario (p. ej. valor de inventario)
+    se escribe completo.
+    
+    Returns:
+        Ruta al archivo creado y número de filas escritas (1 para un diccionario)
+    """
+    filepath, handle = _open_export(filename, '.json', compress, binary=True)
+    with handle:
+        if isinstance(report_data, dict):
+            handle.write(orjson.dumps(report_data, default=str))
+            return filepath, 1
+        
+        count = 0
+        handle.write(b'[')
+        for row in report_data:
+            if count:
+                handle.write(b',')
+            handle.write(orjson.dumps(row, default=str))
+            count += 1
+        handle.write(b']')
+    return filepath, count
+
+# Formatos columnares: requieren pyarrow, que se importa solo al exportar
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+# Filas por row group (Parquet) o record batch (Arrow)
+COLUMNAR_BATCH_SIZE = 50000
+
+# Los reportes entregan fechas como texto e importes como float (lo que
+# necesitan JSON y CSV); en los formatos columnares se guardan con su tipo
+ARROW_TIMESTAMP_COLUMNS = {"date", "sold_at"}
+ARROW_DATE_COLUMNS = {"first_purchase", "last_purchase"}
+ARROW_MONEY_COLUMNS = {
+    "revenue", "taxes", "discounts", "net_revenue", "total_revenue", "average_price",
+    "cost_value", "retail_value", "cogs", "gross_margin", "total_spent", "average_purchase",
+    "unit_price", "discount", "total",
+}
+# Precisión y escala de los importes (decimal128): hasta 10^16 sin desbordar
+ARROW_MONEY_PRECISION = (18, 2)
+
+# Tipos de las filas de los reportes exportados por streaming. Sin ellos el
+# esquema se infiere del primer lote y una columna que allí solo trae nulos
+# (ventas sin cliente, movimientos sin notas) no admitiría valores después
+INVENTORY_MOVEMENTS_ARROW_TYPES = {
+    "movement_id": "int64",
+    "movement_type": "string",
+    "quantity": "int64",
+    "product_id": "int64",
+    "product_name": "string",
+    "sku": "string",
+    "date": "string",
+    "notes": "string",
+}
+SALES_LINES_ARROW_TYPES = {
+    "sale_id": "int64",
+    "invoice_number": "string",
+    "sold_at": "string",
+    "customer_id": "int64",
+    "payment_method": "string",
+    "payment_status": "string",
+    "product_id": "int64",
+    "sku": "string",
+    "product_name": "string",
+    "quantity": "int64",
+    "unit_price": "double",
+    "discount": "double",
+    "tax_rate": "double",
+    "total": "double",
+}
+
+def _typed_record_batch(rows: List[Dict[str, Any]], schema: Any) -> Any:
+    """Convierte un lote de filas en un RecordBatch con fechas e importes tipados."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    
+    batch = pa.RecordBatch.from_pylist(rows, schema=schema)
+    columns = []
+    for field, column in zip(batch.schema, batch.columns):
+        if field.name in ARROW_TIMESTAMP_COLUMNS and pa.types.is_string(field.type):
+            column = column.cast(pa.timestamp('ms'))
+        elif field.name in ARROW_DATE_COLUMNS and pa.types.is_string(field.type):
+            column = column.cast(pa.date32())
+        elif field.name in ARROW_MONEY_COLUMNS:
+            # Los importes ya vienen redondeados a centavos; el redondeo evita
+            # arrastrar el error de representación del float. El cast seguro
+            # falla ante un importe que no cabe en lugar de escribir otro valor
+            column = pc.round(column.cast(pa.float64()), 2).cast(pa.decimal128(*ARROW_MONEY_PRECISION), safe=True)
+        columns.append(column)
+    return pa.RecordBatch.from_arrays(columns, names=batch.schema.names)
+
+def write_report_columnar(
+    rows: Iterable[Dict[str, Any]],
+    filename: str,
+    export_format: str = "parquet",
+    column_types: Optional[Dict[str, str]] = None
+) -> Tuple[str, int]:
+    """
+    Escribe filas en Parquet o en Arrow IPC (formato de archivo), en lotes de
+    COLUMNAR_BATCH_SIZE y comprimidos con zstd. Las columnas de `column_types`
+    (nombre -> alias de tipo Arrow) usan ese tipo; las demás se infieren del
+    primer lote. Fechas e importes se tipan según ARROW_*_COLUMNS.
+    
+    Returns:
+        Ruta al archivo creado y número de filas escritas
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    extension = f".{export_format}"
+    if not filename.endswith(extension):
+        filename += extension
+    os.makedirs(settings.REPORTS_FOLDER, exist_ok=True)
+    filepath = os.path.join(settings.REPORTS_FOLDER, filename)
+    
+    column_types = column_types or {}
+    rows = iter(rows)
+    schema = writer = None
+    # Columnas sin tipo declarado y sin valores en el primer lote
+    as_text = set()
+    count = 0
+    try:
+        while batch := list(islice(rows, COLUMNAR_BATCH_SIZE)):
+            if schema is None:
+                fields = []
+                for field in pa.RecordBatch.from_pylist(batch).schema:
+                    if field.name in column_types:
+                        field = pa.field(field.name, pa.type_for_alias(column_types[field.name]))
+                    elif field.name in ARROW_MONEY_COLUMNS:
+                        # Importe aunque el primer lote solo traiga nulos
+                        field = pa.field(field.name, pa.float64())
+                    elif pa.types.is_null(field.type):
+                        # Se inferiría como null: se toma como texto
+                        field = pa.field(field.name, pa.string())
+                        as_text.add(field.name)
+                    fields.append(field)
+                schema = pa.schema(fields)
+            elif as_text:
+                # Los valores que aparezcan en lotes posteriores se guardan como texto
+                batch = [
+                    {**row, **{name: str(row[name]) for name in as_text if row.get(name) is not None}}
+                    for row in batch
+                ]
+            record_batch = _typed_record_batch(batch, schema)
+            if writer is None:
+                if export_format == "parquet":
+                    writer = pq.ParquetWriter(filepath, record_batch.schema, compression='zstd')
+                else:
+                    writer = pa.ipc.new_file(
+                        filepath, record_batch.schema, options=pa.ipc.IpcWriteOptions(compression='zstd')
+                    )
+            writer.write_batch(record_batch)
+            count += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    
+    if writer is None:
+        # Sin datos: un archivo válido sin columnas
+        if export_format == "parquet":
+            pq.write_table(pa.table({}), filepath)
+        else:
+            pa.ipc.new_file(filepath, pa.schema([])).close()
+    return filepath, count
+
+def export_report_to_json(report_data: Any, filename: str, compress: bool = False) -> str:
     """
     Exporta un reporte a un archivo JSON.
     
     Args:
         report_data: Datos del reporte
         filename: Nombre del archivo a crear
+        compress: Comprimir con gzip
     
     Returns:
         Ruta al archivo creado
     """
-    # Asegurar que el nombre del archivo termine en .json
-    if not filename.endswith('.json'):
-        filename += '.json'
-    
-    # Crear directorio reports si no existe
-    os.makedirs('reports', exist_ok=True)
-    
-    # Ruta completa del archivo
-    filepath = os.path.join('reports', filename)
-    
-    # Escribir los datos al archivo
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(report_data, f, ensure_ascii=False, indent=4)
-    
-    return filepath
+    return write_report_json(report_data, filename, compress)[0]
 
-def export_report_to_csv(report_data: List[Dict[str, Any]], filename: str) -> str:
+def export_report_to_csv(report_data: Iterable[Dict[str, Any]], filename: str, compress: bool = False) -> str:
     """
     Exporta un reporte a un archivo CSV.
     
     Args:
-        report_data: Datos del reporte en formato lista de diccionarios
+        report_data: Filas del reporte (lista o generador de diccionarios)
         filename: Nombre del archivo a crear
+        compress: Comprimir con gzip
     
     Returns:
         Ruta al archivo creado
     """
-    # Asegurar que el nombre del archivo termine en .csv
-    if not filename.endswith('.csv'):
-        filename += '.csv'
-    
-    # Crear directorio reports si no existe
-    os.makedirs('reports', exist_ok=True)
-    
-    # Ruta completa del archivo
-    filepath = os.path.join('reports', filename)
-    
-    # Si no hay datos, crear un archivo vacío con las cabeceras
-    if not report_data:
-        with open(filepath, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(['No data available'])
-        return filepath
-    
-    # Convertir a DataFrame para facilitar el manejo
-    df = pd.DataFrame(report_data)
-    
-    # Guardar a CSV
-    df.to_csv(filepath, index=False, encoding='utf-8')
-    
-    return filepath
+    return write_report_csv(report_data, filename, compress)[0]
 
-def generate_inventory_movements_report(
+# Filas que se traen de la base de datos por cada lectura al exportar
+EXPORT_BATCH_SIZE = 5000
+
+def iter_inventory_movements_report(
     db: Session,
     start_date: date,
     end_date: date,
     product_id: Optional[int] = None,
-    movement_type: Optional[str] = None
-) -> List[Dict[str, Any]]:
+    movement_type: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[Dict[str, Any]]:
     """
-    Genera un reporte de movimientos de inventario.
+    Genera las filas del reporte de movimientos de inventario una por una.
+    
+    La consulta se lee en lotes de `batch_size` con un cursor del lado del
+    servidor (yield_per), así que exportar millones de movimientos no carga
+    todo el resultado en memoria.
     
     Args:
         db: Sesión de base de datos
         start_date: Fecha de inicio
-        end_date: Fecha de fin
+        end_date: Fecha de fin (incluida completa)
         product_id: ID del producto para filtrar (opcional)
         movement_type: Tipo de movimiento para filtrar (opcional)
+        batch_size: Filas por lote
     
-    Returns:
-        Lista de resultados con la información de movimientos de inventario
+    Yields:
+        Un diccionario por movimiento, del más reciente al más antiguo
     """
     # Construir la consulta base
     query = db.query(
@@ -369,10 +697,7 @@ def generate_inventory_movements_report(
     ).join(
         Product, Product.id == InventoryMovement.product_id
     ).filter(
-        and_(
-            InventoryMovement.created_at >= start_date,
-            InventoryMovement.created_at <= end_date
-        )
+        date_range_filter(InventoryMovement.created_at, start_date, end_date)
     )
     
     # Aplicar filtros adicionales si se especifican
@@ -385,13 +710,8 @@ def generate_inventory_movements_report(
     # Ordenar por fecha
     query = query.order_by(desc(InventoryMovement.created_at))
     
-    # Ejecutar la consulta
-    result = query.all()
-    
-    # Convertir a formato de lista de diccionarios
-    report = []
-    for row in result:
-        report.append({
+    for row in query.yield_per(batch_size):
+        yield {
             "movement_id": row.id,
             "movement_type": row.movement_type,
             "quantity": row.quantity,
@@ -400,9 +720,89 @@ def generate_inventory_movements_report(
             "sku": row.sku,
             "date": row.created_at.strftime('%Y-%m-%d %H:%M:%S'),
             "notes": row.notes
-        })
+        }
+
+def generate_inventory_movements_report(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    product_id: Optional[int] = None,
+    movement_type: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Genera un reporte de movimientos de inventario.
     
-    return report
+    Args:
+        db: Sesión de base de datos
+        start_date: Fecha de inicio
+        end_date: Fecha de fin (incluida completa)
+        product_id: ID del producto para filtrar (opcional)
+        movement_type: Tipo de movimiento para filtrar (opcional)
+    
+    Returns:
+        Lista de resultados con la información de movimientos de inventario
+    """
+    return list(iter_inventory_movements_report(db, start_date, end_date, product_id, movement_type))
+
+def iter_sales_lines_report(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """
+    Genera una fila por línea de venta (venta + producto), para exportar las
+    ventas sin agrupar. Se lee en lotes con un cursor del lado del servidor.
+    
+    Args:
+        db: Sesión de base de datos
+        start_date: Fecha de inicio
+        end_date: Fecha de fin (incluida completa)
+        batch_size: Filas por lote
+    
+    Yields:
+        Un diccionario por línea de venta, en orden de venta
+    """
+    query = db.query(
+        Sale.id.label('sale_id'),
+        Sale.invoice_number,
+        Sale.created_at,
+        Sale.customer_id,
+        Sale.payment_method,
+        Sale.payment_status,
+        SaleItem.product_id,
+        Product.sku,
+        Product.name.label('product_name'),
+        SaleItem.quantity,
+        SaleItem.unit_price,
+        SaleItem.discount,
+        SaleItem.tax_rate,
+        SaleItem.total
+    ).join(
+        SaleItem, SaleItem.sale_id == Sale.id
+    ).join(
+        Product, Product.id == SaleItem.product_id
+    ).filter(
+        date_range_filter(Sale.created_at, start_date, end_date)
+    ).order_by(Sale.id, SaleItem.id)
+    
+    for row in query.yield_per(batch_size):
+        yield {
+            "sale_id": row.sale_id,
+            "invoice_number": row.invoice_number,
+            "sold_at": row.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            "customer_id": row.customer_id,
+            "payment_method": row.payment_method,
+            "payment_status": row.payment_status,
+            "product_id": row.product_id,
+            "sku": row.sku,
+            "product_name": row.product_name,
+            "quantity": row.quantity,
+            "unit_price": row.unit_price,
+            "discount": row.discount,
+            "tax_rate": row.tax_rate,
+            "total": row.total
+        }
 
 def generate_low_stock_report(
     db: Session,
@@ -0,0 +1,148 @@
+# app/services/stock_snapshots.py
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, insert, delete, literal
+from datetime import datetime, timedelta, date
+from typing import List, Dict, Any, Optional
+import logging
+
+from ..models.inventory import InventoryMovement, StockSnapshot
+from ..models.product import Product
+from ..utils.date_ranges import day_bounds, local_today
+
+logger = logging.getLogger(__name__)
+
+def _day_end(day: date) -> datetime:
+    """Inicio del día siguiente: límite exclusivo del cierre de `day`."""
+    return day_bounds(None, day)[1]
+
+def _movement_delta(start: Optional[datetime], end: Optional[datetime], product_id: Optional[int] = None):
+    """
+    Subconsulta con la suma de movimientos por producto en [start, end).
+    """
+    query = select(
+        InventoryMovement.product_id.label('product_id'),
+        func.sum(InventoryMovement.quantity).label('quantity')
+    )
+    if start is not None:
+        query = query.where(InventoryMovement.created_at >= start)
+    if end is not None:
+        query = query.where(InventoryMovement.created_at < end)
+    if product_id:
+        query = query.where(InventoryMovement.product_id == product_id)
+    return query.group_by(InventoryMovement.product_id).subquery()
+
+def create_stock_snapshot(db: Session, snapshot_date: Optional[date] = None) -> int:
+    """
+    Guarda el stock de cierre de todos los productos para un día.
+
+    El cierre se calcula como el stock actual menos los movimientos posteriores
+    al día, por lo que al ejecutarse cada noche solo lee los movimientos de
+    unas pocas horas. Si el snapshot del día ya existía, se reemplaza.
+
+    Args:
+        db: Sesión de base de datos
+        snapshot_date: Día a cerrar (por defecto, ayer)
+
+    Returns:
+        Número de productos guardados
+    """
+    if snapshot_date is None:
+        snapshot_date = local_today() - timedelta(days=1)
+
+    later = _movement_delta(_day_end(snapshot_date), None)
+    closing = func.coalesce(Product.stock_quantity, 0) - func.coalesce(later.c.quantity, 0)
+
+    db.execute(delete(StockSnapshot).where(StockSnapshot.snapshot_date == snapshot_date))
+    result = db.execute(
+        insert(StockSnapshot).from_select(
+            ["snapshot_date", "product_id", "closing_quantity"],
+            select(
+                literal(snapshot_date, StockSnapshot.snapshot_date.type),
+                Product.id,
+                closing
+            ).outerjoin(
+                later, later.c.product_id == Product.id
+            )
+        )
+    )
+    db.commit()
+
+    logger.info(f"Stock snapshot for {snapshot_date} saved ({result.rowcount} products)")
+    return result.rowcount
+
+def get_stock_as_of(
+    db: Session,
+    as_of: date,
+    product_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Obtiene el stock de cierre de cada producto en una fecha pasada.
+
+    Parte del snapshot más cercano anterior o igual a la fecha y suma los
+    movimientos posteriores; si no existe, parte del siguiente snapshot y
+    resta los movimientos intermedios; sin snapshots, parte del stock actual.
+
+    Args:
+        db: Sesión de base de datos
+        as_of: Fecha a consultar (cierre del día)
+        product_id: ID del producto para filtrar (opcional)
+
+    Returns:
+        Diccionario con la fecha base usada y el stock por producto
+    """
+    previous = db.query(func.max(StockSnapshot.snapshot_date)).filter(
+        StockSnapshot.snapshot_date <= as_of
+    ).scalar()
+    following = None
+    if previous is None:
+        following = db.query(func.min(StockSnapshot.snapshot_date)).filter(
+            StockSnapshot.snapshot_date > as_of
+        ).scalar()
+
+    if previous is not None:
+        base_date = previous
+        delta = _movement_delta(_day_end(previous), _day_end(as_of), product_id)
+        sign = 1
+    elif following is not None:
+        base_date = following
+        delta = _movement_delta(_day_end(as_of), _day_end(following), product_id)
+        sign = -1
+    else:
+        base_date = None
+        delta = _movement_delta(_day_end(as_of), None, product_id)
+        sign = -1
+
+    query = db.query(
+        Product.id,
+        Product.sku,
+        Product.name,
+        func.coalesce(delta.c.quantity, 0).label('delta')
+    )
+    if base_date is not None:
+        query = query.add_columns(
+            func.coalesce(StockSnapshot.closing_quantity, 0).label('base')
+        ).outerjoin(
+            StockSnapshot, (StockSnapshot.product_id == Product.id) & (StockSnapshot.snapshot_date == base_date)
+        )
+    else:
+        query = query.add_columns(func.coalesce(Product.stock_quantity, 0).label('base'))
+    query = query.outerjoin(delta, delta.c.product_id == Product.id)
+
+    if product_id:
+        query = query.filter(Product.id == product_id)
+
+    items: List[Dict[str, Any]] = [
+        {
+            "product_id": row.id,
+            "sku": row.sku,
+            "name": row.name,
+            "quantity": row.base + sign * row.delta
+        }
+        for row in query.order_by(Product.id).all()
+    ]
+
+    return {
+        "date": as_of,
+        "snapshot_date": base_date,
+        "items": items
+    }
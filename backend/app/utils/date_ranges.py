@@ -0,0 +1,93 @@
+# app/utils/date_ranges.py
+"""
+Rangos de días de reportes y listados.
+
+Los usuarios piden días completos e inclusivos (start_date..end_date); las
+consultas comparan la columna de timestamp contra límites semiabiertos
+[inicio de start_date, inicio del día siguiente a end_date), calculados en
+la zona horaria del negocio (REPORT_TIMEZONE). Así la condición puede usar
+el índice de la columna, cosa que func.date(columna) impide, y no se pierde
+el último día como al comparar un timestamp con una fecha sin hora.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, func, literal, true
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import DateTime
+
+from ..config import settings
+
+def report_timezone() -> ZoneInfo:
+    return ZoneInfo(settings.REPORT_TIMEZONE)
+
+def local_today() -> date:
+    """Día actual en la zona horaria del negocio."""
+    return datetime.now(report_timezone()).date()
+
+def day_start(day: date) -> datetime:
+    """Inicio de `day` en la zona del negocio, expresado en UTC."""
+    return datetime.combine(day, time.min, tzinfo=report_timezone()).astimezone(timezone.utc)
+
+def day_bounds(
+    start_date: Optional[date],
+    end_date: Optional[date]
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Límites [inicio, fin) de los días [start_date, end_date]; un extremo
+    None queda abierto.
+    """
+    start = day_start(start_date) if start_date else None
+    end = day_start(end_date + timedelta(days=1)) if end_date else None
+    return start, end
+
+def date_range_filter(column: Any, start_date: Optional[date], end_date: Optional[date]) -> Any:
+    """Condición de `column` dentro de los días [start_date, end_date]."""
+    start, end = day_bounds(start_date, end_date)
+    conditions = []
+    if start is not None:
+        conditions.append(column >= start)
+    if end is not None:
+        conditions.append(column < end)
+    return and_(true(), *conditions)
+
+class local_time(FunctionElement):
+    """
+    Hora local (zona del negocio, sin zona) de una columna de timestamp,
+    para agrupar por día, semana o mes.
+
+    PostgreSQL convierte con timezone(); SQLite guarda UTC sin zona y solo
+    admite desplazamientos fijos, así que usa el desfase actual de la zona.
+    """
+    type = DateTime()
+    name = "local_time"
+    inherit_cache = True
+
+    def __init__(self, column: Any):
+        offset = datetime.now(report_timezone()).utcoffset() or timedelta(0)
+        clauses = [column, literal(settings.REPORT_TIMEZONE)]
+        if offset:
+            # Parte de la estructura (no solo un parámetro) para que la caché
+            # de SQL compilado distinga ambos casos
+            clauses.append(literal(f"{int(offset.total_seconds() // 60):+d} minutes"))
+        super().__init__(*clauses)
+
+@compiles(local_time)
+def _local_time_default(element, compiler, **kw):
+    column, _, *offset = element.clauses
+    if not offset:
+        # Sin desfase se deja la columna: datetime() redondea a milisegundos
+        # y 23:59:59.9999 pasaría al día siguiente
+        return compiler.process(column, **kw)
+    return f"datetime({compiler.process(column, **kw)}, {compiler.process(offset[0], **kw)})"
+
+@compiles(local_time, "postgresql")
+def _local_time_postgresql(element, compiler, **kw):
+    column, zone, *_ = element.clauses
+    return f"timezone({compiler.process(zone, **kw)}, {compiler.process(column, **kw)})"
+
+def local_date(column: Any) -> Any:
+    """Día local de una columna de timestamp (para agrupar, no para filtrar)."""
+    return func.date(local_time(column))
@@ -0,0 +1,176 @@
+#app/utils/principal_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import settings
+from app.metrics import register_cache
+from app.models.user import User
+
+# Columnas que no se guardan en caché; si un endpoint las lee se cargan de la base
+_EXCLUDED_COLUMNS = {"hashed_password"}
+
+class PrincipalCache:
+    """
+    Caché en memoria del usuario autenticado, con TTL corto y tamaño máximo (LRU).
+
+    La clave es (id de usuario, huella del token): un token nuevo nunca reutiliza
+    una entrada de otro token. Se guardan solo los valores de las columnas, no la
+    instancia ORM, para no compartir objetos entre sesiones.
+
+    La invalidación es local al proceso; con varios workers, el TTL limita el
+    tiempo durante el que otro proceso puede ver datos desactualizados.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[Tuple[int, str]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    @staticmethod
+    def fingerprint(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+    def get(self, user_id: int, token: str) -> Optional[Dict[str, Any]]:
+        key = (user_id, self.fingerprint(token))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, data = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def set(self, user_id: int, token: str, data: Dict[str, Any]) -> None:
+        key = (user_id, self.fingerprint(token))
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, data)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, user_id: int) -> None:
+        """Descarta todas las entradas de un usuario (cualquier token)."""
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _remove(self, key: Tuple[int, str]) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE
+)
+
+register_cache("principal", principal_cache.stats)
+
+def _user_id(user_id: Any) -> Optional[int]:
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+def _from_cache(data: Dict[str, Any]) -> User:
+    user = User(**data)
+    make_transient_to_detached(user)
+    return user
+
+def _remember(user_id: int, token: str, user: Optional[User]) -> None:
+    if user is not None:
+        principal_cache.set(user_id, token, {
+            attr.key: getattr(user, attr.key)
+            for attr in inspect(User).column_attrs
+            if attr.key not in _EXCLUDED_COLUMNS
+        })
+
+def load_principal(db: Session, user_id: Any, token: str) -> Optional[User]:
+    """
+    Obtiene el usuario del token, usando la caché si hay una entrada vigente.
+
+    En un acierto no se ejecuta ningún SELECT: la instancia se reconstruye con
+    los valores guardados y se asocia a la sesión con merge(load=False), de
+    modo que el endpoint puede modificarla y hacer commit como si la hubiera
+    cargado de la base.
+    """
+    user_id = _user_id(user_id)
+    if user_id is None:
+        return None
+
+    if principal_cache.enabled:
+        data = principal_cache.get(user_id, token)
+        if data is not None:
+            return db.merge(_from_cache(data), load=False)
+
+    user = db.get(User, user_id)
+    if principal_cache.enabled:
+        _remember(user_id, token, user)
+    return user
+
+async def load_principal_async(db: AsyncSession, user_id: Any, token: str) -> Optional[User]:
+    """
+    Versión de load_principal para AsyncSession.
+    """
+    user_id = _user_id(user_id)
+    if user_id is None:
+        return None
+
+    if principal_cache.enabled:
+        data = principal_cache.get(user_id, token)
+        if data is not None:
+            return await db.merge(_from_cache(data), load=False)
+
+    user = await db.get(User, user_id)
+    if principal_cache.enabled:
+        _remember(user_id, token, user)
+    return user
@@ -0,0 +1,33 @@
+#app/utils/responses.py
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from fastapi.exceptions import ResponseValidationError
+from pydantic import TypeAdapter, ValidationError
+
+@lru_cache(maxsize=None)
+def type_adapter(response_type: Any) -> TypeAdapter:
+    """TypeAdapter por tipo de respuesta; construirlo cuesta más que serializar una página."""
+    return TypeAdapter(response_type)
+
+def json_response(response_type: Any, content: Any, status_code: int = 200) -> Response:
+    """
+    Valida `content` (objetos ORM, dicts) contra `response_type` y lo serializa
+    directamente a JSON con pydantic-core, sin el paso intermedio por dicts y
+    `json.dumps` que hace FastAPI con `response_model`.
+
+    El endpoint conserva `response_model` para la documentación OpenAPI; como
+    devuelve un Response, FastAPI no vuelve a validar ni serializar.
+    """
+    adapter = type_adapter(response_type)
+    try:
+        value = adapter.validate_python(content, from_attributes=True)
+    except ValidationError as exc:
+        # Mismo error que FastAPI levanta cuando la respuesta no cumple el response_model
+        errors = [
+            {**error, "loc": ("response", *error["loc"])}
+            for error in exc.errors(include_url=False)
+        ]
+        raise ResponseValidationError(errors=errors, body=content)
+    return Response(content=adapter.dump_json(value), status_code=status_code, media_type="application/json")
@@ -1,9 +1,13 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from typing import Optional, Union, Any, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.config import settings
@@ -13,9 +17,10 @@ SECRET_KEY = config_settings.SECRET_KEY
 ALGORITHM = config_settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = config_settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.user import User
 from app.schemas.token import TokenPayload
+from app.utils.principal_cache import load_principal, load_principal_async
 
 # Esquema de OAuth2 para obtener token de autorización
 oauth2_scheme = OAuth2PasswordBearer(
@@ -42,35 +47,74 @@ def create_access_token(subject: Union[str, Any], expires_delta: Optional[timede
     )
     return encoded_jwt
 
+# Contexto de hash compartido: construirlo en cada llamada repite el parseo
+# de la configuración y la carga del backend de bcrypt
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+# bcrypt libera el GIL, así que un pool de hilos acotado permite calcular
+# varios hashes en paralelo sin bloquear el event loop ni saturar la CPU
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+
 def get_password_hash(password: str) -> str:
     """
     Obtener hash de contraseña
     """
-    from passlib.context import CryptContext
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verificar contraseña
     """
-    from passlib.context import CryptContext
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
     return pwd_context.verify(plain_password, hashed_password)
 
-async def get_current_user(
-    db: Session = Depends(get_db),
-    token: str = Depends(oauth2_scheme)
-) -> User:
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
     """
-    Obtener usuario actual basado en el token JWT
+    Verificar contraseña en el pool de hash (para endpoints síncronos).
+    Si el hash usa parámetros antiguos (p. ej. otro número de rondas), devuelve
+    también un hash nuevo para guardarlo; si no, el segundo valor es None.
+    """
+    return _hash_executor.submit(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    ).result()
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Obtener hash de contraseña sin bloquear el event loop
     """
-    credentials_exception = HTTPException(
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, pwd_context.hash, password)
+
+async def verify_and_update_password_async(
+    plain_password: str,
+    hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Versión async de verify_and_update_password
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudieron validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def _token_subject(token: str) -> str:
+    """
+    Decodificar el token JWT y devolver el ID de usuario (claim `sub`)
+    """
+    credentials_exception = _credentials_exception()
     try:
         # Decodificar token JWT
         payload = jwt.decode(
@@ -91,11 +135,11 @@ async def get_current_user(
             
     except JWTError:
         raise credentials_exception
-        
-    # Buscar usuario en la base de datos
-    user = db.query(User).filter(User.id == user_id).first()
+    return user_id
+
+def _check_active(user: Optional[User]) -> User:
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
         
     # Verificar si el usuario está activo
     if not user.is_active:
@@ -103,18 +147,52 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Usuario inactivo"
         )
-    
     return user
 
+async def get_current_user(
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+) -> User:
+    """
+    Obtener usuario actual basado en el token JWT
+    """
+    user_id = _token_subject(token)
+    # Buscar usuario (caché de corta duración o base de datos)
+    return _check_active(load_principal(db, user_id, token))
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(oauth2_scheme)
+) -> User:
+    """
+    Igual que get_current_user, pero con la sesión async: el usuario queda
+    asociado a la misma AsyncSession que recibe el endpoint.
+    """
+    user_id = _token_subject(token)
+    return _check_active(await load_principal_async(db, user_id, token))
+
 async def get_current_active_superuser(
     current_user: User = Depends(get_current_user),
 ) -> User:
     """
     Verificar si el usuario actual es superusuario/admin
     """
-    if not current_user.is_superuser:
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Permisos insuficientes"
+        )
+    return current_user
+
+async def get_current_active_superuser_async(
+    current_user: User = Depends(get_current_user_async),
+) -> User:
+    """
+    Versión de get_current_active_superuser para endpoints con AsyncSession
+    """
+    if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Permisos insuficientes"
         )
-    return current_user
\ No newline at end of file
+    return current_user
@@ -0,0 +1,117 @@
+# benchmarks/bench_cost_layers.py
+"""
+Benchmark de valoración de inventario: capas FIFO abiertas vs. repetir todo
+el historial de movimientos.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_cost_layers --movements 1000000 --products 1000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict, deque
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--movements", type=int, default=1_000_000)
+parser.add_argument("--products", type=int, default=1000)
+parser.add_argument("--database-url", default=None, help="Por defecto, un SQLite temporal")
+args = parser.parse_args()
+
+if args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+else:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_cost_layers.db"
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from sqlalchemy import insert, select, update
+
+from app.database import SessionLocal, Base, engine
+from app.models import Category, Product, InventoryMovement
+from app.services.costing import rebuild_cost_layers
+from app.services.reports import generate_inventory_value_report
+
+def timed(label, fn, *a, **kw):
+    start = time.perf_counter()
+    result = fn(*a, **kw)
+    print(f"{label:<45} {time.perf_counter() - start:9.3f}s")
+    return result
+
+def seed(db):
+    rng = random.Random(42)
+    db.add(Category(name="Bench"))
+    db.flush()
+    db.execute(insert(Product), [
+        {"name": f"P{i}", "sku": f"BENCH-{i}", "price": 10.0, "cost_price": 5.0,
+         "category_id": 1, "stock_quantity": 0, "min_stock_level": 0, "is_active": True}
+        for i in range(args.products)
+    ])
+    stock = [0] * (args.products + 1)
+    rows = []
+    for _ in range(args.movements):
+        product_id = rng.randint(1, args.products)
+        if stock[product_id] < 5 or rng.random() < 0.1:
+            quantity = rng.randint(10, 50)
+            movement_type = "adjustment"
+        else:
+            quantity = -rng.randint(1, min(5, stock[product_id]))
+            movement_type = "sale"
+        stock[product_id] += quantity
+        rows.append({"product_id": product_id, "movement_type": movement_type, "quantity": quantity})
+        if len(rows) == 50_000:
+            db.execute(insert(InventoryMovement), rows)
+            rows = []
+    if rows:
+        db.execute(insert(InventoryMovement), rows)
+    db.execute(update(Product), [
+        {"id": i, "stock_quantity": stock[i]} for i in range(1, args.products + 1)
+    ])
+    db.commit()
+
+def replay_history_valuation(db):
+    """Valoración FIFO sin capas: recorre todo el historial de movimientos."""
+    layers = defaultdict(deque)
+    costs = dict(db.query(Product.id, Product.cost_price).all())
+    result = db.execute(
+        select(InventoryMovement.product_id, InventoryMovement.quantity)
+        .order_by(InventoryMovement.product_id, InventoryMovement.id)
+        .execution_options(yield_per=50_000)
+    )
+    for product_id, quantity in result:
+        queue = layers[product_id]
+        if quantity > 0:
+            queue.append([quantity, costs[product_id]])
+            continue
+        pending = -quantity
+        while pending and queue:
+            taken = min(pending, queue[0][0])
+            queue[0][0] -= taken
+            pending -= taken
+            if queue[0][0] == 0:
+                queue.popleft()
+    return sum(q * c for queue in layers.values() for q, c in queue)
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        timed(f"seed {args.movements} movements", seed, db)
+        replayed = timed("valuation by replaying full history", replay_history_valuation, db)
+        timed("full cost-layer rebuild (one-off)", rebuild_cost_layers, db, full=True)
+        report = timed("valuation from open layers", generate_inventory_value_report, db)
+        print(f"values: replay={replayed:.2f} layers={report['summary']['total_cost_value']:.2f}")
+
+        db.execute(insert(InventoryMovement), [
+            {"product_id": i % args.products + 1, "movement_type": "adjustment", "quantity": 10}
+            for i in range(1000)
+        ])
+        db.commit()
+        timed("incremental rebuild (1000 new movements)", rebuild_cost_layers, db)
+        timed("incremental rebuild bounded by movement id", rebuild_cost_layers, db,
+              since_movement_id=args.movements)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# benchmarks/bench_export.py
+"""
+Benchmark de exportación del reporte de movimientos de inventario con
+--rows movimientos en una base SQLite temporal. Cada modo corre en un proceso
+nuevo para medir su pico de memoria (max RSS):
+
+- pandas : camino anterior (lista de diccionarios + DataFrame.to_csv)
+- csv    : write_report_csv leyendo del cursor en lotes
+- jsonl  : write_report_jsonl leyendo del cursor en lotes
+- csv.gz : write_report_csv comprimido con gzip
+- parquet, arrow : write_report_columnar (columnas tipadas, zstd)
+
+Con --load también mide, en otro proceso, cuánto tarda pandas en cargar cada
+archivo (lo que hace quien consume las exportaciones).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_export --rows 1000000
+    python -m benchmarks.bench_export --rows 200000 --modes csv parquet arrow --load
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--rows", type=int, default=1_000_000, help="Movimientos en la base de prueba")
+parser.add_argument("--modes", nargs="+", default=["pandas", "csv", "jsonl", "csv.gz", "parquet", "arrow"],
+                    choices=["pandas", "csv", "jsonl", "csv.gz", "parquet", "arrow"])
+parser.add_argument("--load", action="store_true", help="Medir también la carga del archivo con pandas")
+args = parser.parse_args()
+
+# Se ejecuta en el proceso hijo; imprime una línea JSON con tiempo, memoria y tamaño
+CHILD = r"""
+import json, logging, os, resource, sys, time
+from datetime import date, timedelta
+
+from app.database import SessionLocal
+from app.services import reports
+
+logging.disable(logging.INFO)
+mode = sys.argv[1]
+start_date, end_date = date.today() - timedelta(days=400), date.today() + timedelta(days=1)
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+db = SessionLocal()
+start = time.perf_counter()
+if mode == "pandas":
+    import pandas as pd
+    rows = reports.generate_inventory_movements_report(db, start_date, end_date)
+    filepath = os.path.join(os.environ["REPORTS_FOLDER"], "movements_pandas.csv")
+    pd.DataFrame(rows).to_csv(filepath, index=False, encoding="utf-8")
+    count = len(rows)
+elif mode in reports.COLUMNAR_FORMATS:
+    rows = reports.iter_inventory_movements_report(db, start_date, end_date)
+    filepath, count = reports.write_report_columnar(rows, "movements_stream", mode)
+else:
+    rows = reports.iter_inventory_movements_report(db, start_date, end_date)
+    writer = reports.write_report_jsonl if mode == "jsonl" else reports.write_report_csv
+    filepath, count = writer(rows, "movements_stream", compress=mode.endswith(".gz"))
+elapsed = time.perf_counter() - start
+db.close()
+
+print(json.dumps({
+    "seconds": elapsed,
+    "rows": count,
+    "baseline_mib": baseline / 1024,
+    "peak_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "bytes": os.path.getsize(filepath),
+    "path": filepath,
+}))
+"""
+
+# Carga del archivo exportado con pandas, en un proceso aparte
+LOAD_CHILD = r"""
+import json, sys, time
+import pandas as pd
+
+mode, path = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+if mode == "parquet":
+    frame = pd.read_parquet(path)
+elif mode == "arrow":
+    import pyarrow as pa
+    with pa.memory_map(path) as source:
+        frame = pa.ipc.open_file(source).read_all().to_pandas()
+elif mode == "jsonl":
+    frame = pd.read_json(path, lines=True)
+else:
+    frame = pd.read_csv(path)
+print(json.dumps({"seconds": time.perf_counter() - start, "rows": len(frame)}))
+"""
+
+def run_child(script, *argv, env):
+    result = subprocess.run(
+        [sys.executable, "-c", script, *argv], env=env, capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def seed(database_url, rows):
+    """Crea el esquema y `rows` movimientos repartidos en 100 productos y un año."""
+    from sqlalchemy import create_engine, insert
+
+    from app.database import Base
+    from app.models import Category, InventoryMovement, Product
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    now = datetime.now()
+    with engine.begin() as connection:
+        connection.execute(insert(Category), [{"id": 1, "name": "General"}])
+        connection.execute(insert(Product), [
+            {"id": i, "name": f"Producto {i}", "sku": f"SKU-{i:05d}", "price": 10.0, "cost_price": 6.0,
+             "category_id": 1, "stock_quantity": 100, "min_stock_level": 5, "is_active": True}
+            for i in range(1, 101)
+        ])
+        batch = []
+        for i in range(rows):
+            batch.append({
+                "product_id": 1 + i % 100,
+                "movement_type": "sale" if i % 3 else "purchase",
+                "quantity": -1 if i % 3 else 12,
+                "notes": None if i % 5 else "Ajuste de inventario, conteo físico",
+                "created_at": now - timedelta(seconds=i * 30),
+            })
+            if len(batch) == 50_000:
+                connection.execute(insert(InventoryMovement), batch)
+                batch = []
+        if batch:
+            connection.execute(insert(InventoryMovement), batch)
+    engine.dispose()
+
+def main():
+    workdir = tempfile.mkdtemp()
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{workdir}/bench_export.db",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark"),
+        "REPORTS_FOLDER": os.path.join(workdir, "reports"),
+    }
+    os.makedirs(env["REPORTS_FOLDER"])
+    os.environ.update(env)
+
+    start = time.perf_counter()
+    seed(env["DATABASE_URL"], args.rows)
+    print(f"rows={args.rows} (seed {time.perf_counter() - start:.1f} s)")
+    print(f"{'mode':<8} {'seconds':>8} {'rows/s':>10} {'peak MiB':>9} {'+MiB':>7} {'file MiB':>9} {'load s':>7}")
+
+    for mode in args.modes:
+        try:
+            data = run_child(CHILD, mode, env=env)
+            load = run_child(LOAD_CHILD, mode, data["path"], env=env)["seconds"] if args.load else None
+        except RuntimeError as e:
+            print(f"{mode:<8} failed: {e}")
+            continue
+        print(f"{mode:<8} {data['seconds']:8.2f} {data['rows'] / data['seconds']:10.0f} {data['peak_mib']:9.0f} "
+              f"{data['peak_mib'] - data['baseline_mib']:7.0f} {data['bytes'] / 2**20:9.1f} "
+              f"{'' if load is None else f'{load:7.2f}':>7}")
+
+if __name__ == "__main__":
+    main()
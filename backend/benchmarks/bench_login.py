@@ -0,0 +1,119 @@
+# benchmarks/bench_login.py
+"""
+Benchmark de inicio de sesión: costo del CryptContext por llamada y
+rendimiento de logins concurrentes con el pool de hash acotado.
+
+Mientras se lanzan los logins se mide la latencia de /health para comprobar
+que bcrypt no bloquea el event loop.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_login --logins 200 --concurrency 32 --rounds 10 --workers 4
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--logins", type=int, default=200)
+parser.add_argument("--concurrency", type=int, default=32)
+parser.add_argument("--rounds", type=int, default=10, help="BCRYPT_ROUNDS")
+parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="PASSWORD_HASH_WORKERS")
+args = parser.parse_args()
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_login.db"
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+
+import httpx
+from passlib.context import CryptContext
+
+from app.database import SessionLocal, Base, engine
+from app.models import User
+from app.utils.security import get_password_hash, verify_password
+from app.main import app
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def bench_context_reuse(hashed, calls=50):
+    """Verificaciones secuenciales: contexto nuevo por llamada vs. compartido."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        CryptContext(schemes=["bcrypt"], deprecated="auto").verify("benchmark", hashed)
+    per_call = (time.perf_counter() - start) / calls
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        verify_password("benchmark", hashed)
+    shared = (time.perf_counter() - start) / calls
+
+    print(f"{'verify, CryptContext per call':<45} {per_call * 1000:9.2f} ms")
+    print(f"{'verify, shared CryptContext':<45} {shared * 1000:9.2f} ms")
+
+async def bench_logins():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies = []
+
+        async def login():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/api/auth/login",
+                    data={"username": "bench", "password": "benchmark"}
+                )
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+
+        health = []
+        done = asyncio.Event()
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/health")
+                health.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+
+    print(f"{'logins/s':<45} {args.logins / elapsed:9.1f}")
+    print(f"{'login latency p50 / p95 (ms)':<45} "
+          f"{statistics.median(latencies) * 1000:9.1f} / {percentile(latencies, 95) * 1000:.1f}")
+    print(f"{'/health during logins p50 / max (ms)':<45} "
+          f"{statistics.median(health) * 1000:9.1f} / {max(health) * 1000:.1f}")
+
+def main():
+    # Los logs por request distorsionan la medición
+    logging.disable(logging.INFO)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(username="bench", email="bench@example.com",
+                    hashed_password=get_password_hash("benchmark"),
+                    is_active=True, is_admin=False)
+        db.add(user)
+        db.commit()
+        hashed = user.hashed_password
+    finally:
+        db.close()
+
+    print(f"rounds={args.rounds} workers={args.workers} "
+          f"logins={args.logins} concurrency={args.concurrency}")
+    bench_context_reuse(hashed)
+    asyncio.run(bench_logins())
+
+if __name__ == "__main__":
+    main()
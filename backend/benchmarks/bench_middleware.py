@@ -0,0 +1,106 @@
+# benchmarks/bench_middleware.py
+"""
+Benchmark del costo por solicitud de la pila de middleware sobre /health:
+los antiguos BaseHTTPMiddleware (logging + rate limiting) frente a los
+middleware ASGI puros.
+
+Las solicitudes se envían directamente a la aplicación ASGI, sin servidor ni
+cliente HTTP, para medir solo el middleware. Los logs se escriben a /dev/null.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_middleware --requests 20000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--requests", type=int, default=20_000)
+args = parser.parse_args()
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware.logging import LoggingMiddleware
+from app.middleware.rate_limiter import RateLimitMiddleware
+
+logger = logging.getLogger("api")
+
+async def legacy_logging_middleware(request: Request, call_next):
+    """Copia del middleware de logging anterior (tres líneas por solicitud)."""
+    request_id = str(uuid.uuid4())
+    logger.info(f"Request {request_id} start: {request.method} {request.url.path}")
+    start_time = time.time()
+    response = await call_next(request)
+    process_time = time.time() - start_time
+    logger.info(
+        f"Request {request_id} completed: status_code={response.status_code}, "
+        f"process_time={process_time:.4f}s"
+    )
+    response.headers["X-Process-Time"] = str(process_time)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        logger.info(f"Incoming request: {request.method} {request.url.path}")
+        return await legacy_logging_middleware(request, call_next)
+
+class LegacyRateLimitingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+def build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    if stack == "legacy":
+        app.add_middleware(LegacyLoggingMiddleware)
+        app.add_middleware(LegacyRateLimitingMiddleware)
+    elif stack == "asgi":
+        app.add_middleware(RateLimitMiddleware)
+        app.add_middleware(LoggingMiddleware)
+    return app
+
+async def run(app: FastAPI, count: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/health", "raw_path": b"/health",
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(count):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / count
+
+def main():
+    logging.basicConfig(level=logging.INFO, stream=open(os.devnull, "w"), force=True)
+
+    baseline = asyncio.run(run(build_app("none"), args.requests))
+    print(f"{'stack':<32} {'us/request':>12} {'overhead us':>12}")
+    print(f"{'no middleware':<32} {baseline * 1e6:12.1f} {0:12.1f}")
+    for label, stack in (("BaseHTTPMiddleware (before)", "legacy"), ("pure ASGI (after)", "asgi")):
+        elapsed = asyncio.run(run(build_app(stack), args.requests))
+        print(f"{label:<32} {elapsed * 1e6:12.1f} {(elapsed - baseline) * 1e6:12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_schemas.py
+"""
+Benchmark de validación de SaleCreate con canastas grandes: ventas por
+segundo validando el cuerpo ya decodificado (lo que hace FastAPI) y el JSON
+crudo (model_validate_json), para canastas de varios tamaños.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_schemas --items 1 10 50 200 --seconds 1
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import warnings
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--items", type=int, nargs="+", default=[1, 10, 50, 200], help="Líneas por venta")
+parser.add_argument("--seconds", type=float, default=1.0, help="Duración de cada medición")
+args = parser.parse_args()
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_schemas.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+# Los avisos de configuración de Pydantic no forman parte de la medición
+warnings.simplefilter("ignore")
+
+from app.schemas.sale import SaleCreate
+
+def basket(size):
+    items = []
+    for n in range(size):
+        quantity, unit_price, discount, tax_rate = 1 + n % 5, 10.0 + n, 0.5, 0.16
+        items.append({
+            "product_id": 1 + n,
+            "quantity": quantity,
+            "unit_price": unit_price,
+            "discount": discount,
+            "tax_rate": tax_rate,
+            "total": round((unit_price * quantity - discount) * (1 + tax_rate), 2),
+        })
+    return {
+        "invoice_number": "INV-00000001",
+        "customer_id": 1,
+        "total_amount": round(sum(item["total"] for item in items), 2),
+        "tax_amount": 0.0,
+        "discount_amount": 0.0,
+        "payment_method": "cash",
+        "payment_status": "paid",
+        "notes": "Venta de mostrador",
+        "items": items,
+    }
+
+def rate(validate, payload):
+    validate(payload)
+    count, start = 0, time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < args.seconds:
+        for _ in range(20):
+            validate(payload)
+        count += 20
+    return count / elapsed
+
+def main():
+    print(f"{'items':>6} {'dict ventas/s':>14} {'µs/línea':>9} {'json ventas/s':>14} {'µs/línea':>9}")
+    for size in args.items:
+        payload = basket(size)
+        raw = json.dumps(payload)
+        from_dict = rate(SaleCreate.model_validate, payload)
+        from_json = rate(SaleCreate.model_validate_json, raw)
+        print(f"{size:>6} {from_dict:14.0f} {1e6 / from_dict / size:9.2f} {from_json:14.0f} {1e6 / from_json / size:9.2f}")
+
+if __name__ == "__main__":
+    main()
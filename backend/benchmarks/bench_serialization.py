@@ -0,0 +1,148 @@
+# benchmarks/bench_serialization.py
+"""
+Benchmark de serialización de las cinco respuestas de lista más grandes
+(productos, ventas con items, movimientos con producto, clientes y una página
+de órdenes de compra), con tres caminos para el mismo contenido:
+
+- fastapi + json   : response_model de FastAPI y JSONResponse (json.dumps)
+- fastapi + orjson : response_model de FastAPI y ORJSONResponse (la clase por defecto)
+- dump_json        : json_response (TypeAdapter.validate_python + dump_json)
+
+Las filas son objetos con atributos (como los del ORM) construidos en memoria,
+para medir solo validación y serialización y no las consultas.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_serialization --rows 100 --repeat 200
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--rows", type=int, default=100, help="Filas por respuesta")
+parser.add_argument("--repeat", type=int, default=200, help="Respuestas serializadas por medición")
+args = parser.parse_args()
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_serialization.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.schemas.customer import Customer
+from app.schemas.inventory import InventoryMovementWithProduct
+from app.schemas.product import ProductWithCategory
+from app.schemas.purchase_order import PurchaseOrderPage
+from app.schemas.sale import SaleWithItems
+from app.utils.responses import json_response
+
+NOW = datetime(2026, 1, 15, 10, 30)
+
+def product(i):
+    return SimpleNamespace(
+        id=i, name=f"Producto {i}", description="Descripción del producto " * 3, sku=f"SKU-{i:06d}",
+        barcode=f"779{i:010d}", price=199.99 + i, cost_price=120.5, tax_rate=0.16, category_id=1 + i % 5,
+        stock_quantity=i % 40, min_stock_level=5, is_active=True, created_at=NOW, updated_at=NOW,
+        category=SimpleNamespace(id=1 + i % 5, name=f"Categoría {i % 5}"),
+    )
+
+def sale(i):
+    items = [
+        SimpleNamespace(id=i * 3 + n, sale_id=i, product_id=n + 1, quantity=2, unit_price=10.0,
+                        discount=0.0, tax_rate=0.16, total=23.2)
+        for n in range(3)
+    ]
+    return SimpleNamespace(
+        id=i, invoice_number=f"INV-{i:08d}", customer_id=1 + i % 50, total_amount=69.6, tax_amount=9.6,
+        discount_amount=0.0, payment_method="cash", payment_status="paid", notes=None,
+        created_at=NOW - timedelta(minutes=i), created_by=1, items=items,
+    )
+
+def movement(i):
+    return SimpleNamespace(
+        id=i, product_id=1 + i % 20, movement_type="sale", quantity=-2, reference_id=i, notes=None,
+        created_at=NOW - timedelta(minutes=i), created_by=1, product=product(1 + i % 20),
+    )
+
+def customer(i):
+    return SimpleNamespace(
+        id=i, name=f"Cliente {i}", email=f"cliente{i}@example.com", phone="555-0100", address="Calle 123",
+        tax_id=f"RFC{i:09d}", is_active=True, created_at=NOW, updated_at=None,
+    )
+
+def purchase_order_page(rows):
+    # Órdenes de 5 items: el mismo volumen de items que --rows filas
+    orders = [
+        {
+            "id": i, "order_number": f"PO-2026-{i:04d}", "supplier_id": 1, "supplier_name": "Mayorista",
+            "order_date": NOW, "expected_delivery_date": None, "status": "pending", "total_amount": 500.0,
+            "payment_terms": "30 días", "shipping_method": None, "notes": None, "created_at": NOW,
+            "updated_at": None,
+            "items": [
+                {"id": i * 5 + n, "product_id": n + 1, "product_name": f"Producto {n + 1}", "quantity": 10,
+                 "unit_price": 10.0, "subtotal": 100.0, "notes": None}
+                for n in range(5)
+            ],
+        }
+        for i in range(1, max(rows // 5, 1) + 1)
+    ]
+    return {"items": orders, "total": len(orders), "page": 1, "limit": len(orders), "pages": 1}
+
+PAYLOADS = [
+    ("products", List[ProductWithCategory], lambda: [product(i) for i in range(1, args.rows + 1)]),
+    ("sales + items", List[SaleWithItems], lambda: [sale(i) for i in range(1, args.rows + 1)]),
+    ("movements", List[InventoryMovementWithProduct], lambda: [movement(i) for i in range(1, args.rows + 1)]),
+    ("customers", List[Customer], lambda: [customer(i) for i in range(1, args.rows + 1)]),
+    ("purchase orders", PurchaseOrderPage, lambda: purchase_order_page(args.rows)),
+]
+
+def measure(render):
+    render()  # calentar cachés (esquemas, TypeAdapter)
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            render()
+        timings.append((time.perf_counter() - start) / args.repeat)
+    # El mínimo es la medición menos afectada por el resto del sistema
+    return min(timings)
+
+def main():
+    # Los logs distorsionan la medición
+    logging.disable(logging.INFO)
+    print(f"rows={args.rows} repeat={args.repeat}")
+    print(f"{'payload':<16} {'KiB':>7} {'fastapi+json':>13} {'fastapi+orjson':>15} {'dump_json':>10} {'speedup':>8}")
+
+    # El campo de FastAPI se crea una vez por ruta: se construye fuera de la medición
+    for label, response_type, build in PAYLOADS:
+        content = build()
+        field = create_model_field(name="Response", type_=response_type, mode="serialization")
+        loop = asyncio.new_event_loop()
+
+        # Lo mismo que hace FastAPI con response_model en un endpoint async
+        def stock(response_class):
+            value = loop.run_until_complete(serialize_response(field=field, response_content=content))
+            return response_class(value).body
+
+        bodies = [stock(JSONResponse), stock(ORJSONResponse), json_response(response_type, content).body]
+        assert all(json.loads(body) == json.loads(bodies[0]) for body in bodies), label
+
+        times = [
+            measure(lambda: stock(JSONResponse)),
+            measure(lambda: stock(ORJSONResponse)),
+            measure(lambda: json_response(response_type, content).body),
+        ]
+        loop.close()
+        print(f"{label:<16} {len(bodies[2]) / 1024:7.1f} {times[0] * 1000:10.2f} ms {times[1] * 1000:12.2f} ms "
+              f"{times[2] * 1000:7.2f} ms {times[0] / times[2]:7.1f}x")
+
+if __name__ == "__main__":
+    main()
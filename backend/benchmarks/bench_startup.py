@@ -0,0 +1,107 @@
+# benchmarks/bench_startup.py
+"""
+Benchmark de arranque: cada corrida es un proceso nuevo que mide
+
+- import    : `import app.main` (incluye create_app)
+- startup   : lifespan de la aplicación (init_db: verificación del esquema y admin)
+- first req : primera respuesta de /health
+
+y comprueba que importar la aplicación no abre conexiones a la base de datos
+ni carga pandas/apscheduler. Con --max-seconds el proceso termina con código 1
+si la mediana de import + startup supera el presupuesto, para usarlo en CI.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --runs 5 --max-seconds 2.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Se ejecuta en el proceso hijo; imprime una línea JSON con los tiempos
+CHILD = r"""
+import asyncio, json, logging, sys, time
+
+start = time.perf_counter()
+import app.main
+from app.database import engine
+imported = time.perf_counter()
+
+side_effects = {
+    "heavy_modules": sorted(m for m in ("pandas", "apscheduler") if m in sys.modules),
+    "db_connections_on_import": engine.pool.checkedin() + engine.pool.checkedout(),
+}
+logging.disable(logging.INFO)
+
+async def serve():
+    import httpx
+    application = app.main.app
+    async with application.router.lifespan_context(application):
+        started = time.perf_counter()
+        transport = httpx.ASGITransport(app=application)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get("/health")
+            assert response.status_code == 200, response.text
+        return started, time.perf_counter()
+
+started, first_request = asyncio.run(serve())
+print(json.dumps({
+    "import": imported - start,
+    "startup": started - imported,
+    "first_request": first_request - started,
+    **side_effects,
+}))
+"""
+
+def run_once(env):
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url", default=None, help="Por defecto, un SQLite temporal")
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="Presupuesto para la mediana de import + startup")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench_startup.db"
+    env.setdefault("SECRET_KEY", "benchmark")
+    env["ENVIRONMENT"] = "development"
+    env["PYTHONWARNINGS"] = "ignore"
+
+    # La primera corrida crea las tablas; las siguientes miden el arranque en frío
+    # de un worker contra un esquema existente
+    cold = run_once(env)
+    runs = [run_once(env) for _ in range(args.runs)]
+
+    print(f"runs={args.runs} database={env['DATABASE_URL'].split(':', 1)[0]}")
+    print(f"{'fase':<16} {'p50 ms':>9} {'max ms':>9}")
+    print(f"{'create tables':<16} {cold['startup'] * 1000:9.1f} {'':>9}")
+    for phase in ("import", "startup", "first_request"):
+        values = [run[phase] for run in runs]
+        print(f"{phase:<16} {statistics.median(values) * 1000:9.1f} {max(values) * 1000:9.1f}")
+
+    failures = []
+    total = statistics.median(run["import"] + run["startup"] for run in runs)
+    print(f"{'total':<16} {total * 1000:9.1f}")
+    if args.max_seconds is not None and total > args.max_seconds:
+        failures.append(f"arranque de {total:.2f}s supera el presupuesto de {args.max_seconds:.2f}s")
+    if runs[0]["heavy_modules"]:
+        failures.append(f"módulos pesados cargados al importar: {', '.join(runs[0]['heavy_modules'])}")
+    if runs[0]["db_connections_on_import"]:
+        failures.append("importar la aplicación abrió conexiones a la base de datos")
+
+    for failure in failures:
+        print(f"FALLO: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
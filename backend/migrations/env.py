@@ -0,0 +1,63 @@
+# migrations/env.py
+"""
+Entorno de Alembic. Usa la misma URL y el mismo metadata que la aplicación;
+si quien invoca ya tiene una conexión abierta (init_db, pruebas) la pasa en
+`config.attributes["connection"]` y se reutiliza.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import Base, DATABASE_URL
+import app.models  # noqa: F401  registra todas las tablas en Base.metadata
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def _database_url() -> str:
+    return config.get_main_option("sqlalchemy.url") or DATABASE_URL
+
+def _configure(**kwargs) -> None:
+    context.configure(
+        target_metadata=target_metadata,
+        compare_type=True,
+        # SQLite no soporta la mayoría de ALTER TABLE: Alembic recrea la tabla
+        render_as_batch=_database_url().startswith("sqlite"),
+        **kwargs
+    )
+
+def run_migrations_offline() -> None:
+    """Genera el SQL sin conectarse (`alembic upgrade head --sql`)."""
+    _configure(url=_database_url(), literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    # Sin el statement timeout de la aplicación: crear un índice sobre una
+    # tabla grande puede tardar minutos
+    engine = create_engine(_database_url(), poolclass=NullPool)
+    try:
+        with engine.connect() as connection:
+            _configure(connection=connection)
+            with context.begin_transaction():
+                context.run_migrations()
+    finally:
+        engine.dispose()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,75 @@
+"""Índices para las consultas de reportes, kardex y órdenes de compra.
+
+En PostgreSQL se crean con CREATE INDEX CONCURRENTLY (fuera de transacción)
+para no bloquear escrituras en tablas grandes. Si una construcción concurrente
+anterior se interrumpió, el índice queda inválido: se elimina y se vuelve a
+crear; los índices válidos que ya existan se respetan.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:40:00.000000
+
+"""
+from typing import Optional, Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_sales_created_at', 'sales', ['created_at']),
+    ('ix_sale_items_sale_id', 'sale_items', ['sale_id']),
+    ('ix_sale_items_product_id', 'sale_items', ['product_id']),
+    ('ix_inventory_movements_product_id_created_at', 'inventory_movements', ['product_id', 'created_at']),
+    ('ix_purchase_order_items_purchase_order_id', 'purchase_order_items', ['purchase_order_id']),
+    ('ix_products_category_id', 'products', ['category_id']),
+]
+
+
+def _pg_index_valid(name: str) -> Optional[bool]:
+    """True/False según pg_index.indisvalid, o None si el índice no existe."""
+    return op.get_bind().execute(
+        sa.text(
+            "SELECT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relname = :name AND n.nspname = current_schema()"
+        ),
+        {"name": name}
+    ).scalar()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().dialect.name != 'postgresql':
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True)
+        return
+
+    # CONCURRENTLY no puede correr dentro de una transacción
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            valid = None if context.is_offline_mode() else _pg_index_valid(name)
+            if valid:
+                continue
+            if valid is False:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name != 'postgresql':
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
+        return
+
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
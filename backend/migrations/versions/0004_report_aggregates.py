@@ -0,0 +1,76 @@
+"""Agregados de reportes materializados y sus marcas de agua.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 09:47:14.964151
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('report_watermarks',
+    sa.Column('report_type', sa.String(length=50), nullable=False),
+    sa.Column('last_sale_id', sa.Integer(), nullable=False),
+    sa.Column('last_movement_id', sa.Integer(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('report_type')
+    )
+    op.create_table('sales_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('sales_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('taxes', sa.Float(), nullable=False),
+    sa.Column('discounts', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('customer_sales_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('purchases', sa.Integer(), nullable=False),
+    sa.Column('total_spent', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.PrimaryKeyConstraint('day', 'customer_id')
+    )
+    op.create_table('inventory_value_by_product',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('stock_quantity', sa.Integer(), nullable=False),
+    sa.Column('cost_value', sa.Float(), nullable=False),
+    sa.Column('retail_value', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_index(op.f('ix_inventory_value_by_product_category_id'), 'inventory_value_by_product', ['category_id'], unique=False)
+    op.create_table('product_sales_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity_sold', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('unit_price_sum', sa.Float(), nullable=False),
+    sa.Column('line_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('product_sales_daily')
+    op.drop_index(op.f('ix_inventory_value_by_product_category_id'), table_name='inventory_value_by_product')
+    op.drop_table('inventory_value_by_product')
+    op.drop_table('customer_sales_daily')
+    op.drop_table('sales_daily')
+    op.drop_table('report_watermarks')
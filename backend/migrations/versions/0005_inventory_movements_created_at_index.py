@@ -0,0 +1,46 @@
+"""Índice por fecha de los movimientos de inventario.
+
+El reporte de movimientos y los snapshots filtran por rango de created_at sin
+producto; el índice compuesto (product_id, created_at) no sirve para eso. En
+PostgreSQL se crea con CONCURRENTLY, como en 0002.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 09:53:03.056824
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().dialect.name != 'postgresql':
+        # Puede existir si la tabla se creó desde los modelos (base previa a Alembic)
+        op.create_index('ix_inventory_movements_created_at', 'inventory_movements', ['created_at'], unique=False,
+                        if_not_exists=True)
+        return
+
+    # CONCURRENTLY no puede correr dentro de una transacción
+    with op.get_context().autocommit_block():
+        op.create_index('ix_inventory_movements_created_at', 'inventory_movements', ['created_at'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name != 'postgresql':
+        op.drop_index('ix_inventory_movements_created_at', table_name='inventory_movements')
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_inventory_movements_created_at', table_name='inventory_movements',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,75 @@
+"""Resumen de compras por cliente (customer_stats) con puntajes RFM.
+
+La tabla se llena con el historial de ventas existente; los puntajes se
+calculan en la primera corrida nocturna. El índice de sales.customer_id se
+crea con CONCURRENTLY en PostgreSQL, como en 0002.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 09:55:57.131719
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('customer_stats',
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('first_purchase_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_purchase_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('purchase_count', sa.Integer(), nullable=False),
+    sa.Column('total_spent', sa.Float(), nullable=False),
+    sa.Column('average_purchase', sa.Float(), nullable=False),
+    sa.Column('recency_score', sa.Integer(), nullable=True),
+    sa.Column('frequency_score', sa.Integer(), nullable=True),
+    sa.Column('monetary_score', sa.Integer(), nullable=True),
+    sa.Column('segment', sa.String(length=30), nullable=True),
+    sa.Column('scored_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.PrimaryKeyConstraint('customer_id')
+    )
+    op.create_index('ix_customer_stats_segment_total_spent', 'customer_stats', ['segment', 'total_spent'], unique=False)
+    op.create_index('ix_customer_stats_total_spent', 'customer_stats', ['total_spent'], unique=False)
+
+    op.execute(
+        "INSERT INTO customer_stats (customer_id, first_purchase_at, last_purchase_at, purchase_count, "
+        "total_spent, average_purchase) "
+        "SELECT customer_id, min(created_at), max(created_at), count(id), coalesce(sum(total_amount), 0), "
+        "coalesce(avg(total_amount), 0) "
+        "FROM sales WHERE customer_id IS NOT NULL AND payment_status != 'cancelled' "
+        "GROUP BY customer_id"
+    )
+
+    if op.get_context().dialect.name != 'postgresql':
+        # Puede existir si la tabla se creó desde los modelos (base previa a Alembic)
+        op.create_index('ix_sales_customer_id', 'sales', ['customer_id'], unique=False, if_not_exists=True)
+        return
+
+    # CONCURRENTLY no puede correr dentro de una transacción
+    with op.get_context().autocommit_block():
+        op.create_index('ix_sales_customer_id', 'sales', ['customer_id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name != 'postgresql':
+        op.drop_index('ix_sales_customer_id', table_name='sales')
+    else:
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_sales_customer_id', table_name='sales', postgresql_concurrently=True, if_exists=True)
+
+    op.drop_index('ix_customer_stats_total_spent', table_name='customer_stats')
+    op.drop_index('ix_customer_stats_segment_total_spent', table_name='customer_stats')
+    op.drop_table('customer_stats')
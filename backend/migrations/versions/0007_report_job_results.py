@@ -0,0 +1,30 @@
+"""Resultados por reporte de los paquetes (report_jobs.results).
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 09:59:49.877792
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('report_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('results', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('report_jobs', schema=None) as batch_op:
+        batch_op.drop_column('results')
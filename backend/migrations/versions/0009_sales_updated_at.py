@@ -0,0 +1,54 @@
+"""Hora de la última edición de las ventas (sales.updated_at).
+
+Los agregados de reportes recalculan el día de las ventas editadas después de
+la última corrida. El índice se crea con CONCURRENTLY en PostgreSQL, como en
+0005.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 10:12:41.530918
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # En una base previa a Alembic la tabla pudo crearse desde los modelos, ya con la columna
+    if context.is_offline_mode() or 'updated_at' not in {
+        column['name'] for column in sa.inspect(op.get_bind()).get_columns('sales')
+    }:
+        with op.batch_alter_table('sales', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+
+    if op.get_context().dialect.name != 'postgresql':
+        op.create_index(op.f('ix_sales_updated_at'), 'sales', ['updated_at'], unique=False, if_not_exists=True)
+        return
+
+    # CONCURRENTLY no puede correr dentro de una transacción
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_sales_updated_at'), 'sales', ['updated_at'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name != 'postgresql':
+        op.drop_index(op.f('ix_sales_updated_at'), table_name='sales')
+    else:
+        with op.get_context().autocommit_block():
+            op.drop_index(op.f('ix_sales_updated_at'), table_name='sales',
+                          postgresql_concurrently=True, if_exists=True)
+
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
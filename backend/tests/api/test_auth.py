@@ -31,6 +31,26 @@ def test_login_nonexistent_user(client):
     assert response.status_code == 401
     assert "Incorrect username or password" in response.json()["detail"]
 
+def test_login_upgrades_outdated_hash(client, db):
+    """Test para regenerar el hash al iniciar sesión si cambió el factor de trabajo."""
+    from passlib.context import CryptContext
+    from app.models import User
+    from app.utils.security import pwd_context
+
+    user = db.query(User).filter(User.username == "testuser").first()
+    user.hashed_password = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("password")
+    db.commit()
+    assert pwd_context.needs_update(user.hashed_password)
+
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "testuser", "password": "password"}
+    )
+    assert response.status_code == 200
+    db.refresh(user)
+    assert not pwd_context.needs_update(user.hashed_password)
+    assert pwd_context.verify("password", user.hashed_password)
+
 def test_register_user(client):
     """Test para registrar un nuevo usuario."""
     response = client.post(
@@ -60,4 +80,30 @@ def test_register_user(client):
         }
     )
     assert response.status_code == 400
-    assert "already exists" in response.json()["detail"]
\ No newline at end of file
+    assert "already exists" in response.json()["detail"]
+
+def test_principal_cache_hit_and_invalidation(client, db):
+    """Test para la caché de usuario autenticado y su invalidación."""
+    from app.models import User
+    from app.utils.principal_cache import principal_cache
+
+    def token_for(username, password):
+        response = client.post("/api/auth/login", data={"username": username, "password": password})
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    user_headers = token_for("testuser", "password")
+    admin_headers = token_for("admin", "admin")
+    user_id = db.query(User).filter(User.username == "testuser").first().id
+
+    assert client.get("/api/users/profile", headers=user_headers).status_code == 200
+    hits = principal_cache.hits
+    assert client.get("/api/users/profile", headers=user_headers).status_code == 200
+    assert principal_cache.hits == hits + 1
+
+    # Al desactivar el usuario, su entrada se descarta y el token deja de servir
+    response = client.patch(f"/api/users/{user_id}/status?is_active=false", headers=admin_headers)
+    assert response.status_code == 200
+    assert client.get("/api/users/profile", headers=user_headers).status_code == 403
+
+    stats = client.get("/api/users/principal-cache/stats", headers=admin_headers).json()
+    assert stats["hits"] >= 1 and stats["invalidations"] >= 1
@@ -0,0 +1,97 @@
+# tests/api/test_customer_stats.py
+from datetime import date, datetime, timedelta
+
+from app.models.customer import Customer
+from app.models.sale import Sale
+from app.services.customer_stats import rebuild_customer_stats, score_customers
+
+def _get_auth_header(client):
+    """Helper para obtener el header de autenticación."""
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "admin", "password": "admin"}
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def _create_sale(client, headers, invoice_number, customer_id):
+    response = client.post("/api/sales/", headers=headers, json={
+        "invoice_number": invoice_number,
+        "customer_id": customer_id,
+        "total_amount": 46.28,
+        "payment_method": "cash",
+        "items": [{"product_id": 3, "quantity": 10, "unit_price": 3.99, "discount": 0, "tax_rate": 0.16,
+                   "total": 46.28}]
+    })
+    assert response.status_code in (200, 201), response.text
+    return response.json()["id"]
+
+def test_customer_stats_follow_sale_writes(client):
+    """Test para actualizar el resumen del cliente al registrar, modificar y cancelar ventas."""
+    headers = _get_auth_header(client)
+    customer_id = client.post("/api/customers/", headers=headers, json={"name": "Ana López"}).json()["id"]
+
+    assert client.get(f"/api/customers/{customer_id}/stats", headers=headers).json()["total_purchases"] == 0
+
+    first = _create_sale(client, headers, "INV-CS-1", customer_id)
+    _create_sale(client, headers, "INV-CS-2", customer_id)
+    stats = client.get(f"/api/customers/{customer_id}/stats", headers=headers).json()
+    assert (stats["total_purchases"], stats["total_spent"], stats["average_purchase"]) == (2, 92.56, 46.28)
+    assert stats["first_purchase"] == stats["last_purchase"] == date.today().isoformat()
+
+    response = client.put(f"/api/sales/{first}", headers=headers, json={"total_amount": 53.72})
+    assert response.status_code == 200
+    stats = client.get(f"/api/customers/{customer_id}/stats", headers=headers).json()
+    assert (stats["total_purchases"], stats["total_spent"]) == (2, 100.0)
+
+    assert client.delete(f"/api/sales/{first}", headers=headers).status_code == 200
+    stats = client.get(f"/api/customers/{customer_id}/stats", headers=headers).json()
+    assert (stats["total_purchases"], stats["total_spent"], stats["average_purchase"]) == (1, 46.28, 46.28)
+
+    assert client.get("/api/customers/999/stats", headers=headers).status_code == 404
+
+def test_rfm_scoring_segments_customers(client, db):
+    """Test para puntuar a todos los clientes y consultar los segmentos por índice."""
+    headers = _get_auth_header(client)
+    now = datetime.now()
+    # (días desde la última compra, número de compras, monto por compra)
+    profiles = {
+        "Frecuente reciente": (1, 6, 100.0),
+        "Frecuente antiguo": (200, 5, 80.0),
+        "Nuevo": (2, 1, 20.0),
+        "Perdido": (300, 1, 10.0),
+        "Ocasional": (60, 2, 30.0),
+    }
+    customers = {}
+    invoice = 0
+    for name, (days_ago, purchases, amount) in profiles.items():
+        customer = Customer(name=name)
+        db.add(customer)
+        db.flush()
+        customers[name] = customer.id
+        for i in range(purchases):
+            invoice += 1
+            db.add(Sale(invoice_number=f"INV-RFM-{invoice}", customer_id=customer.id, total_amount=amount,
+                        payment_method="cash", payment_status="paid",
+                        created_at=now - timedelta(days=days_ago + 7 * i)))
+    db.commit()
+
+    assert rebuild_customer_stats(db) == 5
+    assert score_customers(db) == 5
+
+    champion = client.get(f"/api/customers/{customers['Frecuente reciente']}/stats", headers=headers).json()
+    assert (champion["recency_score"], champion["frequency_score"], champion["monetary_score"]) == (5, 5, 5)
+    assert champion["segment"] == "champions"
+    assert client.get(f"/api/customers/{customers['Perdido']}/stats", headers=headers).json()["segment"] == "hibernating"
+    assert client.get(f"/api/customers/{customers['Frecuente antiguo']}/stats", headers=headers).json()["segment"] == "at_risk"
+
+    response = client.get("/api/customers/?segment=champions", headers=headers)
+    assert [customer["id"] for customer in response.json()] == [customers["Frecuente reciente"]]
+
+    segments = {row["segment"]: row["customers"] for row in
+                client.get("/api/reports/customers/segments/", headers=headers).json()}
+    assert sum(segments.values()) == 5
+
+    lifetime = client.get("/api/reports/customers/lifetime/?limit=2", headers=headers).json()
+    assert [row["name"] for row in lifetime] == ["Frecuente reciente", "Frecuente antiguo"]
+    assert lifetime[0]["total_spent"] == 600.0
@@ -0,0 +1,72 @@
+# tests/api/test_dashboard.py
+from datetime import date
+
+import pytest
+
+from app.services import dashboard
+
+def _get_auth_header(client):
+    """Helper para obtener el header de autenticación."""
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "admin", "password": "admin"}
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def _create_sale(client, headers):
+    response = client.post("/api/sales/", headers=headers, json={
+        "invoice_number": "INV-DASH-1",
+        "total_amount": 46.28,
+        "payment_method": "cash",
+        "items": [{"product_id": 3, "quantity": 10, "unit_price": 3.99, "discount": 0, "tax_rate": 0.16,
+                   "total": 46.28}]
+    })
+    assert response.status_code in (200, 201), response.text
+
+def test_dashboard_returns_all_widgets(client):
+    """Test para obtener todos los widgets del dashboard en una respuesta."""
+    headers = _get_auth_header(client)
+    _create_sale(client, headers)
+
+    response = client.get("/api/reports/dashboard", headers=headers)
+    assert response.status_code == 200
+    content = response.json()
+    assert set(content) == {"sales", "topProducts", "lowStock", "metrics"}
+
+    assert len(content["sales"]) == 7
+    assert content["sales"][-1] == {"date": date.today().isoformat(), "total": 46.28}
+    assert content["metrics"] == {
+        "totalSales": 1, "monthlyRevenue": 46.28, "averageOrderValue": 46.28, "customerCount": 0
+    }
+    # La venta de hoy cuenta aunque el rango termine hoy
+    assert content["topProducts"] == [{"id": 3, "name": "Chocolate Bar", "sales": 10, "revenue": 46.28}]
+    # Chocolate: 50 - 10 vendidas = 40 en stock, mínimo 10 (no es bajo stock)
+    assert all(item["id"] != 3 for item in content["lowStock"])
+
+def test_dashboard_skips_widgets_not_requested(client, monkeypatch):
+    """Test para no calcular los widgets que no se piden."""
+    def fail(*args, **kwargs):
+        raise AssertionError("top products should not be computed")
+    monkeypatch.setattr(dashboard, "generate_product_sales_report", fail)
+    monkeypatch.setattr(dashboard, "generate_low_stock_report", fail)
+
+    headers = _get_auth_header(client)
+    response = client.get("/api/reports/dashboard?widgets=metrics&widgets=sales", headers=headers)
+    assert response.status_code == 200
+    assert set(response.json()) == {"metrics", "sales"}
+
+def test_dashboard_does_not_hide_errors(client, monkeypatch):
+    """Test para propagar los errores en lugar de devolver datos de muestra."""
+    def broken(*args, **kwargs):
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(dashboard, "generate_low_stock_report", broken)
+
+    headers = _get_auth_header(client)
+    with pytest.raises(RuntimeError):
+        client.get("/api/reports/reports/inventory/low-stock", headers=headers)
+
+def test_dashboard_requires_authentication(client):
+    """Test para exigir autenticación en los endpoints del dashboard."""
+    assert client.get("/api/reports/dashboard").status_code == 401
+    assert client.get("/api/reports/reports/inventory/value").status_code == 401
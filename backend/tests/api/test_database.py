@@ -0,0 +1,41 @@
+# tests/api/test_database.py
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.database import create_db_engine, TimedQueuePool
+from app.metrics import db_pool_wait_seconds
+
+def test_engine_uses_configured_pool(monkeypatch, tmp_path):
+    """Test para el pool configurado desde Settings y la medición de esperas."""
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 3)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 1)
+    engine = create_db_engine(f"sqlite:///{tmp_path}/pool.db")
+
+    assert isinstance(engine.pool, TimedQueuePool)
+    assert engine.pool.size() == 3
+    assert engine.pool._max_overflow == 1
+    assert engine.pool._pre_ping is True
+
+    waits = db_pool_wait_seconds.count()
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+    assert db_pool_wait_seconds.count() == waits + 1
+    engine.dispose()
+
+def test_sqlite_statement_timeout(monkeypatch, tmp_path):
+    """Test para el timeout por sentencia en SQLite: se interrumpe y la conexión sigue usable."""
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 50)
+    engine = create_db_engine(f"sqlite:///{tmp_path}/timeout.db")
+
+    slow = text(
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000) "
+        "SELECT count(*) FROM n"
+    )
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError, match="interrupt"):
+            conn.execute(slow).scalar()
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+    engine.dispose()
@@ -0,0 +1,97 @@
+# tests/api/test_date_ranges.py
+from datetime import date, datetime, timezone
+
+from sqlalchemy import event
+
+from app.config import settings
+from app.models.sale import Sale, SaleItem
+from app.services.reports import generate_product_sales_report
+from app.utils.date_ranges import day_bounds
+
+START, END = date(2026, 3, 10), date(2026, 3, 12)
+
+def _get_auth_header(client):
+    """Helper para obtener el header de autenticación."""
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "admin", "password": "admin"}
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def _create_boundary_sales(db):
+    """Ventas justo dentro y justo fuera de los días [START, END]."""
+    created = {
+        "INV-BEFORE": datetime(2026, 3, 9, 23, 59, 59, 999999),
+        "INV-FIRST": datetime(2026, 3, 10, 0, 0, 0),
+        "INV-LAST": datetime(2026, 3, 12, 23, 59, 59, 999999),
+        "INV-AFTER": datetime(2026, 3, 13, 0, 0, 0),
+    }
+    for invoice_number, created_at in created.items():
+        sale = Sale(invoice_number=invoice_number, total_amount=10.0, payment_method="cash",
+                    payment_status="paid", created_by=1, created_at=created_at)
+        db.add(sale)
+        db.flush()
+        db.add(SaleItem(sale_id=sale.id, product_id=1, quantity=1, unit_price=10.0, total=10.0))
+    db.commit()
+
+def test_day_bounds_use_report_timezone(monkeypatch):
+    """Test para calcular los límites de los días en la zona horaria del negocio."""
+    assert day_bounds(START, END) == (
+        datetime(2026, 3, 10, tzinfo=timezone.utc), datetime(2026, 3, 13, tzinfo=timezone.utc)
+    )
+    # Ciudad de México: UTC-6 todo el año
+    monkeypatch.setattr(settings, "REPORT_TIMEZONE", "America/Mexico_City")
+    assert day_bounds(START, END) == (
+        datetime(2026, 3, 10, 6, tzinfo=timezone.utc), datetime(2026, 3, 13, 6, tzinfo=timezone.utc)
+    )
+    assert day_bounds(None, END) == (None, datetime(2026, 3, 13, 6, tzinfo=timezone.utc))
+
+def test_sales_listing_includes_whole_boundary_days(client, db):
+    """Test para incluir el último instante de date_to y excluir el día siguiente."""
+    _create_boundary_sales(db)
+    headers = _get_auth_header(client)
+
+    response = client.get(f"/api/sales/?date_from={START}&date_to={END}", headers=headers)
+    assert response.status_code == 200
+    assert sorted(sale["invoice_number"] for sale in response.json()) == ["INV-FIRST", "INV-LAST"]
+
+def test_reports_include_end_date(client, db):
+    """Test para incluir en los reportes las ventas del día end_date."""
+    _create_boundary_sales(db)
+    headers = _get_auth_header(client)
+
+    response = client.get(f"/api/sales/report/daily/?start_date={START}&end_date={END}", headers=headers)
+    assert [(row["date"], row["total_sales"]) for row in response.json()] == [
+        ("2026-03-10", 1), ("2026-03-12", 1)
+    ]
+
+    response = client.get(f"/api/sales/report/products/?start_date={START}&end_date={END}", headers=headers)
+    assert response.json()[0]["total_quantity"] == 2
+
+    # Un solo día: antes quedaba vacío porque end_date valía 00:00 de ese día
+    report = generate_product_sales_report(db, END, END)
+    assert [(row["product_id"], row["quantity_sold"]) for row in report] == [(1, 1)]
+
+def test_daily_sales_report_uses_created_at_index(client, db):
+    """Test para verificar con EXPLAIN QUERY PLAN que el filtro por fecha usa el índice."""
+    headers = _get_auth_header(client)
+    engine = db.get_bind()
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM sales" in statement and "GROUP BY" in statement:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        response = client.get(f"/api/sales/report/daily/?start_date={START}&end_date={END}", headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert response.status_code == 200
+
+    statement, parameters = statements[-1]
+    with engine.connect() as connection:
+        plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    details = " ".join(row[-1] for row in plan)
+    assert "USING INDEX ix_sales_created_at" in details, details
@@ -0,0 +1,200 @@
+# tests/api/test_inventory.py
+import pytest
+from fastapi.testclient import TestClient
+
+from app.models import Product, InventoryMovement
+
+def _get_auth_header(client):
+    """Helper para obtener el header de autenticación."""
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "admin", "password": "admin"}
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_stock_count_applies_variances(client, db):
+    """Test para aplicar un conteo físico con varias diferencias."""
+    headers = _get_auth_header(client)
+
+    response = client.post(
+        "/api/inventory/counts",
+        json={
+            "items": [
+                {"sku": "PHONE-001", "counted_quantity": 20},
+                {"sku": "TSHIRT-001", "counted_quantity": 110},
+                {"sku": "CHOC-001", "counted_quantity": 50},
+            ],
+            "notes": "Conteo mensual"
+        },
+        headers=headers
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["total_items"] == 3
+    assert content["adjusted_items"] == 2
+    assert content["unchanged_items"] == 1
+    assert content["units_gained"] == 10
+    assert content["units_lost"] == 5
+    assert content["net_variance"] == 5
+
+    # El stock queda igual a lo contado y hay un movimiento por diferencia
+    db.expire_all()
+    stock = {p.sku: p.stock_quantity for p in db.query(Product).all()}
+    assert stock["PHONE-001"] == 20
+    assert stock["TSHIRT-001"] == 110
+    assert stock["CHOC-001"] == 50
+    movements = db.query(InventoryMovement).filter(InventoryMovement.movement_type == "adjustment").all()
+    assert sorted(m.quantity for m in movements) == [-5, 10]
+
+def test_stock_count_unknown_sku(client, db):
+    """Test para un conteo con un SKU inexistente: no se aplica nada."""
+    headers = _get_auth_header(client)
+
+    response = client.post(
+        "/api/inventory/counts",
+        json={
+            "items": [
+                {"sku": "PHONE-001", "counted_quantity": 1},
+                {"sku": "NOPE-404", "counted_quantity": 3},
+            ]
+        },
+        headers=headers
+    )
+    assert response.status_code == 404
+    assert "NOPE-404" in response.json()["detail"]
+
+def test_stock_count_duplicate_sku(client):
+    """Test para un conteo con SKUs repetidos."""
+    headers = _get_auth_header(client)
+
+    response = client.post(
+        "/api/inventory/counts",
+        json={
+            "items": [
+                {"sku": "PHONE-001", "counted_quantity": 1},
+                {"sku": "PHONE-001", "counted_quantity": 2},
+            ]
+        },
+        headers=headers
+    )
+    assert response.status_code == 400
+
+def test_cost_layers_fifo_consumption(client, db):
+    """Test para el consumo FIFO de capas de costo al vender."""
+    from app.models.cost_layer import InventoryCostLayer, CostLayerConsumption
+    headers = _get_auth_header(client)
+
+    # Sin stock inicial: todo el stock proviene de capas
+    db.query(Product).filter(Product.id == 3).update({"stock_quantity": 0})
+    db.commit()
+
+    # Dos entradas del mismo producto con costos distintos
+    for quantity in (10, 10):
+        response = client.post(
+            "/api/inventory/",
+            json={"product_id": 3, "movement_type": "adjustment", "quantity": quantity},
+            headers=headers
+        )
+        assert response.status_code == 200
+    first, second = db.query(InventoryCostLayer).order_by(InventoryCostLayer.id).all()
+    first.unit_cost = 1.0
+    second.unit_cost = 2.0
+    db.commit()
+
+    # La venta consume primero la capa más antigua
+    response = client.post(
+        "/api/sales/",
+        json={
+            "invoice_number": "FIFO-001",
+            "total_amount": 59.85,
+            "payment_method": "cash",
+            "items": [{"product_id": 3, "quantity": 15, "unit_price": 3.99, "total": 59.85}]
+        },
+        headers=headers
+    )
+    assert response.status_code == 201
+    consumed = db.query(CostLayerConsumption).order_by(CostLayerConsumption.id).all()
+    assert [(c.quantity, c.unit_cost) for c in consumed] == [(10, 1.0), (5, 2.0)]
+    db.expire_all()
+    assert [l.remaining_quantity for l in db.query(InventoryCostLayer).order_by(InventoryCostLayer.id)] == [0, 5]
+
+def test_cost_layers_consume_opening_stock_first(client, db):
+    """Test para el stock inicial sin capa: sale antes que las compras posteriores."""
+    from app.models.cost_layer import InventoryCostLayer, CostLayerConsumption
+    headers = _get_auth_header(client)
+
+    response = client.post(
+        "/api/products/",
+        json={
+            "name": "Café",
+            "sku": "COFFEE-001",
+            "price": 6.0,
+            "cost_price": 2.0,
+            "stock_quantity": 50,
+            "category_id": 3
+        },
+        headers=headers
+    )
+    assert response.status_code == 200
+    product_id = response.json()["id"]
+
+    # Entrada posterior a un costo nuevo
+    response = client.post(
+        "/api/inventory/",
+        json={"product_id": product_id, "movement_type": "adjustment", "quantity": 10},
+        headers=headers
+    )
+    assert response.status_code == 200
+    layer = db.query(InventoryCostLayer).filter(InventoryCostLayer.product_id == product_id).one()
+    layer.unit_cost = 3.0
+    db.commit()
+
+    response = client.post(
+        "/api/sales/",
+        json={
+            "invoice_number": "FIFO-002",
+            "total_amount": 30.0,
+            "payment_method": "cash",
+            "items": [{"product_id": product_id, "quantity": 5, "unit_price": 6.0, "total": 30.0}]
+        },
+        headers=headers
+    )
+    assert response.status_code == 201
+
+    # La venta se costea con el stock inicial y la capa de la entrada queda intacta
+    consumed = db.query(CostLayerConsumption).filter(CostLayerConsumption.product_id == product_id).all()
+    assert [(c.quantity, c.unit_cost, c.layer_id) for c in consumed] == [(5, 2.0, None)]
+    db.expire_all()
+    assert db.query(InventoryCostLayer).filter(InventoryCostLayer.product_id == product_id).one().remaining_quantity == 10
+
+def test_stock_as_of_uses_snapshot_and_movements(client, db):
+    """Test para consultar el stock histórico a partir de snapshots."""
+    import datetime
+    headers = _get_auth_header(client)
+    today = datetime.date.today()
+    yesterday = today - datetime.timedelta(days=1)
+
+    response = client.post(
+        "/api/inventory/",
+        json={"product_id": 1, "movement_type": "adjustment", "quantity": 5},
+        headers=headers
+    )
+    assert response.status_code == 200
+
+    # Sin snapshots se parte del stock actual
+    response = client.get(f"/api/inventory/as-of?date={yesterday}&product_id=1", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["snapshot_date"] is None
+    assert response.json()["items"][0]["quantity"] == 25
+
+    response = client.post(f"/api/inventory/snapshots?date={yesterday}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["products"] == 3
+
+    response = client.get(f"/api/inventory/as-of?date={today}", headers=headers)
+    assert response.status_code == 200
+    content = response.json()
+    assert content["snapshot_date"] == str(yesterday)
+    stock = {item["product_id"]: item["quantity"] for item in content["items"]}
+    assert stock == {1: 30, 2: 100, 3: 50}
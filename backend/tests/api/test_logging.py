@@ -0,0 +1,61 @@
+# tests/api/test_logging.py
+import json
+import logging
+
+import pytest
+
+from app.config import settings
+from app.logging_config import (
+    JsonFormatter, RequestContextFilter, start_request, request_id_var, request_sampled_var
+)
+
+@pytest.fixture
+def request_context():
+    """Restaura el contexto de logging que modifican las pruebas."""
+    id_token = request_id_var.set(None)
+    sampled_token = request_sampled_var.set(True)
+    yield
+    request_sampled_var.reset(sampled_token)
+    request_id_var.reset(id_token)
+
+def _record(level=logging.INFO, **extra):
+    record = logging.LogRecord("api", level, __file__, 1, "GET %s", ("/health",), None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+def test_json_formatter_includes_request_id_and_fields(request_context):
+    """Test para el formato JSON con id de solicitud y campos estructurados."""
+    start_request("req-123")
+    record = _record(status=200, duration_ms=1.5)
+    assert RequestContextFilter().filter(record)
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "GET /health"
+    assert entry["request_id"] == "req-123"
+    assert entry["status"] == 200
+    assert entry["duration_ms"] == 1.5
+    assert entry["level"] == "INFO"
+
+def test_sampling_drops_info_but_keeps_warnings(monkeypatch, request_context):
+    """Test para el muestreo: sin muestrear solo pasan los WARNING o superiores."""
+    monkeypatch.setattr(settings, "LOG_SAMPLE_RATE", 0.0)
+    start_request("req-unsampled")
+    log_filter = RequestContextFilter()
+    assert not log_filter.filter(_record(logging.INFO))
+    assert log_filter.filter(_record(logging.WARNING))
+
+def test_register_does_not_log_request_body(client, caplog):
+    """Test para comprobar que el registro de usuarios no escribe el cuerpo en los logs."""
+    with caplog.at_level(logging.INFO):
+        client.post(
+            "/api/auth/register",
+            json={
+                "username": "loguser",
+                "email": "loguser@example.com",
+                "full_name": "Log User",
+                "password": "supersecret123"
+            }
+        )
+    assert "supersecret123" not in caplog.text
+    assert "loguser@example.com" not in caplog.text
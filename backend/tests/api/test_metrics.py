@@ -0,0 +1,45 @@
+# tests/api/test_metrics.py
+import pytest
+
+def test_metrics_endpoint_exposes_routes_db_and_caches(client, db):
+    """Test para el endpoint /metrics: rutas por plantilla, tiempos de SQL y cachés."""
+    from app.metrics import instrument_engine
+    instrument_engine(db.get_bind().engine, name="test")
+
+    response = client.post("/api/auth/login", data={"username": "admin", "password": "admin"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get("/api/categories/1", headers=headers).status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'http_requests_total{method="POST",route="/api/auth/login",status="200"}' in text
+    assert 'route="/api/categories/{id}"' in text
+    assert 'http_request_duration_seconds_bucket{method="POST",route="/api/auth/login",le="+Inf"}' in text
+    assert 'http_requests_in_progress{method="GET"} 1' in text
+    assert 'db_statement_duration_seconds_count{operation="SELECT"}' in text
+    assert 'cache_hit_ratio{cache="principal"}' in text
+
+def test_pool_metrics_are_one_family_per_engine_label(tmp_path):
+    """Test para exportar el pool de varios engines sin repetir familias de métricas."""
+    from collections import Counter
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import QueuePool
+    from app.metrics import REGISTRY, instrument_engine
+
+    engines = [
+        create_engine(f"sqlite:///{tmp_path}/{name}.db", poolclass=QueuePool)
+        for name in ("first", "second")
+    ]
+    for name, engine in zip(("first", "second"), engines):
+        instrument_engine(engine, name=name)
+        instrument_engine(engine, name=name)
+
+    text = REGISTRY.render()
+    types = Counter(line for line in text.splitlines() if line.startswith("# TYPE "))
+    assert [line for line, count in types.items() if count > 1] == []
+    assert 'db_pool_size{engine="first",pool="QueuePool"}' in text
+    assert 'db_pool_size{engine="second",pool="QueuePool"}' in text
+    for engine in engines:
+        engine.dispose()
@@ -0,0 +1,97 @@
+# tests/api/test_migrations.py
+import io
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, inspect
+
+from app import initialization
+from app.database import Base
+from app.initialization import ALEMBIC_INI, alembic_config
+
+HOT_PATH_INDEXES = {
+    ("sales", ("created_at",)),
+    ("sale_items", ("sale_id",)),
+    ("sale_items", ("product_id",)),
+    ("inventory_movements", ("product_id", "created_at")),
+    ("purchase_order_items", ("purchase_order_id",)),
+    ("products", ("category_id",)),
+}
+
+def _indexed_columns(engine):
+    inspector = inspect(engine)
+    return {
+        (table, tuple(index["column_names"]))
+        for table in inspector.get_table_names()
+        for index in inspector.get_indexes(table)
+    }
+
+def test_migrations_match_models_and_downgrade(tmp_path):
+    """Test para comprobar que `upgrade head` produce el esquema de los modelos."""
+    engine = create_engine(f"sqlite:///{tmp_path}/migrations.db")
+    with engine.begin() as connection:
+        command.upgrade(alembic_config(connection), "head")
+
+    assert HOT_PATH_INDEXES <= _indexed_columns(engine)
+    with engine.connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+
+    with engine.begin() as connection:
+        command.downgrade(alembic_config(connection), "0001")
+    assert not HOT_PATH_INDEXES & _indexed_columns(engine)
+
+    with engine.begin() as connection:
+        command.downgrade(alembic_config(connection), "base")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+    engine.dispose()
+
+def test_postgres_indexes_are_created_concurrently():
+    """Test para el SQL generado en PostgreSQL: índices concurrentes fuera de transacción."""
+    output = io.StringIO()
+    config = Config(str(ALEMBIC_INI), output_buffer=output)
+    config.attributes["configure_logger"] = False
+    config.set_main_option("sqlalchemy.url", "postgresql://pos@localhost/pos")
+    command.upgrade(config, "0001:0002", sql=True)
+
+    sql = output.getvalue()
+    assert sql.count("CREATE INDEX CONCURRENTLY") == len(HOT_PATH_INDEXES)
+    # Las sentencias concurrentes quedan entre el COMMIT y el siguiente BEGIN
+    concurrent = sql.split("COMMIT;", 1)[1].split("BEGIN;", 1)[0]
+    assert concurrent.count("CREATE INDEX CONCURRENTLY") == len(HOT_PATH_INDEXES)
+
+def test_legacy_database_reaches_head_following_startup_advice(monkeypatch, tmp_path):
+    """Test para una base creada antes de Alembic: el arranque y `stamp 0001 && upgrade head`."""
+    engine = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    with engine.begin() as connection:
+        command.upgrade(alembic_config(connection), "0001")
+    with engine.begin() as connection:
+        # Sin versión de Alembic y sin una de las tablas de entonces
+        connection.exec_driver_sql("DROP TABLE alembic_version")
+        connection.exec_driver_sql("DROP TABLE stock_snapshots")
+
+    monkeypatch.setattr(initialization, "engine", engine)
+    initialization.create_tables()
+    tables = set(inspect(engine).get_table_names())
+    assert "stock_snapshots" in tables
+    assert not {"report_jobs", "customer_stats", "backup_jobs"} & tables
+
+    with engine.begin() as connection:
+        command.stamp(alembic_config(connection), "0001")
+        command.upgrade(alembic_config(connection), "head")
+    with engine.connect() as connection:
+        assert MigrationContext.configure(connection).get_current_revision() == "0009"
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+    engine.dispose()
+
+def test_startup_stamps_new_database(monkeypatch, tmp_path):
+    """Test para el arranque sobre una base vacía: crea el esquema y lo marca en head."""
+    engine = create_engine(f"sqlite:///{tmp_path}/startup.db")
+    monkeypatch.setattr(initialization, "engine", engine)
+    initialization.create_tables()
+
+    with engine.connect() as connection:
+        assert MigrationContext.configure(connection).get_current_revision() == "0009"
+    assert HOT_PATH_INDEXES <= _indexed_columns(engine)
+    engine.dispose()
@@ -0,0 +1,93 @@
+# tests/api/test_purchase_orders.py
+import pytest
+from fastapi.testclient import TestClient
+
+from app.models import Product, InventoryMovement
+
+def _get_auth_header(client):
+    """Helper para obtener el header de autenticación."""
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "admin", "password": "admin"}
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_supplier_crud(client):
+    """Test para crear, listar, actualizar y eliminar proveedores (sesión async)."""
+    headers = _get_auth_header(client)
+
+    response = client.post("/api/suppliers/", json={"name": "ACME", "phone": "555-1234"}, headers=headers)
+    assert response.status_code == 201
+    supplier_id = response.json()["id"]
+
+    response = client.post("/api/suppliers/", json={"name": "ACME"}, headers=headers)
+    assert response.status_code == 409
+
+    response = client.get("/api/suppliers?name=acm", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
+
+    response = client.patch(f"/api/suppliers/{supplier_id}/status?status=inactive", headers=headers)
+    assert response.json()["status"] == "inactive"
+
+    assert client.delete(f"/api/suppliers/{supplier_id}", headers=headers).status_code == 204
+    assert client.get(f"/api/suppliers/{supplier_id}", headers=headers).status_code == 404
+
+def test_purchase_order_receive_flow(client, db):
+    """Test para crear, aprobar y recibir una orden de compra."""
+    headers = _get_auth_header(client)
+    supplier_id = client.post("/api/suppliers/", json={"name": "Mayorista"}, headers=headers).json()["id"]
+
+    response = client.post(
+        "/api/purchase-orders/",
+        json={
+            "supplier_id": supplier_id,
+            "items": [
+                {"product_id": 1, "quantity": 10, "unit_price": 450.0},
+                {"product_id": 3, "quantity": 40, "unit_price": 1.2},
+            ]
+        },
+        headers=headers
+    )
+    assert response.status_code == 201
+    order = response.json()
+    assert order["supplier_name"] == "Mayorista"
+    assert [item["product_id"] for item in order["items"]] == [1, 3]
+    assert order["total_amount"] == pytest.approx(4548.0)
+
+    response = client.post(f"/api/purchase-orders/{order['id']}/approve", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "approved"
+
+    response = client.post(
+        f"/api/purchase-orders/{order['id']}/receive",
+        json={"items": [
+            {"product_id": 1, "quantity_received": 10},
+            {"product_id": 3, "quantity_received": 40},
+        ]},
+        headers=headers
+    )
+    assert response.status_code == 200
+    receipt = response.json()
+    assert receipt["status"] == "complete"
+    assert {item["product_name"] for item in receipt["items"]} == {"Smartphone", "Chocolate Bar"}
+
+    # Los cambios confirmados por la sesión async se ven desde la síncrona
+    db.expire_all()
+    stock = {p.sku: p.stock_quantity for p in db.query(Product).all()}
+    assert stock["PHONE-001"] == 35
+    assert stock["CHOC-001"] == 90
+    assert db.query(InventoryMovement).filter(InventoryMovement.movement_type == "purchase").count() == 2
+
+    response = client.get("/api/purchase-orders/", headers=headers)
+    assert response.json()["total"] == 1
+    assert response.json()["items"][0]["status"] == "received"
+    assert len(response.json()["items"][0]["items"]) == 2
+
+def test_purchase_order_approve_requires_admin(client):
+    """Test para impedir que un usuario sin privilegios apruebe órdenes."""
+    response = client.post("/api/auth/login", data={"username": "testuser", "password": "password"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = client.post("/api/purchase-orders/1/approve", headers=headers)
+    assert response.status_code == 403
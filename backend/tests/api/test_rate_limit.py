@@ -0,0 +1,81 @@
+# tests/api/test_rate_limit.py
+import pytest
+from fastapi.testclient import TestClient
+
+from app.middleware.rate_limiter import (
+    RateLimitPolicy, MemoryBackend, SQLiteBackend, SWEEP_EVERY
+)
+
+def test_login_route_policy_returns_429(client):
+    """Test para el límite por ruta del login: responde 429 con Retry-After."""
+    statuses = []
+    for _ in range(11):
+        response = client.post(
+            "/api/auth/login",
+            data={"username": "testuser", "password": "wrongpassword"}
+        )
+        statuses.append(response.status_code)
+
+    assert statuses[:10] == [401] * 10
+    assert statuses[10] == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.json()["detail"].startswith("Too many requests")
+
+    # Los endpoints exentos no se limitan
+    assert client.get("/health").status_code == 200
+
+def test_memory_backend_gcra_and_idle_eviction():
+    """Test para el algoritmo GCRA y el descarte de claves inactivas."""
+    backend = MemoryBackend(max_keys=1000, stripes=4)
+    policy = RateLimitPolicy(limit=2, period=1)
+
+    assert backend.hit("a", policy, now=100.0).allowed
+    assert backend.hit("a", policy, now=100.0).allowed
+    rejected = backend.hit("a", policy, now=100.0)
+    assert not rejected.allowed
+    assert rejected.retry_after == pytest.approx(0.5)
+    # Medio segundo después se repone un token
+    assert backend.hit("a", policy, now=100.5).allowed
+
+    # Las claves cuyo TAT ya pasó se descartan al barrer
+    backend = MemoryBackend(max_keys=10 * SWEEP_EVERY, stripes=1)
+    for i in range(SWEEP_EVERY - 1):
+        backend.hit(f"k{i}", policy, now=200.0)
+    assert len(backend) == SWEEP_EVERY - 1
+    backend.hit("late", policy, now=10_000.0)
+    assert len(backend) == 1
+
+    # Y el tamaño queda acotado aunque ninguna clave haya expirado
+    backend = MemoryBackend(max_keys=100, stripes=4)
+    for i in range(1000):
+        backend.hit(f"k{i}", policy, now=300.0)
+    assert len(backend) <= 100
+
+def test_sqlite_backend_shared_between_instances(tmp_path):
+    """Test para compartir límites entre procesos a través del backend SQLite."""
+    path = str(tmp_path / "rate_limits.db")
+    worker_a, worker_b = SQLiteBackend(path), SQLiteBackend(path)
+    policy = RateLimitPolicy(limit=3, period=60)
+
+    assert worker_a.hit("ip:1", policy, now=0.0).allowed
+    assert worker_b.hit("ip:1", policy, now=0.0).allowed
+    assert worker_a.hit("ip:1", policy, now=0.0).allowed
+    assert not worker_b.hit("ip:1", policy, now=0.0).allowed
+
+def test_sqlite_backend_fails_open_when_locked(tmp_path):
+    """Test para dejar pasar la solicitud si otro worker retiene el lock de escritura."""
+    import sqlite3
+
+    path = str(tmp_path / "rate_limits.db")
+    backend = SQLiteBackend(path, timeout=0.05)
+    policy = RateLimitPolicy(limit=1, period=60)
+    assert backend.hit("ip:1", policy, now=0.0).allowed
+
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        assert backend.hit("ip:1", policy, now=0.0).allowed
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+    assert not backend.hit("ip:1", policy, now=0.0).allowed
@@ -0,0 +1,57 @@
+# tests/api/test_replica.py
+import pytest
+from sqlalchemy import insert
+
+from app import database
+from app.database import Base, ReplicaRouter, create_db_engine
+from app.models import Customer
+
+def _get_auth_header(client):
+    """Helper para obtener el header de autenticación."""
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "admin", "password": "admin"}
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def replica(monkeypatch, tmp_path):
+    """Réplica de prueba: otro archivo SQLite con un cliente que el primario no tiene."""
+    engine = create_db_engine(f"sqlite:///{tmp_path}/replica.db")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Customer.__table__), [{"name": "Solo en réplica", "is_active": True}])
+
+    lag = {"seconds": 0.0}
+    router = ReplicaRouter(engine, max_lag_seconds=5, check_interval=0, lag_probe=lambda conn: lag["seconds"])
+    monkeypatch.setattr(database, "replica_router", router)
+    yield lag
+    engine.dispose()
+
+def _customer_names(client, headers):
+    response = client.get("/api/customers/", headers=headers)
+    assert response.status_code == 200
+    return [customer["name"] for customer in response.json()]
+
+def test_read_only_routes_use_replica_and_fall_back_on_lag(client, replica):
+    """Test para enviar las lecturas a la réplica y volver al primario si se atrasa."""
+    headers = _get_auth_header(client)
+    assert _customer_names(client, headers) == ["Solo en réplica"]
+
+    replica["seconds"] = 60
+    assert _customer_names(client, headers) == []
+    assert database.replica_router.lag_seconds == 60
+
+    replica["seconds"] = 1
+    assert _customer_names(client, headers) == ["Solo en réplica"]
+
+def test_unreachable_replica_falls_back_to_primary(client, monkeypatch, tmp_path):
+    """Test para usar el primario si la réplica no acepta conexiones."""
+    engine = create_db_engine(f"sqlite:///{tmp_path}/no-existe/replica.db")
+    router = ReplicaRouter(engine, max_lag_seconds=5, check_interval=60)
+    monkeypatch.setattr(database, "replica_router", router)
+
+    assert _customer_names(client, _get_auth_header(client)) == []
+    assert not router.healthy
+    assert router.lag_seconds is None
@@ -0,0 +1,128 @@
+# tests/api/test_report_aggregates.py
+from datetime import date, datetime, timedelta
+
+from app.models.report_aggregate import ReportWatermark, SalesDaily
+from app.models.sale import Sale
+from app.services.report_aggregates import refresh_report_aggregates, reset_report_aggregates
+
+def _get_auth_header(client):
+    """Helper para obtener el header de autenticación."""
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "admin", "password": "admin"}
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def _create_sale(client, headers, invoice_number="INV-AGG-1"):
+    response = client.post("/api/sales/", headers=headers, json={
+        "invoice_number": invoice_number,
+        "total_amount": 46.28,
+        "payment_method": "cash",
+        "items": [{"product_id": 3, "quantity": 10, "unit_price": 3.99, "discount": 0, "tax_rate": 0.16,
+                   "total": 46.28}]
+    })
+    assert response.status_code in (200, 201), response.text
+    return response.json()["id"]
+
+def test_materialized_reports_fall_back_to_live_before_first_refresh(client):
+    """Test para calcular en vivo mientras los agregados no existan."""
+    headers = _get_auth_header(client)
+    response = client.get("/api/reports/products/?materialized=true", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["X-Report-Source"] == "live"
+
+def test_refresh_materializes_sales_products_and_customers(client, db):
+    """Test para leer de los agregados los mismos datos que en vivo."""
+    headers = _get_auth_header(client)
+    _create_sale(client, headers)
+    refresh_report_aggregates(db)
+
+    response = client.get("/api/reports/sales/?materialized=true", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["X-Report-Source"] == "materialized"
+    assert "X-Report-Refreshed-At" in response.headers
+    assert [(row["date"], row["total_sales"], row["revenue"]) for row in response.json()] == [
+        (date.today().isoformat(), 1, 46.28)
+    ]
+
+    live = client.get("/api/reports/products/", headers=headers).json()
+    materialized = client.get("/api/reports/products/?materialized=true", headers=headers).json()
+    assert materialized == live
+    assert materialized[0]["product_id"] == 3 and materialized[0]["quantity_sold"] == 10
+
+def test_refresh_drops_cancelled_sales(client, db):
+    """Test para quitar del agregado una venta cancelada después de incorporarla."""
+    headers = _get_auth_header(client)
+    sale_id = _create_sale(client, headers)
+    _create_sale(client, headers, "INV-AGG-2")
+    refresh_report_aggregates(db)
+
+    assert client.delete(f"/api/sales/{sale_id}", headers=headers).status_code == 200
+    results = refresh_report_aggregates(db, ["sales"])
+    assert results == {"sales": 1}
+
+    db.expire_all()
+    day = db.query(SalesDaily).one()
+    assert (day.day, day.sales_count, day.revenue) == (date.today(), 1, 46.28)
+
+def test_refresh_picks_up_edited_sales(client, db):
+    """Test para recalcular el día de una venta editada sin movimientos de inventario."""
+    headers = _get_auth_header(client)
+    sale_id = _create_sale(client, headers)
+    _create_sale(client, headers, "INV-AGG-2")
+    refresh_report_aggregates(db)
+
+    response = client.put(f"/api/sales/{sale_id}", headers=headers, json={"total_amount": 50.0})
+    assert response.status_code == 200
+    refresh_report_aggregates(db, ["sales"])
+    db.expire_all()
+    assert db.query(SalesDaily).one().revenue == 96.28
+
+    response = client.put(f"/api/sales/{sale_id}", headers=headers, json={"payment_status": "cancelled"})
+    assert response.status_code == 200
+    refresh_report_aggregates(db, ["sales"])
+    db.expire_all()
+    day = db.query(SalesDaily).one()
+    assert (day.sales_count, day.revenue) == (1, 46.28)
+
+def test_refresh_recovers_missed_runs(client, db):
+    """Test para incorporar en la siguiente corrida todo lo posterior a la marca de agua."""
+    headers = _get_auth_header(client)
+    refresh_report_aggregates(db)
+    assert db.query(ReportWatermark).filter(ReportWatermark.report_type == "sales").one().last_sale_id == 0
+
+    # Ventas de días anteriores registradas mientras no corría el proceso
+    for days_ago in (3, 2):
+        db.add(Sale(
+            invoice_number=f"INV-OLD-{days_ago}",
+            total_amount=10.0,
+            payment_method="cash",
+            payment_status="paid",
+            created_at=datetime.now() - timedelta(days=days_ago)
+        ))
+    db.commit()
+
+    assert refresh_report_aggregates(db, ["sales"]) == {"sales": 2}
+    # Sin ventas nuevas solo se recalcula el día de la última venta incorporada
+    assert refresh_report_aggregates(db, ["sales"]) == {"sales": 1}
+
+    start = (date.today() - timedelta(days=7)).isoformat()
+    response = client.get(f"/api/reports/sales/?materialized=true&start_date={start}", headers=headers)
+    assert [row["total_sales"] for row in response.json()] == [1, 1]
+
+def test_materialized_inventory_value_matches_live(client, db):
+    """Test para recalcular el valor de inventario de los productos con movimientos."""
+    headers = _get_auth_header(client)
+    refresh_report_aggregates(db, ["inventory_value"])
+    _create_sale(client, headers)
+    refresh_report_aggregates(db, ["inventory_value"])
+
+    live = client.get("/api/reports/inventory/value/", headers=headers).json()
+    response = client.get("/api/reports/inventory/value/?materialized=true", headers=headers)
+    assert response.headers["X-Report-Source"] == "materialized"
+    assert response.json() == live
+
+    reset_report_aggregates(db, ["inventory_value"])
+    response = client.get("/api/reports/inventory/value/?materialized=true", headers=headers)
+    assert response.headers["X-Report-Source"] == "live"
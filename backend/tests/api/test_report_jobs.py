@@ -0,0 +1,306 @@
+# tests/api/test_report_jobs.py
+import csv
+import gzip
+import io
+import json
+import time
+import zipfile
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.models.inventory import InventoryMovement
+from app.services import report_jobs, reports
+
+def _get_auth_header(client, username="admin", password="admin"):
+    """Helper para obtener el header de autenticación."""
+    response = client.post(
+        "/api/auth/login",
+        data={"username": username, "password": password}
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def job_pool(db, monkeypatch, tmp_path):
+    """Ejecuta los trabajos en un hilo, contra la base de datos de pruebas."""
+    monkeypatch.setattr(settings, "REPORT_JOB_WORKERS", 0)
+    monkeypatch.setattr(settings, "REPORT_BUNDLE_WORKERS", 0)
+    monkeypatch.setattr(settings, "REPORTS_FOLDER", str(tmp_path))
+    monkeypatch.setattr(report_jobs, "SessionLocal", sessionmaker(bind=db.get_bind()))
+    report_jobs.shutdown_executor()
+    yield tmp_path
+    report_jobs.shutdown_executor()
+
+def _wait_for_job(client, headers, status_url):
+    for _ in range(100):
+        job = client.get(status_url, headers=headers).json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job did not finish: {job}")
+
+def test_export_runs_in_background_and_downloads_with_range(client, job_pool):
+    """Test para exportar un reporte en segundo plano y descargarlo por partes."""
+    headers = _get_auth_header(client)
+    response = client.get("/api/reports/inventory/low-stock/?export_format=csv&threshold_percentage=100",
+                          headers=headers)
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+
+    job = _wait_for_job(client, headers, response.json()["status_url"])
+    assert job["status"] == "completed", job
+    assert job["progress"] == 100
+    assert job["file_size"] > 0
+
+    full = client.get(job["download_url"], headers=headers)
+    assert full.status_code == 200
+    assert int(full.headers["content-length"]) == job["file_size"]
+
+    partial = client.get(job["download_url"], headers={**headers, "Range": "bytes=0-9"})
+    assert partial.status_code == 206
+    assert partial.headers["content-length"] == "10"
+    assert partial.headers["content-range"] == f"bytes 0-9/{job['file_size']}"
+    assert partial.content == full.content[:10]
+
+def test_job_creation_with_explicit_params(client, job_pool):
+    """Test para crear un trabajo con POST y guardar el rango de fechas resuelto."""
+    headers = _get_auth_header(client)
+    response = client.post("/api/reports/jobs", headers=headers, json={
+        "report_type": "customers",
+        "export_format": "json",
+        "params": {"start_date": "2026-01-01", "end_date": "2026-01-31", "limit": 5, "unknown": 1}
+    })
+    assert response.status_code == 202
+    job = _wait_for_job(client, headers, response.json()["status_url"])
+    assert job["status"] == "completed", job
+    assert job["params"] == {"start_date": "2026-01-01", "end_date": "2026-01-31", "limit": 5}
+    assert job["download_url"].endswith(".json")
+
+def test_jobs_and_files_of_other_users_are_hidden(client, job_pool):
+    """Test para no revelar trabajos ni archivos de otros usuarios."""
+    admin = _get_auth_header(client)
+    response = client.get("/api/reports/inventory/value/?export_format=csv", headers=admin)
+    job = _wait_for_job(client, admin, response.json()["status_url"])
+
+    user = _get_auth_header(client, "testuser", "password")
+    assert client.get(response.json()["status_url"], headers=user).status_code == 404
+    assert client.get(job["download_url"], headers=user).status_code == 404
+
+def test_download_rejects_path_traversal(client, job_pool):
+    """Test para no servir archivos fuera de la carpeta de reportes."""
+    headers = _get_auth_header(client)
+    (job_pool / ".env").write_text("SECRET_KEY=x")
+    assert client.get("/api/reports/download/.env", headers=headers).status_code == 404
+    assert client.get("/api/reports/download/..%2F..%2Fetc%2Fpasswd", headers=headers).status_code == 404
+
+def test_csv_writer_streams_rows(job_pool):
+    """Test para escribir un CSV (comprimido) desde un generador de filas."""
+    rows = ({"id": i, "name": f"Fila {i}", "notes": None} for i in range(1000))
+    filepath, count = reports.write_report_csv(rows, "stream", compress=True)
+    assert count == 1000
+    assert filepath.endswith("stream.csv.gz")
+    with gzip.open(filepath, "rt", encoding="utf-8", newline="") as f:
+        lines = list(csv.reader(f))
+    assert lines[0] == ["id", "name", "notes"]
+    assert lines[1] == ["0", "Fila 0", ""]
+    assert len(lines) == 1001
+
+    filepath, count = reports.write_report_csv(iter([]), "empty")
+    assert count == 0
+    assert open(filepath, encoding="utf-8").read() == "No data available\n"
+
+def test_movements_export_as_compressed_json_lines(client, db, job_pool):
+    """Test para exportar movimientos de inventario en JSON Lines con gzip."""
+    db.add_all([
+        InventoryMovement(product_id=1, movement_type="purchase", quantity=5, notes="Compra")
+        for _ in range(3)
+    ])
+    db.commit()
+
+    headers = _get_auth_header(client)
+    response = client.get(
+        "/api/reports/inventory/movements/?export_format=jsonl&compress=true&end_date=2100-01-01",
+        headers=headers
+    )
+    assert response.status_code == 202
+    job = _wait_for_job(client, headers, response.json()["status_url"])
+    assert job["status"] == "completed", job
+    assert job["export_format"] == "jsonl.gz"
+    assert job["row_count"] == 3
+
+    content = gzip.decompress(client.get(job["download_url"], headers=headers).content)
+    lines = [json.loads(line) for line in io.BytesIO(content)]
+    assert len(lines) == 3
+    assert lines[0]["product_id"] == 1 and lines[0]["quantity"] == 5
+
+def test_columnar_writer_types_dates_and_amounts(job_pool):
+    """Test para escribir Parquet y Arrow con fechas e importes tipados."""
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    rows = [
+        {"date": "2026-01-15 10:30:00", "revenue": 10.1 * (i + 1), "notes": None if i < 2 else "Nota"}
+        for i in range(3)
+    ]
+    filepath, count = reports.write_report_columnar(iter(rows), "typed", "parquet")
+    table = pq.read_table(filepath)
+    assert count == 3
+    assert table.schema.field("date").type == pa.timestamp("ms")
+    assert table.schema.field("revenue").type == pa.decimal128(18, 2)
+    assert table.schema.field("notes").type == pa.string()
+    assert str(table.column("revenue")[2].as_py()) == "30.30"
+
+    filepath, count = reports.write_report_columnar(iter(rows), "typed", "arrow")
+    with pa.memory_map(filepath) as source:
+        assert pa.ipc.open_file(source).read_all().num_rows == 3
+
+def test_columnar_writer_money_overflow_and_null_amounts(job_pool, monkeypatch):
+    """Test para importes nulos en el primer lote y para importes que no caben."""
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    monkeypatch.setattr(reports, "COLUMNAR_BATCH_SIZE", 2)
+    rows = [{"revenue": 1.5, "taxes": None}, {"revenue": 2.0, "taxes": None}, {"revenue": 3.0, "taxes": 0.48}]
+    filepath, _ = reports.write_report_columnar(iter(rows), "amounts", "parquet")
+    table = pq.read_table(filepath)
+    assert table.schema.field("taxes").type == pa.decimal128(18, 2)
+    assert [str(value) if value is not None else None for value in table.column("taxes").to_pylist()] == [
+        None, None, "0.48"
+    ]
+
+    # Un importe fuera de rango falla en lugar de escribirse con otro valor
+    with pytest.raises(pa.ArrowInvalid):
+        reports.write_report_columnar(iter([{"total_revenue": 1e17}]), "overflow", "parquet")
+
+def test_columnar_writer_nulls_in_first_batch(job_pool, monkeypatch):
+    """Test para columnas que solo traen nulos en el primer lote."""
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    monkeypatch.setattr(reports, "COLUMNAR_BATCH_SIZE", 2)
+    rows = [
+        {"sale_id": i + 1, "customer_id": customer_id, "notes": None if i < 2 else 42}
+        for i, customer_id in enumerate((None, None, 7))
+    ]
+
+    # Tipo declarado: el cliente sigue siendo entero
+    filepath, count = reports.write_report_columnar(
+        iter(rows), "nulls", "parquet", reports.SALES_LINES_ARROW_TYPES
+    )
+    table = pq.read_table(filepath)
+    assert count == 3
+    assert table.schema.field("customer_id").type == pa.int64()
+    assert table.column("customer_id").to_pylist() == [None, None, 7]
+
+    # Sin tipo declarado: la columna inferida como texto guarda el valor como texto
+    assert table.schema.field("notes").type == pa.string()
+    assert table.column("notes").to_pylist() == [None, None, "42"]
+
+def test_sales_lines_export_as_parquet(client, job_pool):
+    """Test para exportar las líneas de venta a Parquet."""
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    headers = _get_auth_header(client)
+    sale = client.post("/api/sales/", headers=headers, json={
+        "invoice_number": "INV-PARQUET-1",
+        "customer_id": None,
+        "total_amount": 46.28,
+        "payment_method": "cash",
+        "items": [{"product_id": 3, "quantity": 10, "unit_price": 3.99, "discount": 0, "tax_rate": 0.16,
+                   "total": 46.28}]
+    })
+    assert sale.status_code in (200, 201), sale.text
+
+    response = client.get("/api/reports/sales/lines/?export_format=parquet", headers=headers)
+    assert response.status_code == 202
+    job = _wait_for_job(client, headers, response.json()["status_url"])
+    assert job["status"] == "completed", job
+    assert job["download_url"].endswith(".parquet")
+
+    table = pq.read_table(job_pool / job["download_url"].rsplit("/", 1)[1])
+    assert table.num_rows == 1
+    assert table.column("sku")[0].as_py() == "CHOC-001"
+    assert str(table.schema.field("sold_at").type) == "timestamp[ms]"
+
+def test_stale_jobs_expire_only_while_running_without_heartbeat(db, job_pool, monkeypatch):
+    """Test para no dar por perdidos los trabajos en cola ni los que siguen renovando su latido."""
+    from datetime import datetime
+    from app.models.report_job import ReportJob
+
+    old = datetime(2000, 1, 1)
+    queued = ReportJob(id="q" * 32, report_type="sales", params={}, export_format="csv", status="queued")
+    running = ReportJob(id="r" * 32, report_type="sales_lines", params={}, export_format="csv",
+                        status="running", progress=70)
+    db.add_all([queued, running])
+    db.commit()
+    db.query(ReportJob).update({"updated_at": old})
+    db.commit()
+
+    # En cola detrás de un pool ocupado: sigue en cola
+    assert report_jobs.expire_stale_job(db, queued).status == "queued"
+
+    # Un trabajo largo renueva updated_at mientras corre
+    monkeypatch.setattr(settings, "REPORT_JOB_STALE_SECONDS", 4)
+    with report_jobs._heartbeat(running.id):
+        time.sleep(1.5)
+    db.expire_all()
+    assert report_jobs.expire_stale_job(db, running).status == "running"
+
+    # Sin latido (el proceso murió) se marca como fallido
+    db.query(ReportJob).filter(ReportJob.id == running.id).update({"updated_at": old})
+    db.commit()
+    assert report_jobs.expire_stale_job(db, running).status == "failed"
+
+def test_bundle_merges_reports_into_one_archive(client, job_pool):
+    """Test para generar el paquete del cierre de mes en un ZIP con tiempos por reporte."""
+    headers = _get_auth_header(client)
+    response = client.post("/api/reports/bundle", headers=headers, json={})
+    assert response.status_code == 202
+    assert response.json()["report_type"] == "bundle"
+
+    job = _wait_for_job(client, headers, response.json()["status_url"])
+    assert job["status"] == "completed", job
+    assert [result["report_type"] for result in job["results"]] == list(report_jobs.MONTH_END_BUNDLE)
+    assert all(result["seconds"] >= 0 and "row_count" in result for result in job["results"])
+
+    download = client.get(job["download_url"], headers=headers)
+    assert download.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(download.content)) as archive:
+        assert sorted(archive.namelist()) == sorted(
+            [f"{report_type}.csv" for report_type in report_jobs.MONTH_END_BUNDLE] + ["manifest.json"]
+        )
+        manifest = json.loads(archive.read("manifest.json"))
+        low_stock = list(csv.DictReader(io.StringIO(archive.read("low_stock.csv").decode())))
+    assert manifest["wall_seconds"] >= 0
+    assert [entry["file"] for entry in manifest["reports"]] == [f"{t}.csv" for t in report_jobs.MONTH_END_BUNDLE]
+    assert manifest["reports"][0]["params"]["start_date"]
+    assert low_stock == [] or "product_id" in low_stock[0]
+
+    # Las partes ya están en el ZIP: en la carpeta solo queda el paquete
+    assert [path.name for path in job_pool.iterdir()] == [job["download_url"].rsplit("/", 1)[1]]
+
+def test_bundle_reports_failed_parts(client, job_pool):
+    """Test para marcar el paquete como fallido con el error de cada reporte."""
+    headers = _get_auth_header(client)
+    response = client.post("/api/reports/bundle", headers=headers, json={
+        "reports": [
+            {"report_type": "low_stock"},
+            # SQLite no tiene date_trunc: la agrupación semanal falla
+            {"report_type": "sales", "params": {"group_by": "week"}},
+        ],
+        "export_format": "jsonl",
+    })
+    assert response.status_code == 202
+
+    job = _wait_for_job(client, headers, response.json()["status_url"])
+    assert job["status"] == "failed"
+    assert "sales" in job["error"]
+    low_stock, sales = job["results"]
+    assert "error" not in low_stock and "error" in sales
+    assert list(job_pool.iterdir()) == []
+
+    invalid = client.post("/api/reports/bundle", headers=headers, json={"reports": [{"report_type": "payroll"}]})
+    assert invalid.status_code == 422
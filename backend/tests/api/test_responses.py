@@ -0,0 +1,42 @@
+# tests/api/test_responses.py
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+from fastapi.exceptions import ResponseValidationError
+
+from app.schemas.customer import Customer as CustomerSchema
+from app.utils.responses import json_response
+
+def _get_auth_header(client):
+    """Helper para obtener el header de autenticación."""
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "admin", "password": "admin"}
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_json_response_serializes_orm_like_objects():
+    """Test para serializar objetos con atributos directamente a JSON."""
+    row = SimpleNamespace(
+        id=1, name="Ana", email="ana@example.com", phone=None, address=None, tax_id=None,
+        is_active=True, created_at="2026-01-15T10:30:00", updated_at=None
+    )
+    response = json_response(List[CustomerSchema], [row])
+    assert response.media_type == "application/json"
+    assert response.body.startswith(b'[{"name":"Ana","email":"ana@example.com"')
+
+def test_json_response_rejects_invalid_content():
+    """Test para levantar el mismo error que FastAPI cuando la respuesta no es válida."""
+    with pytest.raises(ResponseValidationError) as exc_info:
+        json_response(List[CustomerSchema], [SimpleNamespace(id=1)])
+    assert exc_info.value.errors()[0]["loc"][:2] == ("response", 0)
+
+def test_list_endpoint_uses_fast_serialization(client):
+    """Test para la lista de órdenes de compra serializada con json_response."""
+    headers = _get_auth_header(client)
+    response = client.get("/api/purchase-orders/", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {"items": [], "total": 0, "page": 1, "limit": 10, "pages": 1}
@@ -0,0 +1,48 @@
+# tests/api/test_schemas.py
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.category import CategoryCreate
+from app.schemas.sale import SaleCreate, SaleItem
+
+def _sale(**overrides):
+    sale = {
+        "invoice_number": "INV-1",
+        "total_amount": 23.2,
+        "payment_method": "cash",
+        "items": [{"product_id": 1, "quantity": 2, "unit_price": 10.0, "tax_rate": 0.16, "total": 23.2}],
+    }
+    sale.update(overrides)
+    return sale
+
+def test_string_constraints_are_enforced():
+    """Test para las longitudes de texto (antes constr dentro de Annotated no tenía efecto)."""
+    with pytest.raises(ValidationError) as exc_info:
+        SaleCreate.model_validate(_sale(invoice_number="X" * 51))
+    assert exc_info.value.errors()[0]["type"] == "string_too_long"
+
+    with pytest.raises(ValidationError):
+        CategoryCreate(name="")
+
+def test_sale_item_cross_field_rules():
+    """Test para el validador de descuento y total de cada línea."""
+    assert SaleCreate.model_validate(_sale()).items[0].total == 23.2
+
+    item = {"product_id": 1, "quantity": 2, "unit_price": 10.0, "tax_rate": 0.16, "total": 99.0}
+    with pytest.raises(ValidationError, match="Total amount mismatch"):
+        SaleCreate.model_validate(_sale(items=[item]))
+
+    item = {"product_id": 1, "quantity": 1, "unit_price": 10.0, "discount": 15.0, "total": 0.0}
+    with pytest.raises(ValidationError, match="cannot be greater"):
+        SaleCreate.model_validate(_sale(items=[item]))
+
+    with pytest.raises(ValidationError):
+        SaleCreate.model_validate(_sale(items=[]))
+
+def test_stored_items_are_not_revalidated():
+    """Test para leer items guardados sin repetir las reglas de creación."""
+    row = SimpleNamespace(id=1, sale_id=1, product_id=1, quantity=2, unit_price=10.0, discount=0.0,
+                          tax_rate=0.16, total=20.0)
+    assert SaleItem.model_validate(row).total == 20.0
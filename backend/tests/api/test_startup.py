@@ -0,0 +1,15 @@
+# tests/api/test_startup.py
+import os
+import subprocess
+import sys
+
+def test_import_has_no_side_effects(tmp_path):
+    """Test para comprobar que importar la aplicación no crea tablas ni carga pandas."""
+    db_path = tmp_path / "startup.db"
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", SECRET_KEY="x", PYTHONWARNINGS="ignore")
+    script = "import sys, app.main; print(sorted(m for m in ('pandas', 'apscheduler') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+    # SQLite crea el archivo en la primera conexión: si no existe, nadie se conectó
+    assert not db_path.exists()
@@ -1,24 +1,34 @@
 # tests/conftest.py
 import pytest
 import os
+import tempfile
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 from fastapi.testclient import TestClient
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db
 from app.models import User, Category, Product
 from app.utils.security import get_password_hash
+from app.utils.principal_cache import principal_cache
+from app.middleware.rate_limiter import rate_limiter
 from main import app
 
-# Crear base de datos en memoria para las pruebas
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Base de datos SQLite en un archivo temporal: los endpoints síncronos y los
+# async (aiosqlite) deben ver los mismos datos, cosa que una base en memoria
+# por conexión no permite
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
+    f"sqlite:///{TEST_DB_PATH}",
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# NullPool: TestClient abre un event loop por cliente y las conexiones
+# aiosqlite no deben sobrevivir a su loop
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_PATH}", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 @pytest.fixture(scope="session")
 def db_engine():
     # Crear las tablas en la base de datos
@@ -30,19 +40,19 @@ def db_engine():
 @pytest.fixture(scope="function")
 def db(db_engine):
     # Cada prueba recibe una sesión de base de datos limpia
-    connection = db_engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
+    session = TestingSessionLocal()
     
     # Crear datos básicos para las pruebas
     _create_test_data(session)
     
     yield session
     
-    # Rollback de la transacción y cierre de la conexión
+    # Los endpoints async confirman en su propia conexión, así que en lugar de
+    # un rollback se vacían las tablas (los ids vuelven a empezar en 1)
     session.close()
-    transaction.rollback()
-    connection.close()
+    with db_engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
 
 @pytest.fixture(scope="function")
 def client(db):
@@ -53,8 +63,16 @@ def client(db):
         finally:
             pass
     
-    # Sobreescribir la dependencia get_db
+    async def _get_test_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+    
+    # Sobreescribir las dependencias get_db y get_async_db
     app.dependency_overrides[get_db] = _get_test_db
+    app.dependency_overrides[get_async_db] = _get_test_async_db
+    # Los ids se repiten entre pruebas: la caché de usuario no debe sobrevivirlas
+    principal_cache.clear()
+    rate_limiter.reset()
     
     with TestClient(app) as c:
         yield c